@@ -968,6 +968,7 @@ const InteractiveDealVerifier = () => {
                     <div className="flex-1 overflow-hidden">
                         <LogicCircuit
                             conflictAnalysis={analyzedDoc?.conflictAnalysis}
+                            documentId={analyzedDoc?.id}
                             onNodeClick={(sectionRef) => {
                                 // Scroll to clause in document
                                 const element = document.getElementById(`clause_${sectionRef.replace('.', '_')}`);
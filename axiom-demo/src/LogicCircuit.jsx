@@ -62,11 +62,37 @@ const nodeTypes = {
     clauseNode: ClauseNode
 };
 
-const LogicCircuit = ({ conflictAnalysis, onNodeClick }) => {
+const toFlowNode = (node, position) => ({
+    id: node.id,
+    type: 'clauseNode',
+    position,
+    data: node
+});
+
+const toFlowEdge = (edge) => ({
+    id: `edge-${edge.from}-${edge.to}-${edge.type || ''}`,
+    source: edge.from,
+    target: edge.to,
+    label: edge.label,
+    type: edge.is_conflict_edge ? 'step' : 'smoothstep',
+    animated: edge.is_conflict_edge,
+    style: {
+        stroke: edge.is_conflict_edge ? '#ef4444' : '#94a3b8',
+        strokeWidth: edge.is_conflict_edge ? 3 : 2
+    },
+    markerEnd: {
+        type: 'arrowclosed',
+        color: edge.is_conflict_edge ? '#ef4444' : '#94a3b8'
+    }
+});
+
+const LogicCircuit = ({ conflictAnalysis, documentId, onNodeClick }) => {
     const [isExpanded, setIsExpanded] = useState(false);
     const [nodes, setNodes, onNodesChange] = useNodesState([]);
     const [edges, setEdges, onEdgesChange] = useEdgesState([]);
     const [isLoading, setIsLoading] = useState(false);
+    // Nodes whose whole neighbourhood is already shown
+    const [exhausted, setExhausted] = useState({});
 
     // Generate graph from conflict analysis
     const generateGraph = useCallback(async () => {
@@ -75,12 +101,14 @@ const LogicCircuit = ({ conflictAnalysis, onNodeClick }) => {
         setIsLoading(true);
 
         try {
-            // Call backend to generate logic graph
+            // Call backend to generate logic graph (built from the stored
+            // document when document_id is known, LLM-generated otherwise)
             const response = await fetch(`/api/logic-graph`, {
                 method: 'POST',
                 headers: { 'Content-Type': 'application/json' },
                 body: JSON.stringify({
                     conflict_analysis: conflictAnalysis,
+                    document_id: documentId,
                     expand: isExpanded
                 })
             });
@@ -88,38 +116,18 @@ const LogicCircuit = ({ conflictAnalysis, onNodeClick }) => {
             const data = await response.json();
 
             // Convert backend graph to React Flow format
-            const flowNodes = data.graph.nodes.map((node, idx) => ({
-                id: node.id,
-                type: 'clauseNode',
-                position: { x: 250 * (idx % 3), y: 150 * Math.floor(idx / 3) },
-                data: node
-            }));
-
-            const flowEdges = data.graph.edges.map((edge, idx) => ({
-                id: `edge-${idx}`,
-                source: edge.from,
-                target: edge.to,
-                label: edge.label,
-                type: edge.is_conflict_edge ? 'step' : 'smoothstep',
-                animated: edge.is_conflict_edge,
-                style: {
-                    stroke: edge.is_conflict_edge ? '#ef4444' : '#94a3b8',
-                    strokeWidth: edge.is_conflict_edge ? 3 : 2
-                },
-                markerEnd: {
-                    type: 'arrowclosed',
-                    color: edge.is_conflict_edge ? '#ef4444' : '#94a3b8'
-                }
-            }));
-
-            setNodes(flowNodes);
-            setEdges(flowEdges);
+            setNodes(data.graph.nodes.map((node, idx) => toFlowNode(node, {
+                x: 250 * (idx % 3),
+                y: 150 * Math.floor(idx / 3)
+            })));
+            setEdges(data.graph.edges.map(toFlowEdge));
+            setExhausted({});
         } catch (error) {
             console.error('Failed to generate logic graph:', error);
         } finally {
             setIsLoading(false);
         }
-    }, [conflictAnalysis, isExpanded, setNodes, setEdges]);
+    }, [conflictAnalysis, documentId, isExpanded, setNodes, setEdges]);
 
     // Load graph on mount or when expand changes
     React.useEffect(() => {
@@ -128,11 +136,50 @@ const LogicCircuit = ({ conflictAnalysis, onNodeClick }) => {
         }
     }, [conflictAnalysis, isExpanded, generateGraph]);
 
+    // Lazy expansion: add the clicked clause's neighbours the graph does not
+    // show yet, one page per click
+    const expandNode = useCallback(async (node) => {
+        if (!documentId || exhausted[node.id]) return;
+
+        try {
+            const response = await fetch(`/api/logic-graph/expand`, {
+                method: 'POST',
+                headers: { 'Content-Type': 'application/json' },
+                body: JSON.stringify({
+                    document_id: documentId,
+                    node_id: node.id,
+                    hops: 1,
+                    known_node_ids: nodes.map((n) => n.id)
+                })
+            });
+            if (!response.ok) return;
+
+            const data = await response.json();
+            setNodes((current) => [
+                ...current,
+                ...data.nodes.map((added, idx) => toFlowNode(added, {
+                    x: node.position.x + 250 * ((idx % 3) - 1),
+                    y: node.position.y + 150 * (1 + Math.floor(idx / 3))
+                }))
+            ]);
+            setEdges((current) => {
+                const seen = new Set(current.map((e) => e.id));
+                return [...current, ...data.edges.map(toFlowEdge).filter((e) => !seen.has(e.id))];
+            });
+            if (data.next_offset === null) {
+                setExhausted((current) => ({ ...current, [node.id]: true }));
+            }
+        } catch (error) {
+            console.error('Failed to expand logic graph:', error);
+        }
+    }, [documentId, nodes, exhausted, setNodes, setEdges]);
+
     const handleNodeClick = useCallback((event, node) => {
+        expandNode(node);
         if (onNodeClick && node.data.section_ref) {
             onNodeClick(node.data.section_ref);
         }
-    }, [onNodeClick]);
+    }, [expandNode, onNodeClick]);
 
     if (!conflictAnalysis?.has_conflict) {
         return (
@@ -31,3 +31,22 @@ def get_db():
         yield db
     finally:
         db.close()
+
+# SQL migrations for tables that predate their current columns (applied in name order)
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "migrations")
+
+def apply_migrations(bind=None):
+    """
+    Run migrations/*.sql against PostgreSQL after create_all(), which never
+    alters existing tables. Every script is idempotent and runs on each start.
+    """
+    bind = bind or engine
+    if bind.dialect.name != "postgresql":
+        return
+    for name in sorted(os.listdir(MIGRATIONS_DIR)):
+        if not name.endswith(".sql"):
+            continue
+        with open(os.path.join(MIGRATIONS_DIR, name)) as f:
+            sql = f.read()
+        with bind.begin() as connection:
+            connection.exec_driver_sql(sql)
@@ -2,28 +2,30 @@
 Axiom LCE FastAPI Backend
 European AI-powered legal document analysis with data sovereignty
 """
-from fastapi import FastAPI, UploadFile, File, Form, HTTPException, Depends, Body
+from fastapi import FastAPI, UploadFile, File, Form, HTTPException, Depends, Body, Request, Header
 from fastapi.responses import StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from typing import List, Dict, Optional, Any
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
+from sqlalchemy.orm.exc import StaleDataError
 from sqlalchemy import func
 from dotenv import load_dotenv
 import os
 import time
+import asyncio
 import json
 import uuid
 import statistics
 from io import BytesIO
 from datetime import datetime
 
-from database import get_db, engine
+from database import get_db, engine, SessionLocal, apply_migrations
 
 from models import (
     Base, Document, Analysis, ClauseSuggestion, 
     DealTemplate, DealMetrics, BenchmarkInsight, MarketBenchmark,
-    ScenarioTemplate, AssertionVerification
+    ScenarioTemplate, AssertionVerification, ScenarioTest, DocumentLSHBand
 )
 from services.document_service import DocumentService
 from services.analysis_service import AnalysisService
@@ -31,6 +33,20 @@ from services.benchmark_service import BenchmarkService
 from services.scenario_service import ScenarioService
 from services.structure_service import DocumentStructureService
 from services.verification_service import VerificationService
+from services.term_index import TermIndex
+from services.section_index import SectionIndex
+from services.logic_graph import LogicGraphBuilder, LogicGraphCache
+from services.single_flight import SingleFlight
+from services.similarity_index import SimilarityIndex, NEAR_DUPLICATE_THRESHOLD
+from services.analysis_reuse import AnalysisReuse
+from services.clause_memo import ClauseMemoService
+from services.edit_session import EditSessionManager, EditSession, EditConflict
+from services.version_store import VersionStore
+from services.document_compare import DocumentCompare
+from services.pdf_extractor import PdfExtractor
+from services.upload_spool import UploadSpool, UploadLimitMiddleware
+from services.chunked_upload import ChunkedUploadStore, CommitInProgress
+from services.id_normalizer import IDNormalizer
 from schemas import (
     DocumentUploadResponse,
     AnalysisResponse,
@@ -46,6 +62,7 @@ load_dotenv(dotenv_path=env_path)
 # Create database tables (optional - only if DATABASE_URL is configured)
 try:
     Base.metadata.create_all(bind=engine)
+    apply_migrations(engine)
 except Exception as e:
     print(f"Warning: Database not available - {e}")
     print("Running in database-free mode. Some features may be limited.")
@@ -57,6 +74,9 @@ app = FastAPI(
     description="European AI-powered legal contract analysis with data sovereignty"
 )
 
+# Request bodies over MAX_UPLOAD_MB are refused before they are parsed
+app.add_middleware(UploadLimitMiddleware)
+
 # CORS Configuration
 app.add_middleware(
     CORSMiddleware,
@@ -72,6 +92,26 @@ analysis_service = AnalysisService()
 benchmark_service = BenchmarkService()
 scenario_service = ScenarioService()
 verification_service = VerificationService()
+structure_service = DocumentStructureService()
+clause_memo_service = ClauseMemoService(analysis_service.mistral)
+analysis_flight = SingleFlight()
+logic_graph_cache = LogicGraphCache()
+clause_graph_cache = LogicGraphCache(max_size=32)
+edit_sessions = EditSessionManager()
+chunked_uploads = ChunkedUploadStore()
+
+# Near-duplicate candidates scored per upload (best LSH bucket overlap first)
+MAX_NEAR_DUPLICATE_CANDIDATES = 20
+
+# Compare-and-swap attempts per edit before giving up with 409
+MAX_EDIT_ATTEMPTS = 3
+
+# Idle edit sessions are checked (and flushed) this often
+EDIT_SESSION_SWEEP_SECONDS = 15
+
+# Logic graph expansion bounds (per request)
+MAX_EXPAND_HOPS = 3
+MAX_EXPAND_PAGE = 200
 
 # ============================================================================
 # ROOT & HEALTH ENDPOINTS
@@ -141,8 +181,8 @@ async def analyze_logic_headless(
         # Mock Logic for Demo
         # In real implementation, we would use document_service.extract_text and analysis_service
         
-        content = await file.read()
-        text, tree = document_service.extract_text(file.filename, content)
+        upload = await UploadSpool.receive(file)
+        text, tree = await asyncio.to_thread(document_service.extract_text, upload.filename, upload.file)
         
         # Parse playbook
         user_prefs = {}
@@ -179,6 +219,8 @@ async def analyze_logic_headless(
         
         return HeadlessAnalysisResponse(contract_id=str(uuid.uuid4()), warnings=warnings)
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -196,54 +238,213 @@ async def upload_document(
     Stores document in database and returns document_id for analysis
     """
     try:
-        # Read file content
-        content = await file.read()
+        # Hash and measure the spooled upload in chunks (413 past MAX_UPLOAD_MB)
+        upload = await UploadSpool.receive(file)
         
-        if len(content) == 0:
+        if upload.size == 0:
             raise HTTPException(400, "File is empty")
         
-        # --- ID NORMALIZATION (The "Loose Akoma" Enforcer) ---
-        # Ensure every paragraph has a stable ID *before* we parse or save.
-        from services.id_normalizer import IDNormalizer
-        if file.filename.lower().endswith('.docx'):
-            content = IDNormalizer.normalize_docx(content)
-        
-        # Extract text and structure (using the NORMALIZED content)
-        text, tree = document_service.extract_text(file.filename, content)
-        
-        # Validate text length
-        if not text or len(text.strip()) < 100:
-            raise HTTPException(
-                status_code=400,
-                detail="Document appears to be empty or too short (minimum 100 characters)"
-            )
-        
-        # Format file size
-        file_size = document_service.format_file_size(len(content))
-        
-        # Save to database (Save the NORMALIZED content as the source of truth)
-        doc = Document(
-            filename=file.filename,
-            original_text=text,
-            tree=tree, # Save parsed structure
-            file_content=content, # Save NORMALIZED binary
-            file_type=file.filename.split('.')[-1].lower(),
-            file_size=file_size
+        return await store_upload(upload, db)
+    
+    except ValueError as e:
+        # Document parsing error
+        raise HTTPException(status_code=400, detail=str(e))
+    except HTTPException:
+        raise
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(
+            status_code=500,
+            detail=f"Upload failed: {str(e)}"
         )
-        db.add(doc)
-        db.commit()
-        db.refresh(doc)
-        
-        return DocumentUploadResponse(
-            document_id=str(doc.id),
-            filename=doc.filename,
-            length=len(text),
-            preview=text[:500] + "..." if len(text) > 500 else text,
-            uploaded_at=doc.uploaded_at.isoformat()
+
+async def store_upload(upload: UploadSpool, db: Session) -> DocumentUploadResponse:
+    """Create the Document for a received upload (or return the stored one with the same bytes)"""
+    # Exact re-upload (add-in / email forwarding resends the same draft): reuse the stored document
+    content_hash = upload.sha256
+    existing = db.query(Document).filter(Document.content_hash == content_hash).order_by(
+        Document.uploaded_at.desc()
+    ).first()
+    if existing:
+        return upload_response(existing, db, deduplicated=True)
+    
+    # Normalize IDs, extract text and structure off the event loop: large
+    # PDFs fan out to the extraction process pool
+    content, text, tree = await asyncio.to_thread(ingest_upload, upload)
+    
+    # Validate text length
+    if not text or len(text.strip()) < 100:
+        raise HTTPException(
+            status_code=400,
+            detail="Document appears to be empty or too short (minimum 100 characters)"
         )
     
+    # Format file size
+    file_size = document_service.format_file_size(len(content))
+    
+    # Build defined-term and section indexes once at ingestion
+    # (term -> definition + usages, section number -> node + cross-references)
+    term_index = TermIndex.build(tree, text)
+    section_index = SectionIndex.build(tree, text)
+    
+    # Nearest previously analyzed draft (MinHash/LSH) for analysis reuse
+    minhash = SimilarityIndex.signature(text)
+    band_keys = SimilarityIndex.band_keys(minhash)
+    near_duplicate_id, near_duplicate_similarity = find_near_duplicate(minhash, band_keys, db)
+    
+    # Save to database (Save the NORMALIZED content as the source of truth)
+    doc = Document(
+        filename=upload.filename,
+        original_text=text,
+        tree=tree, # Save parsed structure
+        term_index=term_index,
+        section_index=section_index,
+        file_content=content, # Save NORMALIZED binary
+        content_hash=content_hash, # Hash of the bytes as uploaded (before normalization)
+        text_hash=document_service.fingerprint(text),
+        minhash=minhash,
+        near_duplicate_of=near_duplicate_id,
+        near_duplicate_similarity=near_duplicate_similarity,
+        file_type=upload.filename.split('.')[-1].lower(),
+        file_size=file_size
+    )
+    db.add(doc)
+    db.flush()
+    db.add_all([DocumentLSHBand(document_id=doc.id, band_key=key) for key in band_keys])
+    db.commit()
+    db.refresh(doc)
+    
+    return upload_response(doc, db)
+
+def ingest_upload(upload: UploadSpool):
+    """(content to store, text, tree) of a received upload"""
+    if upload.filename.lower().endswith('.docx'):
+        # --- ID NORMALIZATION (The "Loose Akoma" Enforcer) ---
+        # Ensure every paragraph has a stable ID *before* we parse or save.
+        content = IDNormalizer.normalize_docx(upload.read())
+        text, tree = document_service.extract_text(upload.filename, content)
+        return content, text, tree
+    # PDF / TXT: parsed from the spooled file, read into memory only to be stored
+    text, tree = document_service.extract_text(upload.filename, upload.file)
+    return upload.read(), text, tree
+
+def upload_response(doc: Document, db: Session, deduplicated: bool = False) -> DocumentUploadResponse:
+    """Upload response, offering the latest analysis of any document with the same text"""
+    latest = None
+    if doc.text_hash:
+        latest = db.query(Analysis).join(Document, Analysis.document_id == Document.id).filter(
+            Document.text_hash == doc.text_hash
+        ).order_by(Analysis.created_at.desc()).first()
+    
+    text = doc.original_text
+    return DocumentUploadResponse(
+        document_id=str(doc.id),
+        filename=doc.filename,
+        length=len(text),
+        preview=text[:500] + "..." if len(text) > 500 else text,
+        uploaded_at=doc.uploaded_at.isoformat(),
+        deduplicated=deduplicated,
+        existing_analysis_id=str(latest.id) if latest else None
+    )
+
+def find_near_duplicate(minhash: List[int], band_keys: List[str], db: Session):
+    """(document_id, similarity) of the most similar analyzed document sharing an LSH bucket"""
+    if not band_keys:
+        return None, None
+    
+    candidate_ids = db.query(DocumentLSHBand.document_id).filter(
+        DocumentLSHBand.band_key.in_(band_keys)
+    ).group_by(DocumentLSHBand.document_id).order_by(
+        func.count(DocumentLSHBand.id).desc()
+    ).limit(MAX_NEAR_DUPLICATE_CANDIDATES).all()
+    if not candidate_ids:
+        return None, None
+    
+    candidates = db.query(Document.id, Document.minhash).filter(
+        Document.id.in_([row[0] for row in candidate_ids]),
+        Document.analyses.any()
+    ).all()
+    
+    best_id, best_similarity = None, 0.0
+    for candidate_id, signature in candidates:
+        similarity = SimilarityIndex.similarity(minhash, signature or [])
+        if similarity > best_similarity:
+            best_id, best_similarity = candidate_id, similarity
+    
+    if best_similarity < NEAR_DUPLICATE_THRESHOLD:
+        return None, None
+    return best_id, best_similarity
+
+# ============================================================================
+# RESUMABLE (CHUNKED) UPLOADS
+# ============================================================================
+
+class ChunkedUploadRequest(BaseModel):
+    filename: str
+    size: int
+    chunk_size: Optional[int] = None
+    sha256: Optional[str] = None  # Of the whole file, checked on commit
+
+@app.post("/api/uploads")
+async def create_chunked_upload(request: ChunkedUploadRequest):
+    """
+    Start a resumable upload: PUT the chunks to /api/uploads/{upload_id}/chunks/{index}
+    (any order, X-Chunk-SHA256 header), then POST /api/uploads/{upload_id}/commit.
+    Sessions are kept on disk, so they survive restarts.
+    """
+    try:
+        return chunked_uploads.create(request.filename, request.size, request.chunk_size, request.sha256)
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+
+@app.get("/api/uploads/{upload_id}")
+async def get_chunked_upload(upload_id: str):
+    """Session state: which chunks are stored (resume by sending the others)"""
+    try:
+        return chunked_uploads.status(upload_id)
+    except KeyError:
+        raise HTTPException(404, "Upload session not found")
+
+@app.put("/api/uploads/{upload_id}/chunks/{index}")
+async def put_upload_chunk(
+    upload_id: str,
+    index: int,
+    request: Request,
+    x_chunk_sha256: Optional[str] = Header(None)
+):
+    """Store one chunk (raw request body); re-sending a stored chunk replaces it"""
+    try:
+        return await chunked_uploads.write_chunk(upload_id, index, request.stream(), x_chunk_sha256)
+    except KeyError:
+        raise HTTPException(404, "Upload session not found")
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+
+@app.post("/api/uploads/{upload_id}/commit", response_model=DocumentUploadResponse)
+async def commit_chunked_upload(
+    upload_id: str,
+    db: Session = Depends(get_db)
+):
+    """Assemble the chunks and ingest the file like /api/upload (409 while another commit runs)"""
+    try:
+        with chunked_uploads.committing(upload_id):
+            status = chunked_uploads.status(upload_id)
+            if status["document_id"]:
+                doc = db.query(Document).filter(Document.id == status["document_id"]).first()
+                if doc:
+                    return upload_response(doc, db, deduplicated=True)
+            
+            path, size, sha256 = await asyncio.to_thread(chunked_uploads.assemble, upload_id)
+            with open(path, "rb") as file:
+                response = await store_upload(UploadSpool(status["filename"], file, size, sha256), db)
+            chunked_uploads.committed(upload_id, response.document_id)
+            return response
+    
+    except KeyError:
+        raise HTTPException(404, "Upload session not found")
+    except CommitInProgress:
+        raise HTTPException(409, "Upload is already being committed")
     except ValueError as e:
-        # Document parsing error
         raise HTTPException(status_code=400, detail=str(e))
     except HTTPException:
         raise
@@ -254,6 +455,53 @@ async def upload_document(
             detail=f"Upload failed: {str(e)}"
         )
 
+@app.delete("/api/uploads/{upload_id}")
+async def abort_chunked_upload(upload_id: str):
+    """Drop an upload session and its chunks"""
+    try:
+        chunked_uploads.discard(upload_id)
+    except KeyError:
+        raise HTTPException(404, "Upload session not found")
+    return {"success": True, "upload_id": upload_id}
+
+def build_reuse_plan(doc: Document, db: Session) -> Optional[Dict]:
+    """
+    Reuse plan for a new analysis: against this document's own latest analysis
+    when it was edited since, else against its near-duplicate draft's, if any
+    """
+    latest = db.query(Analysis).filter(
+        Analysis.document_id == doc.id
+    ).order_by(Analysis.created_at.desc()).first()
+    if latest is not None and isinstance(latest.node_hashes, dict):
+        latest_tests = db.query(ScenarioTest).filter(ScenarioTest.analysis_id == latest.id).all()
+        plan = AnalysisReuse.plan_after_edit(latest, latest_tests, doc)
+        if plan is not None:
+            return plan
+    
+    if not doc.near_duplicate_of or (doc.near_duplicate_similarity or 0) < NEAR_DUPLICATE_THRESHOLD:
+        return None
+    
+    prior_doc = db.query(Document).filter(Document.id == doc.near_duplicate_of).first()
+    prior_analysis = db.query(Analysis).filter(
+        Analysis.document_id == doc.near_duplicate_of
+    ).order_by(Analysis.created_at.desc()).first()
+    if not prior_doc or not prior_analysis:
+        return None
+    
+    prior_tests = db.query(ScenarioTest).filter(ScenarioTest.analysis_id == prior_analysis.id).all()
+    return AnalysisReuse.plan(prior_doc, prior_analysis, prior_tests, doc, doc.near_duplicate_similarity)
+
+async def clause_context(doc: Document, db: Session) -> str:
+    """LLM prompt text with memoized boilerplate clauses collapsed; full text if the memo store fails"""
+    try:
+        digest = await clause_memo_service.digest(doc.tree, doc.original_text, db)
+        print(f"Clause memo: {digest['reused']} clauses reused, {digest['novel']} novel")
+        return digest["context_text"] or doc.original_text
+    except Exception as e:
+        print(f"Clause memo unavailable: {e}")
+        db.rollback()
+        return doc.original_text
+
 @app.get("/api/documents", response_model=List[DocumentListItem])
 async def list_documents(
     limit: int = 50,
@@ -323,17 +571,29 @@ async def get_document(
 @app.get("/api/documents/{document_id}/export")
 async def export_document(
     document_id: str,
+    expected_version: Optional[int] = None,
+    track_changes: bool = False,
     db: Session = Depends(get_db)
 ):
     """
     Download the document. 
     If clause suggestions have been selected, they are applied to the document.
+    expected_version: 409 unless the document is still at that version (the
+    exported version is returned in X-Document-Version).
+    track_changes: apply the fixes as word-level tracked changes (redline).
     """
     try:
+        await flush_open_session(document_id, db)
         doc = db.query(Document).filter(Document.id == document_id).first()
         if not doc:
             raise HTTPException(404, "Document not found")
         
+        if expected_version is not None and expected_version != (doc.version or 0):
+            raise HTTPException(409, detail={
+                "message": "Document changed since the version you reviewed",
+                "current_version": doc.version or 0
+            })
+        
         if not doc.file_content:
             raise HTTPException(400, "Original file content not available")
         
@@ -355,7 +615,7 @@ async def export_document(
             if selected_suggestions:
                 try:
                     from services.docx_editor import SafeDocxEditor
-                    editor = SafeDocxEditor(doc.file_content)
+                    editor = SafeDocxEditor(doc.file_content, track_changes=track_changes)
                     applied_count = 0
 
                     for suggestion in selected_suggestions:
@@ -401,7 +661,8 @@ async def export_document(
             file_stream,
             media_type=content_type,
             headers={
-                "Content-Disposition": f'attachment; filename="{filename}"'
+                "Content-Disposition": f'attachment; filename="{filename}"',
+                "X-Document-Version": str(doc.version or 0)
             }
         )
     except HTTPException:
@@ -413,51 +674,459 @@ async def export_document(
 async def edit_document(
     document_id: str,
     operations: List[Dict] = Body(...), # Expect JSON list of ops
+    reanalyze: bool = False,
+    base_version: Optional[int] = None,
     db: Session = Depends(get_db)
 ):
     """
     Apply structural or text edits to the document using the ComposerService.
-    Supports 'update_text' and 'split' operations.
+    Supports 'update_text', 'split', 'insert', 'delete' and 'move' operations;
+    the batch is validated as a whole and applied all-or-nothing (400 otherwise).
+    With reanalyze=true a new analysis is run right away; only the results
+    depending on edited clauses are recomputed (services.analysis_reuse).
+    base_version: the version the client edited (the document's or, with an
+    open edit session, the session's). If the document moved on, the batch is
+    merged when it touches none of the paraIds changed since, else 409.
+    Writes are compare-and-swap on Document.version; a lost race re-checks and retries.
     """
     try:
-        doc = db.query(Document).filter(Document.id == document_id).first()
-        if not doc:
-            raise HTTPException(404, "Document not found")
+        for attempt in range(MAX_EDIT_ATTEMPTS):
+            doc = db.query(Document).filter(Document.id == document_id).first()
+            if not doc:
+                raise HTTPException(404, "Document not found")
+            
+            if not doc.file_content:
+                raise HTTPException(400, "Original file content not available")
+            
+            # Open edit session: apply in memory, write back on flush
+            session = edit_sessions.get(doc.id)
+            if session is not None:
+                async with session.lock:
+                    merged = check_edit_base(doc, base_version, operations, db, session)
+                    session.apply(operations)
+                    flushed = edit_sessions.flush_due(session) or reanalyze
+                    if flushed:
+                        flush_edit_session(session, doc, db)
+                response = {
+                    "success": True,
+                    "document_id": str(doc.id),
+                    "version": session.version,
+                    "operations_applied": len(operations),
+                    "merged": merged,
+                    "session": session.state(),
+                    "flushed": flushed
+                }
+                if reanalyze:
+                    response.update(await reanalyze_after_edit(doc, db))
+                return response
+            
+            merged = check_edit_base(doc, base_version, operations, db)
+            
+            # Initialize Composer
+            from services.composer_service import ComposerService
+            composer = ComposerService(doc.file_content)
+            
+            # Apply operations (this returns new bytes)
+            # Note: ComposerService.apply_operations raises exceptions on errors
+            read_version = doc.version
+            new_content = composer.apply_operations(operations)
+            store_document_content(doc, new_content, composer.changes(), operations, db)
+            try:
+                db.commit()
+                break
+            except StaleDataError:
+                # Another writer committed first: re-read and merge against its version
+                db.rollback()
+                if base_version is None:
+                    base_version = read_version
+        else:
+            raise HTTPException(409, "Document is being edited concurrently, please retry")
         
-        if not doc.file_content:
-            raise HTTPException(400, "Original file content not available")
+        db.refresh(doc)
+        response = {
+            "success": True,
+            "document_id": str(doc.id),
+            "version": doc.version,
+            "merged": merged,
+            "new_size": len(new_content),
+            "operations_applied": len(operations)
+        }
+        if reanalyze:
+            response.update(await reanalyze_after_edit(doc, db))
+        return response
 
-        # Initialize Composer
-        from services.composer_service import ComposerService
-        composer = ComposerService(doc.file_content)
-        
-        # Apply operations (this returns new bytes)
-        # Note: ComposerService.apply_operations raises exceptions on errors
-        new_content = composer.apply_operations(operations)
-        
-        # Update the document record
-        doc.file_content = new_content
-        
-        # We should also re-extract the text and tree since functionality changed
-        # This keeps the DB in sync with the file
+    except HTTPException:
+        raise
+    except ValueError as e:
+        # Invalid operation batch (validated before anything is applied)
+        db.rollback()
+        raise HTTPException(400, str(e))
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(500, f"Edit failed: {str(e)}")
+
+
+def check_edit_base(
+    doc: Document,
+    base_version: Optional[int],
+    operations: List[Dict],
+    db: Session,
+    session: Optional[EditSession] = None
+) -> bool:
+    """
+    Optimistic concurrency for an edit batch prepared against base_version.
+    Returns True when it is merged onto a newer version; raises 409 on overlap.
+    With an open edit session the current version includes its unflushed
+    batches (caller holds session.lock).
+    """
+    current = session.version if session is not None else doc.version or 0
+    if base_version is None or base_version == current:
+        return False
+    
+    if session is not None and base_version >= session.base_version:
+        changed = session.changed_since(base_version)
+    else:
+        changed = VersionStore.changed_since(doc, base_version, db)
+        if changed is not None and session is not None:
+            changed |= session.changed_since(session.base_version)
+    if changed is None:
+        raise HTTPException(409, detail={
+            "message": f"Version {base_version} cannot be merged into version {current}",
+            "current_version": current
+        })
+    conflicts = sorted(changed & VersionStore.touched_para_ids(operations))
+    if conflicts:
+        raise HTTPException(409, detail={
+            "message": "Paragraphs were edited by someone else since your version",
+            "current_version": current,
+            "conflicting_ids": conflicts
+        })
+    return True
+
+
+def store_document_content(
+    doc: Document,
+    new_content: bytes,
+    changes: Optional[List[Dict]],
+    operations: List[Dict],
+    db: Session,
+    batches: Optional[List[List[Dict]]] = None
+):
+    """
+    Write edited DOCX bytes to the record as the next version (operations are
+    logged by VersionStore) and keep text, tree, indexes and hashes in sync.
+    batches: an edit session's batches, logged as one version each.
+    changes=None forces a full re-parse (e.g. rollbacks).
+    """
+    VersionStore.record_batches(doc, batches or [operations], new_content, db)
+    doc.file_content = new_content
+    
+    # Patch the touched nodes in place (node ids stay stable),
+    # re-parse only when the edit changed the structure
+    patched = document_service.patch_docx_structure(doc.tree, changes) if changes is not None else None
+    if patched is not None:
+        doc.original_text, doc.tree = patched
+    else:
         doc.original_text, doc.tree = document_service.extract_text(doc.filename, new_content)
+    doc.term_index = TermIndex.build(doc.tree, doc.original_text)
+    doc.section_index = SectionIndex.build(doc.tree, doc.original_text)
+    doc.content_hash = document_service.fingerprint(new_content)
+    doc.text_hash = document_service.fingerprint(doc.original_text)
+    
+    # Format new size
+    doc.file_size = document_service.format_file_size(len(new_content))
+
+
+async def reanalyze_after_edit(doc: Document, db: Session) -> Dict:
+    analysis = await analyze_document(str(doc.id), db)
+    return {
+        "analysis_id": analysis.analysis_id,
+        "timeline": analysis.timeline,
+        "scenarios": analysis.scenarios
+    }
+
+
+def flush_edit_session(session, doc: Document, db: Session):
+    """Serialize an edit session's document once and commit it (caller holds session.lock)"""
+    if session.pending_ops == 0:
+        return
+    for attempt in range(MAX_EDIT_ATTEMPTS):
+        store_document_content(
+            doc, session.composer.save(), session.composer.changes(), session.operations, db, batches=session.batches
+        )
+        try:
+            db.commit()
+            break
+        except StaleDataError:
+            # Written elsewhere since the session opened: replay the session's ops on the
+            # new head, unless they touch paragraphs changed there
+            db.rollback()
+            db.refresh(doc)
+            try:
+                session.rebase(doc.file_content, doc.version or 0, VersionStore.changed_since(doc, session.base_version, db))
+            except EditConflict as e:
+                # Unmergeable: drop the session so its batches are not retried forever
+                edit_sessions.close(doc.id)
+                session.discard_journal()
+                raise HTTPException(409, detail={
+                    "message": str(e),
+                    "current_version": doc.version or 0,
+                    "conflicting_ids": e.conflicting_ids
+                })
+    else:
+        raise HTTPException(409, "Document is being edited concurrently, please retry")
+    session.flushed(doc.content_hash, doc.version or 0)
+
+
+async def flush_open_session(document_id: str, db: Session):
+    """Make the stored document current before reading file_content (export, analysis)"""
+    session = edit_sessions.get(document_id)
+    if session is None:
+        return
+    async with session.lock:
+        doc = db.query(Document).filter(Document.id == document_id).first()
+        if doc:
+            flush_edit_session(session, doc, db)
+
+
+@app.get("/api/documents/{document_id}/versions")
+async def list_document_versions(
+    document_id: str,
+    db: Session = Depends(get_db)
+):
+    """Edit history: one version per edit batch, newest first"""
+    await flush_open_session(document_id, db)
+    doc = db.query(Document).filter(Document.id == document_id).first()
+    if not doc:
+        raise HTTPException(404, "Document not found")
+    return {
+        "document_id": str(doc.id),
+        "current_version": doc.version or 0,
+        "versions": VersionStore.history(doc, db)
+    }
+
+
+@app.get("/api/documents/{document_id}/versions/{version}/export")
+async def export_document_version(
+    document_id: str,
+    version: int,
+    db: Session = Depends(get_db)
+):
+    """Download the document as it was at a version (rebuilt from the nearest snapshot)"""
+    await flush_open_session(document_id, db)
+    doc = db.query(Document).filter(Document.id == document_id).first()
+    if not doc:
+        raise HTTPException(404, "Document not found")
+    
+    content = VersionStore.materialize(doc, version, db)
+    if content is None:
+        raise HTTPException(404, f"Version {version} not found")
+    
+    filename = doc.filename
+    if filename.endswith(".docx"):
+        filename = filename.replace(".docx", f"_v{version}.docx")
+    return StreamingResponse(
+        BytesIO(content),
+        media_type="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+        headers={
+            "Content-Disposition": f'attachment; filename="{filename}"'
+        }
+    )
+
+
+@app.post("/api/documents/{document_id}/rollback/{version}")
+async def rollback_document(
+    document_id: str,
+    version: int,
+    db: Session = Depends(get_db)
+):
+    """
+    Restore an earlier version. Logged as a new version (history is never
+    rewritten), with a snapshot so later replays start from it.
+    """
+    try:
+        # An open session holds the head in memory: write it back and drop it
+        await flush_open_session(document_id, db)
+        edit_sessions.close(document_id)
         
-        # Format new size
-        doc.file_size = document_service.format_file_size(len(new_content))
+        doc = db.query(Document).filter(Document.id == document_id).first()
+        if not doc:
+            raise HTTPException(404, "Document not found")
         
-        db.commit()
-        db.refresh(doc)
+        content = VersionStore.materialize(doc, version, db)
+        if content is None:
+            raise HTTPException(404, f"Version {version} not found")
         
+        store_document_content(doc, content, None, [VersionStore.restore_operation(version)], db)
+        try:
+            db.commit()
+        except StaleDataError:
+            db.rollback()
+            raise HTTPException(409, "Document was edited during the rollback, please retry")
         return {
             "success": True,
             "document_id": str(doc.id),
-            "new_size": len(new_content),
-            "operations_applied": len(operations)
+            "restored_version": version,
+            "version": doc.version
         }
+    except HTTPException:
+        raise
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(500, f"Rollback failed: {str(e)}")
+
+
+@app.get("/api/documents/{document_id}/compare/{other_id}")
+async def compare_documents(
+    document_id: str,
+    other_id: str,
+    db: Session = Depends(get_db)
+):
+    """
+    What changed from one document (the base draft) to another, paragraph by
+    paragraph from the stored trees.
+    Yields NDJSON records:
+    {"type": "documents", "old": {...}, "new": {...}}
+    {"type": "inserted" | "deleted" | "modified" | "moved", ...}  (new-document order)
+    {"type": "summary", ...}
+    """
+    await flush_open_session(document_id, db)
+    await flush_open_session(other_id, db)
+    docs = {}
+    for key in (document_id, other_id):
+        docs[key] = db.query(Document).filter(Document.id == key).first()
+        if not docs[key]:
+            raise HTTPException(404, f"Document {key} not found")
+    old_doc, new_doc = docs[document_id], docs[other_id]
+
+    def describe(doc: Document) -> Dict:
+        return {"id": str(doc.id), "filename": doc.filename, "version": doc.version or 0}
+
+    header = {"type": "documents", "old": describe(old_doc), "new": describe(new_doc)}
+    old = DocumentCompare.paragraphs(old_doc.tree, old_doc.original_text)
+    new = DocumentCompare.paragraphs(new_doc.tree, new_doc.original_text)
+
+    # Plain generator: Starlette runs it in the threadpool, off the event loop
+    def record_generator():
+        yield json.dumps(header) + "\n"
+        try:
+            for record in DocumentCompare.compare(old, new):
+                yield json.dumps(record) + "\n"
+        except Exception as e:
+            print(f"Compare error: {str(e)}")
+            yield json.dumps({"type": "error", "message": "Comparison interrupted: " + str(e)}) + "\n"
+
+    return StreamingResponse(record_generator(), media_type="application/x-ndjson")
+
+
+@app.post("/api/documents/{document_id}/session")
+async def open_edit_session(
+    document_id: str,
+    db: Session = Depends(get_db)
+):
+    """
+    Keep the document open in this worker: subsequent /edit calls apply in memory
+    and are journaled; the document is written back on save, close, idle timeout
+    or every MAX_PENDING_OPS operations.
+    """
+    doc = db.query(Document).filter(Document.id == document_id).first()
+    if not doc:
+        raise HTTPException(404, "Document not found")
+    if not doc.file_content:
+        raise HTTPException(400, "Original file content not available")
+    
+    try:
+        session = edit_sessions.open(doc.id, doc.file_content, doc.version or 0)
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+    return {"success": True, "session": session.state()}
+
+
+@app.post("/api/documents/{document_id}/session/save")
+async def save_edit_session(
+    document_id: str,
+    db: Session = Depends(get_db)
+):
+    """Flush the open edit session to storage"""
+    session = edit_sessions.get(document_id)
+    if session is None:
+        raise HTTPException(404, "No open edit session for this document")
+    try:
+        await flush_open_session(document_id, db)
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(500, f"Save failed: {str(e)}")
+    return {"success": True, "session": session.state()}
+
 
+@app.delete("/api/documents/{document_id}/session")
+async def close_edit_session(
+    document_id: str,
+    db: Session = Depends(get_db)
+):
+    """Flush and close the open edit session"""
+    if edit_sessions.get(document_id) is None:
+        raise HTTPException(404, "No open edit session for this document")
+    try:
+        await flush_open_session(document_id, db)
     except Exception as e:
         db.rollback()
-        raise HTTPException(500, f"Edit failed: {str(e)}")
+        raise HTTPException(500, f"Save failed: {str(e)}")
+    edit_sessions.close(document_id)
+    return {"success": True, "document_id": document_id}
+
+
+async def sweep_edit_sessions():
+    """Background loop: flush and close idle sessions"""
+    while True:
+        await asyncio.sleep(EDIT_SESSION_SWEEP_SECONDS)
+        for session in edit_sessions.idle():
+            db = SessionLocal()
+            try:
+                await flush_open_session(session.document_id, db)
+                edit_sessions.close(session.document_id)
+            except Exception as e:
+                db.rollback()
+                print(f"Edit session flush failed for {session.document_id}: {e}")
+            finally:
+                db.close()
+
+
+@app.on_event("startup")
+async def start_edit_sessions():
+    # Journals left by a crashed worker: replay and flush them before anything reads the documents
+    for document_id in edit_sessions.orphaned_journals():
+        db = SessionLocal()
+        try:
+            doc = db.query(Document).filter(Document.id == document_id).first()
+            if doc and doc.file_content:
+                edit_sessions.open(doc.id, doc.file_content, doc.version or 0)
+                await flush_open_session(document_id, db)
+                edit_sessions.close(document_id)
+        except Exception as e:
+            db.rollback()
+            print(f"Warning: could not recover edit journal for {document_id} - {e}")
+        finally:
+            db.close()
+    asyncio.ensure_future(sweep_edit_sessions())
+
+
+@app.on_event("shutdown")
+async def stop_pdf_extraction():
+    PdfExtractor.shared().close()
+
+
+@app.on_event("shutdown")
+async def stop_edit_sessions():
+    for session in edit_sessions.open_sessions():
+        db = SessionLocal()
+        try:
+            await flush_open_session(session.document_id, db)
+        except Exception as e:
+            db.rollback()
+            print(f"Edit session flush failed for {session.document_id}: {e}")
+        finally:
+            db.close()
 
 # ============================================================================
 # ANALYSIS ENDPOINTS
@@ -474,63 +1143,16 @@ async def analyze_document(
     Saves results to database
     """
     try:
-        # Get document from database
+        # Get document from database (with any open edit session flushed)
+        await flush_open_session(document_id, db)
         doc = db.query(Document).filter(Document.id == document_id).first()
         if not doc:
             raise HTTPException(404, "Document not found. Please upload first.")
         
-        # Run basic analysis (definitions, conflicts, timeline)
-        start_time = time.time()
-        result = await analysis_service.analyze_document(doc.original_text)
-        duration_ms = int((time.time() - start_time) * 1000)
-        
-        # Save analysis to database (initial save)
-        analysis = Analysis(
-            document_id=doc.id,
-            timeline=result["timeline"],
-            scenarios=[], # Will be populated by scenario service
-            definitions=result.get("definitions", []),
-            conflict_analysis=result.get("conflict_analysis", {}),
-            analysis_duration_ms=f"{duration_ms}ms"
-        )
-        db.add(analysis)
-        db.commit()
-        db.refresh(analysis)
-        
-        # Generate and test scenarios (3-Tier System)
-        scenario_tests = await scenario_service.generate_all_scenarios(
-            analysis_id=str(analysis.id),
-            document_text=doc.original_text,
-            transaction_type="founder_agreement", # Default to founder agreement for now
-            db=db
-        )
-        
-        # Format scenarios for frontend/JSON column
-        formatted_scenarios = [{
-            "id": str(st.id),
-            "name": st.name,
-            "status": st.status,
-            "description": st.description,
-            "trigger_event": st.trigger_event if st.status == "fail" else None,
-            "conflict": st.reasoning.get("conflict_if_any") if st.status == "fail" else None,
-            "outcome": st.reasoning.get("actual_outcome") if st.status == "fail" else None,
-            "expected_outcome": st.reasoning.get("expected_behavior") if st.status == "fail" else None,
-            "source_type": st.source_type,
-            "severity": st.severity
-        } for st in scenario_tests]
-        
-        # Update analysis with formatted scenarios
-        analysis.scenarios = formatted_scenarios
-        db.commit()
-        
-        return AnalysisResponse(
-            document_id=document_id,
-            analysis_id=str(analysis.id),
-            timeline=analysis.timeline,
-            scenarios=analysis.scenarios,
-            tree=doc.tree or {}, # Return stored tree
-            analysis_complete=True,
-            created_at=analysis.created_at.isoformat()
+        # Identical concurrent requests for this document share one run (and one Analysis row)
+        return await analysis_flight.run(
+            document_flight_key(doc),
+            lambda: shared_document_analysis(str(doc.id))
         )
     
     except HTTPException:
@@ -542,6 +1164,111 @@ async def analyze_document(
             detail=f"Analysis failed: {str(e)}"
         )
 
+
+def document_flight_key(doc: Document) -> str:
+    """
+    Coalescing key for a run that saves an Analysis: per document, since two
+    documents with the same text (different bytes) each need their own row.
+    The LLM call inside is coalesced by text alone.
+    """
+    return f"{analysis_service.flight_key(doc.original_text)}:{doc.id}"
+
+
+async def shared_document_analysis(document_id: str) -> AnalysisResponse:
+    """
+    The coalesced /api/analyze run. It outlives the request that started it
+    (followers keep waiting if the leader disconnects), so it works on its own
+    session and its own copy of the document.
+    """
+    db = SessionLocal()
+    try:
+        doc = db.query(Document).filter(Document.id == document_id).first()
+        if not doc:
+            raise HTTPException(404, "Document not found. Please upload first.")
+        return await run_document_analysis(doc, document_id, db)
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+async def run_document_analysis(doc: Document, document_id: str, db: Session) -> AnalysisResponse:
+    """Full analysis pipeline for one document: LLM analysis, scenarios, DB writes"""
+    # Run basic analysis (definitions, conflicts, timeline)
+    # Coalesced by content hash, so the same draft uploaded twice is analyzed once
+    start_time = time.time()
+    reuse = build_reuse_plan(doc, db)
+    context_text = await clause_context(doc, db)
+    result = await analysis_flight.run(
+        analysis_service.flight_key(doc.original_text),
+        lambda: analysis_service.analyze_document(doc.original_text, doc.tree, prior=reuse, context_text=context_text)
+    )
+    duration_ms = int((time.time() - start_time) * 1000)
+    
+    # Save analysis to database (initial save)
+    analysis = Analysis(
+        document_id=doc.id,
+        timeline=result["timeline"],
+        scenarios=[], # Will be populated by scenario service
+        definitions=result.get("definitions", []),
+        definition_graph=result.get("definition_graph"),
+        conflict_analysis=result.get("conflict_analysis", {}),
+        node_hashes=AnalysisReuse.node_hashes(doc.tree),
+        analysis_duration_ms=f"{duration_ms}ms"
+    )
+    db.add(analysis)
+    db.commit()
+    db.refresh(analysis)
+    
+    # Generate and test scenarios (3-Tier System)
+    # Near-duplicate drafts only re-test scenarios whose clauses changed
+    if reuse and (reuse["reusable_scenario_tests"] or reuse["stale_scenario_tests"]):
+        scenario_tests = await scenario_service.reuse_scenarios(
+            reuse["reusable_scenario_tests"],
+            reuse["stale_scenario_tests"],
+            analysis_id=str(analysis.id),
+            document_text=context_text,
+            db=db
+        )
+    else:
+        scenario_tests = await scenario_service.generate_all_scenarios(
+            analysis_id=str(analysis.id),
+            document_text=context_text,
+            transaction_type="founder_agreement", # Default to founder agreement for now
+            db=db
+        )
+    
+    # Format scenarios for frontend/JSON column
+    formatted_scenarios = [{
+        "id": str(st.id),
+        "name": st.name,
+        "status": st.status,
+        "description": st.description,
+        "trigger_event": st.trigger_event if st.status == "fail" else None,
+        "conflict": st.reasoning.get("conflict_if_any") if st.status == "fail" else None,
+        "outcome": st.reasoning.get("actual_outcome") if st.status == "fail" else None,
+        "expected_outcome": st.reasoning.get("expected_behavior") if st.status == "fail" else None,
+        "source_type": st.source_type,
+        "severity": st.severity
+    } for st in scenario_tests]
+    
+    # Update analysis with formatted scenarios and what each result depends on
+    analysis.scenarios = formatted_scenarios
+    analysis.dependencies = AnalysisReuse.dependencies(doc.tree, analysis.conflict_analysis, scenario_tests)
+    db.commit()
+    
+    return AnalysisResponse(
+        document_id=document_id,
+        analysis_id=str(analysis.id),
+        timeline=analysis.timeline,
+        scenarios=analysis.scenarios,
+        tree=doc.tree or {}, # Return stored tree
+        analysis_complete=True,
+        created_at=analysis.created_at.isoformat()
+    )
+
+
 @app.post("/api/analyze-quick", response_model=AnalysisResponse)
 async def analyze_quick(
     file: UploadFile = File(...),
@@ -558,6 +1285,9 @@ async def analyze_quick(
         # Analyze immediately
         return await analyze_document(upload_result.document_id, db)
     
+    except HTTPException:
+        # Upload rejections (empty, too short, over the size limit) keep their status
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -593,29 +1323,12 @@ async def analyze_quick_stream(
                     }
                 }) + "\n"
 
-                async for event in analysis_service.analyze_document_generator(document.original_text):
-                    # Save results to DB if it's the final result
-                    if event["type"] == "result":
-                        result = event["data"]
-                        analysis = Analysis(
-                        document_id=document.id,
-                        timeline=result["timeline"],
-                        scenarios=result["scenarios"],
-                        definitions=result.get("definitions", []),
-                        conflict_analysis=result.get("conflict_analysis", {}),
-                        analysis_duration_ms=f"{result['duration_ms']}ms"
-                        )
-                        # We need a new DB session or careful handling for async generator? 
-                        # Actually, `db` dependency is thread-local mostly safe, but prolonged stream might be tricky.
-                        # For now, let's assume it's fine or create a fresh validation at end.
-                        # Re-querying to be safe if session detached (though usually fine in same request context)
-                        db.add(analysis)
-                        db.commit()
-                        db.refresh(analysis)
-                        
-                        # Add analysis_id to the result
-                        event["data"]["analysis_id"] = str(analysis.id)
-                    
+                # Concurrent streams of the same document attach to one run;
+                # late joiners replay the events they missed
+                async for event in analysis_flight.stream(
+                    document_flight_key(document),
+                    lambda: stream_document_analysis(str(document.id))
+                ):
                     yield json.dumps(event) + "\n"
             
             except Exception as e:
@@ -627,12 +1340,59 @@ async def analyze_quick_stream(
 
         return StreamingResponse(event_generator(), media_type="application/x-ndjson")
 
+    except HTTPException:
+        # Upload rejections (empty, too short, over the size limit) keep their status
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=500,
             detail=f"Streaming analysis failed: {str(e)}"
         )
 
+async def stream_document_analysis(document_id: str):
+    """
+    Analysis event stream for one document; the final result is saved once.
+    Shared by every stream of the document and produced in the background, so
+    it uses its own session rather than the first caller's.
+    """
+    db = SessionLocal()
+    try:
+        document = db.query(Document).filter(Document.id == document_id).first()
+        if not document:
+            raise ValueError("Document not found")
+        reuse = build_reuse_plan(document, db)
+        context_text = await clause_context(document, db)
+        async for event in analysis_service.analyze_document_generator(
+            document.original_text, document.tree, prior=reuse, context_text=context_text
+        ):
+            # Save results to DB if it's the final result
+            if event["type"] == "result":
+                result = event["data"]
+                analysis = Analysis(
+                    document_id=document.id,
+                    timeline=result["timeline"],
+                    scenarios=result["scenarios"],
+                    definitions=result.get("definitions", []),
+                    definition_graph=result.get("definition_graph"),
+                    conflict_analysis=result.get("conflict_analysis", {}),
+                    node_hashes=AnalysisReuse.node_hashes(document.tree),
+                    dependencies=AnalysisReuse.dependencies(document.tree, result.get("conflict_analysis"), []),
+                    analysis_duration_ms=f"{result['duration_ms']}ms"
+                )
+                db.add(analysis)
+                db.commit()
+                db.refresh(analysis)
+                
+                # Add analysis_id to the result
+                event["data"]["analysis_id"] = str(analysis.id)
+            
+            yield event
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
 @app.get("/api/analyses/{document_id}")
 async def get_analyses(
     document_id: str,
@@ -775,7 +1535,8 @@ async def verify_assertion(
                     document_text=doc.original_text,
                     assertion_text=assertion_text,
                     definitions=definitions,
-                    document_tree=doc.tree
+                    document_tree=doc.tree,
+                    term_index=doc.term_index
                 ):
                     yield json.dumps(event) + "\n"
                     
@@ -856,11 +1617,11 @@ async def suggest_clause_fixes(
         # Extract relevant information
         conflict_type = scenario.get('conflict', 'unknown_conflict')
         
-        # Try to extract the problematic clause from document using LLM-powered structure service
-        # This is the "Modern Approach" replacing regex
+        # Resolve the problematic clause via the section index (LLM only if no section matches)
         found_clause = await structure_service.find_clause_by_conflict(
             document.original_text,
-            scenario.get('conflict', '')
+            scenario.get('conflict', ''),
+            section_index=document.section_index
         )
 
         if found_clause and found_clause.get('text'):
@@ -942,10 +1703,12 @@ async def suggest_clause_fixes(
 async def select_suggestion(
     suggestion_id: str,
     selected_type: str,  # "founder_friendly", "market_standard", or "company_friendly"
+    expected_version: Optional[int] = None,
     db: Session = Depends(get_db)
 ):
     """
     Record which suggestion the user selected
+    expected_version: the suggestion version the client saw; 409 if it changed since
     """
     try:
         suggestion = db.query(ClauseSuggestion).filter(
@@ -960,14 +1723,26 @@ async def select_suggestion(
         if selected_type not in valid_types:
             raise HTTPException(400, f"Invalid type. Must be one of: {valid_types}")
         
-        # Update selection
+        if expected_version is not None and expected_version != suggestion.version:
+            raise HTTPException(409, detail={
+                "message": "Selection was changed by someone else",
+                "current_version": suggestion.version,
+                "selected": suggestion.selected_option
+            })
+        
+        # Update selection (compare-and-swap on ClauseSuggestion.version)
         suggestion.selected_option = selected_type
         suggestion.selected_at = datetime.utcnow()
-        db.commit()
+        try:
+            db.commit()
+        except StaleDataError:
+            db.rollback()
+            raise HTTPException(409, "Selection was changed concurrently, please retry")
         
         return {
             "suggestion_id": suggestion_id,
             "selected": selected_type,
+            "version": suggestion.version,
             "message": "Selection recorded"
         }
     
@@ -1053,38 +1828,120 @@ async def chat_with_document(
         raise HTTPException(500, f"Chat failed: {str(e)}")
 
 @app.post("/api/logic-graph")
-async def generate_logic_graph(request: dict):
+async def generate_logic_graph(request: dict, db: Session = Depends(get_db)):
     """
     Generate a logic graph structure for visualization
-    Takes conflict analysis and returns nodes/edges for React Flow
+    Takes conflict analysis (+ document_id) and returns nodes/edges for React Flow.
+    Nodes and edges come from the stored tree and indexes; the LLM only labels
+    the conflict subgraph. Cached per (document version, conflict).
     """
     try:
         conflict_analysis = request.get("conflict_analysis", {})
         expand = request.get("expand", False)
+        document_id = request.get("document_id")
         
         if not conflict_analysis.get("has_conflict"):
             return {"graph": {"nodes": [], "edges": []}}
         
-        mistral = MistralService()
-        graph = await mistral.generate_logic_graph(conflict_analysis, expand)
+        if not document_id:
+            # Legacy clients without a document: LLM-generated graph
+            graph = await analysis_service.mistral.generate_logic_graph(conflict_analysis, expand)
+            return {"graph": graph}
         
-        return {"graph": graph}
+        doc = db.query(Document).filter(Document.id == document_id).first()
+        if not doc:
+            raise HTTPException(404, "Document not found")
+        
+        document_version = LogicGraphCache.document_version(str(doc.id), doc.original_text)
+        cache_key = LogicGraphCache.key(document_version, conflict_analysis, expand)
+        cached = logic_graph_cache.get(cache_key)
+        if cached is not None:
+            return {"graph": cached, "cached": True}
+        
+        graph = LogicGraphBuilder.build(
+            doc.tree,
+            doc.original_text,
+            conflict_analysis,
+            expand=expand,
+            clause_graph=get_clause_graph(doc, document_version)
+        )
+        annotations = await analysis_service.mistral.annotate_logic_graph(
+            LogicGraphBuilder.conflict_subgraph(graph), conflict_analysis
+        )
+        graph = LogicGraphBuilder.apply_annotations(graph, annotations)
+        logic_graph_cache.put(cache_key, graph)
         
+        return {"graph": graph, "cached": False}
+        
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Error generating logic graph: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+
+@app.post("/api/logic-graph/expand")
+async def expand_logic_graph(request: dict, db: Session = Depends(get_db)):
+    """
+    Lazy neighbourhood expansion for the logic graph.
+    Body: {"document_id", "node_id", "hops": 1, "known_node_ids": [...], "offset": 0, "limit": 50}
+    Returns only nodes/edges the client does not have yet, from the cached clause graph.
+    """
+    try:
+        document_id = request.get("document_id")
+        node_id = request.get("node_id")
+        if not document_id or not node_id:
+            raise HTTPException(400, "document_id and node_id are required")
+        
+        doc = db.query(Document).filter(Document.id == document_id).first()
+        if not doc:
+            raise HTTPException(404, "Document not found")
+        
+        document_version = LogicGraphCache.document_version(str(doc.id), doc.original_text)
+        try:
+            expansion = LogicGraphBuilder.neighborhood(
+                get_clause_graph(doc, document_version),
+                node_id,
+                hops=min(int(request.get("hops", 1)), MAX_EXPAND_HOPS),
+                known=request.get("known_node_ids", []),
+                offset=max(int(request.get("offset", 0)), 0),
+                limit=min(max(int(request.get("limit", 50)), 1), MAX_EXPAND_PAGE)
+            )
+        except KeyError:
+            raise HTTPException(404, f"Node {node_id} not found in document graph")
+        
+        return expansion
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Error expanding logic graph: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+def get_clause_graph(doc: Document, document_version: str) -> Dict:
+    """Whole-document clause graph, built once per document version"""
+    clause_graph = clause_graph_cache.get(document_version)
+    if clause_graph is None:
+        clause_graph = LogicGraphBuilder.clause_graph(
+            doc.tree, doc.original_text, doc.section_index, doc.term_index
+        )
+        clause_graph_cache.put(document_version, clause_graph)
+    return clause_graph
+
 from services.docx_editor import SafeDocxEditor
 
 @app.post("/api/export-with-fix/{suggestion_id}")
 async def export_document_with_fix(
     suggestion_id: str,
     selected_type: str,
+    track_changes: bool = False,
     db: Session = Depends(get_db)
 ):
     """
     Generate a new DOCX with the selected clause fix applied using SafeDocxEditor.
     Preserves original formatting.
+    track_changes: write the fix as word-level tracked changes (redline).
     """
     try:
         # Get suggestion
@@ -1114,7 +1971,7 @@ async def export_document_with_fix(
             raise HTTPException(400, "Invalid suggestion type")
             
         # Initialize Safe Editor with original content
-        editor = SafeDocxEditor(document.file_content)
+        editor = SafeDocxEditor(document.file_content, track_changes=track_changes)
         
         # Apply the fix (replace original text with new text)
         result = editor.replace_clause(
@@ -0,0 +1,32 @@
+-- Columns added to tables that existing databases created before them.
+-- Base.metadata.create_all() creates missing tables but never alters existing
+-- ones, so these run on every start (database.apply_migrations) and must stay
+-- idempotent.
+
+-- documents: dedupe hashes, term/section indexes, edit version, near-duplicates
+ALTER TABLE documents ADD COLUMN IF NOT EXISTS content_hash VARCHAR(64);
+ALTER TABLE documents ADD COLUMN IF NOT EXISTS text_hash VARCHAR(64);
+ALTER TABLE documents ADD COLUMN IF NOT EXISTS term_index JSON;
+ALTER TABLE documents ADD COLUMN IF NOT EXISTS section_index JSON;
+ALTER TABLE documents ADD COLUMN IF NOT EXISTS version INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE documents ADD COLUMN IF NOT EXISTS minhash JSON;
+ALTER TABLE documents ADD COLUMN IF NOT EXISTS near_duplicate_of UUID REFERENCES documents (id);
+ALTER TABLE documents ADD COLUMN IF NOT EXISTS near_duplicate_similarity DOUBLE PRECISION;
+CREATE INDEX IF NOT EXISTS ix_documents_content_hash ON documents (content_hash);
+CREATE INDEX IF NOT EXISTS ix_documents_text_hash ON documents (text_hash);
+
+-- analyses: definition checks and incremental re-analysis
+ALTER TABLE analyses ADD COLUMN IF NOT EXISTS definition_graph JSON;
+ALTER TABLE analyses ADD COLUMN IF NOT EXISTS node_hashes JSON;
+ALTER TABLE analyses ADD COLUMN IF NOT EXISTS dependencies JSON;
+
+-- clause_suggestions: optimistic locking on selection changes
+ALTER TABLE clause_suggestions ADD COLUMN IF NOT EXISTS version INTEGER NOT NULL DEFAULT 1;
+
+-- clause_memos: one memo per (clause, model, prompt); keep the first of any duplicates
+DELETE FROM clause_memos a USING clause_memos b
+WHERE a.clause_hash = b.clause_hash
+  AND a.model_used = b.model_used
+  AND a.prompt_version = b.prompt_version
+  AND a.ctid > b.ctid;
+CREATE UNIQUE INDEX IF NOT EXISTS uq_clause_memos_key ON clause_memos (clause_hash, model_used, prompt_version);
@@ -1,7 +1,7 @@
 """
 SQLAlchemy database models for Axiom LCE
 """
-from sqlalchemy import Column, String, Text, DateTime, JSON, ForeignKey, Integer, Boolean, Float, LargeBinary
+from sqlalchemy import Column, String, Text, DateTime, JSON, ForeignKey, Integer, Boolean, Float, LargeBinary, UniqueConstraint
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
@@ -21,14 +21,65 @@ class Document(Base):
     file_type = Column(String(10), nullable=False)  # 'docx', 'pdf', 'txt'
     file_size = Column(String(50))  # e.g., "245 KB"
     file_content = Column(LargeBinary) # Original binary content
+    content_hash = Column(String(64), index=True)  # SHA-256 of the uploaded bytes (exact re-upload dedupe)
+    text_hash = Column(String(64), index=True)  # SHA-256 of original_text (analysis reuse across re-saves)
     tree = Column(JSON) # Structured representation of the document
+    term_index = Column(JSON) # Defined terms -> definition node + usage offsets (services.term_index)
+    section_index = Column(JSON)  # Section numbers -> nodes + resolved cross-references (services.section_index)
+    version = Column(Integer, default=0, nullable=False)  # Edit version of file_content (services.version_store)
+    
+    # Near-duplicate detection (services.similarity_index)
+    minhash = Column(JSON)  # MinHash signature over word shingles
+    near_duplicate_of = Column(UUID(as_uuid=True), ForeignKey('documents.id'))  # Nearest previously analyzed draft
+    near_duplicate_similarity = Column(Float)  # Estimated Jaccard similarity to that draft
     
     # Relationship to analyses
     analyses = relationship("Analysis", back_populates="document", cascade="all, delete-orphan")
     
+    # Compare-and-swap on version: concurrent writers get StaleDataError instead of overwriting.
+    # VersionStore sets the next version itself (one per edit batch).
+    __mapper_args__ = {"version_id_col": version, "version_id_generator": False}
+    
     def __repr__(self):
         return f"<Document(id={self.id}, filename={self.filename})>"
 
+class DocumentLSHBand(Base):
+    """LSH bucket membership for near-duplicate lookups (one row per document band)"""
+    __tablename__ = "document_lsh_bands"
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    document_id = Column(UUID(as_uuid=True), ForeignKey('documents.id'), nullable=False, index=True)
+    band_key = Column(String(32), nullable=False, index=True)  # "<band>:<bucket hash>"
+    
+    def __repr__(self):
+        return f"<DocumentLSHBand(document_id={self.document_id}, band_key={self.band_key})>"
+
+class DocumentOperation(Base):
+    """Append-only composer operation log: one row per edit batch (= one document version)"""
+    __tablename__ = "document_operations"
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    document_id = Column(UUID(as_uuid=True), ForeignKey('documents.id'), nullable=False, index=True)
+    version = Column(Integer, nullable=False)  # Version this batch produces
+    operations = Column(JSON, nullable=False)  # ComposerService operations, as applied
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    
+    def __repr__(self):
+        return f"<DocumentOperation(document_id={self.document_id}, version={self.version})>"
+
+class DocumentSnapshot(Base):
+    """Materialized file content every SNAPSHOT_INTERVAL versions (replay starts here)"""
+    __tablename__ = "document_snapshots"
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    document_id = Column(UUID(as_uuid=True), ForeignKey('documents.id'), nullable=False, index=True)
+    version = Column(Integer, nullable=False)
+    file_content = Column(LargeBinary, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    
+    def __repr__(self):
+        return f"<DocumentSnapshot(document_id={self.document_id}, version={self.version})>"
+
 class Analysis(Base):
     """Stores AI analysis results for documents"""
     __tablename__ = "analyses"
@@ -40,8 +91,13 @@ class Analysis(Base):
     timeline = Column(JSON, nullable=False)  # Timeline steps array
     scenarios = Column(JSON, nullable=False)  # Scenario test results array
     definitions = Column(JSON)  # Extracted definitions
+    definition_graph = Column(JSON)  # Circular / undefined / unused term checks (services.definition_graph)
     conflict_analysis = Column(JSON)  # Conflict detection results
     
+    # Incremental re-analysis after edits (services.analysis_reuse)
+    node_hashes = Column(JSON)  # {node_id: paragraph hash} of the tree analyzed
+    dependencies = Column(JSON)  # {"definitions": [node_id], "conflict": [node_id], "scenarios": {test_id: [node_id]}}
+    
     # Metadata
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     model_used = Column(String(50), default="mistral-small-latest")
@@ -77,6 +133,9 @@ class ClauseSuggestion(Base):
     # User interaction tracking
     selected_option = Column(String(50))  # "founder_friendly", "market_standard", etc.
     selected_at = Column(DateTime)
+    version = Column(Integer, nullable=False, default=1)  # Bumped on every selection change
+    
+    __mapper_args__ = {"version_id_col": version}
     
     def __repr__(self):
         return f"<ClauseSuggestion(id={self.id}, conflict_type={self.conflict_type})>"
@@ -323,3 +382,32 @@ class AssertionVerification(Base):
     
     def __repr__(self):
         return f"<AssertionVerification(id={self.id}, verdict={self.verdict})>"
+
+class ClauseMemo(Base):
+    """Per-clause LLM findings keyed by normalized clause text, reused across contracts"""
+    __tablename__ = "clause_memos"
+    __table_args__ = (
+        UniqueConstraint("clause_hash", "model_used", "prompt_version", name="uq_clause_memos_key"),
+    )
+    
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    clause_hash = Column(String(64), nullable=False, index=True)  # services.clause_memo fingerprint
+    
+    # Invalidation: a memo only applies to the model + prompt that produced it
+    model_used = Column(String(50), nullable=False)
+    prompt_version = Column(String(20), nullable=False)
+    
+    # Findings
+    classification = Column(String(50))  # "governing_law", "notices", "termination", ...
+    is_boilerplate = Column(Boolean, default=False)  # Standard wording with no deal-specific risk
+    terms = Column(JSON)  # Defined terms the clause relies on
+    findings = Column(Text)  # Scenario-relevant summary (what the clause does)
+    
+    # Usage
+    hit_count = Column(Integer, default=0)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    last_used_at = Column(DateTime)
+    
+    def __repr__(self):
+        return f"<ClauseMemo(hash={self.clause_hash[:12]}, classification={self.classification})>"
+
@@ -41,6 +41,8 @@ class DocumentUploadResponse(BaseModel):
     length: int
     preview: str
     uploaded_at: str
+    deduplicated: bool = False  # True when an identical file was already stored
+    existing_analysis_id: Optional[str] = None  # Latest analysis of the same text, reusable immediately
 
 class AnalysisResponse(BaseModel):
     document_id: str
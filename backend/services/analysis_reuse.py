@@ -0,0 +1,277 @@
+"""
+Analysis reuse between near-duplicate drafts.
+
+Given the nearest previously analyzed document (services.similarity_index),
+diff the two trees by paragraph hash and decide which prior results still
+hold: definitions when no definition paragraph changed, the conflict analysis
+when none of its sections changed, and each scenario test whose affected
+clauses are untouched. Everything else is re-run.
+
+Edits to the same document use the dependency map stored with each Analysis
+(node hashes at analysis time, and the tree node ids each result depends on)
+so only results touching edited nodes are re-run.
+"""
+import hashlib
+import re
+from collections import Counter, defaultdict
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from .definition_extractor import DefinitionExtractor
+from .section_index import SectionIndex
+
+_WS = re.compile(r"\s+")
+
+
+def _paragraph_hash(text: str) -> str:
+    return hashlib.sha1(_WS.sub(" ", text.strip()).lower().encode("utf-8")).hexdigest()
+
+
+class AnalysisReuse:
+    """Tree diff and reuse planning for near-duplicate documents"""
+
+    @staticmethod
+    def diff_trees(old_tree: Optional[Dict], old_text: str, new_tree: Optional[Dict], new_text: str) -> Dict:
+        """
+        Paragraph-hash multiset diff:
+        {"unchanged": int, "added": [text], "removed": [text], "changed_sections": [key] or None}
+        changed_sections is None when either side has no tree (sections unknown).
+        """
+        old_nodes = list(AnalysisReuse._paragraphs(old_tree, old_text))
+        new_nodes = list(AnalysisReuse._paragraphs(new_tree, new_text))
+
+        remaining = Counter(_paragraph_hash(text) for _, text in old_nodes)
+        added: List[Tuple[Optional[str], str]] = []
+        unchanged = 0
+        for node_id, text in new_nodes:
+            h = _paragraph_hash(text)
+            if remaining[h] > 0:
+                remaining[h] -= 1
+                unchanged += 1
+            else:
+                added.append((node_id, text))
+
+        removed: List[Tuple[Optional[str], str]] = []
+        for node_id, text in old_nodes:
+            h = _paragraph_hash(text)
+            if remaining[h] > 0:
+                remaining[h] -= 1
+                removed.append((node_id, text))
+
+        changed_sections = None
+        if old_tree and new_tree:
+            new_owners = SectionIndex.section_owners(new_tree)
+            old_owners = SectionIndex.section_owners(old_tree)
+            changed = {new_owners.get(node_id) for node_id, _ in added}
+            changed |= {old_owners.get(node_id) for node_id, _ in removed}
+            changed_sections = sorted(k for k in changed if k)
+
+        return {
+            "unchanged": unchanged,
+            "added": [text for _, text in added],
+            "removed": [text for _, text in removed],
+            "changed_sections": changed_sections
+        }
+
+    @staticmethod
+    def plan(
+        prior_document,
+        prior_analysis,
+        prior_scenario_tests: List,
+        document,
+        similarity: float
+    ) -> Dict:
+        """
+        Reuse plan handed to AnalysisService / ScenarioService.
+        A None value for definitions / conflict_analysis means "re-run".
+        """
+        diff = AnalysisReuse.diff_trees(
+            prior_document.tree, prior_document.original_text, document.tree, document.original_text
+        )
+        changed_sections = diff["changed_sections"]
+        changed_text = "\n\n".join(diff["added"] + diff["removed"])
+
+        # Definitions stay valid unless a changed paragraph declares one
+        definitions_changed = bool(DefinitionExtractor.extract(changed_text)) if changed_text else False
+        definitions = None if definitions_changed else prior_analysis.definitions
+
+        conflict_analysis = None
+        prior_conflict = prior_analysis.conflict_analysis or {}
+        if definitions is not None and AnalysisReuse.sections_unchanged(
+            prior_conflict.get("affected_sections", []), changed_sections, changed_text
+        ):
+            conflict_analysis = prior_conflict
+
+        reusable, stale = [], []
+        for test in prior_scenario_tests:
+            if definitions is not None and AnalysisReuse.sections_unchanged(
+                test.affected_clauses or [], changed_sections, changed_text
+            ):
+                reusable.append(test)
+            else:
+                stale.append(test)
+
+        return {
+            "kind": "near_duplicate",
+            "source_document_id": str(prior_document.id),
+            "source_analysis_id": str(prior_analysis.id),
+            "similarity": similarity,
+            "diff": {
+                "unchanged": diff["unchanged"],
+                "added": len(diff["added"]),
+                "removed": len(diff["removed"]),
+                "changed_sections": changed_sections
+            },
+            "definitions": definitions,
+            "conflict_analysis": conflict_analysis,
+            "scenarios": prior_analysis.scenarios if conflict_analysis is not None else None,
+            "reusable_scenario_tests": reusable,
+            "stale_scenario_tests": stale
+        }
+
+    @staticmethod
+    def sections_unchanged(references: List[str], changed_sections: Optional[List[str]], changed_text: str) -> bool:
+        """True when none of the referenced clauses ("Section 4.2", "4.2") were touched"""
+        if not changed_text:
+            return True
+        if changed_sections is None or not references:
+            # Unknown structure or unknown dependencies: be safe and re-run
+            return False
+        changed = set(changed_sections)
+        for reference in references:
+            for key in AnalysisReuse._reference_keys(reference):
+                if key in changed or key.split("(", 1)[0] in changed:
+                    return False
+        return True
+
+    # ------------------------------------------------------------------
+    # Edits to the same document
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def node_hashes(tree: Optional[Dict]) -> Dict[str, str]:
+        """node_id -> paragraph hash, the baseline an Analysis was computed against"""
+        return {node_id: _paragraph_hash(text) for node_id, text in AnalysisReuse._paragraphs(tree, "") if node_id}
+
+    @staticmethod
+    def dependencies(tree: Optional[Dict], conflict_analysis: Optional[Dict], scenario_tests: List) -> Dict:
+        """
+        Tree node ids each result depends on:
+        {"definitions": [id], "conflict": [id], "scenarios": {scenario_test_id: [id]}}
+        An empty list means the dependencies are unknown (re-run on any edit).
+        """
+        owned: Dict[str, List[str]] = defaultdict(list)
+        for node_id, key in SectionIndex.section_owners(tree).items():
+            owned[key].append(node_id)
+
+        def nodes_for(references) -> List[str]:
+            ids = set()
+            for reference in references or []:
+                for key in AnalysisReuse._reference_keys(reference):
+                    ids.update(owned.get(key) or owned.get(key.split("(", 1)[0], []))
+            return sorted(ids)
+
+        return {
+            "definitions": sorted(
+                node_id for node_id, text in AnalysisReuse._paragraphs(tree, "")
+                if node_id and DefinitionExtractor.extract(text)
+            ),
+            "conflict": nodes_for((conflict_analysis or {}).get("affected_sections")),
+            "scenarios": {str(test.id): nodes_for(test.affected_clauses) for test in scenario_tests}
+        }
+
+    @staticmethod
+    def changed_nodes(baseline: Dict[str, str], tree: Optional[Dict]) -> Dict:
+        """
+        Nodes edited since the baseline: {"changed": [id], "added": [id]}.
+        changed covers edited and removed nodes, plus every node of a section
+        that gained a new node (so the section's dependents are invalidated).
+        """
+        current = AnalysisReuse.node_hashes(tree)
+        changed = {node_id for node_id, h in baseline.items() if current.get(node_id) != h}
+        added = [node_id for node_id in current if node_id not in baseline]
+        if added:
+            owners = SectionIndex.section_owners(tree)
+            grown = {owners[node_id] for node_id in added if node_id in owners}
+            changed |= {node_id for node_id, key in owners.items() if key in grown and node_id in baseline}
+        return {"changed": sorted(changed), "added": added}
+
+    @staticmethod
+    def plan_after_edit(prior_analysis, prior_scenario_tests: List, document) -> Optional[Dict]:
+        """
+        Reuse plan for re-analyzing an edited document against its own latest
+        Analysis. None when that analysis has no dependency map or nothing changed.
+        """
+        baseline = prior_analysis.node_hashes
+        dependencies = prior_analysis.dependencies
+        if not isinstance(baseline, dict) or not isinstance(dependencies, dict):
+            return None
+        delta = AnalysisReuse.changed_nodes(baseline, document.tree)
+        changed = set(delta["changed"])
+        if not changed and not delta["added"]:
+            return None
+
+        current = dict(AnalysisReuse._paragraphs(document.tree, ""))
+        changed_text = "\n\n".join(current[node_id] for node_id in sorted(changed) + delta["added"] if node_id in current)
+
+        def untouched(nodes: List[str]) -> bool:
+            # Unknown dependencies are never considered safe
+            return bool(nodes) and not changed.intersection(nodes)
+
+        definitions = prior_analysis.definitions
+        if changed.intersection(dependencies.get("definitions", [])) or (
+            changed_text and DefinitionExtractor.extract(changed_text)
+        ):
+            definitions = None
+
+        conflict_analysis = None
+        if definitions is not None and untouched(dependencies.get("conflict", [])):
+            conflict_analysis = prior_analysis.conflict_analysis
+
+        scenario_nodes = dependencies.get("scenarios", {})
+        reusable, stale = [], []
+        for test in prior_scenario_tests:
+            if definitions is not None and untouched(scenario_nodes.get(str(test.id), [])):
+                reusable.append(test)
+            else:
+                stale.append(test)
+
+        return {
+            "kind": "edit",
+            "source_document_id": str(document.id),
+            "source_analysis_id": str(prior_analysis.id),
+            "similarity": 1.0,
+            "diff": {
+                "unchanged": len(baseline) - len(changed.intersection(baseline)),
+                "added": len(delta["added"]),
+                "removed": sum(1 for node_id in baseline if node_id not in current),
+                "changed_nodes": sorted(changed)
+            },
+            "definitions": definitions,
+            "conflict_analysis": conflict_analysis,
+            "scenarios": prior_analysis.scenarios if conflict_analysis is not None else None,
+            "reusable_scenario_tests": reusable,
+            "stale_scenario_tests": stale
+        }
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _reference_keys(reference) -> List[str]:
+        found = SectionIndex.find_references(str(reference))
+        return [r["key"] for r in found] or [SectionIndex.normalize_ref(None, str(reference))]
+
+    @staticmethod
+    def _paragraphs(tree: Optional[Dict], text: str) -> Iterator[Tuple[Optional[str], str]]:
+        if tree and tree.get("children"):
+            stack = list(reversed(tree["children"]))
+            while stack:
+                node = stack.pop()
+                if node.get("text_content"):
+                    yield node.get("id"), node["text_content"]
+                stack.extend(reversed(node.get("children", [])))
+        elif text:
+            for paragraph in re.split(r"\n\s*\n", text):
+                if paragraph.strip():
+                    yield None, paragraph
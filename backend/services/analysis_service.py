@@ -3,20 +3,39 @@ Analysis orchestration service
 Coordinates document analysis workflow
 """
 import asyncio
+import hashlib
 import time
-from typing import Dict, List
+from typing import Dict, List, Optional
 from .mistral_service import MistralService
+from .definition_graph import DefinitionGraph
 from schemas import TimelineStep, Scenario
 
+# Bump when prompts or post-processing change, so in-flight/reused results never mix versions
+PIPELINE_VERSION = "1"
+
 class AnalysisService:
     def __init__(self):
         self.mistral = MistralService()
     
-    async def analyze_document(self, text: str) -> Dict:
+    def flight_key(self, text: str) -> str:
+        """(document content hash, pipeline version) key for coalescing identical analyses"""
+        content_hash = hashlib.sha256((text or "").encode("utf-8")).hexdigest()
+        return f"analysis:{PIPELINE_VERSION}:{self.mistral.model}:{content_hash}"
+    
+    async def analyze_document(
+        self,
+        text: str,
+        tree: Optional[Dict] = None,
+        prior: Optional[Dict] = None,
+        context_text: Optional[str] = None
+    ) -> Dict:
         """
         Orchestrate full document analysis workflow
         Returns timeline steps and scenarios for frontend
+        prior: reuse plan from a near-duplicate draft (services.analysis_reuse); reused parts skip the LLM
+        context_text: compacted text for conflict/scenario prompts (services.clause_memo); defaults to text
         """
+        context_text = context_text or text
         start_time = time.time()
         timeline = []
         
@@ -25,19 +44,14 @@ class AnalysisService:
             "id": 1,
             "type": "system",
             "title": "Analysis Started",
-            "message": "Processing document with Mistral AI (European infrastructure, GDPR-compliant)",
+            "message": self._started_message(prior),
             "timestamp": "Just now"
         })
         
         # Step 2: Extract definitions (parallel start)
-        definitions = await self.mistral.extract_definitions(text)
-        timeline.append({
-            "id": 2,
-            "type": "success",
-            "title": "Definitions Verified",
-            "message": f"{len(definitions)} definitions found. No circular dependencies detected.",
-            "timestamp": f"{int((time.time() - start_time) * 1000)}ms"
-        })
+        definitions = await self._definitions(text, tree, prior)
+        definition_graph = DefinitionGraph.analyze(definitions, text, tree)
+        timeline.append(self._definitions_step(definitions, definition_graph, start_time))
         
         # Step 3: Analyzing termination clauses
         timeline.append({
@@ -49,7 +63,7 @@ class AnalysisService:
         })
         
         # Step 4: Conflict analysis
-        conflict_analysis = await self.mistral.analyze_conflicts(text, definitions)
+        conflict_analysis = await self._conflicts(context_text, definitions, prior)
         
         if conflict_analysis.get("has_conflict"):
             conflict_type = conflict_analysis.get("conflict_type", "Unknown").replace("_", " ").title()
@@ -89,7 +103,10 @@ class AnalysisService:
             })
         
         # Step 5: Generate scenarios (can run in parallel with conflict analysis)
-        scenarios_data = await self.mistral.generate_scenarios(text, definitions)
+        if prior and prior.get("scenarios") is not None:
+            scenarios_data = prior["scenarios"]
+        else:
+            scenarios_data = await self.mistral.generate_scenarios(context_text, definitions)
         
         # Calculate total duration
         duration_ms = int((time.time() - start_time) * 1000)
@@ -98,11 +115,18 @@ class AnalysisService:
             "timeline": timeline,
             "scenarios": scenarios_data,
             "definitions": definitions,
+            "definition_graph": definition_graph,
             "conflict_analysis": conflict_analysis,
             "duration_ms": duration_ms
         }
 
-    async def analyze_document_generator(self, text: str):
+    async def analyze_document_generator(
+        self,
+        text: str,
+        tree: Optional[Dict] = None,
+        prior: Optional[Dict] = None,
+        context_text: Optional[str] = None
+    ):
         """
         Generator that yields progress updates and results in real-time
         Yields JSON-compatible dicts:
@@ -110,6 +134,7 @@ class AnalysisService:
         - {"type": "timeline_step", "data": {...}}
         - {"type": "result", "data": {...}}
         """
+        context_text = context_text or text
         start_time = time.time()
         
         # Initial Progress
@@ -120,7 +145,7 @@ class AnalysisService:
             "id": 1,
             "type": "system",
             "title": "Analysis Started",
-            "message": "Processing document with Mistral AI (European infrastructure, GDPR-compliant)",
+            "message": self._started_message(prior),
             "timestamp": "Just now"
         }
         yield {"type": "timeline_step", "data": step1}
@@ -132,15 +157,10 @@ class AnalysisService:
         
         # Step 2: Extract definitions
         yield {"type": "progress", "stage": "Extracting Definitions...", "percent": 30}
-        definitions = await self.mistral.extract_definitions(text)
+        definitions = await self._definitions(text, tree, prior)
+        definition_graph = DefinitionGraph.analyze(definitions, text, tree)
         
-        step2 = {
-            "id": 2,
-            "type": "success",
-            "title": "Definitions Verified",
-            "message": f"{len(definitions)} definitions found. No circular dependencies detected.",
-            "timestamp": f"{int((time.time() - start_time) * 1000)}ms"
-        }
+        step2 = self._definitions_step(definitions, definition_graph, start_time)
         yield {"type": "timeline_step", "data": step2}
         
         # Step 3: Analyze conflicts (Start)
@@ -156,7 +176,7 @@ class AnalysisService:
         
         # Step 4: Actual Conflict Analysis
         yield {"type": "progress", "stage": "Cross-Referencing...", "percent": 70}
-        conflict_analysis = await self.mistral.analyze_conflicts(text, definitions)
+        conflict_analysis = await self._conflicts(context_text, definitions, prior)
         
         if conflict_analysis.get("has_conflict"):
             conflict_type = conflict_analysis.get("conflict_type", "Unknown").replace("_", " ").title()
@@ -201,7 +221,10 @@ class AnalysisService:
         
         # Step 5: Generate Scenarios
         yield {"type": "progress", "stage": "Generating Scenarios...", "percent": 90}
-        scenarios_data = await self.mistral.generate_scenarios(text, definitions)
+        if prior and prior.get("scenarios") is not None:
+            scenarios_data = prior["scenarios"]
+        else:
+            scenarios_data = await self.mistral.generate_scenarios(context_text, definitions)
         
         yield {"type": "progress", "stage": "Finalizing...", "percent": 100}
         
@@ -211,7 +234,58 @@ class AnalysisService:
             "timeline": [step1, step2, step3, step4, step5], # In a real implementation we might accumulate these better
             "scenarios": scenarios_data,
             "definitions": definitions,
+            "definition_graph": definition_graph,
             "conflict_analysis": conflict_analysis,
             "duration_ms": duration_ms
         }
         yield {"type": "result", "data": final_result}
+
+    @staticmethod
+    def _definitions_step(definitions: List[Dict], graph: Dict, start_time: float) -> Dict:
+        """Timeline step 2, reporting the definition graph checks"""
+        parts = [f"{len(definitions)} definitions found."]
+        if graph["cycles"]:
+            loops = "; ".join(" -> ".join(cycle + cycle[:1]) for cycle in graph["cycles"][:3])
+            parts.append(f"Circular definitions: {loops}.")
+        else:
+            parts.append("No circular dependencies detected.")
+        if graph["undefined_terms"]:
+            parts.append(f"{len(graph['undefined_terms'])} terms used but not defined ({', '.join(graph['undefined_terms'][:5])}).")
+        if graph["unused_terms"]:
+            parts.append(f"{len(graph['unused_terms'])} defined terms never used.")
+
+        return {
+            "id": 2,
+            "type": "warning" if graph["cycles"] or graph["undefined_terms"] else "success",
+            "title": "Definitions Verified",
+            "message": " ".join(parts),
+            "timestamp": f"{int((time.time() - start_time) * 1000)}ms"
+        }
+
+    async def _definitions(self, text: str, tree: Optional[Dict], prior: Optional[Dict]) -> List[Dict]:
+        if prior and prior.get("definitions") is not None:
+            return prior["definitions"]
+        return await self.mistral.extract_definitions(text, tree)
+
+    async def _conflicts(self, text: str, definitions: List[Dict], prior: Optional[Dict]) -> Dict:
+        if prior and prior.get("conflict_analysis") is not None:
+            return prior["conflict_analysis"]
+        return await self.mistral.analyze_conflicts(text, definitions)
+
+    @staticmethod
+    def _started_message(prior: Optional[Dict]) -> str:
+        message = "Processing document with Mistral AI (European infrastructure, GDPR-compliant)"
+        if not prior:
+            return message
+        diff = prior["diff"]
+        reused = [name for name, key in (("definitions", "definitions"), ("conflict analysis", "conflict_analysis"))
+                  if prior.get(key) is not None]
+        reusing = f"reusing {', '.join(reused) if reused else 'unchanged scenario results only'}."
+        if prior.get("kind") == "edit":
+            changed = len(diff["changed_nodes"]) + diff["added"]
+            return f"{message}. {changed} clause{'s' if changed != 1 else ''} edited since the last analysis; {reusing}"
+        changed = diff["added"] + diff["removed"]
+        return (
+            f"{message}. {prior['similarity']:.0%} similar to a previous draft "
+            f"({changed} paragraph{'s' if changed != 1 else ''} changed); {reusing}"
+        )
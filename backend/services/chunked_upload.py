@@ -0,0 +1,301 @@
+"""
+Resumable chunked uploads.
+
+For files too large to send reliably in one request (data-room exports with
+embedded exhibits): the client creates a session (filename, total size,
+optionally the SHA-256 of the whole file), PUTs numbered chunks, each with
+its SHA-256, in any order and as often as needed, then commits.
+
+Everything lives on disk under UPLOAD_SESSION_DIR: a manifest per session and
+one file per chunk. A chunk is written to a temporary file, checked against
+its size and checksum and only then renamed into place, so a stored chunk is
+always complete. After a dropped connection or a worker restart, status()
+lists the chunks already stored and the client resends only the others.
+
+assemble() concatenates the chunks in order into one file, hashing while
+copying and checking the declared size / checksum, and then drops the
+chunks; the assembled file is what ingestion reads (as an UploadSpool).
+Once a document was created from it, committed() records the document id,
+so a repeated commit returns the same document. A commit holds the session's
+lock file (committing()) from assembly to committed(), so two concurrent
+commits cannot both assemble or both ingest; the second gets CommitInProgress.
+
+Sessions untouched for SESSION_TTL_SECONDS are removed on the next create().
+Limit: MAX_CHUNKED_UPLOAD_MB for the whole file, by default the same as
+MAX_UPLOAD_MB: the assembled file is ingested like a direct upload, so this
+only makes large uploads resumable, not larger.
+"""
+import asyncio
+import hashlib
+import json
+import math
+import os
+import re
+import shutil
+import tempfile
+import time
+import uuid
+from contextlib import contextmanager
+from typing import AsyncIterator, Dict, Iterator, Optional, Tuple
+
+from .upload_spool import max_upload_bytes
+
+DEFAULT_SESSION_DIR = os.path.join(tempfile.gettempdir(), "axiom-upload-sessions")
+DEFAULT_CHUNK_SIZE = 8 * 1024 * 1024
+MIN_CHUNK_SIZE = 256 * 1024
+MAX_CHUNK_SIZE = 32 * 1024 * 1024
+SESSION_TTL_SECONDS = 24 * 3600
+# A commit lock older than this was left by a crashed worker
+COMMIT_LOCK_SECONDS = 3600
+COPY_BUFFER = 1024 * 1024
+
+_UPLOAD_ID = re.compile(r"^[0-9a-f]{32}$")
+_SHA256 = re.compile(r"^[0-9a-f]{64}$")
+_ASSEMBLED = "upload.bin"
+_MANIFEST = "manifest.json"
+_COMMIT_LOCK = "commit.lock"
+
+
+class CommitInProgress(Exception):
+    """Another request is committing this session"""
+
+
+class ChunkedUploadStore:
+    """Upload sessions, their chunks and manifests on disk"""
+
+    def __init__(
+        self,
+        session_dir: Optional[str] = None,
+        max_size: Optional[int] = None,
+        ttl: float = SESSION_TTL_SECONDS
+    ):
+        self.session_dir = session_dir or os.getenv("UPLOAD_SESSION_DIR", DEFAULT_SESSION_DIR)
+        if max_size is None:
+            try:
+                max_size = int(os.environ["MAX_CHUNKED_UPLOAD_MB"]) * 1024 * 1024
+            except (KeyError, ValueError):
+                max_size = max_upload_bytes()
+        self.max_size = max_size
+        self.ttl = ttl
+
+    def create(self, filename: str, size: int, chunk_size: Optional[int] = None, sha256: Optional[str] = None) -> Dict:
+        """New session; raises ValueError on an invalid or oversized declaration"""
+        filename = os.path.basename(filename or "")
+        chunk_size = chunk_size or DEFAULT_CHUNK_SIZE
+        if not filename:
+            raise ValueError("filename is required")
+        if size <= 0:
+            raise ValueError("File is empty")
+        if size > self.max_size:
+            raise ValueError(f"File exceeds the {self.max_size // (1024 * 1024)} MB limit")
+        if not MIN_CHUNK_SIZE <= chunk_size <= MAX_CHUNK_SIZE:
+            raise ValueError(f"chunk_size must be between {MIN_CHUNK_SIZE} and {MAX_CHUNK_SIZE} bytes")
+        if sha256 is not None and not _SHA256.match(sha256.lower()):
+            raise ValueError("sha256 must be a hex SHA-256 digest")
+
+        self.sweep()
+        upload_id = uuid.uuid4().hex
+        os.makedirs(self._path(upload_id))
+        self._save(upload_id, {
+            "upload_id": upload_id,
+            "filename": filename,
+            "size": size,
+            "chunk_size": chunk_size,
+            "chunks": math.ceil(size / chunk_size),
+            "sha256": sha256.lower() if sha256 else None,
+            "created_at": time.time(),
+            "assembled": None,
+            "document_id": None
+        })
+        return self.status(upload_id)
+
+    def status(self, upload_id: str) -> Dict:
+        """Manifest plus the chunk indexes stored so far; KeyError for unknown sessions"""
+        manifest = self._load(upload_id)
+        if manifest["assembled"]:
+            received = list(range(manifest["chunks"]))
+        else:
+            received = sorted(
+                int(name[len("chunk-"):]) for name in os.listdir(self._path(upload_id))
+                if name.startswith("chunk-") and name[len("chunk-"):].isdigit()
+            )
+        return {**manifest, "received": received, "complete": len(received) == manifest["chunks"]}
+
+    async def write_chunk(self, upload_id: str, index: int, body: AsyncIterator[bytes], checksum: Optional[str]) -> Dict:
+        """Store chunk `index` from a byte stream if it matches its length and SHA-256"""
+        manifest = self._load(upload_id)
+        if manifest["assembled"]:
+            raise ValueError("Upload was already committed")
+        if not 0 <= index < manifest["chunks"]:
+            raise ValueError(f"Chunk index must be between 0 and {manifest['chunks'] - 1}")
+        if not checksum or not _SHA256.match(checksum.lower()):
+            raise ValueError("A hex SHA-256 checksum of the chunk is required")
+        expected = min(manifest["chunk_size"], manifest["size"] - index * manifest["chunk_size"])
+
+        target = self._chunk_path(upload_id, index)
+        partial = f"{target}.{uuid.uuid4().hex}.part"
+        digest = hashlib.sha256()
+        size = 0
+        buffered = bytearray()
+        # Disk writes, hashing and fsync run in a worker thread: a 32 MB chunk
+        # must not stall the event loop
+        out = await asyncio.to_thread(open, partial, "wb")
+        try:
+            async for data in body:
+                size += len(data)
+                if size > expected:
+                    raise ValueError(f"Chunk {index} is longer than {expected} bytes")
+                buffered += data
+                if len(buffered) >= COPY_BUFFER:
+                    await asyncio.to_thread(_write, out, digest, bytes(buffered))
+                    buffered.clear()
+            await asyncio.to_thread(_write, out, digest, bytes(buffered))
+            await asyncio.to_thread(_sync_close, out)
+            if size != expected:
+                raise ValueError(f"Chunk {index} has {size} bytes, expected {expected}")
+            if digest.hexdigest() != checksum.lower():
+                raise ValueError(f"Checksum mismatch for chunk {index}")
+            os.replace(partial, target)
+        finally:
+            out.close()
+            if os.path.exists(partial):
+                os.remove(partial)
+        os.utime(self._path(upload_id))  # activity, for the TTL sweep
+
+        status = self.status(upload_id)
+        return {"upload_id": upload_id, "index": index, "received": len(status["received"]), "chunks": status["chunks"]}
+
+    def assemble(self, upload_id: str) -> Tuple[str, int, str]:
+        """
+        (path, size, sha256) of the whole file; ValueError while chunks are
+        missing or it does not verify. Call it under committing().
+        """
+        manifest = self._load(upload_id)
+        path = os.path.join(self._path(upload_id), _ASSEMBLED)
+        if manifest["assembled"]:
+            return path, manifest["assembled"]["size"], manifest["assembled"]["sha256"]
+
+        status = self.status(upload_id)
+        if not status["complete"]:
+            missing = sorted(set(range(manifest["chunks"])) - set(status["received"]))
+            raise ValueError(f"{len(missing)} chunks missing (first: {missing[0]})")
+
+        digest = hashlib.sha256()
+        size = 0
+        partial = f"{path}.part"
+        try:
+            fd = os.open(partial, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        except FileExistsError:
+            raise CommitInProgress(upload_id)
+        try:
+            with os.fdopen(fd, "wb") as out:
+                for index in range(manifest["chunks"]):
+                    with open(self._chunk_path(upload_id, index), "rb") as chunk:
+                        while True:
+                            data = chunk.read(COPY_BUFFER)
+                            if not data:
+                                break
+                            digest.update(data)
+                            size += len(data)
+                            out.write(data)
+                out.flush()
+                os.fsync(out.fileno())
+            sha256 = digest.hexdigest()
+            if size != manifest["size"] or (manifest["sha256"] and sha256 != manifest["sha256"]):
+                raise ValueError("Assembled file does not match the declared size / sha256")
+        except BaseException:
+            os.remove(partial)
+            raise
+        os.replace(partial, path)
+
+        manifest["assembled"] = {"size": size, "sha256": sha256}
+        self._save(upload_id, manifest)
+        for index in range(manifest["chunks"]):
+            os.remove(self._chunk_path(upload_id, index))
+        return path, size, sha256
+
+    @contextmanager
+    def committing(self, upload_id: str) -> Iterator[None]:
+        """Hold the session's commit lock; CommitInProgress if another request has it"""
+        lock = os.path.join(self._path(upload_id), _COMMIT_LOCK)
+        self._load(upload_id)
+        try:
+            if time.time() - os.path.getmtime(lock) > COMMIT_LOCK_SECONDS:
+                os.remove(lock)
+        except FileNotFoundError:
+            pass
+        try:
+            os.close(os.open(lock, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600))
+        except FileExistsError:
+            raise CommitInProgress(upload_id)
+        try:
+            # Left by a worker that died while assembling
+            partial = os.path.join(self._path(upload_id), f"{_ASSEMBLED}.part")
+            if os.path.exists(partial):
+                os.remove(partial)
+            yield
+        finally:
+            if os.path.exists(lock):
+                os.remove(lock)
+
+    def committed(self, upload_id: str, document_id: str):
+        """Ingested as document_id: keep only the manifest"""
+        manifest = self._load(upload_id)
+        manifest["document_id"] = str(document_id)
+        self._save(upload_id, manifest)
+        path = os.path.join(self._path(upload_id), _ASSEMBLED)
+        if os.path.exists(path):
+            os.remove(path)
+
+    def discard(self, upload_id: str):
+        self._load(upload_id)
+        shutil.rmtree(self._path(upload_id), ignore_errors=True)
+
+    def sweep(self) -> int:
+        """Remove sessions untouched for longer than the TTL; returns how many"""
+        if not os.path.isdir(self.session_dir):
+            return 0
+        removed = 0
+        cutoff = time.time() - self.ttl
+        for name in os.listdir(self.session_dir):
+            path = os.path.join(self.session_dir, name)
+            if _UPLOAD_ID.match(name) and os.path.getmtime(path) < cutoff:
+                shutil.rmtree(path, ignore_errors=True)
+                removed += 1
+        return removed
+
+    # ------------------------------------------------------------------
+
+    def _path(self, upload_id: str) -> str:
+        if not _UPLOAD_ID.match(upload_id or ""):
+            raise KeyError(upload_id)
+        return os.path.join(self.session_dir, upload_id)
+
+    def _chunk_path(self, upload_id: str, index: int) -> str:
+        return os.path.join(self._path(upload_id), f"chunk-{index:06d}")
+
+    def _load(self, upload_id: str) -> Dict:
+        try:
+            with open(os.path.join(self._path(upload_id), _MANIFEST), encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            raise KeyError(upload_id)
+
+    def _save(self, upload_id: str, manifest: Dict):
+        path = os.path.join(self._path(upload_id), _MANIFEST)
+        with open(f"{path}.part", "w", encoding="utf-8") as f:
+            json.dump(manifest, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(f"{path}.part", path)
+
+
+def _write(out, digest, data: bytes):
+    digest.update(data)
+    out.write(data)
+
+
+def _sync_close(out):
+    out.flush()
+    os.fsync(out.fileno())
+    out.close()
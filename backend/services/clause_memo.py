@@ -0,0 +1,178 @@
+"""
+Clause-level memoization across contracts.
+
+Each clause is fingerprinted by its normalized text (numbering, case and
+whitespace stripped), and its LLM findings (classification, terms, summary,
+boilerplate flag) are stored in ClauseMemo under (hash, model, prompt version).
+A new analysis only summarizes clauses never seen before; boilerplate clauses
+with a memo from an earlier request are replaced by their one-line summary in
+the LLM context, so conflict analysis and scenario tests stop re-sending
+standard wording. Memos written by this request are stored but not yet
+trusted to stand in for the clause.
+"""
+import hashlib
+import re
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from models import ClauseMemo
+from .mistral_service import MistralService
+
+# Bump when the clause summary prompt changes (old memos stop matching)
+CLAUSE_PROMPT_VERSION = "1"
+
+# Clauses per summarization call, calls in flight, and characters sent per clause
+CLAUSE_BATCH_SIZE = 25
+CLAUSE_CONCURRENCY = 4
+MAX_CLAUSE_CHARS = 1500
+
+_LEADING_NUMBER = re.compile(r'^\s*(?:(?:article|section|clause|schedule)\s+)?(?:\d+(?:\.\d+)*[.):]?|[ivxlcdm]+[.)]|\([a-z0-9]+\))\s+', re.IGNORECASE)
+_NON_WORD = re.compile(r'[^\w\s]')
+_WS = re.compile(r'\s+')
+
+
+class ClauseMemoService:
+    """Fingerprinting, memo lookup and compact LLM context for documents"""
+
+    def __init__(self, mistral: Optional[MistralService] = None):
+        self.mistral = mistral or MistralService()
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        """Numbering-, case-, punctuation- and whitespace-insensitive clause text"""
+        lines = [_LEADING_NUMBER.sub("", line) for line in (text or "").splitlines()]
+        cleaned = _NON_WORD.sub(" ", " ".join(lines).lower())
+        return _WS.sub(" ", cleaned).strip()
+
+    @staticmethod
+    def fingerprint(text: str) -> str:
+        return hashlib.sha256(ClauseMemoService.normalize(text).encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def clauses(tree: Optional[Dict], text: str) -> List[Dict]:
+        """
+        Clause units in document order: each section with its points, plus
+        stand-alone paragraphs. Without a tree, blank-line separated paragraphs.
+        """
+        units: List[Dict] = []
+        if tree and tree.get("children"):
+            stack = list(reversed(tree["children"]))
+            while stack:
+                node = stack.pop()
+                if node.get("an_type") == "section":
+                    parts = []
+                    inner = [node]
+                    while inner:
+                        current = inner.pop()
+                        if current.get("text_content"):
+                            parts.append(current["text_content"])
+                        inner.extend(reversed(current.get("children", [])))
+                    units.append({"section": node.get("an_num"), "text": "\n".join(parts)})
+                    continue
+                if node.get("text_content"):
+                    units.append({"section": node.get("an_num"), "text": node["text_content"]})
+                stack.extend(reversed(node.get("children", [])))
+        elif text:
+            for paragraph in re.split(r'\n\s*\n', text):
+                if paragraph.strip():
+                    units.append({"section": None, "text": paragraph.strip()})
+
+        for unit in units:
+            unit["hash"] = ClauseMemoService.fingerprint(unit["text"])
+        return units
+
+    async def digest(self, tree: Optional[Dict], text: str, db: Session) -> Dict:
+        """
+        Attach memos to every clause, summarizing only unseen ones.
+        Returns {"clauses": [...], "reused": n, "novel": n, "context_text": str}
+        """
+        units = self.clauses(tree, text)
+        memos = self._lookup({u["hash"] for u in units}, db)
+        reused = sum(1 for u in units if u["hash"] in memos)
+
+        novel: Dict[str, Dict] = {}
+        fresh = set()
+        for unit in units:
+            if unit["hash"] not in memos and unit["hash"] not in novel and self.normalize(unit["text"]):
+                novel[unit["hash"]] = unit
+
+        if novel and self.mistral.client:
+            summaries = await self.mistral.summarize_clauses(
+                [{"id": h, "section": u["section"], "text": u["text"][:MAX_CLAUSE_CHARS]} for h, u in novel.items()],
+                batch_size=CLAUSE_BATCH_SIZE,
+                concurrency=CLAUSE_CONCURRENCY
+            )
+            for clause_hash, summary in summaries.items():
+                if clause_hash not in novel:
+                    continue
+                memo = ClauseMemo(
+                    clause_hash=clause_hash,
+                    model_used=self.mistral.model,
+                    prompt_version=CLAUSE_PROMPT_VERSION,
+                    classification=str(summary.get("classification", "general"))[:50],
+                    is_boilerplate=bool(summary.get("boilerplate", False)),
+                    terms=summary.get("terms", []),
+                    findings=summary.get("findings", "")
+                )
+                # A concurrent digest may have stored the same clause first
+                try:
+                    with db.begin_nested():
+                        db.add(memo)
+                except IntegrityError:
+                    pass
+                fresh.add(clause_hash)
+                memos[clause_hash] = memo
+        if memos:
+            db.commit()
+
+        for unit in units:
+            memo = memos.get(unit["hash"])
+            unit["memo"] = {
+                "classification": memo.classification,
+                "boilerplate": bool(memo.is_boilerplate),
+                "terms": memo.terms or [],
+                "findings": memo.findings or "",
+                "fresh": unit["hash"] in fresh
+            } if memo is not None else None
+
+        return {
+            "clauses": units,
+            "reused": reused,
+            "novel": len(novel),
+            "context_text": self.compact_text(units)
+        }
+
+    @staticmethod
+    def compact_text(units: List[Dict]) -> str:
+        """
+        Document text for LLM prompts: boilerplate with a memo from an earlier
+        request collapses to its summary
+        """
+        parts = []
+        for unit in units:
+            memo = unit.get("memo")
+            if memo and memo["boilerplate"] and memo["findings"] and not memo.get("fresh"):
+                label = f"Section {unit['section']}" if unit.get("section") else "Clause"
+                parts.append(f"[{label} - standard {memo['classification'].replace('_', ' ')}: {memo['findings']}]")
+            else:
+                parts.append(unit["text"])
+        return "\n\n".join(parts)
+
+    def _lookup(self, hashes, db: Session) -> Dict[str, ClauseMemo]:
+        if not hashes:
+            return {}
+        rows = db.query(ClauseMemo).filter(
+            ClauseMemo.clause_hash.in_(list(hashes)),
+            ClauseMemo.model_used == self.mistral.model,
+            ClauseMemo.prompt_version == CLAUSE_PROMPT_VERSION
+        ).all()
+        memos = {}
+        now = datetime.utcnow()
+        for row in rows:
+            row.hit_count = (row.hit_count or 0) + 1
+            row.last_used_at = now
+            memos[row.clause_hash] = row
+        return memos
@@ -1,162 +1,350 @@
 from docx import Document
+from docx.enum.style import WD_STYLE_TYPE
+from docx.oxml import OxmlElement
 from docx.oxml.ns import qn
+import copy
 import io
+import uuid
+from lxml.etree import SubElement
 from typing import List, Dict, Optional
 
+from .docx_stream import iter_paragraphs, paragraph_text
+from .redline import Redliner, DEFAULT_AUTHOR
+
+# Operation types apply_operations understands
+OPERATION_TYPES = ("update_text", "split", "insert", "delete", "move")
+
+_RPR = qn('w:rPr')
+_T = qn('w:t')
+_XML_SPACE = "{http://www.w3.org/XML/1998/namespace}space"
+
 class ComposerService:
     """
     The 'Bridge' between the Shadow Tree (logic) and the Skeleton DOCX (storage).
     Performs surgical edits based on stable paraIds.
+    Edits work directly on the lxml body (w:p elements indexed by paraId), so a
+    batch of operations is one pass with no python-docx proxy objects.
+    track_changes=True writes text edits, inserts and deletes as tracked
+    changes (redlines for export; the stored skeleton is always edited plainly).
     """
 
-    def __init__(self, file_content: bytes):
+    def __init__(self, file_content: bytes, track_changes: bool = False, author: str = DEFAULT_AUTHOR):
         self.source_bytes = file_content
         try:
             self.doc = Document(io.BytesIO(file_content))
             self._build_id_map()
         except Exception as e:
             raise ValueError(f"Failed to load skeleton: {e}")
+        self.redliner = Redliner(self.doc.element.body, author) if track_changes else None
+
+        # Touched paraIds in first-touch order, and paraIds created by splits/inserts
+        self.touched: List[str] = []
+        self.inserted: Dict[str, List[str]] = {}
+        self.deleted: set = set()
+        self.structural = False  # Insert-before / move: the stored tree must be re-parsed
+        self._styles: Dict[str, Optional[str]] = {}
+        self._style_names: Dict[Optional[str], str] = {}
 
     def _build_id_map(self):
-        """Index all paragraphs by their w:paraId"""
+        """Index all body paragraphs (w:p elements, also in tables and text boxes) by their w:paraId"""
         self.para_map = {}
-        for p in self.doc.paragraphs:
+        for p in iter_paragraphs(self.doc.element.body):
             # We assume ID Normalizer has run, so paraId SHOULD exist.
             # But we handle the None case gracefully.
-            para_id = p._element.get(qn('w:paraId'))
+            para_id = p.get(qn('w:paraId'))
             if para_id:
                 self.para_map[para_id] = p
 
-    def apply_operations(self, operations: List[Dict]) -> bytes:
+    def apply_operations(self, operations: List[Dict], save: bool = True) -> Optional[bytes]:
         """
-        Apply a sequence of explicit operations to the document.
+        Apply a batch of explicit operations to the document.
+        save=False keeps the edits in memory only (edit sessions serialize on flush via save()).
         Operations schema:
         [
             {"type": "update_text", "id": "uuid", "text": "New content"},
-            # Phase B ops:
-            # {"type": "split", "id": "uuid", "parts": ["Part A", "Part B"]}
+            {"type": "split", "id": "uuid", "parts": ["Part A", "Part B"]},
+            {"type": "insert", "id": "anchor", "text": "New paragraph", "position": "after" | "before"},
+            {"type": "delete", "id": "uuid"},
+            {"type": "move", "id": "uuid", "after": "anchor"}   # or "before": "anchor"
         ]
+        The whole batch is validated first (raises ValueError, nothing applied).
+        Splits and inserts record the paraIds they create in op["new_ids"] /
+        op["new_id"] (and reuse them when present), so a logged operation
+        replays to the same document.
         """
+        self._validate(operations)
+
         for op in operations:
-            op_type = op.get("type")
-            node_id = op.get("id")
-            
-            if not node_id in self.para_map:
-                print(f"Warning: Node {node_id} not found in skeleton. Skipping.")
-                continue
-                
-            target_para = self.para_map[node_id]
+            op_type = op["type"]
+            node_id = op["id"]
+            target = self.para_map[node_id]
 
             if op_type == "update_text":
-                self._update_paragraph_text(target_para, op.get("text", ""))
-            
+                self._rewrite(target, op.get("text", ""))
+                self._touch(node_id)
+
             elif op_type == "split":
-                # Phase B: The Splitter
-                self._split_paragraph(target_para, op.get("parts", []))
-        
+                op["new_ids"] = self._split_paragraph(target, op.get("parts", []), op.get("new_ids"))
+                self._touch(node_id)
+
+            elif op_type == "insert":
+                before = op.get("position") == "before"
+                op["new_id"] = self._insert_paragraph(target, op.get("text", ""), before, op.get("new_id"))
+                if before:
+                    self.structural = True
+                else:
+                    self._touch(node_id)
+
+            elif op_type == "delete":
+                self._touch(node_id)
+                if self.redliner:
+                    self.redliner.mark_deleted(target)
+                else:
+                    target.getparent().remove(target)
+                del self.para_map[node_id]
+                self.deleted.add(node_id)
+
+            elif op_type == "move":
+                anchor = self.para_map[op.get("after") or op.get("before")]
+                if op.get("after"):
+                    anchor.addnext(target)
+                else:
+                    anchor.addprevious(target)
+                self.structural = True
+
+        return self._save() if save else None
+
+    def save(self) -> bytes:
+        """Serialize the current in-memory document"""
         return self._save()
 
-    def _split_paragraph(self, target_para, parts: List[str]):
+    def changes(self) -> Optional[List[Dict]]:
+        """
+        What apply_operations touched, for patching the stored tree
+        (DocumentService.patch_docx_structure) instead of re-parsing:
+        [{"id": paraId, "text", "style", "inserted": [{"id", "text"}]}]
+        Deleted paragraphs report empty text. None after moves or
+        insert-before (the structure must be re-parsed).
+        """
+        if self.structural:
+            return None
+        position = {}
+        if self.inserted:
+            position = {el: i for i, el in enumerate(iter_paragraphs(self.doc.element.body))}
+
+        changes = []
+        for para_id in self.touched:
+            created = [new_id for new_id in self.inserted.get(para_id, []) if new_id in self.para_map]
+            created.sort(key=lambda new_id: position[self.para_map[new_id]])
+            changes.append({
+                "id": para_id,
+                "text": "" if para_id in self.deleted else paragraph_text(self.para_map[para_id]),
+                "style": self._style_name(self._styles.get(para_id)),
+                "inserted": [
+                    {"id": new_id, "text": paragraph_text(self.para_map[new_id])}
+                    for new_id in created
+                ]
+            })
+        return changes
+
+    def clear_changes(self):
+        """Forget recorded changes (after they were applied to the stored tree)"""
+        self.touched = []
+        self.inserted = {}
+        self.deleted = set()
+        self.structural = False
+        self._styles = {}
+
+    # ------------------------------------------------------------------
+    # Validation
+    # ------------------------------------------------------------------
+
+    def _validate(self, operations: List[Dict]):
+        """Check the whole batch against the paraIds that will exist at each step"""
+        known = set(self.para_map)
+        cell_paragraphs: Dict = {}
+        cell_of: Dict = {}
+        errors = []
+
+        def count(cell) -> int:
+            return cell_paragraphs.setdefault(cell, len(cell.findall(qn('w:p'))))
+
+        for i, op in enumerate(operations):
+            op_type, node_id = op.get("type"), op.get("id")
+            if op_type not in OPERATION_TYPES:
+                errors.append(f"op {i}: unknown type {op_type!r}")
+                continue
+            if node_id not in known:
+                errors.append(f"op {i}: paragraph {node_id!r} not found")
+                continue
+
+            # A table cell must keep at least one paragraph: track how many
+            # each touched cell holds as the batch goes
+            cell = self._cell(node_id, cell_of)
+            if op_type == "split":
+                parts = op.get("parts")
+                if not isinstance(parts, list) or not parts:
+                    errors.append(f"op {i}: split needs a non-empty parts list")
+                    continue
+                new_ids = op.get("new_ids") or []
+                if any(new_id in known for new_id in new_ids):
+                    errors.append(f"op {i}: new_ids already exist")
+                known.update(new_ids)
+                cell_of.update((new_id, cell) for new_id in new_ids)
+                if cell is not None:
+                    cell_paragraphs[cell] = count(cell) + len(parts) - 1
+            elif op_type == "insert":
+                if op.get("new_id") in known:
+                    errors.append(f"op {i}: new_id already exists")
+                if op.get("new_id"):
+                    known.add(op["new_id"])
+                    cell_of[op["new_id"]] = cell
+                if cell is not None:
+                    cell_paragraphs[cell] = count(cell) + 1
+            elif op_type == "delete":
+                if cell is not None:
+                    if count(cell) <= 1:
+                        errors.append(f"op {i}: cannot delete the last paragraph of a table cell")
+                    cell_paragraphs[cell] = count(cell) - 1
+                known.discard(node_id)
+            elif op_type == "move":
+                anchor = op.get("after") or op.get("before")
+                if anchor not in known or anchor == node_id:
+                    errors.append(f"op {i}: move needs an existing 'after' or 'before' paragraph")
+                    continue
+                target = self._cell(anchor, cell_of)
+                if cell is not target:
+                    if cell is not None:
+                        if count(cell) <= 1:
+                            errors.append(f"op {i}: cannot move the last paragraph out of a table cell")
+                        cell_paragraphs[cell] = count(cell) - 1
+                    if target is not None:
+                        cell_paragraphs[target] = count(target) + 1
+                cell_of[node_id] = target
+
+        if errors:
+            raise ValueError("Invalid operations: " + "; ".join(errors[:10]))
+
+    def _cell(self, node_id, cell_of: Dict):
+        """The w:tc a paragraph sits in at this point of the batch (None outside tables)"""
+        if node_id in cell_of:
+            return cell_of[node_id]
+        parent = self.para_map[node_id].getparent() if node_id in self.para_map else None
+        return parent if parent is not None and parent.tag == qn('w:tc') else None
+
+    # ------------------------------------------------------------------
+    # Element edits
+    # ------------------------------------------------------------------
+
+    def _split_paragraph(self, target, parts: List[str], new_ids: Optional[List[str]] = None) -> List[str]:
         """
         Split a paragraph into N paragraphs, cloning the style of the original.
-        The target_para becomes the first part. New paragraphs are inserted after.
+        The target becomes the first part. New paragraphs are inserted after.
+        Returns the paraIds of the new paragraphs (new_ids, when given, are reused).
         """
         if not parts:
-            return
+            return []
 
         # 1. Update the original (first part)
-        self._update_paragraph_text(target_para, parts[0])
-        
-        # 2. Insert subsequent parts
-        current_para = target_para
-        
-        import copy
-        import uuid
-        
-        for i in range(1, len(parts)):
-            new_text = parts[i]
-            
-            # Create a new paragraph by copying the logic of the previous one
-            # note: python-docx doesn't have a clean 'clone' method, so we work with XML
-            
-            # Get the XML element of the current paragraph
-            curr_element = current_para._element
-            
-            # Create a deep copy of the element
-            new_element = copy.deepcopy(curr_element)
-            
-            # Assign a new unique paraId (Critical for future edits)
-            # Word expects 8-char hex, but UUID is robust and accepted
-            new_id = str(uuid.uuid4())
-            new_element.set(qn('w:paraId'), new_id)
-            
-            # Insert the new element after the current one
-            curr_element.addnext(new_element)
-            
-            # Now wrap it in a proxy object so we can edit it safely
-            # We can't simply instantiate Paragraph(new_element, parent) easily without internal API
-            # So we use a trick: we find it in the document (it's now part of the tree)
-            # But searching is slow.
-            
-            # Better way: Modify the XML directly for the text, since we just cloned it
-            # The cloned element has the OLD text runs. We need to clear/update them.
-            
-            # Clear all run texts in the XML
-            # w:r is the run namespace
-            for run_idx, run in enumerate(new_element.findall(qn('w:r'))):
-                # Find the w:t (text) elements
-                texts = run.findall(qn('w:t'))
-                if run_idx == 0:
-                    # Set the text of the first run to our new content
-                    if texts:
-                        texts[0].text = new_text
-                    else:
-                        # Create w:t if missing (unlikely in a clone of text para)
-                        pass 
-                    # Remove other text elements in this run if any
-                    for t in texts[1:]:
-                         run.remove(t)
-                else:
-                    # Remove subsequent runs
-                    new_element.remove(run)
-            
-            # If the first run had no text element (unlikely), we might need to add it.
-            # But assuming the source had text, the clone has text.
-            
-            # Update our cursor to this new paragraph (for the next iteration)
-            # We don't fully need the proxy object if we continue cloning the XML
-            current_para = type('obj', (object,), {'_element': new_element}) # Mock object with _element
-            
-            # Add to our map? 
-            # Ideally yes, but we might not need it for this transaction. 
-            self.para_map[new_id] = current_para # Sort of works if we need it later
-
-    def _update_paragraph_text(self, paragraph, new_text: str):
+        self._rewrite(target, parts[0])
+
+        # 2. Insert subsequent parts, each after the previous one
+        current = target
+        created = []
+        for i, new_text in enumerate(parts[1:]):
+            element = self._new_paragraph_like(target, new_text, new_ids[i] if new_ids and len(new_ids) > i else None)
+            current.addnext(element)
+            current = element
+            self.para_map[element.get(qn('w:paraId'))] = element
+            created.append(element.get(qn('w:paraId')))
+
+        self.inserted.setdefault(target.get(qn('w:paraId')), []).extend(created)
+        return created
+
+    def _insert_paragraph(self, anchor, text: str, before: bool, new_id: Optional[str] = None) -> str:
+        """New paragraph with the anchor's paragraph and first-run formatting"""
+        element = self._new_paragraph_like(anchor, text, new_id)
+        new_id = element.get(qn('w:paraId'))
+        if before:
+            anchor.addprevious(element)
+        else:
+            anchor.addnext(element)
+        self.para_map[new_id] = element
+        self.inserted.setdefault(anchor.get(qn('w:paraId')), []).append(new_id)
+        return new_id
+
+    def _new_paragraph_like(self, template, text: str, new_id: Optional[str] = None):
+        """
+        Fresh w:p carrying the template's w:pPr and its first run's w:rPr.
+        Word expects 8-char hex paraIds, but UUID is robust and accepted.
+        """
+        element = OxmlElement('w:p')
+        element.set(qn('w:paraId'), new_id or str(uuid.uuid4()))
+        if template.pPr is not None:
+            element.append(copy.deepcopy(template.pPr))
+        runs = template.r_lst
+        run = element.add_r()
+        if runs and runs[0].rPr is not None:
+            run.insert(0, copy.deepcopy(runs[0].rPr))
+        self._set_run_text(run, text)
+        if self.redliner:
+            self.redliner.mark_inserted(element)
+        return element
+
+    def _rewrite(self, paragraph, new_text: str):
+        if self.redliner:
+            self.redliner.rewrite(paragraph, new_text)
+        else:
+            self._set_text(paragraph, new_text)
+
+    @staticmethod
+    def _set_text(paragraph, new_text: str):
         """
         Replace text while trying to preserve run-level formatting of the *start*.
-        (Simple preservation strategy: keep the first run's style, clear others)
+        (Simple preservation strategy: keep the first run's style, drop others)
         """
-        if not paragraph.runs:
-            paragraph.add_run(new_text)
+        runs = paragraph.r_lst
+        if not runs:
+            ComposerService._set_run_text(paragraph.add_r(), new_text)
             return
 
         # Heuristic: The first run usually contains the "Paragraph Style" overrides (bold, etc)
-        # We set the first run to the new text, and remove subsequent runs.
         # This destroys "intra-paragraph" formatting (e.g. one bold word in middle),
         # but preserves "paragraph-level" formatting (e.g. the whole thing is bold).
-        
-        # 1. Update first run
-        paragraph.runs[0].text = new_text
-        
-        # 2. Remove subsequent runs
-        # We iterate backwards to avoid index shifting issues, checking we don't delete run 0
-        for i in range(len(paragraph.runs) - 1, 0, -1):
-            # python-docx doesn't have a clean 'remove_run', so we clear text
-            # OR we can remove the element from xml. Clearing text is safer/easier.
-            paragraph.runs[i].text = "" 
-            # If we really want to remove the xml element:
-            # r = paragraph.runs[i]._element
-            # r.getparent().remove(r)
+        ComposerService._set_run_text(runs[0], new_text)
+        for run in runs[1:]:
+            paragraph.remove(run)
+
+    @staticmethod
+    def _set_run_text(run, text: str):
+        """run.text = text, with a direct w:t append for the common plain-text case"""
+        if "\t" in text or "\n" in text or "\r" in text:
+            run.text = text
+            return
+        for child in list(run):
+            if child.tag != _RPR:
+                run.remove(child)
+        t = SubElement(run, _T)
+        t.text = text
+        if text != text.strip():
+            t.set(_XML_SPACE, "preserve")
+
+    # ------------------------------------------------------------------
+    # Change tracking
+    # ------------------------------------------------------------------
+
+    def _touch(self, para_id: str):
+        if para_id in self._styles:
+            return
+        self.touched.append(para_id)
+        # Style id now (cheap); names are resolved once per style in changes()
+        self._styles[para_id] = self.para_map[para_id].style
+
+    def _style_name(self, style_id: Optional[str]) -> str:
+        # Split/insert-created paragraphs carry their anchor's style (cloned pPr)
+        if style_id not in self._style_names:
+            self._style_names[style_id] = self.doc.styles.get_by_id(style_id, WD_STYLE_TYPE.PARAGRAPH).name
+        return self._style_names[style_id]
 
     def _save(self) -> bytes:
         target_stream = io.BytesIO()
@@ -0,0 +1,207 @@
+"""
+Deterministic defined-term extraction.
+
+Finds the definitions a contract declares mechanically, in one linear pass over
+the parsed tree (or plain paragraphs when no tree exists):
+- Quoted terms followed by "means" / "shall mean" / "has the meaning" ...
+- Parenthetical definitions: TechCorp Inc. (the "Company")
+- Unquoted "Term means ..." paragraphs (common where terms are bolded)
+
+The LLM is only needed afterwards to categorize results or fill gaps.
+"""
+import re
+from typing import Dict, List, Optional, Tuple
+
+_OPEN_QUOTE = r'["“‘\']'
+_CLOSE_QUOTE = r'["”’\']'
+_TERM_BODY = r'([A-Z0-9][^"“”‘’]{0,79}?)'
+
+_DEFINING_VERB = (
+    r'(?:shall\s+)?(?:means?|mean\b|shall\s+have\s+the\s+meaning|has\s+the\s+meaning|'
+    r'have\s+the\s+meaning|is\s+defined\s+as|includes?|refers\s+to)'
+)
+
+# "Cause" shall mean ...   /   "Good Reason": means ...
+QUOTED_DEFINITION = re.compile(
+    _OPEN_QUOTE + _TERM_BODY + _CLOSE_QUOTE + r'\s*[:,]?\s*' + _DEFINING_VERB + r'\b[\s:,-]*',
+)
+
+# ... (the "Company") / (each a "Founder") / (hereinafter referred to as "Buyer")
+PARENTHETICAL_DEFINITION = re.compile(
+    r'\(\s*(?:together\s+|collectively\s+|each\s+|hereinafter\s+|individually\s+)?(?:referred\s+to\s+as\s+)?'
+    r'(?:the\s+|a\s+|an\s+|as\s+)?' + _OPEN_QUOTE + _TERM_BODY + _CLOSE_QUOTE + r'\s*\)'
+)
+
+# Affiliate means ... (paragraph start, unquoted)
+UNQUOTED_DEFINITION = re.compile(
+    r'^(?:\(?[a-z0-9]{1,4}[.)]\s+)?([A-Z][\w\'-]*(?:\s+[A-Z][\w\'-]*){0,4})\s+(?:shall\s+)?means\b[\s:,-]*'
+)
+
+# Any quoted capitalised phrase (candidate term usages, used for gap detection)
+QUOTED_PHRASE = re.compile(_OPEN_QUOTE + r'([A-Z][A-Za-z0-9\'\- ]{1,60}?)' + _CLOSE_QUOTE)
+
+# Where a parenthetical definition's subject starts (searching backwards)
+_SUBJECT_BOUNDARY = re.compile(r'(?:[.;:]\s|\)\s*,?\s*(?:and\s+)?|\bbetween\s+|\band\s+(?=[A-Z]))')
+
+# Leading recital verbs to trim from parenthetical subjects ("is entered into as of ...")
+_RECITAL_LEAD = re.compile(
+    r'^(?:is\s+|are\s+)?(?:made\s+|entered\s+into\s+|dated\s+)?(?:as\s+of|on|with\s+effect\s+from)\s+',
+    re.IGNORECASE
+)
+_TRAILING_CONJUNCTION = re.compile(r'[;,]?\s*(?:and|or)?\s*[;,]?\s*$')
+
+# Kinds, best first: an explicit "means" beats a pointer or a parenthetical
+_KIND_RANK = {"means": 0, "unquoted": 1, "parenthetical": 2, "pointer": 3}
+
+_CATEGORY_KEYWORDS = [
+    ("parties", ["company", "founder", "investor", "purchaser", "seller", "buyer", "board", "party", "parties",
+                 "employee", "director", "shareholder", "holder", "landlord", "tenant", "group", "affiliate",
+                 "consultant", "contractor", "licensor", "licensee", "customer", "supplier", "lender", "borrower",
+                 "subsidiary", "corporation", "limited", "inc.", "llc"]),
+    ("time", ["date", "period", "term", "day", "month", "year", "anniversary", "deadline", "notice period"]),
+    ("financial", ["price", "payment", "amount", "fee", "cost", "value", "salary", "consideration", "cap",
+                   "indebtedness", "loss", "$", "€", "£", "dividend"]),
+    ("equity", ["share", "stock", "equity", "vest", "option", "securities", "leaver", "dilution"]),
+    ("conditions", ["reason", "cause", "breach", "event", "default", "change of control", "condition",
+                    "termination", "material adverse", "trigger"]),
+]
+
+
+class DefinitionExtractor:
+    """
+    Linear-time defined-term finder.
+    Returns definitions in the same shape as MistralService.extract_definitions:
+    {"term", "definition", "section", "category"} plus "node_id" / "source" traceability.
+    """
+
+    @staticmethod
+    def extract(text: str, tree: Optional[Dict] = None) -> List[Dict]:
+        found: Dict[str, Dict] = {}
+        for paragraph, section, node_id in DefinitionExtractor._iter_paragraphs(text, tree):
+            for definition in DefinitionExtractor._scan_paragraph(paragraph):
+                definition["section"] = section
+                definition["node_id"] = node_id
+                key = definition["term"].lower()
+                existing = found.get(key)
+                if existing is None or _KIND_RANK[definition["kind"]] < _KIND_RANK[existing["kind"]]:
+                    found[key] = definition
+
+        results = []
+        for definition in found.values():
+            results.append({
+                "term": definition["term"],
+                "definition": definition["definition"],
+                "section": definition["section"],
+                "category": DefinitionExtractor.guess_category(definition["term"], definition["definition"]),
+                "node_id": definition["node_id"],
+                "kind": definition["kind"],
+                "source": "local"
+            })
+        return results
+
+    @staticmethod
+    def find_undefined_quoted_terms(text: str, definitions: List[Dict], limit: int = 20) -> List[Tuple[str, str]]:
+        """
+        Quoted capitalised phrases with no local definition, with a snippet of context.
+        These are the gaps worth handing to the LLM.
+        """
+        known = {d["term"].lower() for d in definitions}
+        gaps = []
+        seen = set()
+        for match in QUOTED_PHRASE.finditer(text):
+            term = match.group(1).strip()
+            key = term.lower()
+            if key in known or key in seen or len(term.split()) > 6:
+                continue
+            seen.add(key)
+            start = max(0, match.start() - 150)
+            gaps.append((term, text[start:match.end() + 250].replace("\n", " ")))
+            if len(gaps) >= limit:
+                break
+        return gaps
+
+    @staticmethod
+    def guess_category(term: str, definition: str) -> str:
+        """Keyword-based category (same buckets the LLM prompt uses)"""
+        term_lower = term.lower()
+        for category, keywords in _CATEGORY_KEYWORDS:
+            if any(k in term_lower for k in keywords):
+                return category
+        definition_lower = definition[:200].lower()
+        for category, keywords in _CATEGORY_KEYWORDS:
+            if any(k in definition_lower for k in keywords):
+                return category
+        return "general"
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _iter_paragraphs(text: str, tree: Optional[Dict]):
+        """Yield (paragraph_text, section_label, node_id) in document order"""
+        if tree and tree.get("children"):
+            # Iterative pre-order walk carrying the nearest numbered ancestor
+            stack = [(child, None) for child in reversed(tree["children"])]
+            while stack:
+                node, inherited = stack.pop()
+                section = node.get("an_num") or inherited
+                if node.get("an_type") == "point" and inherited and node.get("an_num"):
+                    # (a) under 4.2 -> "4.2(a)"
+                    section = f"{inherited}{node['an_num']}"
+                node_text = node.get("text_content") or node.get("text") or ""
+                if node_text:
+                    yield node_text, DefinitionExtractor._section_label(section), node.get("id")
+                for child in reversed(node.get("children", [])):
+                    stack.append((child, section))
+            return
+
+        section = None
+        heading = re.compile(r'^(?:(?:ARTICLE|SECTION|Section|Clause)\s+)?(\d+(?:\.\d+)*)\.?\s')
+        for paragraph in re.split(r'\n\s*\n|\n(?=\s*(?:\d+(?:\.\d+)*\.?\s|\([a-z0-9]+\)\s))', text):
+            paragraph = paragraph.strip()
+            if not paragraph:
+                continue
+            match = heading.match(paragraph)
+            if match:
+                section = match.group(1)
+            yield paragraph, DefinitionExtractor._section_label(section), None
+
+    @staticmethod
+    def _section_label(section: Optional[str]) -> str:
+        if not section:
+            return "Preamble"
+        return section.replace("ARTICLE ", "Article ").replace("SECTION ", "Section ")
+
+    @staticmethod
+    def _scan_paragraph(paragraph: str) -> List[Dict]:
+        results = []
+
+        quoted = list(QUOTED_DEFINITION.finditer(paragraph))
+        for i, match in enumerate(quoted):
+            # The definition runs until the next quoted definition in the same paragraph
+            end = quoted[i + 1].start() if i + 1 < len(quoted) else len(paragraph)
+            body = _TRAILING_CONJUNCTION.sub("", paragraph[match.end():end].strip())
+            kind = "pointer" if "meaning" in match.group(0).lower() else "means"
+            if kind == "pointer":
+                body = f"has the meaning {body}"
+            results.append({"term": match.group(1).strip(), "definition": body, "kind": kind})
+
+        if not quoted:
+            unquoted = UNQUOTED_DEFINITION.match(paragraph)
+            if unquoted:
+                results.append({
+                    "term": unquoted.group(1).strip(),
+                    "definition": _TRAILING_CONJUNCTION.sub("", paragraph[unquoted.end():].strip()),
+                    "kind": "unquoted"
+                })
+
+        for match in PARENTHETICAL_DEFINITION.finditer(paragraph):
+            preceding = paragraph[max(0, match.start() - 300):match.start()]
+            boundaries = list(_SUBJECT_BOUNDARY.finditer(preceding))
+            subject = preceding[boundaries[-1].end():] if boundaries else preceding
+            subject = _RECITAL_LEAD.sub("", subject.strip().strip(",").strip())
+            if subject:
+                results.append({"term": match.group(1).strip(), "definition": subject, "kind": "parenthetical"})
+
+        return results
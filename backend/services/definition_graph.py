@@ -0,0 +1,175 @@
+"""
+Definition dependency graph.
+
+Nodes are defined terms; an edge A -> B means the definition of A uses term B.
+Runs in linear time over the definitions and document nodes (one compiled
+alternation per document) and reports:
+- circular definitions (strongly connected components, Tarjan)
+- terms used but never defined (quoted or recurring Title Case phrases)
+- terms defined but never used outside their own definition
+"""
+import re
+from collections import Counter
+from typing import Dict, List, Optional
+
+from .definition_extractor import DefinitionExtractor
+from .term_index import TermIndex
+
+# Title Case phrases of 2-4 words ("Unvested Shares", "Purchase Price")
+_TITLE_PHRASE = re.compile(r"\b([A-Z][a-z]+(?:[ \t]+[A-Z][a-z]+){1,3})\b")
+
+# Leading words that capitalize a phrase without making it a term
+_LEADING_STOPWORDS = {
+    "the", "this", "that", "these", "those", "a", "an", "in", "if", "any", "each", "no", "all", "such",
+    "upon", "notwithstanding", "subject", "for", "on", "by", "as", "to", "where", "unless", "provided",
+    "save", "except", "nothing", "neither", "either", "following", "its", "their", "his", "her", "our",
+}
+
+# Phrases containing these words are structure, calendar or boilerplate, not defined terms
+_EXCLUDED_WORDS = {
+    "section", "sections", "article", "articles", "schedule", "schedules", "clause", "clauses", "exhibit",
+    "annex", "appendix", "part", "paragraph", "agreement", "january", "february", "march", "april", "may",
+    "june", "july", "august", "september", "october", "november", "december", "monday", "tuesday",
+    "wednesday", "thursday", "friday", "saturday", "sunday", "state", "states", "united", "kingdom",
+}
+
+MIN_UNDEFINED_OCCURRENCES = 2
+
+
+class DefinitionGraph:
+    """Builds the term dependency graph and runs the consistency checks"""
+
+    @staticmethod
+    def analyze(definitions: List[Dict], text: str, tree: Optional[Dict] = None) -> Dict:
+        terms = TermIndex.definitions_map(definitions)
+        pattern = TermIndex._usage_pattern(terms) if terms else None
+
+        # 1. Edges: terms referenced inside each definition body
+        edges: Dict[str, List[str]] = {key: [] for key in terms}
+        if pattern is not None:
+            for key, d in terms.items():
+                referenced = []
+                for match in pattern.finditer(d.get("definition", "") or ""):
+                    target = TermIndex.normalize(match.group(0))
+                    if target in terms and target != key and target not in referenced:
+                        referenced.append(target)
+                edges[key] = referenced
+
+        # 2. Usages outside the defining node
+        used = set()
+        definition_nodes = {d.get("node_id") for d in terms.values() if d.get("node_id")}
+        if pattern is not None:
+            for node_id, node_text in TermIndex._iter_nodes(tree, text):
+                if node_id is not None and node_id in definition_nodes:
+                    continue
+                for match in pattern.finditer(node_text):
+                    used.add(TermIndex.normalize(match.group(0)))
+        # A term referenced by another definition counts as used
+        for targets in edges.values():
+            used.update(targets)
+        unused = [terms[key]["term"] for key in terms if key not in used]
+
+        cycles = [
+            [terms[key]["term"] for key in component]
+            for component in DefinitionGraph.strongly_connected_components(edges)
+            if len(component) > 1
+        ]
+
+        return {
+            "terms": len(terms),
+            "edges": {terms[k]["term"]: [terms[t]["term"] for t in v] for k, v in edges.items() if v},
+            "has_cycles": bool(cycles),
+            "cycles": cycles,
+            "undefined_terms": DefinitionGraph.undefined_terms(text, tree, terms),
+            "unused_terms": unused
+        }
+
+    @staticmethod
+    def strongly_connected_components(edges: Dict[str, List[str]]) -> List[List[str]]:
+        """Iterative Tarjan's algorithm, O(V + E)"""
+        index_of: Dict[str, int] = {}
+        lowlink: Dict[str, int] = {}
+        on_stack = set()
+        stack: List[str] = []
+        components: List[List[str]] = []
+        counter = 0
+
+        for root in edges:
+            if root in index_of:
+                continue
+            work = [(root, 0)]
+            while work:
+                node, child_pos = work.pop()
+                if child_pos == 0:
+                    index_of[node] = lowlink[node] = counter
+                    counter += 1
+                    stack.append(node)
+                    on_stack.add(node)
+
+                children = edges.get(node, [])
+                recursed = False
+                for i in range(child_pos, len(children)):
+                    child = children[i]
+                    if child not in index_of:
+                        work.append((node, i + 1))
+                        work.append((child, 0))
+                        recursed = True
+                        break
+                    if child in on_stack:
+                        lowlink[node] = min(lowlink[node], index_of[child])
+                if recursed:
+                    continue
+
+                if lowlink[node] == index_of[node]:
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack.discard(member)
+                        component.append(member)
+                        if member == node:
+                            break
+                    components.append(list(reversed(component)))
+
+                if work:
+                    parent = work[-1][0]
+                    lowlink[parent] = min(lowlink[parent], lowlink[node])
+
+        return components
+
+    @staticmethod
+    def undefined_terms(text: str, tree: Optional[Dict], terms: Dict[str, Dict]) -> List[str]:
+        """
+        Quoted terms with no definition, plus Title Case phrases that recur
+        mid-sentence without being defined (e.g. "Unvested Shares").
+        """
+        full_text = text or "\n\n".join(t for _, t in TermIndex._iter_nodes(tree, ""))
+        definitions = list(terms.values())
+
+        flagged: Dict[str, str] = {}
+        for term, _ in DefinitionExtractor.find_undefined_quoted_terms(full_text, definitions, limit=50):
+            flagged[TermIndex.normalize(term)] = term
+
+        counts: Counter = Counter()
+        surface: Dict[str, str] = {}
+        for match in _TITLE_PHRASE.finditer(full_text):
+            words = match.group(1).split()
+            while words and words[0].lower() in _LEADING_STOPWORDS:
+                words = words[1:]
+            if len(words) < 2 or any(w.lower() in _EXCLUDED_WORDS for w in words):
+                continue
+            # Skip phrases that open a sentence or paragraph (capitalized for grammar, not meaning)
+            before = full_text[max(0, match.start() - 2):match.start()]
+            if not before.strip() or before.rstrip()[-1:] in ".!?:;":
+                continue
+            phrase = " ".join(words)
+            key = TermIndex.normalize(phrase)
+            if key in terms:
+                continue
+            counts[key] += 1
+            surface.setdefault(key, phrase)
+
+        for key, count in counts.items():
+            if count >= MIN_UNDEFINED_OCCURRENCES and key not in flagged:
+                flagged[key] = surface[key]
+
+        return sorted(flagged.values())
@@ -0,0 +1,206 @@
+"""
+Paragraph-level comparison of two stored documents.
+
+Works on the stored trees (no re-parse). Paragraphs are aligned in three
+passes, each near-linear:
+1. anchors: paragraphs whose normalized-text hash, or paraId, occurs once on
+   each side; the longest in-order run of anchors is the unchanged spine and
+   out-of-order anchors are moves
+2. between consecutive spine anchors, a patience/Myers diff over paragraph
+   hashes (services.redline) matches the remaining identical paragraphs
+3. what is left in each gap is paired position by position into
+   modifications when the texts are similar enough, otherwise deletions and
+   insertions; leftover deletions and insertions with the same hash are moves
+
+Change records are yielded lazily in new-document order; word-level diffs
+are computed per record as it is consumed, so large comparisons stream.
+"""
+import hashlib
+import re
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from .redline import diff_tokens, longest_increasing, match_sequences, tokenize
+
+# Word-set overlap (Jaccard) above which a deleted + inserted pair is a modification
+MODIFIED_SIMILARITY = 0.5
+
+_WS = re.compile(r"\s+")
+
+
+def _paragraph_hash(text: str) -> str:
+    return hashlib.sha1(_WS.sub(" ", text.strip()).lower().encode("utf-8")).hexdigest()
+
+
+class DocumentCompare:
+    """Align two documents' paragraphs and describe what changed"""
+
+    @staticmethod
+    def paragraphs(tree: Optional[Dict], text: str) -> List[Dict]:
+        """Non-empty paragraphs in document order (tree nodes, or blank-line split text)"""
+        paragraphs = []
+        if tree and tree.get("children"):
+            stack = list(reversed(tree["children"]))
+            while stack:
+                node = stack.pop()
+                if node.get("text_content"):
+                    paragraphs.append({
+                        "id": node.get("id"),
+                        "para_id": node.get("original_xml_id"),
+                        "an_type": node.get("an_type"),
+                        "an_num": node.get("an_num"),
+                        "text": node["text_content"]
+                    })
+                stack.extend(reversed(node.get("children", [])))
+        elif text:
+            for paragraph in re.split(r"\n\s*\n", text):
+                if paragraph.strip():
+                    paragraphs.append({"id": None, "para_id": None, "an_type": None, "an_num": None, "text": paragraph})
+        for index, paragraph in enumerate(paragraphs):
+            paragraph["index"] = index
+            paragraph["hash"] = _paragraph_hash(paragraph["text"])
+        return paragraphs
+
+    @staticmethod
+    def compare(old: List[Dict], new: List[Dict]) -> Iterator[Dict]:
+        """
+        Change records, then one summary record:
+        {"type": "inserted", "new": p}
+        {"type": "deleted", "old": p}
+        {"type": "modified", "old": p, "new": p, "diff": [{"op", "text"}]}
+        {"type": "moved", "old": p, "new": p, "diff": [...] (only if the text changed)}
+        {"type": "summary", "unchanged": n, "inserted": n, ...}
+        """
+        records, unchanged = DocumentCompare.align(old, new)
+        counts = {"unchanged": unchanged, "inserted": 0, "deleted": 0, "modified": 0, "moved": 0}
+        for kind, i, j in records:
+            counts[kind] += 1
+            record = {"type": kind}
+            if i is not None:
+                record["old"] = DocumentCompare._public(old[i])
+            if j is not None:
+                record["new"] = DocumentCompare._public(new[j])
+            if i is not None and j is not None and old[i]["hash"] != new[j]["hash"]:
+                record["diff"] = DocumentCompare.word_diff(old[i]["text"], new[j]["text"])
+            yield record
+        yield {"type": "summary", **counts}
+
+    @staticmethod
+    def align(old: List[Dict], new: List[Dict]) -> Tuple[List[Tuple[str, Optional[int], Optional[int]]], int]:
+        """
+        ([(kind, old_index | None, new_index | None)] in new-document order,
+        number of unchanged paragraphs)
+        """
+        # 1. Unique hash / paraId anchors; the longest in-order run is the spine
+        anchors = DocumentCompare._unique_pairs(old, new, "hash")
+        paired_old = {i for i, _ in anchors}
+        paired_new = {j for _, j in anchors}
+        anchors += [
+            (i, j) for i, j in DocumentCompare._unique_pairs(old, new, "para_id")
+            if i not in paired_old and j not in paired_new
+        ]
+        anchors.sort()
+        spine = longest_increasing(anchors)
+        spine_set = set(spine)
+        moved = [(i, j) for i, j in anchors if (i, j) not in spine_set]
+        moved_old = {i for i, _ in moved}
+        moved_new = {j for _, j in moved}
+
+        # (kind, old, new, sort key); deletions sort before the new paragraph they precede
+        records = []
+        unchanged = 0
+        deleted: List[Tuple[int, int]] = []
+        inserted: List[int] = []
+
+        i = j = 0
+        for anchor_i, anchor_j in spine + [(len(old), len(new))]:
+            gap_old = [k for k in range(i, anchor_i) if k not in moved_old]
+            gap_new = [k for k in range(j, anchor_j) if k not in moved_new]
+            # 2. Identical paragraphs inside the gap
+            matched = match_sequences([old[k]["hash"] for k in gap_old], [new[k]["hash"] for k in gap_new])
+            unchanged += len(matched)
+            # 3. Pair up what is left between consecutive matches
+            a = b = 0
+            for match_a, match_b in matched + [(len(gap_old), len(gap_new))]:
+                DocumentCompare._pair(
+                    old, new, gap_old[a:match_a], gap_new[b:match_b],
+                    gap_new[match_b] if match_b < len(gap_new) else anchor_j,
+                    records, deleted, inserted
+                )
+                a, b = match_a + 1, match_b + 1
+
+            if anchor_i < len(old):
+                if old[anchor_i]["hash"] == new[anchor_j]["hash"]:
+                    unchanged += 1
+                else:
+                    records.append(("modified", anchor_i, anchor_j, (anchor_j, 1)))
+            i, j = anchor_i + 1, anchor_j + 1
+
+        # Leftover deletions and insertions of the same text are moves too
+        waiting: Dict[str, List[int]] = {}
+        for k in inserted:
+            waiting.setdefault(new[k]["hash"], []).append(k)
+        for k, before in deleted:
+            candidates = waiting.get(old[k]["hash"])
+            if candidates:
+                moved.append((k, candidates.pop(0)))
+            else:
+                records.append(("deleted", k, None, (before, 0)))
+        for candidates in waiting.values():
+            records.extend(("inserted", None, k, (k, 1)) for k in candidates)
+        records.extend(("moved", i, j, (j, 1)) for i, j in moved)
+
+        records.sort(key=lambda record: record[3])
+        return [(kind, i, j) for kind, i, j, _ in records], unchanged
+
+    @staticmethod
+    def word_diff(old_text: str, new_text: str) -> List[Dict]:
+        """[{"op": "equal" | "delete" | "insert", "text"}] word-level diff"""
+        a, b = tokenize(old_text), tokenize(new_text)
+        diff = []
+        for tag, i1, i2, j1, j2 in diff_tokens(a, b):
+            text = "".join(b[j1:j2]) if tag == "insert" else "".join(a[i1:i2])
+            diff.append({"op": tag, "text": text})
+        return diff
+
+    @staticmethod
+    def similarity(old_text: str, new_text: str) -> float:
+        a, b = set(old_text.lower().split()), set(new_text.lower().split())
+        if not a or not b:
+            return 0.0
+        return len(a & b) / len(a | b)
+
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _unique_pairs(old: List[Dict], new: List[Dict], key: str) -> List[Tuple[int, int]]:
+        """(i, j) for values of key occurring exactly once on each side"""
+        counts: Dict[str, List[int]] = {}
+        for paragraph in old:
+            if paragraph[key]:
+                entry = counts.setdefault(paragraph[key], [0, paragraph["index"], 0, -1])
+                entry[0] += 1
+        for paragraph in new:
+            entry = counts.get(paragraph[key]) if paragraph[key] else None
+            if entry is not None:
+                entry[2] += 1
+                entry[3] = paragraph["index"]
+        return [(i, j) for count_old, i, count_new, j in counts.values() if count_old == 1 and count_new == 1]
+
+    @staticmethod
+    def _pair(old, new, gap_old: List[int], gap_new: List[int], before: int, records, deleted, inserted):
+        """Positional pairing of one unmatched stretch into modified / deleted / inserted"""
+        for offset in range(max(len(gap_old), len(gap_new))):
+            i = gap_old[offset] if offset < len(gap_old) else None
+            j = gap_new[offset] if offset < len(gap_new) else None
+            if i is not None and j is not None and \
+                    DocumentCompare.similarity(old[i]["text"], new[j]["text"]) >= MODIFIED_SIMILARITY:
+                records.append(("modified", i, j, (j, 1)))
+                continue
+            if i is not None:
+                deleted.append((i, j if j is not None else before))
+            if j is not None:
+                inserted.append(j)
+
+    @staticmethod
+    def _public(paragraph: Dict) -> Dict:
+        return {key: paragraph[key] for key in ("index", "id", "para_id", "an_type", "an_num", "text")}
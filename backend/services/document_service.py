@@ -2,12 +2,19 @@
 Document parsing service for DOCX, PDF, and TXT files
 """
 import io
+import hashlib
 from docx import Document
-from pypdf import PdfReader
-from typing import Tuple
+from typing import BinaryIO, Dict, List, Optional, Tuple, Union
 
 class DocumentService:
     
+    @staticmethod
+    def fingerprint(data: Union[bytes, str]) -> str:
+        """SHA-256 hex digest of raw upload bytes or extracted text (dedupe keys)"""
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        return hashlib.sha256(data).hexdigest()
+    
     @staticmethod
     def extract_text_from_docx(file_content: bytes) -> str:
         """Extract text from DOCX file"""
@@ -22,13 +29,11 @@ class DocumentService:
     @staticmethod
     def extract_text_from_pdf(file_content: bytes) -> str:
         """Extract text from PDF file"""
+        from .pdf_extractor import PdfExtractor
+        
         try:
-            pdf_file = io.BytesIO(file_content)
-            reader = PdfReader(pdf_file)
-            
             text_parts = []
-            for page in reader.pages:
-                page_text = page.extract_text()
+            for _, page_text in PdfExtractor.shared().pages(file_content):
                 if page_text.strip():
                     text_parts.append(page_text)
             
@@ -52,9 +57,11 @@ class DocumentService:
             raise ValueError("Could not decode text file with any common encoding")
     
     @staticmethod
-    def extract_text(filename: str, content: bytes) -> Tuple[str, dict]:
+    def extract_text(filename: str, content: Union[bytes, BinaryIO]) -> Tuple[str, dict]:
         """
         Extract text and structure from file based on extension
+        content may be a seekable file handle (a spooled upload): DOCX and PDF
+        are parsed from it without reading it into memory first
         Returns: (text, tree_dict)
         """
         filename_lower = filename.lower()
@@ -62,11 +69,13 @@ class DocumentService:
         if filename_lower.endswith('.docx'):
             return DocumentService.parse_docx_structure(content)
         elif filename_lower.endswith('.pdf'):
-            text = DocumentService.extract_text_from_pdf(content)
-            return text, None
+            return DocumentService.parse_pdf_structure(content)
         elif filename_lower.endswith('.txt'):
+            if hasattr(content, "read"):
+                content.seek(0)
+                content = content.read()
             text = DocumentService.extract_text_from_txt(content)
-            return text, None
+            return DocumentService.parse_text_structure(text)
         else:
             raise ValueError(
                 f"Unsupported file type: {filename}. "
@@ -74,17 +83,22 @@ class DocumentService:
             )
             
     @staticmethod
-    def parse_docx_structure(content: bytes) -> Tuple[str, dict]:
+    def parse_docx_structure(content: Union[bytes, BinaryIO]) -> Tuple[str, dict]:
         """
         Robustly parse DOCX into text and structure tree
         Uses logic ported from Spine for accurate clause detection
+        One streaming pass over the package (services.docx_stream): body
+        paragraphs in document order including tables, auto-numbering resolved
+        to real numbers, footnotes/endnotes after the paragraph that references
+        them, headers/footers (deduplicated) at the end.
         Returns: Tuple[full_text, root_node_dict]
         """
-        import re
         import uuid
+        from .docx_stream import DocxStream
         
         try:
-            doc = Document(io.BytesIO(content))
+            package = DocxStream(content)
+            notes = {"footnote": package.notes("footnote"), "endnote": package.notes("endnote")}
         except Exception as e:
             raise ValueError(f"Error parsing DOCX: {str(e)}")
 
@@ -102,113 +116,247 @@ class DocumentService:
         current_article = None
         current_section = None
         
-        for p in doc.paragraphs:
-            text = p.text.strip()
-            if not text:
-                continue
-                
-            paragraphs_text.append(text)
-            style_name = p.style.name
-            
-            # Safe ID strategy
-            try:
-                from docx.oxml.ns import qn
-                if p._element is not None:
-                    # Use standard qualified name lookup
-                    para_id = p._element.get(qn('w:paraId'))
-                    if not para_id:
-                        # Fallback if Normalizer hasn't run (should verify logic)
-                        para_id = str(id(p._element))
-                else:
-                    para_id = str(id(p))
-            except Exception:
-                para_id = str(uuid.uuid4())
-
-            # --- Detection Logic (Robust) ---
-            # Patterns for generic numbering detection
-            pattern_section = r'^(\d+(\.\d+)*)\.?\s+(.*)' # 1.1 or 1.1.1 or 4
-            pattern_point = r'^(\([a-z0-9]+\))\s+(.*)' # (a) or (1)
-            
+        def make_node(record, metadata):
+            text = record["text"].strip()
+            if record["label"]:
+                metadata["num_label"] = record["label"]
             # Base node structure matching schemas_ast.ClauseNode
             node = {
                 "id": str(uuid.uuid4()),
                 "text_content": text,
-                "original_xml_id": para_id,
+                # Fallback if Normalizer hasn't run: position in the part
+                "original_xml_id": record["para_id"] or f"{metadata.get('part', 'body')}:{len(paragraphs_text)}",
                 "children": [],
                 "an_type": "paragraph", # Default
                 "an_num": None,
-                "metadata": {}
+                "metadata": metadata
             }
-            
-            # Priority 1: Headers (Explicit or Keyword)
-            pattern_article = r'^(ARTICLE|SECTION|SCHEDULE|EXHIBIT)\s+([IVXLCDM0-9A-Z]+)' # Detect ARTICLE I or SECTION 1
-            a_match = re.match(pattern_article, text, re.IGNORECASE)
-
-            if style_name.startswith('Heading 1') or style_name == 'Title' or a_match:
-                node["an_type"] = "article"
-                if a_match:
-                     node["an_num"] = f"{a_match.group(1)} {a_match.group(2)}"
-                
-                root["children"].append(node)
-                current_article = node
-                current_section = None 
+            node["an_type"], node["an_num"] = DocumentService._classify_node(text, record["style"], metadata)
+            # --- Clause Classification ---
+            node["clause_type"] = DocumentService._detect_clause_type(text)
+            paragraphs_text.append(text)
+            return node
+        
+        def add_notes(record, parent):
+            for kind, note_id in record["notes"]:
+                for note in notes[kind].get(note_id, []):
+                    if note["text"].strip():
+                        parent["children"].append(make_node(note, {"part": kind, "note_id": note_id}))
+        
+        try:
+            for record in package.body():
+                text = record["text"].strip()
+                if not text:
+                    add_notes(record, current_section or current_article or root)
+                    continue
                 
-            elif style_name.startswith('Heading 2'):
-                match = re.match(pattern_section, text)
-                node["an_type"] = "section"
-                node["an_num"] = match.group(1) if match else None
+                table = record["table"]
+                node = make_node(record, {"table": table} if table else {})
                 
-                if current_article:
-                    current_article["children"].append(node)
-                else:
+                if node["an_type"] == "article" and not table:
                     root["children"].append(node)
-                current_section = node
-            
-            # Priority 2: Regex on Normal/List Text
-            else:
-                s_match = re.match(pattern_section, text)
-                p_match = re.match(pattern_point, text)
-                
-                if s_match:
-                     # Looks like section (1.1) but styled Normal
-                     node["an_type"] = "section"
-                     node["an_num"] = s_match.group(1)
-                     
-                     if current_article:
-                         current_article["children"].append(node)
-                     else:
-                         root["children"].append(node)
-                     current_section = node
-                     
-                elif p_match:
-                    # Looks like point (a)
-                    node["an_type"] = "point"
-                    node["an_num"] = p_match.group(1)
+                    current_article = node
+                    current_section = None 
                     
-                    if current_section:
-                        current_section["children"].append(node)
-                    elif current_article:
-                         current_article["children"].append(node)
+                elif node["an_type"] == "section" and not table:
+                    if current_article:
+                        current_article["children"].append(node)
                     else:
                         root["children"].append(node)
-                        
+                    current_section = node
+                
                 else:
-                    # Standard Paragraph
-                    node["an_type"] = "paragraph"
-                    
+                    # Points, standard paragraphs and table cells (never containers)
                     if current_section:
                         current_section["children"].append(node)
                     elif current_article:
                         current_article["children"].append(node)
                     else:
                         root["children"].append(node)
+                add_notes(record, node)
             
-            # --- Clause Classification ---
-            node["clause_type"] = DocumentService._detect_clause_type(text)
+            # Headers / footers repeat per section: each distinct text once
+            seen = set()
+            for record in package.headers_footers():
+                text = record["text"].strip()
+                if text and text not in seen:
+                    seen.add(text)
+                    root["children"].append(make_node(record, {"part": record["part"]}))
+        except Exception as e:
+            raise ValueError(f"Error parsing DOCX: {str(e)}")
 
         full_text = "\n\n".join(paragraphs_text)
         return full_text, root
 
+    @staticmethod
+    def parse_pdf_structure(content: Union[bytes, BinaryIO]) -> Tuple[str, dict]:
+        """
+        PDF text and structure tree. Pages are extracted in parallel
+        (services.pdf_extractor) and fed to the builder in page order as they
+        arrive (services.text_structure).
+        """
+        from .pdf_extractor import PdfExtractor
+        from .text_structure import TextStructureBuilder
+        
+        try:
+            builder = TextStructureBuilder()
+            for page_number, page_text in PdfExtractor.shared().pages(content):
+                builder.feed_page(page_text, page_number)
+            return builder.finish()
+        except Exception as e:
+            raise ValueError(f"Error parsing PDF: {str(e)}")
+
+    @staticmethod
+    def parse_text_structure(text: str) -> Tuple[str, dict]:
+        """Plain-text structure tree (services.text_structure)"""
+        from .text_structure import TextStructureBuilder
+        
+        builder = TextStructureBuilder()
+        builder.feed_lines(text.splitlines())
+        return builder.finish()
+
+    @staticmethod
+    def patch_docx_structure(tree: dict, changes: List[Dict]) -> Optional[Tuple[str, dict]]:
+        """
+        Apply ComposerService.changes() to a stored tree instead of re-parsing.
+        Edited nodes keep their ids; split parts become new nodes where
+        parse_docx_structure would put them. Returns (full_text, tree), or None
+        when an edit changes the structure (new heading/section, emptied
+        container) and a full re-parse is needed.
+        changes: [{"id": paraId, "text", "style", "inserted": [{"id", "text"}]}]
+        """
+        import copy
+        import uuid
+        
+        if not tree or not tree.get("children"):
+            return None
+        root = copy.deepcopy(tree)
+        
+        # paraId -> (node, parent) in one walk
+        located: Dict[str, Tuple[dict, dict]] = {}
+        stack = [(child, root) for child in root["children"]]
+        while stack:
+            node, parent = stack.pop()
+            if node.get("original_xml_id"):
+                located[node["original_xml_id"]] = (node, parent)
+            stack.extend((child, node) for child in node.get("children", []))
+        
+        for change in changes:
+            if change["id"] not in located:
+                return None
+            node, parent = located[change["id"]]
+            index = parent["children"].index(node)
+            metadata = node.get("metadata") or {}
+            # Headings in table cells are leaves, not containers
+            heading = node["an_type"] in ("article", "section") and not metadata.get("table")
+            
+            text = (change.get("text") or "").strip()
+            # Adding or removing an auto-numbered paragraph renumbers the ones after it
+            if metadata.get("num_label") and (not text or change.get("inserted")):
+                return None
+            if not text:
+                if heading or node.get("children"):
+                    return None
+                del parent["children"][index]
+            elif DocumentService._classify_node(text, change.get("style"), metadata) != (node["an_type"], node.get("an_num")):
+                return None
+            else:
+                node["text_content"] = text
+                node["clause_type"] = DocumentService._detect_clause_type(text)
+            
+            # Split parts: inside a heading they open its body, otherwise they follow as siblings
+            if heading:
+                container, position = node, 0
+            else:
+                container, position = parent, index + 1 if text else index
+            for part in change.get("inserted", []):
+                part_text = (part.get("text") or "").strip()
+                if not part_text:
+                    continue
+                part_metadata = {"table": metadata["table"]} if metadata.get("table") else {}
+                an_type, an_num = DocumentService._classify_node(part_text, change.get("style"), part_metadata)
+                if an_type not in ("paragraph", "point"):
+                    return None
+                new_node = {
+                    "id": str(uuid.uuid4()),
+                    "text_content": part_text,
+                    "original_xml_id": part["id"],
+                    "children": [],
+                    "an_type": an_type,
+                    "an_num": an_num,
+                    "metadata": part_metadata,
+                    "clause_type": DocumentService._detect_clause_type(part_text)
+                }
+                container["children"].insert(position, new_node)
+                position += 1
+                located[part["id"]] = (new_node, container)
+        
+        return DocumentService.tree_text(root), root
+
+    @staticmethod
+    def tree_text(tree: dict) -> str:
+        """Full text in document order (same joining as parse_docx_structure)"""
+        paragraphs_text = []
+        stack = list(reversed(tree.get("children", [])))
+        while stack:
+            node = stack.pop()
+            paragraphs_text.append(node["text_content"])
+            stack.extend(reversed(node.get("children", [])))
+        return "\n\n".join(paragraphs_text)
+
+    @staticmethod
+    def _classify_node(text: str, style_name: str, metadata: Dict) -> Tuple[str, Optional[str]]:
+        """
+        (an_type, an_num) of a parsed paragraph, using its auto-numbering label
+        (metadata["num_label"]) when Word renders one. In table cells a bare
+        number ("100 Shares") is data, not a section.
+        """
+        label = metadata.get("num_label")
+        an_type, an_num = DocumentService._classify_paragraph(f"{label} {text}" if label else text, style_name)
+        if label and an_num is None:
+            if an_type == "paragraph":
+                an_type, an_num = "point", "(" + label.strip("().") + ")"
+            else:
+                an_num = label.rstrip(".")
+        if metadata.get("table") is not None and not label and \
+                an_type in ("article", "section") and an_num and "." not in an_num and " " not in an_num:
+            an_type, an_num = "paragraph", None
+        return an_type, an_num
+
+    @staticmethod
+    def _classify_paragraph(text: str, style_name: str) -> Tuple[str, Optional[str]]:
+        """Structural (an_type, an_num) of one DOCX paragraph"""
+        import re
+        
+        # Patterns for generic numbering detection
+        pattern_section = r'^(\d+(\.\d+)*)\.?\s+(.*)' # 1.1 or 1.1.1 or 4
+        pattern_point = r'^(\([a-z0-9]+\))\s+(.*)' # (a) or (1)
+        
+        # Priority 1: Headers (Explicit or Keyword)
+        pattern_article = r'^(ARTICLE|SECTION|SCHEDULE|EXHIBIT)\s+([IVXLCDM0-9A-Z]+)' # Detect ARTICLE I or SECTION 1
+        a_match = re.match(pattern_article, text, re.IGNORECASE)
+        style_name = style_name or ""
+        
+        if style_name.startswith('Heading 1') or style_name == 'Title' or a_match:
+            return "article", f"{a_match.group(1)} {a_match.group(2)}" if a_match else None
+        
+        if style_name.startswith('Heading 2'):
+            match = re.match(pattern_section, text)
+            return "section", match.group(1) if match else None
+        
+        # Priority 2: Regex on Normal/List Text
+        s_match = re.match(pattern_section, text)
+        if s_match:
+            # Looks like section (1.1) but styled Normal
+            return "section", s_match.group(1)
+        
+        p_match = re.match(pattern_point, text)
+        if p_match:
+            # Looks like point (a)
+            return "point", p_match.group(1)
+        
+        return "paragraph", None
+
     @staticmethod
     def _detect_clause_type(text: str) -> str:
         """Simple heuristic to classify clause type"""
@@ -2,14 +2,21 @@ from docx import Document
 from typing import Dict, List, Optional
 import io
 
+from .redline import Redliner, DEFAULT_AUTHOR
+
 class SafeDocxEditor:
     """
     Safe document editing using python-docx with preservation of formatting.
+    With track_changes=True replacements are written as word-level tracked
+    changes (w:ins / w:del) instead of overwriting the text.
     """
     
-    def __init__(self, docx_content: bytes):
+    def __init__(self, docx_content: bytes, track_changes: bool = False, author: str = DEFAULT_AUTHOR):
         self.doc = Document(io.BytesIO(docx_content))
-        # We don't cache text here because it might change after edits
+        self.redliner = Redliner(self.doc.element.body, author) if track_changes else None
+        # Normalized paragraph texts, built on first lookup and updated on every
+        # replacement (one pass over the document however many fixes are applied)
+        self._texts: Optional[List] = None
         
     def replace_clause(
         self, 
@@ -25,8 +32,12 @@ class SafeDocxEditor:
         if not target_para:
             return {"success": False, "error": "Could not locate clause in document"}
         
-        # Replace text while preserving formatting of the first run
-        self._replace_paragraph_text(target_para, new_text)
+        if self.redliner:
+            self.redliner.rewrite(target_para._p, new_text)
+        else:
+            # Replace text while preserving formatting of the first run
+            self._replace_paragraph_text(target_para, new_text)
+        self._texts[self._index[target_para._p]] = (target_para, " ".join(new_text.split()))
         
         return {"success": True}
     
@@ -34,10 +45,13 @@ class SafeDocxEditor:
         """Find paragraph by matching text (exact or contained)"""
         # Clean for comparison
         clean_target = " ".join(text.split())
+        if self._texts is None:
+            self._texts = [(para, " ".join(para.text.split())) for para in self.doc.paragraphs]
+            self._index = {para._p: i for i, (para, _) in enumerate(self._texts)}
         
-        for para in self.doc.paragraphs:
-            clean_para = " ".join(para.text.split())
-            if clean_target in clean_para or clean_para in clean_target:
+        for para, clean_para in self._texts:
+            # Empty paragraphs are "contained" in every clause: never a match
+            if clean_para and (clean_target in clean_para or clean_para in clean_target):
                 # Basic match. For production, we might need stricter matching 
                 # to avoid false positives in similar clauses
                 return para
@@ -0,0 +1,333 @@
+"""
+Streaming DOCX package reader.
+
+Reads the OOXML parts straight from the zip with lxml (no python-docx
+proxies) and yields one record per paragraph:
+- the body in document order, including paragraphs inside tables (nested
+  tables too) and text boxes (once: the mc:Fallback copy is skipped)
+- footnotes / endnotes, keyed by note id, so callers can place them after the
+  paragraph that references them
+- headers and footers
+
+Auto-numbered paragraphs (w:numPr on the paragraph or inherited from its
+style) get the label Word would render ("1.2", "(a)", "ARTICLE IV"), from
+numbering.xml counters advanced in document order.
+
+The body is parsed with iterparse and each finished top-level element is
+freed, so memory stays flat however long the document is.
+"""
+import io
+import re
+import zipfile
+from typing import BinaryIO, Dict, Iterator, List, Optional, Tuple, Union
+
+from docx.styles import BabelFish
+from lxml import etree
+
+W = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+W14 = "http://schemas.microsoft.com/office/word/2010/wordml"
+MC = "http://schemas.openxmlformats.org/markup-compatibility/2006"
+
+
+def _w(tag: str) -> str:
+    return f"{{{W}}}{tag}"
+
+
+_P, _TBL, _TR, _TC, _BODY = _w("p"), _w("tbl"), _w("tr"), _w("tc"), _w("body")
+_PPR, _NUMPR, _PSTYLE = _w("pPr"), _w("numPr"), _w("pStyle")
+_VAL, _ID, _TYPE = _w("val"), _w("id"), _w("type")
+_PARA_ID = _w("paraId")
+_W14_PARA_ID = f"{{{W14}}}paraId"
+# Word writes every text box twice: mc:Choice (DrawingML) and mc:Fallback
+# (VML, for old readers). Only the Choice copy is shown and edited.
+_FALLBACK = f"{{{MC}}}Fallback"
+
+# Visible text: runs (also inside hyperlinks, fields, smart tags, tracked
+# insertions). Deleted / moved-away runs and nested text-box paragraphs are not
+# part of this paragraph's text.
+_TEXT_CHARS = {_w("t"): None, _w("tab"): "\t", _w("br"): "\n", _w("cr"): "\n", _w("noBreakHyphen"): "-"}
+_SKIP = {_w("del"), _w("moveFrom"), _P, _PPR, _w("rPr")}
+
+# Notes Word keeps for its own separators
+_SEPARATOR_NOTES = {"separator", "continuationSeparator", "continuationNotice"}
+
+_SECONDARY_PART = re.compile(r"^word/(header|footer)\d*\.xml$")
+
+
+def paragraph_text(p) -> str:
+    """Visible text of one w:p element (tabs and breaks as \\t / \\n)"""
+    parts: List[str] = []
+    stack = list(reversed(p))
+    while stack:
+        el = stack.pop()
+        tag = el.tag
+        if tag in _SKIP:
+            continue
+        if tag in _TEXT_CHARS:
+            char = _TEXT_CHARS[tag]
+            parts.append((el.text or "") if char is None else char)
+            continue
+        stack.extend(reversed(el))
+    return "".join(parts)
+
+
+def in_fallback(el) -> bool:
+    """Inside mc:Fallback (the duplicate of a text box that Word ignores)"""
+    return next(el.iterancestors(_FALLBACK), None) is not None
+
+
+def iter_paragraphs(root) -> Iterator:
+    """w:p elements under root in document order, without mc:Fallback copies"""
+    for p in root.iter(_P):
+        if not in_fallback(p):
+            yield p
+
+
+def paragraph_id(p) -> Optional[str]:
+    return p.get(_PARA_ID) or p.get(_W14_PARA_ID)
+
+
+class Numbering:
+    """numbering.xml + style numPr -> rendered list labels, counted in document order"""
+
+    def __init__(self, numbering_xml: Optional[bytes], styles: "Styles"):
+        self.styles = styles
+        # abstractNumId -> {ilvl: {"start", "fmt", "text", "legal"}}
+        self.abstract: Dict[str, Dict[int, Dict]] = {}
+        # numId -> (abstractNumId, {ilvl: start override})
+        self.nums: Dict[str, Tuple[str, Dict[int, int]]] = {}
+        self._counters: Dict[str, Dict[int, int]] = {}
+        self._started: set = set()
+        if numbering_xml:
+            self._load(etree.fromstring(numbering_xml))
+
+    def _load(self, root):
+        for abstract in root.iterchildren(_w("abstractNum")):
+            levels = {}
+            for lvl in abstract.iterchildren(_w("lvl")):
+                levels[int(lvl.get(_w("ilvl"), "0"))] = {
+                    "start": int(_child_val(lvl, "start") or 1),
+                    "fmt": _child_val(lvl, "numFmt") or "decimal",
+                    "text": _child_val(lvl, "lvlText") or "",
+                    "legal": lvl.find(_w("isLgl")) is not None
+                }
+            self.abstract[abstract.get(_w("abstractNumId"))] = levels
+        for num in root.iterchildren(_w("num")):
+            overrides = {}
+            for override in num.iterchildren(_w("lvlOverride")):
+                start = _child_val(override, "startOverride")
+                if start is not None:
+                    overrides[int(override.get(_w("ilvl"), "0"))] = int(start)
+            self.nums[num.get(_w("numId"))] = (_child_val(num, "abstractNumId"), overrides)
+
+    def label(self, ppr, style_id: Optional[str]) -> Tuple[Optional[str], Optional[int]]:
+        """(label, level) for a paragraph, advancing the list counters; (None, None) if unnumbered"""
+        num_id, ilvl = None, None
+        numpr = ppr.find(_NUMPR) if ppr is not None else None
+        if numpr is not None:
+            num_id, ilvl = _child_val(numpr, "numId"), _child_val(numpr, "ilvl")
+        if num_id is None:
+            style_num = self.styles.numbering(style_id)
+            if style_num:
+                num_id, ilvl = style_num[0], ilvl if ilvl is not None else style_num[1]
+        if not num_id or num_id == "0" or num_id not in self.nums:
+            return None, None
+        level = int(ilvl or 0)
+        abstract_id, overrides = self.nums[num_id]
+        levels = self.abstract.get(abstract_id)
+        if not levels or level not in levels:
+            return None, None
+
+        # Lists sharing an abstract definition continue each other, unless the
+        # num restarts a level (startOverride) the first time it is used
+        counters = self._counters.setdefault(abstract_id, {})
+        if num_id not in self._started:
+            self._started.add(num_id)
+            for override_level in overrides:
+                counters.pop(override_level, None)
+        start = overrides.get(level, levels[level]["start"])
+        counters[level] = counters[level] + 1 if level in counters else start
+        for deeper in [k for k in counters if k > level]:
+            del counters[deeper]
+
+        definition = levels[level]
+        if definition["fmt"] in ("bullet", "none"):
+            return None, level
+
+        def render(match) -> str:
+            k = int(match.group(1)) - 1
+            value = counters.get(k, overrides.get(k, levels.get(k, {}).get("start", 1)))
+            fmt = "decimal" if definition["legal"] else levels.get(k, {}).get("fmt", "decimal")
+            return _format_number(value, fmt)
+
+        label = re.sub(r"%(\d)", render, definition["text"]).strip()
+        return label or None, level
+
+
+class Styles:
+    """Paragraph style names (as python-docx shows them) and style-linked numbering"""
+
+    def __init__(self, styles_xml: Optional[bytes]):
+        self._names: Dict[str, str] = {}
+        self._based_on: Dict[str, str] = {}
+        self._numpr: Dict[str, Tuple[Optional[str], Optional[str]]] = {}
+        self.default: Optional[str] = None
+        if not styles_xml:
+            return
+        for style in etree.fromstring(styles_xml).iterchildren(_w("style")):
+            if style.get(_TYPE) != "paragraph":
+                continue
+            style_id = style.get(_w("styleId"))
+            name = _child_val(style, "name")
+            self._names[style_id] = BabelFish.internal2ui(name) if name else style_id
+            based_on = _child_val(style, "basedOn")
+            if based_on:
+                self._based_on[style_id] = based_on
+            ppr = style.find(_PPR)
+            numpr = ppr.find(_NUMPR) if ppr is not None else None
+            if numpr is not None:
+                self._numpr[style_id] = (_child_val(numpr, "numId"), _child_val(numpr, "ilvl"))
+            if style.get(_w("default")) in ("1", "true"):
+                self.default = style_id
+
+    def name(self, style_id: Optional[str]) -> str:
+        style_id = style_id if style_id in self._names else self.default
+        return self._names.get(style_id, "Normal")
+
+    def numbering(self, style_id: Optional[str]) -> Optional[Tuple[str, Optional[str]]]:
+        seen = set()
+        style_id = style_id or self.default
+        while style_id and style_id not in seen:
+            seen.add(style_id)
+            if style_id in self._numpr and self._numpr[style_id][0]:
+                return self._numpr[style_id]
+            style_id = self._based_on.get(style_id)
+        return None
+
+
+class DocxStream:
+    """One pass over a DOCX package's paragraphs"""
+
+    def __init__(self, content: Union[bytes, BinaryIO]):
+        """content: the package bytes, or a seekable file handle (a spooled upload)"""
+        try:
+            self.package = zipfile.ZipFile(content if hasattr(content, "read") else io.BytesIO(content))
+            self.names = set(self.package.namelist())
+            if "word/document.xml" not in self.names:
+                raise ValueError("word/document.xml missing")
+        except zipfile.BadZipFile as e:
+            raise ValueError(f"Not a DOCX package: {e}")
+        self.styles = Styles(self._read("word/styles.xml"))
+        self.numbering = Numbering(self._read("word/numbering.xml"), self.styles)
+
+    def body(self) -> Iterator[Dict]:
+        """
+        Body paragraphs in document order:
+        {"para_id", "text", "style", "label", "level", "table", "notes"}
+        table: {"index", "row", "cell"} of the innermost table, or None.
+        notes: [("footnote" | "endnote", note id)] referenced by the paragraph.
+        """
+        tables: List[List[int]] = []  # [table index, row, cell] per open table
+        table_count = 0
+        fallback_depth = 0
+        with self.package.open("word/document.xml") as stream:
+            for event, el in etree.iterparse(stream, events=("start", "end"), tag=(_P, _TBL, _TR, _TC, _FALLBACK)):
+                tag = el.tag
+                if tag == _FALLBACK:
+                    fallback_depth += 1 if event == "start" else -1
+                    continue
+                if fallback_depth:
+                    continue
+                if event == "start":
+                    if tag == _TBL:
+                        tables.append([table_count, -1, -1])
+                        table_count += 1
+                    elif tag == _TR and tables:
+                        tables[-1][1] += 1
+                        tables[-1][2] = -1
+                    elif tag == _TC and tables:
+                        tables[-1][2] += 1
+                    continue
+
+                if tag == _P:
+                    record = self._record(el)
+                    record["table"] = (
+                        {"index": tables[-1][0], "row": tables[-1][1], "cell": tables[-1][2]} if tables else None
+                    )
+                    record["notes"] = [
+                        (kind, ref.get(_ID))
+                        for kind in ("footnote", "endnote")
+                        for ref in el.iter(_w(f"{kind}Reference"))
+                    ]
+                    yield record
+                elif tag == _TBL:
+                    tables.pop()
+
+                # Free finished top-level content (and what came before it)
+                parent = el.getparent()
+                if parent is not None and parent.tag == _BODY:
+                    el.clear()
+                    while el.getprevious() is not None:
+                        del parent[0]
+
+    def notes(self, kind: str) -> Dict[str, List[Dict]]:
+        """Footnote or endnote paragraphs by note id ("footnote" / "endnote")"""
+        content = self._read(f"word/{kind}s.xml")
+        if not content:
+            return {}
+        notes: Dict[str, List[Dict]] = {}
+        for note in etree.fromstring(content).iterchildren(_w(kind)):
+            if note.get(_TYPE) in _SEPARATOR_NOTES:
+                continue
+            notes[note.get(_ID)] = [self._record(p) for p in iter_paragraphs(note)]
+        return notes
+
+    def headers_footers(self) -> Iterator[Dict]:
+        """Header and footer paragraphs, part by part ("part": "header" | "footer")"""
+        for name in sorted(n for n in self.names if _SECONDARY_PART.match(n)):
+            part = _SECONDARY_PART.match(name).group(1)
+            for p in iter_paragraphs(etree.fromstring(self._read(name))):
+                record = self._record(p)
+                record["part"] = part
+                yield record
+
+    def _record(self, p) -> Dict:
+        ppr = p.find(_PPR)
+        style_el = ppr.find(_PSTYLE) if ppr is not None else None
+        style_id = style_el.get(_VAL) if style_el is not None else None
+        label, level = self.numbering.label(ppr, style_id)
+        return {
+            "para_id": paragraph_id(p),
+            "text": paragraph_text(p),
+            "style": self.styles.name(style_id),
+            "label": label,
+            "level": level
+        }
+
+    def _read(self, name: str) -> Optional[bytes]:
+        return self.package.read(name) if name in self.names else None
+
+
+def _child_val(el, tag: str) -> Optional[str]:
+    child = el.find(_w(tag))
+    return child.get(_VAL) if child is not None else None
+
+
+_ROMAN = [(1000, "m"), (900, "cm"), (500, "d"), (400, "cd"), (100, "c"), (90, "xc"),
+          (50, "l"), (40, "xl"), (10, "x"), (9, "ix"), (5, "v"), (4, "iv"), (1, "i")]
+
+
+def _format_number(value: int, fmt: str) -> str:
+    if fmt in ("lowerLetter", "upperLetter") and value > 0:
+        letter = chr(ord("a") + (value - 1) % 26) * ((value - 1) // 26 + 1)
+        return letter.upper() if fmt == "upperLetter" else letter
+    if fmt in ("lowerRoman", "upperRoman") and value > 0:
+        roman = ""
+        for amount, numeral in _ROMAN:
+            while value >= amount:
+                roman += numeral
+                value -= amount
+        return roman.upper() if fmt == "upperRoman" else roman
+    if fmt == "decimalZero":
+        return f"{value:02d}"
+    return str(value)
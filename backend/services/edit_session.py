@@ -0,0 +1,219 @@
+"""
+In-memory edit sessions.
+
+An open session keeps one document's ComposerService (parsed DOCX and para
+map) in this worker's memory. Edits apply in memory and are appended to a
+journal (one JSON line per batch, fsynced before the request returns) so a
+crash loses nothing acknowledged: opening a session replays any journal left
+behind. Each journal starts with the content hash of the version its ops
+apply to, so a journal whose flush already reached the database is dropped
+instead of replayed twice. The document is
+serialized and written back to the database only on flush: explicit save,
+close, idle timeout or every MAX_PENDING_OPS operations.
+
+Every applied batch is a version, as it is without a session: the session
+is at base_version + number of unflushed batches, and a flush logs each
+batch as its own version. Batches prepared against an older version are
+checked against the paraIds changed since (changed_since), and a flush that
+lost a write race only replays onto the new head when nothing it touched was
+changed there (rebase raises EditConflict otherwise).
+"""
+import asyncio
+import json
+import os
+import tempfile
+import time
+from typing import Dict, List, Optional, Set
+
+from .composer_service import ComposerService
+from .document_service import DocumentService
+from .version_store import VersionStore
+
+DEFAULT_JOURNAL_DIR = os.path.join(tempfile.gettempdir(), "axiom-edit-journal")
+
+# Flush policy
+MAX_PENDING_OPS = 200
+IDLE_TIMEOUT_SECONDS = 120
+
+
+class EditConflict(Exception):
+    """Unflushed session batches overlap edits stored since the session's base version"""
+
+    def __init__(self, conflicting_ids: List[str]):
+        super().__init__("Paragraphs were edited by someone else since the session opened")
+        self.conflicting_ids = conflicting_ids
+
+
+class EditSession:
+    """One open document: composer, unflushed ops and their journal"""
+
+    def __init__(self, document_id: str, file_content: bytes, journal_path: str, version: int = 0):
+        self.document_id = document_id
+        self.composer = ComposerService(file_content)
+        self.base_hash = DocumentService.fingerprint(file_content)
+        self.base_version = version  # Stored version the unflushed batches apply to
+        self.journal_path = journal_path
+        self.pending_ops = 0
+        self.batches: List[List[Dict]] = []  # Unflushed batches, as applied (one version each on flush)
+        self.last_activity = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    @property
+    def operations(self) -> List[Dict]:
+        return [op for batch in self.batches for op in batch]
+
+    @property
+    def version(self) -> int:
+        return self.base_version + len(self.batches)
+
+    def changed_since(self, version: int) -> Optional[Set[str]]:
+        """paraIds touched by the unflushed batches after version (None if outside the session)"""
+        if not self.base_version <= version <= self.version:
+            return None
+        changed: Set[str] = set()
+        for batch in self.batches[version - self.base_version:]:
+            changed |= VersionStore.touched_para_ids(batch)
+        return changed
+
+    def apply(self, operations: List[Dict]):
+        """Apply a batch in memory and journal it (before the request is acknowledged)"""
+        self.composer.apply_operations(operations, save=False)
+        self.batches.append(operations)
+        header = not os.path.exists(self.journal_path)
+        with open(self.journal_path, "a", encoding="utf-8") as journal:
+            if header:
+                journal.write(json.dumps({"base": self.base_hash}) + "\n")
+            journal.write(json.dumps({"ops": operations}) + "\n")
+            journal.flush()
+            os.fsync(journal.fileno())
+        self.pending_ops += len(operations)
+        self.last_activity = time.monotonic()
+
+    def replay_journal(self) -> int:
+        """Re-apply ops journaled by a previous (crashed) worker; returns the op count"""
+        if not os.path.exists(self.journal_path):
+            return 0
+        replayed = 0
+        with open(self.journal_path, encoding="utf-8") as journal:
+            try:
+                base = json.loads(journal.readline()).get("base")
+            except ValueError:
+                base = None
+            if base != self.base_hash:
+                # Written against another version (its flush already landed)
+                lines = []
+            else:
+                lines = journal.readlines()
+        for line in lines:
+            try:
+                operations = json.loads(line)["ops"]
+            except (ValueError, KeyError):
+                # Torn final write: that batch was never acknowledged
+                break
+            self.composer.apply_operations(operations, save=False)
+            self.batches.append(operations)
+            replayed += len(operations)
+        if not replayed:
+            os.remove(self.journal_path)
+        self.pending_ops += replayed
+        return replayed
+
+    def rebase(self, file_content: bytes, version: int, changed: Optional[Set[str]]):
+        """
+        Re-apply the unflushed batches on a newer stored version (after a lost
+        write race). changed: paraIds stored since base_version
+        (VersionStore.changed_since); raises EditConflict on any overlap.
+        """
+        if changed is None:
+            raise EditConflict([])
+        conflicts = sorted(changed & self.changed_since(self.base_version))
+        if conflicts:
+            raise EditConflict(conflicts)
+        self.composer = ComposerService(file_content)
+        for batch in self.batches:
+            self.composer.apply_operations(batch, save=False)
+        self.base_hash = DocumentService.fingerprint(file_content)
+        self.base_version = version
+        with open(self.journal_path, "w", encoding="utf-8") as journal:
+            journal.write(json.dumps({"base": self.base_hash}) + "\n")
+            for batch in self.batches:
+                journal.write(json.dumps({"ops": batch}) + "\n")
+            journal.flush()
+            os.fsync(journal.fileno())
+
+    def flushed(self, content_hash: str, version: int):
+        """The database now holds everything applied so far (as content_hash at version)"""
+        self.composer.clear_changes()
+        self.base_hash = content_hash
+        self.base_version = version
+        self.pending_ops = 0
+        self.batches = []
+        self.discard_journal()
+
+    def discard_journal(self):
+        if os.path.exists(self.journal_path):
+            os.remove(self.journal_path)
+
+    def state(self) -> Dict:
+        return {
+            "document_id": self.document_id,
+            "version": self.version,
+            "pending_ops": self.pending_ops,
+            "idle_seconds": int(time.monotonic() - self.last_activity)
+        }
+
+
+class EditSessionManager:
+    """Per-process registry of open sessions and their flush policy"""
+
+    def __init__(
+        self,
+        journal_dir: Optional[str] = None,
+        max_pending_ops: int = MAX_PENDING_OPS,
+        idle_timeout: float = IDLE_TIMEOUT_SECONDS
+    ):
+        self.journal_dir = journal_dir or os.getenv("EDIT_JOURNAL_DIR", DEFAULT_JOURNAL_DIR)
+        self.max_pending_ops = max_pending_ops
+        self.idle_timeout = idle_timeout
+        self._sessions: Dict[str, EditSession] = {}
+
+    def get(self, document_id: str) -> Optional[EditSession]:
+        return self._sessions.get(str(document_id))
+
+    def open(self, document_id: str, file_content: bytes, version: int = 0) -> EditSession:
+        """Open (or return the already open) session at the stored version, recovering any journaled ops"""
+        document_id = str(document_id)
+        session = self._sessions.get(document_id)
+        if session is None:
+            os.makedirs(self.journal_dir, exist_ok=True)
+            session = EditSession(document_id, file_content, self._journal_path(document_id), version)
+            replayed = session.replay_journal()
+            if replayed:
+                print(f"Edit session {document_id}: recovered {replayed} journaled operations")
+            self._sessions[document_id] = session
+        return session
+
+    def close(self, document_id: str) -> Optional[EditSession]:
+        return self._sessions.pop(str(document_id), None)
+
+    def flush_due(self, session: EditSession) -> bool:
+        return session.pending_ops >= self.max_pending_ops
+
+    def idle(self) -> List[EditSession]:
+        now = time.monotonic()
+        return [s for s in self._sessions.values() if now - s.last_activity >= self.idle_timeout]
+
+    def open_sessions(self) -> List[EditSession]:
+        return list(self._sessions.values())
+
+    def orphaned_journals(self) -> List[str]:
+        """Document ids with journaled ops but no open session (left by a crash)"""
+        if not os.path.isdir(self.journal_dir):
+            return []
+        return [
+            name[:-len(".jsonl")] for name in os.listdir(self.journal_dir)
+            if name.endswith(".jsonl") and name[:-len(".jsonl")] not in self._sessions
+        ]
+
+    def _journal_path(self, document_id: str) -> str:
+        return os.path.join(self.journal_dir, f"{document_id}.jsonl")
@@ -1,13 +1,23 @@
 import uuid
 import io
+import re
 from docx import Document
+from docx.oxml import parse_xml
 from docx.oxml.ns import qn
+from lxml import etree
+
+from .docx_stream import in_fallback
+
+# Secondary parts whose paragraphs get IDs too (headers, footers, notes)
+SECONDARY_PARTS = re.compile(r"^/word/(header\d*|footer\d*|footnotes|endnotes)\.xml$")
 
 class IDNormalizer:
     """
     The 'Ingestion Gatekeeper'.
     Ensures every paragraph in a DOCX file has a stable, unique 'paraId'.
     This allows us to rely on these IDs for round-trip editing later.
+    Covers the whole body (table cells and text boxes included) plus
+    headers, footers, footnotes and endnotes.
     """
     
     @staticmethod
@@ -25,17 +35,33 @@ class IDNormalizer:
         modified = False
         existing_ids = set()
 
+        # Paragraph elements of every part, parsed once; blob-only parts
+        # (footnotes/endnotes) are written back from their parsed XML
+        paragraphs = list(doc.element.body.iter(qn('w:p')))
+        blob_parts = []
+        for part in doc.part.package.iter_parts():
+            if not SECONDARY_PARTS.match(str(part.partname)):
+                continue
+            element = getattr(part, "element", None)
+            if element is None:
+                element = parse_xml(part.blob)
+                blob_parts.append((part, element))
+            paragraphs.extend(element.iter(qn('w:p')))
+
         # First pass: Collect existing IDs to ensure uniqueness
-        for p in doc.paragraphs:
-            # Access the underlying XML element
+        for p in paragraphs:
             # The attribute is w:paraId in the w namespace
-            para_id = p._element.get(qn('w:paraId'))
+            para_id = p.get(qn('w:paraId'))
             if para_id:
                 existing_ids.add(para_id)
 
-        # Second pass: Inject missing IDs
-        for p in doc.paragraphs:
-            para_id = p._element.get(qn('w:paraId'))
+        # Second pass: Inject missing IDs (not into mc:Fallback text-box copies,
+        # which Word ignores; their IDs above still count for uniqueness)
+        touched_blobs = set()
+        for p in paragraphs:
+            if in_fallback(p):
+                continue
+            para_id = p.get(qn('w:paraId'))
             
             if not para_id:
                 # Generate a new 8-char hex ID (standard Word format is 8 hex chars)
@@ -48,13 +74,18 @@ class IDNormalizer:
                 while new_id in existing_ids:
                     new_id = str(uuid.uuid4())
                 
-                p._element.set(qn('w:paraId'), new_id)
+                p.set(qn('w:paraId'), new_id)
                 existing_ids.add(new_id)
                 modified = True
+                touched_blobs.add(p.getroottree().getroot())
 
         if not modified:
             return file_content
 
+        for part, element in blob_parts:
+            if element in touched_blobs:
+                part._blob = etree.tostring(element, xml_declaration=True, encoding="UTF-8", standalone=True)
+
         # Save to bytes
         target_stream = io.BytesIO()
         doc.save(target_stream)
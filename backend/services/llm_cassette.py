@@ -0,0 +1,210 @@
+"""
+Record/replay cassette layer for Mistral chat completions.
+
+Every service talks to the LLM through `MistralService.client.chat.complete`,
+so wrapping that client is enough to cover MistralService, ScenarioService and
+DocumentStructureService alike.
+
+Modes (set via environment):
+    MISTRAL_CASSETTE_MODE=record  -> call the real API and append each prompt/completion
+    MISTRAL_CASSETTE_MODE=replay  -> serve completions from the cassette, no network
+    MISTRAL_CASSETTE_PATH         -> JSONL cassette file (default: cassettes/mistral.jsonl)
+    MISTRAL_CASSETTE_LATENCY_MS   -> replay delay in ms, or "recorded" to reuse the
+                                     latency captured at record time (default: 0)
+"""
+import os
+import json
+import time
+import hashlib
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional
+
+DEFAULT_CASSETTE_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "cassettes",
+    "mistral.jsonl"
+)
+
+
+class CassetteMissError(LookupError):
+    """Raised in replay mode when a prompt was never recorded"""
+
+
+class _Message:
+    def __init__(self, content: str):
+        self.role = "assistant"
+        self.content = content
+
+
+class _Choice:
+    def __init__(self, content: str):
+        self.index = 0
+        self.message = _Message(content)
+        self.finish_reason = "stop"
+
+
+class CassetteResponse:
+    """Minimal stand-in for the Mistral ChatCompletionResponse (choices[0].message.content)"""
+
+    def __init__(self, content: str, model: str):
+        self.model = model
+        self.choices = [_Choice(content)]
+
+
+class Cassette:
+    """
+    Append-only JSONL store of prompt -> completion interactions.
+    One instance is shared per path so all services replay from the same cursors.
+    """
+    _open_cassettes: Dict[str, "Cassette"] = {}
+    _registry_lock = threading.Lock()
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._entries: Dict[str, List[Dict]] = {}
+        self._cursors: Dict[str, int] = {}
+        self._load()
+
+    @classmethod
+    def open(cls, path: str) -> "Cassette":
+        path = os.path.abspath(path)
+        with cls._registry_lock:
+            if path not in cls._open_cassettes:
+                cls._open_cassettes[path] = cls(path)
+            return cls._open_cassettes[path]
+
+    @staticmethod
+    def request_key(params: Dict) -> str:
+        """Stable hash of the full request (model, messages, sampling options)"""
+        canonical = json.dumps(params, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # A torn final line from an interrupted recording
+                    continue
+                self._entries.setdefault(entry["key"], []).append(entry)
+
+    def __len__(self) -> int:
+        return sum(len(v) for v in self._entries.values())
+
+    def record(self, params: Dict, content: str, latency_ms: int):
+        key = self.request_key(params)
+        entry = {
+            "key": key,
+            "request": params,
+            "content": content,
+            "latency_ms": latency_ms,
+            "recorded_at": datetime.utcnow().isoformat()
+        }
+        with self._lock:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False, default=str) + "\n")
+            self._entries.setdefault(key, []).append(entry)
+
+    def next_entry(self, params: Dict) -> Dict:
+        """
+        Return the next recorded entry for this request.
+        Repeated identical prompts are served in recorded order; once exhausted
+        the last recording is repeated so replays never run dry.
+        """
+        key = self.request_key(params)
+        with self._lock:
+            entries = self._entries.get(key)
+            if not entries:
+                raise CassetteMissError(
+                    f"No cassette entry for request {key[:12]} (model={params.get('model')}) in {self.path}"
+                )
+            cursor = self._cursors.get(key, 0)
+            self._cursors[key] = cursor + 1
+            return entries[min(cursor, len(entries) - 1)]
+
+    def rewind(self):
+        with self._lock:
+            self._cursors.clear()
+
+
+class _CassetteChat:
+    def __init__(self, owner: "CassetteClient"):
+        self._owner = owner
+
+    def complete(self, **kwargs):
+        return self._owner._complete(**kwargs)
+
+
+class CassetteClient:
+    """
+    Drop-in wrapper for `Mistral` exposing `.chat.complete(**kwargs)`.
+    In replay mode `inner` may be None (no API key needed).
+    """
+
+    def __init__(self, inner, mode: str, cassette: Cassette, latency_ms: Optional[str] = None):
+        if mode not in ("record", "replay"):
+            raise ValueError(f"Unknown cassette mode: {mode}")
+        if mode == "record" and inner is None:
+            raise ValueError("Cassette record mode requires a configured Mistral client")
+        self.inner = inner
+        self.mode = mode
+        self.cassette = cassette
+        self.latency_ms = latency_ms or "0"
+        self.chat = _CassetteChat(self)
+
+    def _complete(self, **kwargs):
+        params = dict(kwargs)
+
+        if self.mode == "record":
+            start = time.time()
+            response = self.inner.chat.complete(**kwargs)
+            latency_ms = int((time.time() - start) * 1000)
+            self.cassette.record(params, response.choices[0].message.content, latency_ms)
+            return response
+
+        entry = self.cassette.next_entry(params)
+        delay_ms = self._replay_delay_ms(entry)
+        if delay_ms > 0:
+            # Called via asyncio.to_thread, so sleeping here does not block the event loop
+            time.sleep(delay_ms / 1000.0)
+        return CassetteResponse(entry["content"], params.get("model", ""))
+
+    def _replay_delay_ms(self, entry: Dict) -> int:
+        if self.latency_ms == "recorded":
+            return int(entry.get("latency_ms") or 0)
+        try:
+            return int(float(self.latency_ms))
+        except ValueError:
+            return 0
+
+
+def wrap_client(client):
+    """
+    Wrap a Mistral client according to MISTRAL_CASSETTE_* settings.
+    Returns the client unchanged when no cassette mode is configured.
+    """
+    mode = (os.getenv("MISTRAL_CASSETTE_MODE") or "").strip().lower()
+    if not mode or mode == "off":
+        return client
+
+    path = os.getenv("MISTRAL_CASSETTE_PATH", DEFAULT_CASSETTE_PATH)
+
+    if mode == "record" and client is None:
+        print("WARNING: MISTRAL_CASSETTE_MODE=record but MISTRAL_API_KEY not set. Recording disabled.")
+        return None
+
+    return CassetteClient(
+        client,
+        mode=mode,
+        cassette=Cassette.open(path),
+        latency_ms=os.getenv("MISTRAL_CASSETTE_LATENCY_MS")
+    )
@@ -0,0 +1,309 @@
+"""
+Deterministic clause dependency graph for /api/logic-graph.
+
+Nodes and edges come from the parsed tree, the section index (cross-reference
+edges) and the term index (definition -> usage edges), so the same document
+and conflict always render the same graph. The LLM is only asked to label
+edge semantics on the small conflict subgraph, and results are cached per
+(document version, conflict).
+"""
+import hashlib
+import json
+from collections import OrderedDict
+from typing import Dict, List, Optional, Set, Tuple
+
+from .section_index import REFERENCE_PATTERN, SectionIndex
+from .term_index import TermIndex
+
+# Graphs kept in memory (per document version + conflict)
+LOGIC_GRAPH_CACHE_SIZE = 256
+
+# Nodes rendered around the conflict (React Flow stays readable below this)
+MAX_GRAPH_NODES = 40
+
+_PROTECTION_WORDS = ("notwithstanding", "entitled to retain", "shall not apply", "protect", "except that")
+
+EDGE_TYPES = {"triggers", "depends_on", "contradicts", "excludes"}
+
+
+class LogicGraphBuilder:
+    """Builds React Flow nodes/edges from stored document indexes"""
+
+    @staticmethod
+    def clause_graph(
+        tree: Optional[Dict],
+        text: str,
+        section_index: Optional[Dict] = None,
+        term_index: Optional[Dict] = None
+    ) -> Dict:
+        """
+        Whole-document clause graph, independent of any conflict (cache per document version):
+        {"nodes": {section_key: node}, "adjacency": {section_key: [[neighbour, type, label, forward]]},
+         "ids": {graph_node_id: section_key}}
+        Adjacency is stored both ways for neighbourhood walks; "forward" keeps the edge direction.
+        """
+        if not isinstance(section_index, dict):
+            section_index = SectionIndex.build(tree, text)
+        if not isinstance(term_index, dict):
+            term_index = TermIndex.build(tree, text)
+
+        sections = section_index.get("sections", {})
+        owner = SectionIndex.section_owners(tree)
+        adjacency: Dict[str, List[List]] = {}
+
+        def connect(source: str, target: str, edge_type: str, label: str):
+            if source and target and source != target:
+                adjacency.setdefault(source, []).append([target, edge_type, label, True])
+                adjacency.setdefault(target, []).append([source, edge_type, label, False])
+
+        node_key = {entry["node_id"]: key for key, entry in sections.items() if entry.get("node_id")}
+        for ref in section_index.get("references", []):
+            source = owner.get(ref["from"]) or node_key.get(ref["from"])
+            target = owner.get(ref["to"]) or node_key.get(ref["to"])
+            connect(source, target, "depends_on", f"refers to {ref['phrase']}")
+
+        terms = term_index.get("terms", {})
+        for term_key, usages in term_index.get("usages", {}).items():
+            definition = terms.get(term_key, {})
+            defining = owner.get(definition.get("node_id"))
+            if not defining:
+                continue
+            seen: Set[str] = set()
+            for node_id, _, _ in usages:
+                user = owner.get(node_id)
+                if user and user not in seen:
+                    seen.add(user)
+                    connect(defining, user, "depends_on", f"uses \"{definition.get('term', term_key)}\"")
+
+        definition_keys = {owner.get(d.get("node_id")) for d in terms.values()}
+        nodes = {}
+        for key, entry in sections.items():
+            if "(" in key:
+                # Graph nodes are sections/articles; points fold into their section
+                continue
+            node = LogicGraphBuilder._node(key, entry, False)
+            if key in definition_keys and node["type"] != "protection":
+                node["type"] = "definition"
+            nodes[key] = node
+
+        return {
+            "nodes": nodes,
+            "adjacency": adjacency,
+            "ids": {node["id"]: key for key, node in nodes.items()}
+        }
+
+    @staticmethod
+    def build(
+        tree: Optional[Dict],
+        text: str,
+        conflict_analysis: Dict,
+        section_index: Optional[Dict] = None,
+        term_index: Optional[Dict] = None,
+        expand: bool = False,
+        clause_graph: Optional[Dict] = None
+    ) -> Dict:
+        if clause_graph is None:
+            clause_graph = LogicGraphBuilder.clause_graph(tree, text, section_index, term_index)
+        graph_nodes = clause_graph["nodes"]
+        adjacency = clause_graph["adjacency"]
+
+        # Seeds: the sections the conflict analysis points at
+        seeds: List[str] = []
+        for ref in conflict_analysis.get("affected_sections", []) or []:
+            # "Article III" / "Clause 5.1" / "§ 4.2(a)", or a bare "4.2"
+            matches = list(REFERENCE_PATTERN.finditer(str(ref)))
+            keys = [SectionIndex.normalize_ref(m.group("kind"), m.group("num")) for m in matches] \
+                or [SectionIndex.normalize_ref(None, str(ref))]
+            for key in keys:
+                if key not in graph_nodes:
+                    # Graph nodes are sections; "4.2(a)" collapses into 4.2
+                    key = key.split("(", 1)[0]
+                if key in graph_nodes and key not in seeds:
+                    seeds.append(key)
+
+        # Breadth-first neighbourhood around the seeds (1 hop, 2 when expanded)
+        included = LogicGraphBuilder._walk(adjacency, seeds, 2 if expand else 1, MAX_GRAPH_NODES)
+
+        conflict_keys = set(seeds)
+        nodes = [{**graph_nodes[key], "is_conflict_node": key in conflict_keys} for key in included if key in graph_nodes]
+        edges, emitted = LogicGraphBuilder._edges(adjacency, included, set(included), conflict_keys)
+
+        # The conflict itself: seeds that contradict each other without a textual link
+        for a, b in zip(seeds, seeds[1:]):
+            if (a, b) not in emitted and (b, a) not in emitted:
+                edges.append({
+                    "from": LogicGraphBuilder.node_id(a),
+                    "to": LogicGraphBuilder.node_id(b),
+                    "type": "contradicts",
+                    "label": "conflicts with",
+                    "is_conflict_edge": True
+                })
+
+        return {"nodes": nodes, "edges": edges}
+
+    @staticmethod
+    def neighborhood(
+        clause_graph: Dict,
+        node_id: str,
+        hops: int = 1,
+        known: Optional[List[str]] = None,
+        offset: int = 0,
+        limit: int = 50
+    ) -> Dict:
+        """
+        Incremental expansion: the k-hop neighbourhood of one node, minus the
+        nodes the client already shows, paginated in breadth-first order.
+        Returns only new nodes and the edges that connect them to visible ones.
+        """
+        ids = clause_graph["ids"]
+        start = ids.get(node_id) or (node_id if node_id in clause_graph["nodes"] else None)
+        if start is None:
+            raise KeyError(node_id)
+
+        known_keys = {ids[k] for k in known or [] if k in ids}
+        reachable = LogicGraphBuilder._walk(clause_graph["adjacency"], [start], max(1, hops))
+        fresh = [k for k in reachable if k != start and k not in known_keys and k in clause_graph["nodes"]]
+
+        page = fresh[offset:offset + limit]
+        visible = known_keys | {start} | set(fresh[:offset + limit])
+        edges, _ = LogicGraphBuilder._edges(clause_graph["adjacency"], page, visible, set())
+        next_offset = offset + limit if offset + limit < len(fresh) else None
+
+        return {
+            "node_id": LogicGraphBuilder.node_id(start),
+            "nodes": [clause_graph["nodes"][k] for k in page],
+            "edges": edges,
+            "total": len(fresh),
+            "offset": offset,
+            "next_offset": next_offset
+        }
+
+    @staticmethod
+    def node_id(section_key: str) -> str:
+        """"4.2(a)" -> "clause_4_2_a", "article i" -> "clause_article_i" """
+        cleaned = section_key.replace(".", "_").replace("(", "_").replace(")", "").replace(" ", "_")
+        return f"clause_{cleaned}"
+
+    @staticmethod
+    def conflict_subgraph(graph: Dict) -> Dict:
+        """Conflict nodes plus every edge touching them (the part worth labelling)"""
+        conflict_ids = {n["id"] for n in graph["nodes"] if n.get("is_conflict_node")}
+        edges = [e for e in graph["edges"] if e["from"] in conflict_ids or e["to"] in conflict_ids]
+        touched = conflict_ids | {e["from"] for e in edges} | {e["to"] for e in edges}
+        return {"nodes": [n for n in graph["nodes"] if n["id"] in touched], "edges": edges}
+
+    @staticmethod
+    def apply_annotations(graph: Dict, annotations: List[Dict]) -> Dict:
+        """Merge LLM edge labels ({"from", "to", "type", "label"}) into the graph"""
+        by_pair = {}
+        for a in annotations or []:
+            if isinstance(a, dict) and a.get("type") in EDGE_TYPES:
+                by_pair[(a.get("from"), a.get("to"))] = a
+        for edge in graph["edges"]:
+            a = by_pair.get((edge["from"], edge["to"])) or by_pair.get((edge["to"], edge["from"]))
+            if a:
+                edge["type"] = a["type"]
+                edge["label"] = a.get("label") or edge["label"]
+        return graph
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _walk(adjacency: Dict, seeds: List[str], depth: int, max_nodes: Optional[int] = None) -> Dict[str, int]:
+        """Breadth-first walk: section key -> hop count, in discovery order"""
+        included: Dict[str, int] = {seed: 0 for seed in seeds}
+        frontier = list(seeds)
+        for hop in range(1, depth + 1):
+            next_frontier = []
+            for key in frontier:
+                for neighbour, _, _, _ in adjacency.get(key, []):
+                    if neighbour in included or (max_nodes is not None and len(included) >= max_nodes):
+                        continue
+                    included[neighbour] = hop
+                    next_frontier.append(neighbour)
+            frontier = next_frontier
+        return included
+
+    @staticmethod
+    def _edges(adjacency: Dict, keys, visible: Set[str], conflict_keys: Set[str]) -> Tuple[List[Dict], Set[Tuple[str, str]]]:
+        """Edges from each of keys to any visible node, deduplicated and oriented"""
+        edges = []
+        emitted: Set[Tuple[str, str]] = set()
+        for key in keys:
+            for neighbour, edge_type, label, forward in adjacency.get(key, []):
+                if neighbour not in visible:
+                    continue
+                pair = (key, neighbour) if forward else (neighbour, key)
+                if pair in emitted or (pair[1], pair[0]) in emitted:
+                    continue
+                emitted.add(pair)
+                edges.append({
+                    "from": LogicGraphBuilder.node_id(pair[0]),
+                    "to": LogicGraphBuilder.node_id(pair[1]),
+                    "type": edge_type,
+                    "label": label,
+                    "is_conflict_edge": pair[0] in conflict_keys and pair[1] in conflict_keys
+                })
+        return edges, emitted
+
+    @staticmethod
+    def _node(key: str, entry: Dict, is_conflict: bool) -> Dict:
+        text = entry.get("text", "")
+        first_line = text.split("\n", 1)[0]
+        lowered = first_line.lower()
+        if any(w in lowered for w in _PROTECTION_WORDS):
+            node_type = "protection"
+        elif any(w in lowered for w in ("if ", "unless", "provided that", "subject to")):
+            node_type = "condition"
+        else:
+            node_type = "consequence"
+        return {
+            "id": LogicGraphBuilder.node_id(key),
+            "label": LogicGraphBuilder._label(key, entry, first_line),
+            "type": node_type,
+            "section_ref": key,
+            "preview": first_line[:160],
+            "is_conflict_node": is_conflict,
+            "is_implicit": False
+        }
+
+    @staticmethod
+    def _label(key: str, entry: Dict, first_line: str) -> str:
+        label = entry.get("label") or key
+        # "4.2 GOOD REASON PROTECTION. Notwithstanding ..." -> "4.2 Good Reason Protection"
+        heading = first_line[len(label):].strip(" .:-") if first_line.startswith(label) else ""
+        title = heading.split(".", 1)[0].strip()
+        if title and len(title) <= 60:
+            return f"{label} {title.title() if title.isupper() else title}"
+        return f"Section {label}" if label[:1].isdigit() else label.title()
+
+
+class LogicGraphCache:
+    """Small LRU keyed by (document version, conflict)"""
+
+    def __init__(self, max_size: int = LOGIC_GRAPH_CACHE_SIZE):
+        self.max_size = max_size
+        self._entries: "OrderedDict[str, Dict]" = OrderedDict()
+
+    @staticmethod
+    def key(document_version: str, conflict_analysis: Dict, expand: bool) -> str:
+        conflict = json.dumps(conflict_analysis, sort_keys=True, default=str)
+        return hashlib.sha256(f"{document_version}|{expand}|{conflict}".encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def document_version(document_id: str, text: str) -> str:
+        return f"{document_id}:{hashlib.sha256((text or '').encode('utf-8')).hexdigest()[:16]}"
+
+    def get(self, key: str) -> Optional[Dict]:
+        graph = self._entries.get(key)
+        if graph is not None:
+            self._entries.move_to_end(key)
+        return graph
+
+    def put(self, key: str, graph: Dict):
+        self._entries[key] = graph
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
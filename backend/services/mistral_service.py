@@ -12,6 +12,8 @@ from typing import Dict, List, Optional
 from dotenv import load_dotenv
 from pathlib import Path
 from functools import wraps
+from .llm_cassette import wrap_client
+from .definition_extractor import DefinitionExtractor
 
 
 # Load environment variables
@@ -21,12 +23,16 @@ load_dotenv(dotenv_path=env_path)
 class MistralService:
     def __init__(self):
         api_key = os.getenv("MISTRAL_API_KEY")
+        replaying = os.getenv("MISTRAL_CASSETTE_MODE", "").lower() == "replay"
         # Allow instantiation without key for dev/mock mode if needed, but warn
         if not api_key:
-            print("WARNING: MISTRAL_API_KEY not set. Queries will fail.")
+            if not replaying:
+                print("WARNING: MISTRAL_API_KEY not set. Queries will fail.")
             self.client = None
         else:
             self.client = Mistral(api_key=api_key)
+        # Record/replay layer (no-op unless MISTRAL_CASSETTE_MODE is set)
+        self.client = wrap_client(self.client)
         self.model = os.getenv("MISTRAL_MODEL_ID", "mistral-small-latest")
     
     def _clean_json_response(self, content: str) -> str:
@@ -37,9 +43,104 @@ class MistralService:
             content = content.split("```")[1].split("```")[0]
         return content.strip()
 
-    async def extract_definitions(self, text: str) -> List[Dict]:
+    async def extract_definitions(self, text: str, tree: Optional[Dict] = None) -> List[Dict]:
         """
-        Extract defined terms from legal document
+        Extract defined terms from legal document.
+        Fast path: DefinitionExtractor finds definitions locally in one pass; the LLM
+        only categorizes them and fills gaps. Falls back to whole-document extraction
+        when nothing is mechanically detectable.
+        """
+        local_definitions = DefinitionExtractor.extract(text, tree)
+        if local_definitions:
+            gaps = DefinitionExtractor.find_undefined_quoted_terms(text, local_definitions)
+            return await self.categorize_definitions(local_definitions, gaps)
+
+        return await self._extract_definitions_llm(text)
+
+    async def categorize_definitions(self, definitions: List[Dict], gaps: List = None) -> List[Dict]:
+        """
+        Ask the LLM to categorize locally extracted definitions and define gap terms
+        (quoted terms with no local definition). Only terms and short snippets are sent.
+        Keeps the keyword-guessed categories if the LLM is unavailable or fails.
+        """
+        if not self.client:
+            return definitions
+
+        gaps = gaps or []
+        terms_text = "\n".join([
+            f'- "{d["term"]}": {d["definition"][:160]}'
+            for d in definitions
+        ])
+        gaps_text = "\n".join([
+            f'- "{term}" (context: ...{snippet[:300]}...)'
+            for term, snippet in gaps
+        ]) or "None"
+
+        messages = [
+            {
+                "role": "user",
+                "content": f"""These defined terms were extracted from a legal document.
+
+Defined terms:
+{terms_text}
+
+Quoted terms used without a detected definition:
+{gaps_text}
+
+1. Categorize every defined term into one of: "parties", "financial", "time", "conditions", "equity", "general".
+2. For each quoted term without a definition, give its definition ONLY if the context states it; otherwise skip it.
+
+Return ONLY a JSON object with NO other text:
+{{
+  "categories": {{"Company": "parties", "Vesting Period": "time"}},
+  "additional_definitions": [
+    {{"term": "Good Reason", "definition": "material reduction in salary...", "category": "conditions"}}
+  ]
+}}"""
+            }
+        ]
+
+        try:
+            response = await asyncio.to_thread(
+                self.client.chat.complete,
+                model=self.model,
+                messages=messages,
+                temperature=0.1
+            )
+
+            content = response.choices[0].message.content
+            content = self._clean_json_response(content)
+            result = json.loads(content)
+
+            categories = result.get("categories", {}) if isinstance(result, dict) else {}
+            valid = {"parties", "financial", "time", "conditions", "equity", "general"}
+            for d in definitions:
+                category = categories.get(d["term"])
+                if category in valid:
+                    d["category"] = category
+
+            known = {d["term"].lower() for d in definitions}
+            for extra in result.get("additional_definitions", []) if isinstance(result, dict) else []:
+                term = (extra.get("term") or "").strip()
+                if term and term.lower() not in known and extra.get("definition"):
+                    definitions.append({
+                        "term": term,
+                        "definition": extra["definition"],
+                        "section": extra.get("section", "Unknown"),
+                        "category": extra.get("category") if extra.get("category") in valid else "general",
+                        "source": "llm"
+                    })
+                    known.add(term.lower())
+
+            return definitions
+
+        except Exception as e:
+            print(f"Error categorizing definitions: {e}")
+            return definitions
+
+    async def _extract_definitions_llm(self, text: str) -> List[Dict]:
+        """
+        Whole-document LLM extraction (used when no definitions are found locally)
         """
         if not self.client: return []
 
@@ -188,6 +289,112 @@ Edge types: triggers, depends_on, contradicts, excludes
             
             return {"nodes": nodes, "edges": edges}
     
+    async def annotate_logic_graph(self, subgraph: Dict, conflict_analysis: Dict) -> List[Dict]:
+        """
+        Label edge semantics on a deterministic conflict subgraph.
+        Returns [{"from", "to", "type", "label"}]; empty on failure (graph keeps its defaults).
+        """
+        if not self.client or not subgraph.get("edges"):
+            return []
+
+        nodes_text = "\n".join(
+            f"- {n['id']} ({n['label']}): {n['preview']}" for n in subgraph["nodes"]
+        )
+        edges_text = "\n".join(f"- {e['from']} -> {e['to']}" for e in subgraph["edges"])
+        messages = [{
+            "role": "user",
+            "content": f"""Label the relationships between these contract clauses.
+
+Conflict: {conflict_analysis.get("details") or conflict_analysis.get("conflict_type", "")}
+
+Clauses:
+{nodes_text}
+
+Edges:
+{edges_text}
+
+For each edge choose one type: triggers, depends_on, contradicts, excludes, and a short label (max 4 words).
+
+Return ONLY a JSON object (no markdown):
+{{"edges": [{{"from": "clause_1_1", "to": "clause_4_2", "type": "triggers", "label": "activates"}}]}}
+"""
+        }]
+
+        try:
+            response = await asyncio.to_thread(
+                self.client.chat.complete,
+                model=self.model,
+                messages=messages,
+                temperature=0.0
+            )
+            content = self._clean_json_response(response.choices[0].message.content)
+            return json.loads(content).get("edges", [])
+        except Exception as e:
+            print(f"Error annotating logic graph: {e}")
+            return []
+
+    async def summarize_clauses(self, clauses: List[Dict], batch_size: int = 25, concurrency: int = 4) -> Dict[str, Dict]:
+        """
+        Per-clause findings for the clause memo store (services.clause_memo).
+        clauses: [{"id", "section", "text"}]; returns {id: {"classification", "boilerplate", "terms", "findings"}}
+        The model sees short positional ids (c0, c1, ...) that are mapped back
+        here, so a mis-copied id cannot attach findings to the wrong clause.
+        At most `concurrency` batches are in flight.
+        """
+        if not self.client or not clauses:
+            return {}
+
+        ids = {f"c{i}": c["id"] for i, c in enumerate(clauses)}
+        numbered = [{**c, "id": f"c{i}"} for i, c in enumerate(clauses)]
+        limit = asyncio.Semaphore(max(concurrency, 1))
+
+        async def summarize_batch(batch: List[Dict]) -> Dict[str, Dict]:
+            clauses_text = "\n\n".join(
+                f"[{c['id']}] {('Section ' + c['section']) if c.get('section') else ''}\n{c['text']}" for c in batch
+            )
+            batch_ids = {c["id"] for c in batch}
+            messages = [{
+                "role": "user",
+                "content": f"""Summarize each contract clause for later risk analysis.
+
+Clauses (each starts with its [id]):
+{clauses_text}
+
+For each clause return:
+- classification: snake_case clause type (governing_law, notices, confidentiality, termination, vesting, payment, ...)
+- boilerplate: true only if the wording is standard market boilerplate with no deal-specific terms, numbers or conditions
+- terms: defined terms the clause relies on
+- findings: one sentence on what the clause does (triggers, consequences, exceptions)
+
+Return ONLY a JSON object (no markdown):
+{{"clauses": [{{"id": "c0", "classification": "notices", "boilerplate": true, "terms": ["Party"], "findings": "..."}}]}}
+"""
+            }]
+            try:
+                async with limit:
+                    response = await asyncio.to_thread(
+                        self.client.chat.complete,
+                        model=self.model,
+                        messages=messages,
+                        temperature=0.0
+                    )
+                content = self._clean_json_response(response.choices[0].message.content)
+                summaries = {}
+                for c in json.loads(content).get("clauses", []):
+                    position = str(c.get("id", "")).strip("[] ") if isinstance(c, dict) else ""
+                    if position in batch_ids:
+                        summaries[ids[position]] = {**c, "id": ids[position]}
+                return summaries
+            except Exception as e:
+                print(f"Error summarizing clauses: {e}")
+                return {}
+
+        batches = [numbered[i:i + batch_size] for i in range(0, len(numbered), batch_size)]
+        summaries: Dict[str, Dict] = {}
+        for result in await asyncio.gather(*[summarize_batch(b) for b in batches]):
+            summaries.update(result)
+        return summaries
+
     async def analyze_conflicts(self, text: str, definitions: List[Dict]) -> Dict:
         """
         Analyze document for logical conflicts
@@ -0,0 +1,317 @@
+"""
+Parallel, memory-bounded PDF text extraction.
+
+pypdf's extract_text is pure Python and slow on large data room PDFs, so
+page ranges are extracted in a process pool. The parent only hashes each
+page and streams texts out in page order as ranges finish, so the structure
+builder starts on page 1 while later pages are still being extracted. At
+most 2 ranges per worker are in flight.
+
+Limits:
+- PDF_MAX_PAGES: larger PDFs are rejected before any extraction
+- PDF_MAX_TEXT_CHARS: extraction stops once this much text was produced
+- PDF_WORKER_MEMORY_MB: address-space limit per worker (RLIMIT_AS, Linux);
+  workers are also recycled every TASKS_PER_CHILD ranges so RSS cannot creep
+- PDF_TASK_TIMEOUT_SECONDS: a range that takes longer fails its request and
+  retires the pool (its worker may be stuck): new requests get a fresh pool,
+  requests already running on the old one finish there, and the old pool is
+  terminated when the last of them is done
+
+Per-page texts are cached (LRU, bounded by characters) under a hash of the
+page's content stream and everything its resources reference: fonts with
+their encodings, Differences and ToUnicode maps, and Form XObjects with their
+own content and resources, recursively. Re-uploaded drafts only extract the
+pages that changed.
+"""
+import hashlib
+import io
+import multiprocessing
+import os
+import shutil
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import BinaryIO, Dict, Iterator, List, Optional, Tuple, Union
+
+from pypdf import PdfReader
+from pypdf.generic import ArrayObject, DictionaryObject, IndirectObject, StreamObject
+
+PAGES_PER_TASK = 16
+TASKS_PER_CHILD = 50
+# Below this many uncached pages the pool is not worth the round-trip
+PARALLEL_MIN_PAGES = 24
+CACHE_MAX_CHARS = 20_000_000
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, default))
+    except ValueError:
+        return default
+
+
+def _limit_memory(limit_bytes: int):
+    """Pool initializer: cap the worker's address space"""
+    if not limit_bytes:
+        return
+    try:
+        import resource
+        resource.setrlimit(resource.RLIMIT_AS, (limit_bytes, limit_bytes))
+    except (ImportError, ValueError, OSError):
+        pass
+
+
+def _extract_range(path: str, start: int, stop: int) -> List[str]:
+    """Worker: texts of pages [start, stop) of the PDF at path"""
+    reader = PdfReader(path)
+    return [_page_text(reader.pages[i]) for i in range(start, stop)]
+
+
+def _object_hash(obj, shared: Dict, visiting: set) -> str:
+    """
+    Hash of a PDF object with everything it references, resolved: dictionaries
+    by sorted key, streams by their decoded data. Image data is left out (no
+    text in it), and so is /Parent (the page tree is not part of the page).
+    """
+    if isinstance(obj, IndirectObject):
+        ref = (obj.idnum, obj.generation)
+        if ref in shared:
+            return shared[ref]
+        if ref in visiting:
+            return "cycle"
+        visiting.add(ref)
+        shared[ref] = _object_hash(obj.get_object(), shared, visiting)
+        visiting.discard(ref)
+        return shared[ref]
+
+    digest = hashlib.sha256()
+    if isinstance(obj, DictionaryObject):
+        for key in sorted(obj.keys()):
+            if key != "/Parent":
+                digest.update(f"{key}:{_object_hash(obj.raw_get(key), shared, visiting)};".encode("utf-8"))
+        if isinstance(obj, StreamObject) and obj.get("/Subtype") != "/Image":
+            try:
+                digest.update(obj.get_data())
+            except Exception:
+                digest.update(obj._data or b"")
+    elif isinstance(obj, ArrayObject):
+        for item in obj:
+            digest.update(f"{_object_hash(item, shared, visiting)},".encode("utf-8"))
+    else:
+        digest.update(f"{type(obj).__name__}:{obj!r}".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _page_text(page) -> str:
+    try:
+        return page.extract_text() or ""
+    except MemoryError:
+        raise
+    except Exception as e:
+        # One broken page must not sink the document
+        print(f"Warning: could not extract PDF page text - {e}")
+        return ""
+
+
+class PdfExtractor:
+    """Page-ordered PDF text with a shared process pool and page cache"""
+
+    _shared: Optional["PdfExtractor"] = None
+    _shared_lock = threading.Lock()
+
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        max_pages: Optional[int] = None,
+        max_text_chars: Optional[int] = None,
+        worker_memory_mb: Optional[int] = None,
+        task_timeout: Optional[int] = None,
+        pages_per_task: int = PAGES_PER_TASK,
+        parallel_min_pages: int = PARALLEL_MIN_PAGES,
+        cache_max_chars: int = CACHE_MAX_CHARS
+    ):
+        self.workers = workers if workers is not None else _env_int("PDF_WORKERS", min(4, os.cpu_count() or 1))
+        self.max_pages = max_pages or _env_int("PDF_MAX_PAGES", 1500)
+        self.max_text_chars = max_text_chars or _env_int("PDF_MAX_TEXT_CHARS", 20_000_000)
+        self.worker_memory_mb = worker_memory_mb if worker_memory_mb is not None else _env_int("PDF_WORKER_MEMORY_MB", 1024)
+        self.task_timeout = task_timeout or _env_int("PDF_TASK_TIMEOUT_SECONDS", 120)
+        self.pages_per_task = pages_per_task
+        self.parallel_min_pages = parallel_min_pages
+        self.cache_max_chars = cache_max_chars
+
+        self._pool = None
+        self._pool_lock = threading.Lock()
+        self._pool_users: Dict[object, int] = {}  # pool -> requests running on it (retired pools too)
+        self._cache: "OrderedDict[str, str]" = OrderedDict()
+        self._cache_chars = 0
+        self._cache_lock = threading.Lock()
+        self.cache_hits = 0
+
+    @classmethod
+    def shared(cls) -> "PdfExtractor":
+        """Process-wide extractor (one pool and cache per API worker)"""
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls()
+            return cls._shared
+
+    def pages(self, content: Union[bytes, BinaryIO]) -> Iterator[Tuple[int, str]]:
+        """
+        (page_number, text) in page order; raises ValueError on limits and timeouts.
+        content: the PDF bytes, or a seekable file handle (a spooled upload)
+        """
+        if hasattr(content, "read"):
+            content.seek(0)
+        reader = PdfReader(content if hasattr(content, "read") else io.BytesIO(content))
+        page_count = len(reader.pages)
+        if page_count > self.max_pages:
+            raise ValueError(f"PDF has {page_count} pages (limit {self.max_pages})")
+
+        shared: Dict = {}
+        keys = [self._page_key(page, shared) for page in reader.pages]
+        texts: List[Optional[str]] = [self._cache_get(key) for key in keys]
+        missing = [i for i, text in enumerate(texts) if text is None]
+
+        produced = 0
+        if len(missing) < max(self.parallel_min_pages, 1) or self.workers <= 1:
+            source = ((i, texts[i] if texts[i] is not None else _page_text(reader.pages[i])) for i in range(page_count))
+        else:
+            source = self._parallel(content, texts, missing)
+
+        for i, text in source:
+            if texts[i] is None:
+                self._cache_put(keys[i], text)
+            produced += len(text)
+            if produced > self.max_text_chars:
+                raise ValueError(f"PDF text exceeds {self.max_text_chars} characters")
+            yield i + 1, text
+
+    def close(self):
+        with self._pool_lock:
+            pools = set(self._pool_users)
+            if self._pool is not None:
+                pools.add(self._pool)
+            for pool in pools:
+                pool.terminate()
+            self._pool = None
+            self._pool_users = {}
+
+    # ------------------------------------------------------------------
+
+    def _parallel(self, content: Union[bytes, BinaryIO], texts: List[Optional[str]], missing: List[int]) -> Iterator[Tuple[int, str]]:
+        # Contiguous uncached runs, cut into ranges
+        ranges: List[Tuple[int, int]] = []
+        for i in missing:
+            if ranges and ranges[-1][1] == i and i - ranges[-1][0] < self.pages_per_task:
+                ranges[-1] = (ranges[-1][0], i + 1)
+            else:
+                ranges.append((i, i + 1))
+
+        # Workers read the PDF from disk instead of receiving a copy per range
+        with tempfile.NamedTemporaryFile(suffix=".pdf") as spool:
+            if hasattr(content, "read"):
+                content.seek(0)
+                shutil.copyfileobj(content, spool, 1024 * 1024)
+            else:
+                spool.write(content)
+            spool.flush()
+            pool = self._acquire_pool()
+            try:
+                yield from self._collect(pool, spool.name, texts, ranges)
+            finally:
+                self._release_pool(pool)
+
+    def _collect(self, pool, path: str, texts: List[Optional[str]], ranges: List[Tuple[int, int]]) -> Iterator[Tuple[int, str]]:
+        """Submit ranges (at most 2 per worker ahead) and yield pages in order"""
+        in_flight: "OrderedDict[Tuple[int, int], object]" = OrderedDict()
+        next_range = 0
+
+        def submit_ahead():
+            nonlocal next_range
+            while next_range < len(ranges) and len(in_flight) < self.workers * 2:
+                start, stop = ranges[next_range]
+                in_flight[(start, stop)] = pool.apply_async(_extract_range, (path, start, stop))
+                next_range += 1
+
+        submit_ahead()
+        page = 0
+        while page < len(texts):
+            if texts[page] is not None:
+                yield page, texts[page]
+                page += 1
+                continue
+            (start, stop), result = in_flight.popitem(last=False)
+            try:
+                extracted = result.get(timeout=self.task_timeout)
+            except multiprocessing.TimeoutError:
+                self._retire_pool(pool)
+                raise ValueError(f"PDF extraction timed out on pages {start + 1}-{stop}")
+            except MemoryError:
+                raise ValueError(f"PDF pages {start + 1}-{stop} exceed the extraction memory limit")
+            submit_ahead()
+            for offset, text in enumerate(extracted):
+                yield start + offset, text
+            page = stop
+
+    def _acquire_pool(self):
+        with self._pool_lock:
+            if self._pool is None:
+                methods = multiprocessing.get_all_start_methods()
+                # forkserver: no fork of the (threaded) API process itself
+                context = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+                self._pool = context.Pool(
+                    processes=self.workers,
+                    initializer=_limit_memory,
+                    initargs=(self.worker_memory_mb * 1024 * 1024,),
+                    maxtasksperchild=TASKS_PER_CHILD
+                )
+            self._pool_users[self._pool] = self._pool_users.get(self._pool, 0) + 1
+            return self._pool
+
+    def _release_pool(self, pool):
+        with self._pool_lock:
+            users = self._pool_users.get(pool, 0) - 1
+            if users > 0:
+                self._pool_users[pool] = users
+                return
+            self._pool_users.pop(pool, None)
+            if pool is not self._pool:
+                # Retired and no request left on it
+                pool.terminate()
+
+    def _retire_pool(self, pool):
+        """Stop handing out this pool (a worker may be stuck); it is terminated once unused"""
+        with self._pool_lock:
+            if self._pool is pool:
+                self._pool = None
+
+    @staticmethod
+    def _page_key(page, shared: Optional[Dict] = None) -> str:
+        """
+        Hash of what the page's text depends on: content stream + resources.
+        shared: hashes of indirect objects already seen in this PDF (fonts and
+        forms are usually shared by many pages)
+        """
+        digest = hashlib.sha256()
+        contents = page.get_contents()
+        digest.update(contents.get_data() if contents is not None else b"")
+        digest.update(_object_hash(page.get("/Resources"), {} if shared is None else shared, set()).encode("ascii"))
+        return digest.hexdigest()
+
+    def _cache_get(self, key: str) -> Optional[str]:
+        with self._cache_lock:
+            text = self._cache.get(key)
+            if text is not None:
+                self._cache.move_to_end(key)
+                self.cache_hits += 1
+            return text
+
+    def _cache_put(self, key: str, text: str):
+        with self._cache_lock:
+            if key in self._cache or len(text) > self.cache_max_chars:
+                return
+            self._cache[key] = text
+            self._cache_chars += len(text)
+            while self._cache_chars > self.cache_max_chars:
+                _, evicted = self._cache.popitem(last=False)
+                self._cache_chars -= len(evicted)
@@ -0,0 +1,479 @@
+"""
+Word-level redlines as native tracked changes.
+
+Rewriting a paragraph diffs the old and new text word by word and writes
+the result as w:del / w:ins revisions around the unchanged runs, so Word
+shows exactly what changed and the counterparty can accept or reject it.
+The diff is patience (unique words as anchors) with linear-space Myers for
+the stretches between anchors. Every piece of old text keeps the w:rPr of
+the run it came from; inserted text takes the formatting of the run it is
+inserted after.
+
+Only text is diffed. Everything else in the paragraph (field characters and
+instructions, footnote references, drawings, hyperlinks, bookmarks) is an
+atom: it keeps its place between the surrounding text and is never written
+as deleted or unchanged text.
+"""
+import copy
+import re
+from datetime import datetime, timezone
+from itertools import groupby
+from typing import Dict, List, Optional, Tuple
+
+from docx.oxml import OxmlElement
+from docx.oxml.ns import qn
+
+DEFAULT_AUTHOR = "Axiom LCE"
+
+# Words, whitespace runs and single punctuation marks
+_TOKEN = re.compile(r"\s+|\w+|[^\w\s]")
+
+_R = qn('w:r')
+_RPR = qn('w:rPr')
+_PPR = qn('w:pPr')
+_ID = qn('w:id')
+_T = qn('w:t')
+_DEL_TEXT = qn('w:delText')
+_INSTR_TEXT = qn('w:instrText')
+_DEL_INSTR_TEXT = qn('w:delInstrText')
+_BR = qn('w:br')
+
+# Run content that is text, as paragraph_text renders it (page and column
+# breaks are atoms)
+_TEXT_CHARS = {_T: None, qn('w:tab'): "\t", _BR: "\n", qn('w:cr'): "\n", qn('w:noBreakHyphen'): "-"}
+
+Opcode = Tuple[str, int, int, int, int]
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN.findall(text)
+
+
+def diff_tokens(a: List[str], b: List[str]) -> List[Opcode]:
+    """
+    difflib-style opcodes ("equal" / "delete" / "insert", i1, i2, j1, j2).
+    A change is always a delete followed by an insert. Whitespace-only
+    equalities between two changes are folded into them, so "net sixty days"
+    -> "thirty business days" reads as one replacement, not three.
+    """
+    matches = match_sequences(a, b)
+
+    # Matched pairs -> runs of equal tokens
+    blocks = []
+    for i, j in matches:
+        if blocks and blocks[-1][0] + blocks[-1][2] == i and blocks[-1][1] + blocks[-1][2] == j:
+            blocks[-1][2] += 1
+        else:
+            blocks.append([i, j, 1])
+    # Drop whitespace-only blocks that would split a change in two
+    blocks = [
+        block for block in blocks
+        if not (
+            block[0] > 0 and block[1] > 0
+            and block[0] + block[2] < len(a) and block[1] + block[2] < len(b)
+            and all(not token.strip() for token in a[block[0]:block[0] + block[2]])
+        )
+    ]
+    blocks.append([len(a), len(b), 0])
+
+    opcodes: List[Opcode] = []
+    i = j = 0
+    for bi, bj, size in blocks:
+        if i < bi:
+            opcodes.append(("delete", i, bi, j, j))
+        if j < bj:
+            opcodes.append(("insert", bi, bi, j, bj))
+        if size:
+            opcodes.append(("equal", bi, bi + size, bj, bj + size))
+        i, j = bi + size, bj + size
+    return opcodes
+
+
+def match_sequences(a: List, b: List) -> List[Tuple[int, int]]:
+    """Index pairs (i, j) of a common subsequence of two lists of hashables, in order"""
+    matches: List[Tuple[int, int]] = []
+    _patience(a, 0, len(a), b, 0, len(b), matches)
+    return matches
+
+
+def _patience(a, alo, ahi, b, blo, bhi, matches):
+    """Anchor on tokens unique to both sides (in order), recurse between anchors"""
+    while alo < ahi and blo < bhi and a[alo] == b[blo]:
+        matches.append((alo, blo))
+        alo += 1
+        blo += 1
+    suffix = []
+    while alo < ahi and blo < bhi and a[ahi - 1] == b[bhi - 1]:
+        ahi -= 1
+        bhi -= 1
+        suffix.append((ahi, bhi))
+    if alo < ahi and blo < bhi:
+        anchors = _unique_anchors(a, alo, ahi, b, blo, bhi)
+        if anchors:
+            i, j = alo, blo
+            for ai, bj in anchors:
+                _patience(a, i, ai, b, j, bj, matches)
+                matches.append((ai, bj))
+                i, j = ai + 1, bj + 1
+            _patience(a, i, ahi, b, j, bhi, matches)
+        else:
+            _myers(a, alo, ahi, b, blo, bhi, matches)
+    matches.extend(reversed(suffix))
+
+
+def _unique_anchors(a, alo, ahi, b, blo, bhi) -> List[Tuple[int, int]]:
+    """Longest increasing run of (i, j) pairs over tokens occurring once on each side"""
+    counts: Dict[str, List[int]] = {}
+    for i in range(alo, ahi):
+        entry = counts.setdefault(a[i], [0, i, 0, -1])
+        entry[0] += 1
+    for j in range(blo, bhi):
+        entry = counts.get(b[j])
+        if entry is not None:
+            entry[2] += 1
+            entry[3] = j
+    return longest_increasing(sorted(
+        (i, j) for count_a, i, count_b, j in counts.values() if count_a == 1 and count_b == 1
+    ))
+
+
+def longest_increasing(pairs: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    """Longest subsequence of (i, j) pairs (sorted by i) that is increasing in j"""
+    if not pairs:
+        return []
+
+    # Patience sort on j: tails[k] is the pair ending the best run of length k + 1
+    tails: List[int] = []
+    previous = [-1] * len(pairs)
+    for index, (_, j) in enumerate(pairs):
+        lo, hi = 0, len(tails)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if pairs[tails[mid]][1] < j:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo:
+            previous[index] = tails[lo - 1]
+        if lo == len(tails):
+            tails.append(index)
+        else:
+            tails[lo] = index
+
+    anchors = []
+    index = tails[-1]
+    while index != -1:
+        anchors.append(pairs[index])
+        index = previous[index]
+    anchors.reverse()
+    return anchors
+
+
+def _myers(a, alo, ahi, b, blo, bhi, matches):
+    """Myers' O(ND) diff in linear space: split at the middle snake and recurse"""
+    while alo < ahi and blo < bhi and a[alo] == b[blo]:
+        matches.append((alo, blo))
+        alo += 1
+        blo += 1
+    suffix = []
+    while alo < ahi and blo < bhi and a[ahi - 1] == b[bhi - 1]:
+        ahi -= 1
+        bhi -= 1
+        suffix.append((ahi, bhi))
+    if alo < ahi and blo < bhi:
+        split = _middle_snake(a, alo, ahi, b, blo, bhi)
+        if split:
+            x, y = split
+            _myers(a, alo, x, b, blo, y, matches)
+            _myers(a, x, ahi, b, y, bhi, matches)
+    matches.extend(reversed(suffix))
+
+
+def _middle_snake(a, alo, ahi, b, blo, bhi) -> Optional[Tuple[int, int]]:
+    """
+    Point where the forward and reverse D-paths meet (both ranges non-empty,
+    common prefix and suffix already removed). None if nothing is in common.
+    """
+    n, m = ahi - alo, bhi - blo
+    max_d = (n + m + 1) // 2
+    offset = max_d + 1
+    length = 2 * max_d + 3
+    forward = [-1] * length
+    reverse = [-1] * length
+    forward[offset + 1] = 0
+    reverse[offset + 1] = 0
+    delta = n - m
+    odd = delta % 2 != 0
+    k1_start = k1_end = k2_start = k2_end = 0
+
+    for d in range(max_d):
+        for k1 in range(-d + k1_start, d + 1 - k1_end, 2):
+            k1_offset = offset + k1
+            if k1 == -d or (k1 != d and forward[k1_offset - 1] < forward[k1_offset + 1]):
+                x1 = forward[k1_offset + 1]
+            else:
+                x1 = forward[k1_offset - 1] + 1
+            y1 = x1 - k1
+            while x1 < n and y1 < m and a[alo + x1] == b[blo + y1]:
+                x1 += 1
+                y1 += 1
+            forward[k1_offset] = x1
+            if x1 > n:
+                k1_end += 2
+            elif y1 > m:
+                k1_start += 2
+            elif odd:
+                k2_offset = offset + delta - k1
+                if 0 <= k2_offset < length and reverse[k2_offset] != -1 and x1 >= n - reverse[k2_offset]:
+                    return alo + x1, blo + y1
+
+        for k2 in range(-d + k2_start, d + 1 - k2_end, 2):
+            k2_offset = offset + k2
+            if k2 == -d or (k2 != d and reverse[k2_offset - 1] < reverse[k2_offset + 1]):
+                x2 = reverse[k2_offset + 1]
+            else:
+                x2 = reverse[k2_offset - 1] + 1
+            y2 = x2 - k2
+            while x2 < n and y2 < m and a[ahi - x2 - 1] == b[bhi - y2 - 1]:
+                x2 += 1
+                y2 += 1
+            reverse[k2_offset] = x2
+            if x2 > n:
+                k2_end += 2
+            elif y2 > m:
+                k2_start += 2
+            elif not odd:
+                k1_offset = offset + delta - k2
+                if 0 <= k1_offset < length and forward[k1_offset] != -1:
+                    x1 = forward[k1_offset]
+                    y1 = x1 - (k1_offset - offset)
+                    if x1 >= n - x2:
+                        return alo + x1, blo + y1
+    return None
+
+
+class Redliner:
+    """
+    Writes tracked changes into one document's body. Revision ids continue
+    after the highest w:id already in the body; a paragraph rewritten twice
+    is re-diffed against its original runs, so the redline always shows
+    original -> latest.
+    """
+
+    def __init__(self, body, author: str = DEFAULT_AUTHOR, date: Optional[datetime] = None):
+        self.author = author
+        self.date = (date or datetime.now(timezone.utc)).strftime("%Y-%m-%dT%H:%M:%SZ")
+        self._next_id = 1 + max(
+            (int(value) for value in (el.get(_ID) for el in body.iter()) if value and value.isdigit()),
+            default=0
+        )
+        # paragraph element -> (original runs, insert position, elements written in their place)
+        self._originals: Dict = {}
+
+    def rewrite(self, paragraph, new_text: str) -> bool:
+        """
+        Redline a w:p's text to new_text. Fields, footnote references,
+        drawings, hyperlinks and bookmarks stay where they are. False if the
+        text is unchanged.
+        """
+        if paragraph in self._originals:
+            children, position, written = self._originals[paragraph]
+            for element in written:
+                paragraph.remove(element)
+        else:
+            children = [child for child in paragraph if child.tag != _PPR]
+            position = paragraph.index(children[0]) if children else len(paragraph)
+            for child in children:
+                paragraph.remove(child)
+
+        segments = _segments(children)
+        old_text = "".join(text for text, _ in segments if text is not None)
+        if old_text == new_text and paragraph not in self._originals:
+            for i, child in enumerate(children):
+                paragraph.insert(position + i, child)
+            return False
+
+        written = self._redline(segments, old_text, new_text)
+        for i, element in enumerate(written):
+            paragraph.insert(position + i, element)
+        self._originals[paragraph] = (children, position, written)
+        return True
+
+    def mark_inserted(self, paragraph):
+        """Track a whole new paragraph (its runs and paragraph mark) as inserted"""
+        for run in [child for child in paragraph if child.tag == _R]:
+            wrapper = self._revision('w:ins')
+            run.addprevious(wrapper)
+            wrapper.append(run)
+        self._mark_paragraph(paragraph, 'w:ins')
+
+    def mark_deleted(self, paragraph):
+        """Track a whole paragraph as deleted (it stays in the XML until accepted)"""
+        for run in [child for child in paragraph if child.tag == _R]:
+            wrapper = self._revision('w:del')
+            run.addprevious(wrapper)
+            wrapper.append(run)
+            _mark_deleted_text(run)
+        self._mark_paragraph(paragraph, 'w:del')
+
+    # ------------------------------------------------------------------
+
+    def _redline(self, segments, old_text: str, new_text: str) -> List:
+        sources = [(text, rpr) for text, rpr in segments if text is not None]
+        atoms = []
+        offset = 0
+        for text, value in segments:
+            if text is None:
+                atoms.append((offset, value))
+            else:
+                offset += len(text)
+
+        a, b = tokenize(old_text), tokenize(new_text)
+        a_offsets = _offsets(a)
+        b_offsets = _offsets(b)
+        boundaries = _offsets([text for text, _ in sources])
+
+        elements = []
+        next_atom = 0
+        for tag, i1, i2, j1, j2 in diff_tokens(a, b):
+            start, end = a_offsets[i1], a_offsets[i2]
+            if tag == "insert":
+                wrapper = self._revision('w:ins')
+                wrapper.append(_run(new_text[b_offsets[j1]:b_offsets[j2]], _format_at(sources, boundaries, start)))
+                elements.append(wrapper)
+                continue
+            # Atoms inside the range split it: text before, the atom, text after
+            while next_atom < len(atoms) and atoms[next_atom][0] < end:
+                offset, atom = atoms[next_atom]
+                self._old_text(elements, tag, sources, boundaries, start, offset)
+                elements.append(atom)
+                start = offset
+                next_atom += 1
+            self._old_text(elements, tag, sources, boundaries, start, end)
+        elements.extend(atom for _, atom in atoms[next_atom:])
+        return elements
+
+    def _old_text(self, elements: List, tag: str, sources, boundaries, start: int, end: int):
+        """Runs for old_text[start:end], unchanged or wrapped in one w:del"""
+        pieces = [(text, rpr) for text, rpr in _pieces(sources, boundaries, start, end) if text]
+        if not pieces:
+            return
+        if tag == "equal":
+            elements.extend(_run(text, rpr) for text, rpr in pieces)
+        else:
+            wrapper = self._revision('w:del')
+            for text, rpr in pieces:
+                wrapper.append(_run(text, rpr, deleted=True))
+            elements.append(wrapper)
+
+    def _revision(self, tag: str):
+        element = OxmlElement(tag)
+        element.set(_ID, str(self._next_id))
+        element.set(qn('w:author'), self.author)
+        element.set(qn('w:date'), self.date)
+        self._next_id += 1
+        return element
+
+    def _mark_paragraph(self, paragraph, tag: str):
+        pPr = paragraph.find(_PPR)
+        if pPr is None:
+            pPr = OxmlElement('w:pPr')
+            paragraph.insert(0, pPr)
+        rPr = pPr.find(_RPR)
+        if rPr is None:
+            rPr = OxmlElement('w:rPr')
+            # rPr comes before sectPr / pPrChange, after everything else
+            tail = next((child for child in pPr if child.tag in (qn('w:sectPr'), qn('w:pPrChange'))), None)
+            if tail is not None:
+                tail.addprevious(rPr)
+            else:
+                pPr.append(rPr)
+        # A paragraph cloned from a tracked one carries its mark: replace it
+        for mark in [child for child in rPr if child.tag in (qn('w:ins'), qn('w:del'))]:
+            rPr.remove(mark)
+        rPr.insert(0, self._revision(tag))
+
+
+def _segments(children) -> List[Tuple]:
+    """
+    A paragraph's content in order: (text, rPr) for text, (None, element) for
+    atoms. A run mixing both (text and a footnote reference) is split; its
+    atoms become runs of their own with the same rPr.
+    """
+    segments = []
+    for child in children:
+        if child.tag != _R:
+            segments.append((None, child))
+            continue
+        rpr = child.find(_RPR)
+        content = [el for el in child if el.tag != _RPR]
+        if not any(_is_text(el) for el in content):
+            if content:
+                segments.append((None, child))
+            continue
+        if all(_is_text(el) for el in content):
+            segments.append((_text(content), rpr))
+            continue
+        for is_text, group in groupby(content, key=_is_text):
+            if is_text:
+                segments.append((_text(group), rpr))
+            else:
+                run = OxmlElement('w:r')
+                if rpr is not None:
+                    run.append(copy.deepcopy(rpr))
+                run.extend(copy.deepcopy(el) for el in group)
+                segments.append((None, run))
+    return segments
+
+
+def _is_text(el) -> bool:
+    if el.tag == _BR:
+        return el.get(qn('w:type')) in (None, "textWrapping")
+    return el.tag in _TEXT_CHARS
+
+
+def _text(elements) -> str:
+    return "".join(
+        (el.text or "") if _TEXT_CHARS[el.tag] is None else _TEXT_CHARS[el.tag]
+        for el in elements
+    )
+
+
+def _mark_deleted_text(run):
+    for el in run.iter(_T, _INSTR_TEXT):
+        el.tag = _DEL_TEXT if el.tag == _T else _DEL_INSTR_TEXT
+
+
+def _offsets(tokens: List[str]) -> List[int]:
+    """Character offset of each token, plus the total length"""
+    offsets = [0]
+    for token in tokens:
+        offsets.append(offsets[-1] + len(token))
+    return offsets
+
+
+def _pieces(sources, boundaries, start: int, end: int):
+    """(text, rPr) slices of the original runs covering old_text[start:end]"""
+    for index, (text, rpr) in enumerate(sources):
+        run_start, run_end = boundaries[index], boundaries[index + 1]
+        if run_end <= start or run_start >= end:
+            continue
+        yield text[max(start, run_start) - run_start:min(end, run_end) - run_start], rpr
+
+
+def _format_at(sources, boundaries, position: int):
+    """rPr of the run holding the character before position (or the first run)"""
+    for index, (_, rpr) in enumerate(sources):
+        if boundaries[index] < position <= boundaries[index + 1]:
+            return rpr
+    return sources[0][1] if sources else None
+
+
+def _run(text: str, rpr, deleted: bool = False):
+    run = OxmlElement('w:r')
+    if rpr is not None:
+        run.append(copy.deepcopy(rpr))
+    run.text = text
+    if deleted:
+        _mark_deleted_text(run)
+    return run
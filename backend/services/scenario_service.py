@@ -54,6 +54,58 @@ class ScenarioService:
         
         return tested_scenarios
     
+    async def reuse_scenarios(
+        self,
+        reusable: List[ScenarioTest],
+        stale: List[ScenarioTest],
+        analysis_id: str,
+        document_text: str,
+        db: Session
+    ) -> List[ScenarioTest]:
+        """
+        Near-duplicate drafts (services.analysis_reuse): copy prior results whose
+        clauses are unchanged, re-test only the scenarios touching changed clauses.
+        """
+        tested_scenarios = []
+        for prior in reusable:
+            scenario_test = ScenarioTest(
+                analysis_id=analysis_id,
+                source_type=prior.source_type,
+                template_id=prior.template_id,
+                name=prior.name,
+                description=prior.description,
+                trigger_event=prior.trigger_event,
+                status=prior.status,
+                reasoning={**(prior.reasoning or {}), "reused_from": str(prior.id)},
+                severity=prior.severity,
+                affected_clauses=prior.affected_clauses
+            )
+            db.add(scenario_test)
+            tested_scenarios.append(scenario_test)
+        if reusable:
+            db.commit()
+            for scenario_test in tested_scenarios:
+                db.refresh(scenario_test)
+        
+        for prior in stale:
+            reasoning = prior.reasoning or {}
+            result = await self._test_scenario(
+                {
+                    "source_type": prior.source_type,
+                    "template_id": prior.template_id,
+                    "name": prior.name,
+                    "description": prior.description,
+                    "trigger_event": prior.trigger_event,
+                    "expected_behavior": reasoning.get("expected_behavior", "")
+                },
+                document_text,
+                analysis_id,
+                db
+            )
+            tested_scenarios.append(result)
+        
+        return tested_scenarios
+    
     async def _get_template_scenarios(
         self,
         transaction_type: str,
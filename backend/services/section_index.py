@@ -0,0 +1,240 @@
+"""
+Per-document section-number index and cross-reference resolver, built once at
+ingestion and stored on Document.
+
+Shape (JSON-serializable, stored in Document.section_index):
+{
+    "sections":   {"4.2": {"node_id": "...", "an_type": "section", "label": "4.2", "text": "..."},
+                   "4.2(a)": {...}, "article i": {...}, "schedule 3": {...}},
+    "references": [{"from": "<node_id>", "to": "<node_id>", "ref": "4.2(a)", "phrase": "Section 4.2(a)",
+                    "start": 12, "end": 27}],
+    "unresolved": [{"from": "<node_id>", "ref": "9.9", "phrase": "Section 9.9"}]
+}
+Clause lookups ("Section 4.2" in a conflict description) become dictionary hits.
+"""
+import re
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# Section 4.1 / clause 5.2(a) / Sections 3.1 / § 7 / Article III / Schedule 3 / Exhibit B
+REFERENCE_PATTERN = re.compile(
+    r'(?:\b(?P<kind>sections?|clauses?|articles?|schedules?|exhibits?|annex|appendix)\s+|(?P<sect>§)\s*)'
+    r'(?P<num>\d+(?:\.\d+)*(?:\s*\([a-z0-9]+\))*|(?-i:[IVXLCDM]+|[A-Z])\b)',
+    re.IGNORECASE
+)
+
+# Plain-text headings when no tree exists (PDF/TXT)
+_TEXT_HEADING = re.compile(
+    r'^(?:(ARTICLE|SECTION|SCHEDULE|EXHIBIT)\s+([IVXLCDM0-9A-Z]+)\b|(\d+(?:\.\d+)*)\.?\s)',
+    re.IGNORECASE
+)
+
+# Characters of clause text kept per entry (enough for prompts and previews)
+MAX_SECTION_TEXT = 2000
+
+# Reference kinds that point at headed blocks ("Article III") rather than numbered sections
+_BLOCK_KINDS = {"article", "schedule", "exhibit", "annex", "appendix"}
+
+
+class SectionIndex:
+    """Builder and lookup helpers for the stored section index"""
+
+    @staticmethod
+    def normalize_ref(kind: Optional[str], number: str) -> str:
+        """("Clause", "5.2 (a)") -> "5.2(a)", ("Article", "III") -> "article iii" """
+        number = re.sub(r'\s+', '', number.strip().rstrip('.')).lower()
+        kind = (kind or "").lower().rstrip('s')
+        if kind in _BLOCK_KINDS:
+            return f"{kind} {number}"
+        return number
+
+    @staticmethod
+    def build(tree: Optional[Dict], text: str) -> Dict:
+        """Index numbered nodes, then resolve every in-text reference in one pass"""
+        sections: Dict[str, Dict] = {}
+        nodes: List[Tuple[Optional[str], str, int, Optional[str]]] = []
+
+        for node_id, own_text, clause_text, key, an_type, label, start in SectionIndex._iter_numbered(tree, text):
+            nodes.append((node_id, own_text, start or 0, key))
+            if key and key not in sections:
+                sections[key] = {
+                    "node_id": node_id,
+                    "an_type": an_type,
+                    "label": label,
+                    "start": start,
+                    "text": clause_text[:MAX_SECTION_TEXT]
+                }
+
+        references: List[Dict] = []
+        unresolved: List[Dict] = []
+        for node_id, node_text, offset, own_key in nodes:
+            for ref in SectionIndex.find_references(node_text):
+                if ref["start"] == 0 and own_key and ref["key"] == own_key:
+                    # The node's own heading ("ARTICLE I", "Section 4:"), not a reference
+                    continue
+                target = SectionIndex.resolve(sections, ref["key"])
+                if target is None:
+                    unresolved.append({"from": node_id, "ref": ref["key"], "phrase": ref["phrase"]})
+                    continue
+                if target["node_id"] is not None and target["node_id"] == node_id:
+                    # "this Section 4.2" inside 4.2 itself
+                    continue
+                references.append({
+                    "from": node_id,
+                    "to": target["node_id"],
+                    "ref": ref["key"],
+                    "phrase": ref["phrase"],
+                    "start": offset + ref["start"],
+                    "end": offset + ref["end"]
+                })
+
+        return {"sections": sections, "references": references, "unresolved": unresolved}
+
+    @staticmethod
+    def find_references(text: str) -> List[Dict]:
+        """Every cross-reference phrase in a string, normalized: [{"key", "phrase", "start", "end"}]"""
+        found = []
+        for match in REFERENCE_PATTERN.finditer(text or ""):
+            kind = "section" if match.group("sect") else match.group("kind")
+            number = match.group("num")
+            # Bare single letters/roman numerals only make sense after block kinds ("Exhibit B")
+            if not number[0].isdigit() and kind.lower().rstrip('s') not in _BLOCK_KINDS:
+                continue
+            found.append({
+                "key": SectionIndex.normalize_ref(kind, number),
+                "phrase": match.group(0),
+                "start": match.start(),
+                "end": match.end()
+            })
+        return found
+
+    @staticmethod
+    def resolve(sections: Dict[str, Dict], key: str) -> Optional[Dict]:
+        """Exact key, then the enclosing section ("4.2(a)" -> "4.2"), then "Article 3" -> "3" """
+        if not sections or not key:
+            return None
+        if key in sections:
+            return sections[key]
+        base = key.split("(", 1)[0]
+        if base != key and base in sections:
+            return sections[base]
+        if " " in key:
+            number = key.split(" ", 1)[1]
+            if number in sections:
+                return sections[number]
+        return None
+
+    @staticmethod
+    def lookup(index: Optional[Dict], description: str) -> Optional[Dict]:
+        """
+        First section referenced in free text (e.g. a conflict description) that
+        exists in the stored index: {"key", "node_id", "text", ...} or None.
+        """
+        if not isinstance(index, dict):
+            return None
+        sections = index.get("sections") or {}
+        for ref in SectionIndex.find_references(description):
+            target = SectionIndex.resolve(sections, ref["key"])
+            if target is not None:
+                return {**target, "key": ref["key"]}
+        return None
+
+    @staticmethod
+    def referencing(index: Optional[Dict], node_id: str) -> List[Dict]:
+        """Reference edges pointing at a node"""
+        if not isinstance(index, dict):
+            return []
+        return [r for r in index.get("references", []) if r["to"] == node_id]
+
+    @staticmethod
+    def section_owners(tree: Optional[Dict]) -> Dict[str, str]:
+        """node_id -> key of the nearest numbered ancestor section (one tree walk)"""
+        owners: Dict[str, str] = {}
+        if not tree or not tree.get("children"):
+            return owners
+        stack = [(child, None) for child in reversed(tree["children"])]
+        while stack:
+            node, inherited = stack.pop()
+            an_num = (node.get("an_num") or "").strip()
+            key = inherited
+            if an_num and node.get("an_type") != "point":
+                if " " in an_num:
+                    kind, number = an_num.split(" ", 1)
+                    key = SectionIndex.normalize_ref(None if kind.lower() == "section" else kind, number)
+                else:
+                    key = SectionIndex.normalize_ref(None, an_num)
+            if node.get("id") and key:
+                owners[node["id"]] = key
+            for child in reversed(node.get("children", [])):
+                stack.append((child, key))
+        return owners
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _iter_numbered(tree: Optional[Dict], text: str) -> Iterator[Tuple]:
+        """
+        Yield (node_id, own_text, clause_text, key, an_type, label, start) in document order.
+        Clause text includes descendants so "Section 4.2" returns its points too;
+        references are scanned over own_text only so nothing is counted twice.
+        """
+        if tree and tree.get("children"):
+            # Iterative post-order so each node's text can include its children's
+            stack = [(child, None, None, False) for child in reversed(tree["children"])]
+            child_texts: Dict[int, List[str]] = {}
+            clause_texts: Dict[int, str] = {}
+            ordered = []
+            while stack:
+                node, parent, parent_num, visited = stack.pop()
+                if not visited:
+                    ordered.append((node, parent_num))
+                    stack.append((node, parent, parent_num, True))
+                    num = node.get("an_num") or parent_num
+                    if node.get("an_type") == "point" and parent_num and node.get("an_num"):
+                        num = parent_num
+                    for child in reversed(node.get("children", [])):
+                        stack.append((child, node, num, False))
+                    continue
+                parts = [node.get("text_content") or ""] + child_texts.pop(id(node), [])
+                clause_texts[id(node)] = "\n".join(p for p in parts if p)
+                if parent is not None:
+                    child_texts.setdefault(id(parent), []).append(clause_texts[id(node)])
+
+            for node, parent_num in ordered:
+                full_text = clause_texts.get(id(node), "")
+                an_num = (node.get("an_num") or "").strip()
+                key = None
+                if an_num:
+                    if node.get("an_type") == "point":
+                        if parent_num and parent_num[0].isdigit():
+                            key = SectionIndex.normalize_ref(None, f"{parent_num}{an_num}")
+                    elif " " in an_num:
+                        kind, number = an_num.split(" ", 1)
+                        key = SectionIndex.normalize_ref(kind, number)
+                        if kind.lower() == "section":
+                            key = SectionIndex.normalize_ref(None, number)
+                    else:
+                        key = SectionIndex.normalize_ref(None, an_num)
+                yield (node.get("id"), node.get("text_content") or "", full_text, key,
+                       node.get("an_type"), an_num or None, None)
+            return
+
+        if not text:
+            return
+        # No tree (PDF/TXT): paragraphs keyed by their heading, offsets into original_text
+        for match in re.finditer(r'[^\n]+(?:\n(?!\s*\n)[^\n]+)*', text):
+            paragraph = match.group(0)
+            stripped = paragraph.lstrip()
+            start = match.start() + (len(paragraph) - len(stripped))
+            heading = _TEXT_HEADING.match(stripped)
+            key = label = None
+            if heading:
+                if heading.group(1):
+                    label = f"{heading.group(1)} {heading.group(2)}"
+                    kind = heading.group(1).lower()
+                    key = SectionIndex.normalize_ref(None if kind == "section" else kind, heading.group(2))
+                else:
+                    label = heading.group(3)
+                    key = SectionIndex.normalize_ref(None, label)
+            yield None, stripped, stripped, key, "section" if key else "paragraph", label, start
@@ -0,0 +1,69 @@
+"""
+Near-duplicate document detection.
+
+MinHash signatures over word shingles (one-permutation hashing, so one hash
+per shingle instead of one per permutation), banded for LSH lookups:
+documents sharing any band bucket are candidates, and the signature agreement
+estimates their Jaccard similarity. Used at upload to find the nearest
+previously analyzed draft.
+"""
+import hashlib
+import re
+from typing import List
+
+# Signature bins and LSH banding (16 bands x 4 rows ~ candidates from ~0.5 Jaccard up)
+SIGNATURE_SIZE = 64
+LSH_BANDS = 16
+SHINGLE_WORDS = 5
+
+# Minimum estimated Jaccard similarity to treat a document as a prior draft
+NEAR_DUPLICATE_THRESHOLD = 0.6
+
+_WORD = re.compile(r"\w+")
+_MAX_HASH = (1 << 64) - 1
+
+
+class SimilarityIndex:
+    """MinHash/LSH helpers; signatures are plain int lists (stored as JSON)"""
+
+    @staticmethod
+    def signature(text: str) -> List[int]:
+        words = _WORD.findall((text or "").lower())
+        if not words:
+            return []
+
+        bins: List[int] = [_MAX_HASH] * SIGNATURE_SIZE
+        span = max(1, len(words) - SHINGLE_WORDS + 1)
+        for i in range(span):
+            shingle = " ".join(words[i:i + SHINGLE_WORDS]).encode("utf-8")
+            h = int.from_bytes(hashlib.blake2b(shingle, digest_size=8).digest(), "big")
+            slot, value = h % SIGNATURE_SIZE, h // SIGNATURE_SIZE
+            if value < bins[slot]:
+                bins[slot] = value
+
+        # Densify empty bins from the next filled one (keeps short documents comparable)
+        filled = [i for i, v in enumerate(bins) if v != _MAX_HASH]
+        for i, v in enumerate(bins):
+            if v == _MAX_HASH:
+                donor = next((j for j in filled if j > i), filled[0])
+                bins[i] = bins[donor] ^ (i * 0x9E3779B97F4A7C15 & _MAX_HASH)
+        return bins
+
+    @staticmethod
+    def band_keys(signature: List[int]) -> List[str]:
+        """One bucket key per band: "<band>:<hash of its rows>" """
+        if not signature:
+            return []
+        rows = len(signature) // LSH_BANDS
+        keys = []
+        for band in range(LSH_BANDS):
+            chunk = ",".join(str(v) for v in signature[band * rows:(band + 1) * rows])
+            keys.append(f"{band}:{hashlib.blake2b(chunk.encode('ascii'), digest_size=8).hexdigest()}")
+        return keys
+
+    @staticmethod
+    def similarity(a: List[int], b: List[int]) -> float:
+        """Estimated Jaccard similarity: fraction of agreeing signature bins"""
+        if not a or not b or len(a) != len(b):
+            return 0.0
+        return sum(1 for x, y in zip(a, b) if x == y) / len(a)
@@ -0,0 +1,95 @@
+"""
+Single-flight request coalescing.
+
+Concurrent identical requests (same key) attach to one in-flight computation
+instead of each running the LLM pipeline:
+- run():    awaitables; every caller gets the leader's result (or exception)
+- stream(): async generators; events are buffered so late joiners replay what
+            they missed, then follow live until the producer finishes
+Keys are released as soon as the computation completes, so later requests
+start a fresh run (results are not cached here).
+"""
+import asyncio
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+
+class _Broadcast:
+    """Append-only event buffer shared by every subscriber of one stream"""
+
+    def __init__(self):
+        self.events: List[Any] = []
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self._changed = asyncio.Event()
+
+    def publish(self, event: Any):
+        self.events.append(event)
+        self._notify()
+
+    def close(self, error: Optional[BaseException] = None):
+        self.done = True
+        self.error = error
+        self._notify()
+
+    def _notify(self):
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+
+    async def subscribe(self) -> AsyncIterator[Any]:
+        position = 0
+        while True:
+            while position < len(self.events):
+                yield self.events[position]
+                position += 1
+            if self.done:
+                if self.error is not None:
+                    raise self.error
+                return
+            await self._changed.wait()
+
+
+class SingleFlight:
+    """Per-process registry of in-flight computations"""
+
+    def __init__(self):
+        self._calls: Dict[str, asyncio.Future] = {}
+        self._streams: Dict[str, _Broadcast] = {}
+
+    def in_flight(self, key: str) -> bool:
+        return key in self._calls or key in self._streams
+
+    async def run(self, key: str, factory: Callable[[], Awaitable[Any]]) -> Any:
+        """Await the shared computation for key, starting it if nobody else has"""
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(factory())
+            self._calls[key] = task
+
+            def release(finished, key=key):
+                if self._calls.get(key) is finished:
+                    del self._calls[key]
+
+            task.add_done_callback(release)
+        # Shield: a disconnecting caller must not cancel the work others are waiting on
+        return await asyncio.shield(task)
+
+    def stream(self, key: str, factory: Callable[[], AsyncIterator[Any]]) -> AsyncIterator[Any]:
+        """Subscribe to the shared event stream for key, starting the producer if needed"""
+        broadcast = self._streams.get(key)
+        if broadcast is None:
+            broadcast = _Broadcast()
+            self._streams[key] = broadcast
+            asyncio.ensure_future(self._produce(key, broadcast, factory))
+        return broadcast.subscribe()
+
+    async def _produce(self, key: str, broadcast: _Broadcast, factory: Callable[[], AsyncIterator[Any]]):
+        error = None
+        try:
+            async for event in factory():
+                broadcast.publish(event)
+        except Exception as e:
+            error = e
+        finally:
+            if self._streams.get(key) is broadcast:
+                del self._streams[key]
+            broadcast.close(error)
@@ -2,6 +2,7 @@ import json
 import asyncio
 from typing import Dict, List, Optional
 from .mistral_service import MistralService
+from .section_index import SectionIndex
 
 class DocumentStructureService:
     """
@@ -135,10 +136,25 @@ Return ONLY a JSON object:
             print(f"Error validating edit: {e}")
             return {"is_safe": False, "error": str(e)}
 
-    async def find_clause_by_conflict(self, text: str, conflict_description: str) -> Optional[Dict]:
+    async def find_clause_by_conflict(
+        self,
+        text: str,
+        conflict_description: str,
+        section_index: Optional[Dict] = None
+    ) -> Optional[Dict]:
         """
-        Find the exact clause mentioned in a conflict description
+        Find the exact clause mentioned in a conflict description.
+        Section numbers resolve against the ingestion-time section index first;
+        the LLM is only asked when the description names no indexed section.
         """
+        indexed = SectionIndex.lookup(section_index, conflict_description)
+        if indexed:
+            return {
+                "id": indexed["node_id"],
+                "text": indexed["text"],
+                "number": indexed["key"] if indexed["key"][:1].isdigit() else indexed["label"]
+            }
+
         if not self.mistral.client: return None
 
         prompt = f"""Given a legal document and a conflict description, identify the specific clause text that causes the conflict.
@@ -0,0 +1,170 @@
+"""
+Per-document defined-term index, built once at ingestion and stored on Document.
+
+Shape (JSON-serializable, stored in Document.term_index):
+{
+    "terms":  {"good reason": {"term": "Good Reason", "definition": "...", "section": "1.1", "node_id": "..."}},
+    "usages": {"good reason": [["<node_id>", start, end], ...]},
+    "tokens": {"reason": ["good reason"], "good": ["good reason"]}
+}
+Keys are normalized (case-folded, possessive and plural stripped) so entity
+lookups are dictionary hits and usage offsets can drive UI highlighting.
+"""
+import re
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from .definition_extractor import DefinitionExtractor
+
+_WS = re.compile(r"\s+")
+_POSSESSIVE = re.compile(r"['’]s?$")
+
+# Usage entries kept per term (offsets for highlighting, not an exhaustive concordance)
+MAX_USAGES_PER_TERM = 500
+
+
+def _singular(word: str) -> str:
+    if len(word) > 3 and word.endswith("ies"):
+        return word[:-3] + "y"
+    # Sibilant stems take "es" (Addresses, Taxes, Branches); "Expenses" is "Expense" + "s"
+    if len(word) > 3 and word.endswith(("sses", "xes", "zzes", "ches", "shes")):
+        return word[:-2]
+    # Singular nouns in -ss, -is, -us (Business, Analysis, Status, Bonus) are left alone
+    if len(word) > 2 and word.endswith("s") and not word.endswith(("ss", "is", "us")):
+        return word[:-1]
+    return word
+
+
+class TermIndex:
+    """Builder and lookup helpers for the stored term index"""
+
+    @staticmethod
+    def normalize(term: str) -> str:
+        """Case-fold, collapse whitespace, drop quotes/possessive, singularize the last word"""
+        cleaned = _WS.sub(" ", (term or "").strip().strip('"“”‘’\'').lower())
+        if not cleaned:
+            return ""
+        words = cleaned.split(" ")
+        words[-1] = _singular(_POSSESSIVE.sub("", words[-1]))
+        return " ".join(words)
+
+    @staticmethod
+    def build(tree: Optional[Dict], text: str, definitions: Optional[List[Dict]] = None) -> Dict:
+        """
+        Build the index in one pass over the document nodes.
+        Definitions default to the local DefinitionExtractor results.
+        """
+        if definitions is None:
+            definitions = DefinitionExtractor.extract(text, tree)
+
+        terms: Dict[str, Dict] = {}
+        for d in definitions:
+            key = TermIndex.normalize(d.get("term", ""))
+            if key and key not in terms:
+                terms[key] = {
+                    "term": d["term"],
+                    "definition": d.get("definition", ""),
+                    "section": d.get("section"),
+                    "node_id": d.get("node_id"),
+                    "category": d.get("category", "general")
+                }
+
+        usages: Dict[str, List] = {key: [] for key in terms}
+        pattern = TermIndex._usage_pattern(terms)
+        if pattern is not None:
+            for node_id, node_text in TermIndex._iter_nodes(tree, text):
+                for match in pattern.finditer(node_text):
+                    key = TermIndex.normalize(match.group(0))
+                    bucket = usages.get(key)
+                    if bucket is not None and len(bucket) < MAX_USAGES_PER_TERM:
+                        bucket.append([node_id, match.start(), match.end()])
+
+        return {
+            "terms": terms,
+            "usages": usages,
+            "tokens": TermIndex.token_map(terms)
+        }
+
+    @staticmethod
+    def definitions_map(definitions: List[Dict]) -> Dict[str, Dict]:
+        """Normalized term -> definition dict (first definition wins)"""
+        mapped = {}
+        for d in definitions or []:
+            key = TermIndex.normalize(d.get("term", ""))
+            if key and key not in mapped:
+                mapped[key] = d
+        return mapped
+
+    @staticmethod
+    def lookup(index: Optional[Dict], entity: str) -> Optional[Dict]:
+        """Exact normalized hit in a stored index: {"term", ..., "usages": [...]} or None"""
+        if not index:
+            return None
+        key = TermIndex.normalize(entity)
+        entry = index.get("terms", {}).get(key)
+        if entry is None:
+            return None
+        return {**entry, "usages": index.get("usages", {}).get(key, [])}
+
+    @staticmethod
+    def matching_keys(entity: str, terms: Dict[str, Dict], tokens: Optional[Dict[str, List[str]]] = None) -> List[str]:
+        """
+        Terms matching an entity: the exact normalized key if present, otherwise
+        every term containing all of the entity's words ("Leaver" -> "bad leaver").
+        """
+        key = TermIndex.normalize(entity)
+        if not key:
+            return []
+        if key in terms:
+            return [key]
+        if tokens is None:
+            tokens = TermIndex.token_map(terms)
+        candidates = None
+        for word in key.split(" "):
+            hits = set(tokens.get(_singular(word), ()))
+            candidates = hits if candidates is None else candidates & hits
+            if not candidates:
+                return []
+        return sorted(candidates or [])
+
+    @staticmethod
+    def token_map(terms: Dict[str, Dict]) -> Dict[str, List[str]]:
+        """Word -> normalized terms containing it"""
+        tokens: Dict[str, List[str]] = {}
+        for key in terms:
+            for word in set(key.split(" ")):
+                tokens.setdefault(_singular(word), []).append(key)
+        return tokens
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _usage_pattern(terms: Dict[str, Dict]) -> Optional["re.Pattern"]:
+        """One alternation over every term (longest first) with plural/possessive suffixes"""
+        if not terms:
+            return None
+        alternatives = []
+        for key in sorted(terms, key=len, reverse=True):
+            words = [re.escape(w) for w in key.split(" ")]
+            last = key.split(" ")[-1]
+            if last.endswith("y") and len(last) > 2:
+                words[-1] = re.escape(last[:-1]) + r"(?:y|ies)"
+            else:
+                words[-1] = words[-1] + r"(?:e?s)?"
+            alternatives.append(r"\s+".join(words) + r"(?:['’]s?)?")
+        return re.compile(r"\b(?:" + "|".join(alternatives) + r")\b", re.IGNORECASE)
+
+    @staticmethod
+    def _iter_nodes(tree: Optional[Dict], text: str) -> Iterator[Tuple[Optional[str], str]]:
+        if tree and tree.get("children"):
+            stack = list(reversed(tree["children"]))
+            while stack:
+                node = stack.pop()
+                node_text = node.get("text_content") or ""
+                if node_text:
+                    yield node.get("id"), node_text
+                stack.extend(reversed(node.get("children", [])))
+        elif text:
+            # No tree (PDF/TXT): offsets are into original_text
+            yield None, text
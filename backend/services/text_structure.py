@@ -0,0 +1,145 @@
+"""
+Structure tree for PDF and plain-text documents.
+
+Text from these formats arrives as lines (PDF text is hard-wrapped), so
+paragraphs are rebuilt first: a paragraph ends at a blank line, before a
+line that opens a new block (numbering such as "ARTICLE IV" / "4.1" / "(a)",
+a quoted definition, an all-caps heading) and after a line that ends a
+sentence when the next one starts a new one. Hyphenated line breaks are
+joined and bare page numbers dropped. Each paragraph is then classified
+with the DOCX rules (DocumentService) and attached article > section >
+point exactly like parse_docx_structure, so PDFs and TXT files get the same
+ClauseNode tree.
+
+Pages / lines are consumed as they come (feed_page / feed_lines), nothing
+but the open paragraph is buffered.
+"""
+import re
+import uuid
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .document_service import DocumentService
+
+_BLOCK_START = re.compile(
+    r'^(ARTICLE|SECTION|SCHEDULE|EXHIBIT)\s+[IVXLCDM0-9A-Z]+\b'  # ARTICLE IV, Section 5
+    r'|^\d+(\.\d+)*\.?\s+\S'                                     # 4 / 4.1 / 4.1.2 Title
+    r'|^\([a-z0-9]+\)\s+\S'                                      # (a) / (iv) / (2)
+    r'|^["“][^"”]{1,80}["”]\s+(means|shall mean|has the meaning)',  # "Term" means
+    re.IGNORECASE
+)
+_BARE_HEADING_NUMBER = re.compile(r'^(ARTICLE|SECTION|SCHEDULE|EXHIBIT)\s+[IVXLCDM0-9A-Z]+\.?$', re.IGNORECASE)
+# "30 days after ..." is routine in a hard-wrapped line: a bare number only
+# opens a block when the line before ended a sentence
+_BARE_NUMBER = re.compile(r'^\d+\.?\s')
+_PAGE_NUMBER = re.compile(r'^(page\s+)?\d+(\s+of\s+\d+)?$|^-\s*\d+\s*-$', re.IGNORECASE)
+_SENTENCE_END = re.compile(r'[.;:!?]["”)]?$')
+_HYPHENATED = re.compile(r'[A-Za-z]-$')
+
+
+def _is_heading(line: str) -> bool:
+    """Short all-caps line without closing punctuation ("REPRESENTATIONS AND WARRANTIES")"""
+    letters = [c for c in line if c.isalpha()]
+    return len(letters) >= 2 and line.upper() == line and len(line.split()) <= 12 and line[-1] not in ".,;"
+
+
+class TextStructureBuilder:
+    """Incremental paragraph + tree builder over PDF pages or text lines"""
+
+    def __init__(self):
+        self.root = {
+            "id": "root",
+            "an_type": "document",
+            "text_content": "ROOT",
+            "children": [],
+            "metadata": {}
+        }
+        self.paragraphs_text: List[str] = []
+        self._lines: List[str] = []
+        self._page: Optional[int] = None
+        self._paragraph_page: Optional[int] = None
+        self._current_article = None
+        self._current_section = None
+
+    def feed_page(self, text: str, page_number: int):
+        """Add one PDF page; a paragraph may continue across the page break"""
+        self._page = page_number
+        self.feed_lines(text.splitlines())
+
+    def feed_lines(self, lines: Iterable[str]):
+        for raw in lines:
+            line = " ".join(raw.split())
+            if not line:
+                self._flush()
+                continue
+            if _PAGE_NUMBER.match(line):
+                continue
+            heading = _is_heading(line)
+            # "ARTICLE IV" on its own line, title on the next: one heading
+            if heading and len(self._lines) == 1 and _BARE_HEADING_NUMBER.match(self._lines[0]):
+                self._append(line)
+                self._flush()
+                continue
+            block = _BLOCK_START.match(line) and not (
+                _BARE_NUMBER.match(line) and self._lines and not _SENTENCE_END.search(self._lines[-1])
+            )
+            if heading or block:
+                self._flush()
+                self._append(line)
+                if heading and not _BARE_HEADING_NUMBER.match(line):
+                    self._flush()
+                continue
+            if self._lines and (
+                _SENTENCE_END.search(self._lines[-1]) and line[0].isupper()
+                or _BARE_HEADING_NUMBER.match(self._lines[-1])
+            ):
+                self._flush()
+            self._append(line)
+
+    def finish(self) -> Tuple[str, Dict]:
+        """(full_text, root) once everything was fed"""
+        self._flush()
+        return "\n\n".join(self.paragraphs_text), self.root
+
+    # ------------------------------------------------------------------
+
+    def _append(self, line: str):
+        if not self._lines:
+            self._paragraph_page = self._page  # a paragraph belongs to the page it starts on
+        self._lines.append(line)
+
+    def _flush(self):
+        if not self._lines:
+            return
+        text = self._lines[0]
+        for line in self._lines[1:]:
+            if _HYPHENATED.search(text) and line[0].islower():
+                text = text[:-1] + line
+            else:
+                text = f"{text} {line}"
+        heading = _is_heading(text) and all(_is_heading(line) for line in self._lines)
+        self._lines = []
+        self._add(text, "Heading 1" if heading and not _BLOCK_START.match(text) else "")
+
+    def _add(self, text: str, style_name: str):
+        self.paragraphs_text.append(text)
+        node = {
+            "id": str(uuid.uuid4()),
+            "text_content": text,
+            "original_xml_id": None,
+            "children": [],
+            "an_type": "paragraph",
+            "an_num": None,
+            "metadata": {"page": self._paragraph_page} if self._paragraph_page is not None else {}
+        }
+        node["an_type"], node["an_num"] = DocumentService._classify_paragraph(text, style_name)
+        node["clause_type"] = DocumentService._detect_clause_type(text)
+
+        if node["an_type"] == "article":
+            self.root["children"].append(node)
+            self._current_article = node
+            self._current_section = None
+        elif node["an_type"] == "section":
+            (self._current_article or self.root)["children"].append(node)
+            self._current_section = node
+        else:
+            (self._current_section or self._current_article or self.root)["children"].append(node)
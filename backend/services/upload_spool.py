@@ -0,0 +1,120 @@
+"""
+Upload intake without whole-body reads.
+
+Starlette already spools multipart file parts to disk past 1 MB, so an upload
+handler only needs to avoid `await file.read()`: UploadSpool walks the spooled
+part in fixed-size chunks, hashing it (the same SHA-256 as
+DocumentService.fingerprint) and enforcing the size limit, and then hands the
+rewound file handle to the parsers. Bytes are only materialized once, for what
+has to be stored.
+
+UploadLimitMiddleware enforces the limit before any of that: a request whose
+Content-Length is over the limit is answered 413 without reading its body, and
+a body without Content-Length (chunked transfer) is cut off as soon as it
+passes the limit.
+
+Limit: MAX_UPLOAD_MB (per file; the request body may be MULTIPART_OVERHEAD
+larger for the form envelope).
+"""
+import hashlib
+import json
+import os
+from typing import BinaryIO, Optional
+
+from fastapi import HTTPException, UploadFile
+
+CHUNK_SIZE = 1024 * 1024
+DEFAULT_MAX_UPLOAD_MB = 100
+MULTIPART_OVERHEAD = 64 * 1024
+
+
+def max_upload_bytes() -> int:
+    try:
+        return int(os.getenv("MAX_UPLOAD_MB", DEFAULT_MAX_UPLOAD_MB)) * 1024 * 1024
+    except ValueError:
+        return DEFAULT_MAX_UPLOAD_MB * 1024 * 1024
+
+
+def too_large(limit: int) -> HTTPException:
+    return HTTPException(status_code=413, detail=f"Upload exceeds the {limit // (1024 * 1024)} MB limit")
+
+
+class UploadSpool:
+    """A received upload: seekable file handle, size and content hash"""
+
+    def __init__(self, filename: str, file: BinaryIO, size: int, sha256: str):
+        self.filename = filename
+        self.file = file
+        self.size = size
+        self.sha256 = sha256
+
+    @classmethod
+    async def receive(cls, upload: UploadFile, max_bytes: Optional[int] = None) -> "UploadSpool":
+        """Hash and measure an UploadFile chunk by chunk; 413 past max_bytes"""
+        limit = max_bytes or max_upload_bytes()
+        if upload.size is not None and upload.size > limit:
+            raise too_large(limit)
+
+        digest = hashlib.sha256()
+        size = 0
+        await upload.seek(0)
+        while True:
+            chunk = await upload.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            size += len(chunk)
+            if size > limit:
+                raise too_large(limit)
+            digest.update(chunk)
+        await upload.seek(0)
+        return cls(upload.filename, upload.file, size, digest.hexdigest())
+
+    def read(self) -> bytes:
+        """The whole content (for storage); the handle stays usable"""
+        self.file.seek(0)
+        content = self.file.read()
+        self.file.seek(0)
+        return content
+
+
+class UploadLimitMiddleware:
+    """ASGI middleware: 413 for request bodies over the upload limit, before parsing"""
+
+    def __init__(self, app, max_body_bytes: Optional[int] = None):
+        self.app = app
+        self.max_body_bytes = max_body_bytes or max_upload_bytes() + MULTIPART_OVERHEAD
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        limit = self.max_body_bytes
+        length = dict(scope["headers"]).get(b"content-length")
+        if length is not None and length.isdigit() and int(length) > limit:
+            await _reject(send, limit)
+            return
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    # Raised inside form parsing, FastAPI turns this into the response
+                    raise too_large(limit)
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+
+async def _reject(send, limit: int):
+    body = json.dumps({"detail": too_large(limit).detail}).encode("utf-8")
+    await send({
+        "type": "http.response.start",
+        "status": 413,
+        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())]
+    })
+    await send({"type": "http.response.body", "body": body})
@@ -14,6 +14,7 @@ import time
 import re
 from typing import Dict, List, Optional, AsyncGenerator
 from .mistral_service import MistralService
+from .term_index import TermIndex
 
 
 class VerificationService:
@@ -25,7 +26,8 @@ class VerificationService:
         document_text: str,
         assertion_text: str,
         definitions: List[Dict],
-        document_tree: Optional[Dict] = None
+        document_tree: Optional[Dict] = None,
+        term_index: Optional[Dict] = None
     ) -> AsyncGenerator[Dict, None]:
         """
         Stream verification events in real-time (SSE-compatible)
@@ -57,6 +59,9 @@ class VerificationService:
         
         parsed_assertion = await self._parse_assertion(assertion_text)
         
+        # Normalized term -> definition, built once per verification (O(1) entity lookups)
+        definitions_by_term = TermIndex.definitions_map(definitions)
+        
         # Step 3: Search for entities in document
         for entity in parsed_assertion.get("entities", []):
             yield {
@@ -69,14 +74,17 @@ class VerificationService:
             found_location = self._find_entity_in_document(
                 entity, 
                 document_text, 
-                definitions
+                definitions_by_term,
+                term_index
             )
             
             if found_location:
+                indexed = TermIndex.lookup(term_index, entity)
                 yield {
                     "type": "entity_found",
                     "entity": entity,
                     "location": found_location,
+                    "highlights": indexed["usages"][:50] if indexed else [],
                     "timestamp": int((time.time() - start_time) * 1000)
                 }
             
@@ -92,7 +100,7 @@ class VerificationService:
         logic_trace = await self._build_logic_trace(
             parsed_assertion,
             document_text,
-            definitions
+            definitions_by_term
         )
         
         yield {
@@ -167,7 +175,8 @@ class VerificationService:
         self, 
         entity: str, 
         document_text: str, 
-        definitions: List[Dict]
+        definitions_by_term: Dict[str, Dict],
+        term_index: Optional[Dict] = None
     ) -> Optional[str]:
         """
         Find where an entity is defined or mentioned in the document
@@ -178,14 +187,17 @@ class VerificationService:
         if not entity_norm:
             return None
 
-        # 1. Check definitions with better matching
-        for defn in definitions:
-            term = defn.get("term", "").lower()
-            # Exact match or term starts/ends with entity
-            if entity_norm == term or f" {entity_norm} " in f" {term} " or term.startswith(entity_norm):
-                return f"Definition: {defn.get('section', 'Unknown')}"
+        # 1. Definitions from the analysis (dictionary hit on the normalized term)
+        keys = TermIndex.matching_keys(entity, definitions_by_term)
+        if keys:
+            return f"Definition: {definitions_by_term[keys[0]].get('section', 'Unknown')}"
+        
+        # 2. Ingestion-time term index (covers documents analyzed before definitions existed)
+        indexed = TermIndex.lookup(term_index, entity)
+        if indexed:
+            return f"Definition: {indexed.get('section') or 'Unknown'}"
         
-        # 2. Search document text (case-insensitive boundary match)
+        # 3. Search document text (case-insensitive boundary match)
         # Try exact match first
         pattern = re.compile(rf'\b{re.escape(entity_norm)}\b', re.IGNORECASE)
         match = pattern.search(document_text)
@@ -197,7 +209,7 @@ class VerificationService:
             context = document_text[start:end].replace('\n', ' ').strip()
             return f"Found in context: ...{context}..."
         
-        # 3. Fallback: check if entity is part of a longer word in document (less strict)
+        # 4. Fallback: check if entity is part of a longer word in document (less strict)
         if len(entity_norm) > 3:
              if entity_norm in document_text.lower():
                  return "Found as part of a term in document"
@@ -208,7 +220,7 @@ class VerificationService:
         self,
         parsed_assertion: Dict,
         document_text: str,
-        definitions: List[Dict]
+        definitions_by_term: Dict[str, Dict]
     ) -> Dict:
         """
         Build causality chain showing how assertion flows through document logic
@@ -233,17 +245,18 @@ class VerificationService:
             "status": "neutral"
         })
         
-        # Add relevant definitions
+        # Add relevant definitions (token-index lookups instead of entities x definitions scan)
+        tokens = TermIndex.token_map(definitions_by_term)
         for entity in parsed_assertion.get("entities", []):
-            for defn in definitions:
-                if entity.lower() in defn.get("term", "").lower():
-                    chain.append({
-                        "node": f"Definition: {defn['term']}",
-                        "text": defn.get("definition", ""),
-                        "type": "definition",
-                        "status": "neutral",
-                        "section": defn.get("section")
-                    })
+            for key in TermIndex.matching_keys(entity, definitions_by_term, tokens):
+                defn = definitions_by_term[key]
+                chain.append({
+                    "node": f"Definition: {defn['term']}",
+                    "text": defn.get("definition", ""),
+                    "type": "definition",
+                    "status": "neutral",
+                    "section": defn.get("section")
+                })
         
         # Use Mistral to find relevant clauses and build chain
         relevant_clauses = await self.mistral.find_relevant_clauses(
@@ -0,0 +1,154 @@
+"""
+Operation-log document versioning.
+
+Every edit batch is appended to DocumentOperation as the next document
+version; Document.file_content stays the materialized head. The original
+upload is kept as the version 0 snapshot, and every SNAPSHOT_INTERVAL
+versions another snapshot is stored, so any version is rebuilt by replaying
+at most SNAPSHOT_INTERVAL - 1 batches on top of the nearest snapshot.
+Storage grows with the edits, not with versions x file size.
+"""
+from typing import Dict, List, Optional, Set
+
+from sqlalchemy.orm import Session
+
+from models import Document, DocumentOperation, DocumentSnapshot
+from .composer_service import ComposerService
+
+# Versions between stored snapshots
+SNAPSHOT_INTERVAL = 20
+
+# Rollbacks are logged as this operation (always paired with a snapshot)
+RESTORE_OPERATION = "restore"
+
+
+class VersionStore:
+    """Append, list and materialize document versions"""
+
+    @staticmethod
+    def record(doc: Document, operations: List[Dict], new_content: bytes, db: Session) -> int:
+        """
+        Log one applied batch as the next version (call before doc.file_content
+        is overwritten; the caller commits). Returns the new version number.
+        """
+        return VersionStore.record_batches(doc, [operations], new_content, db)
+
+    @staticmethod
+    def record_batches(doc: Document, batches: List[List[Dict]], new_content: bytes, db: Session) -> int:
+        """
+        Log batches applied together (an edit session flush) as consecutive
+        versions. Only the content after the last one exists, so when they
+        cross a snapshot interval the snapshot is taken at the last version.
+        """
+        start = doc.version or 0
+        if start == 0 and doc.file_content and not VersionStore._has_snapshot(doc.id, 0, db):
+            db.add(DocumentSnapshot(document_id=doc.id, version=0, file_content=doc.file_content))
+
+        version = start
+        restored = False
+        for operations in batches:
+            version += 1
+            db.add(DocumentOperation(document_id=doc.id, version=version, operations=operations))
+            restored = restored or any(op.get("type") == RESTORE_OPERATION for op in operations)
+        if version // SNAPSHOT_INTERVAL > start // SNAPSHOT_INTERVAL or restored:
+            db.add(DocumentSnapshot(document_id=doc.id, version=version, file_content=new_content))
+        doc.version = version
+        return version
+
+    @staticmethod
+    def materialize(doc: Document, version: int, db: Session) -> Optional[bytes]:
+        """File content at a version: nearest snapshot plus replayed batches (None if unknown)"""
+        current = doc.version or 0
+        if version < 0 or version > current:
+            return None
+        if version == current:
+            return doc.file_content
+
+        snapshot = db.query(DocumentSnapshot).filter(
+            DocumentSnapshot.document_id == doc.id,
+            DocumentSnapshot.version <= version
+        ).order_by(DocumentSnapshot.version.desc()).first()
+        if snapshot is None:
+            return None
+        if snapshot.version == version:
+            return snapshot.file_content
+
+        batches = db.query(DocumentOperation).filter(
+            DocumentOperation.document_id == doc.id,
+            DocumentOperation.version > snapshot.version,
+            DocumentOperation.version <= version
+        ).order_by(DocumentOperation.version).all()
+
+        composer = ComposerService(snapshot.file_content)
+        for batch in batches:
+            composer.apply_operations(batch.operations, save=False)
+        return composer.save()
+
+    @staticmethod
+    def history(doc: Document, db: Session) -> List[Dict]:
+        """Versions newest first, with their operations"""
+        snapshots = {
+            v for (v,) in db.query(DocumentSnapshot.version).filter(DocumentSnapshot.document_id == doc.id).all()
+        }
+        batches = db.query(DocumentOperation).filter(
+            DocumentOperation.document_id == doc.id
+        ).order_by(DocumentOperation.version.desc()).all()
+
+        versions = [{
+            "version": batch.version,
+            "operations": batch.operations,
+            "operation_count": len(batch.operations or []),
+            "snapshot": batch.version in snapshots,
+            "created_at": batch.created_at.isoformat() if batch.created_at else None
+        } for batch in batches]
+        versions.append({
+            "version": 0,
+            "operations": [],
+            "operation_count": 0,
+            "snapshot": True,
+            "created_at": doc.uploaded_at.isoformat() if doc.uploaded_at else None
+        })
+        return versions
+
+    @staticmethod
+    def touched_para_ids(operations: List[Dict]) -> Set[str]:
+        """paraIds an operation batch reads or writes (targets, move anchors and created ids)"""
+        touched = set()
+        for op in operations or []:
+            for key in ("id", "new_id", "after", "before"):
+                if op.get(key):
+                    touched.add(op[key])
+            touched.update(op.get("new_ids") or [])
+        return touched
+
+    @staticmethod
+    def changed_since(doc: Document, base_version: int, db: Session) -> Optional[Set[str]]:
+        """
+        paraIds touched by versions after base_version, for merging a batch that
+        was prepared against it. None when the base is unknown or a rollback
+        happened since (everything may have changed).
+        """
+        current = doc.version or 0
+        if base_version < 0 or base_version > current:
+            return None
+        batches = db.query(DocumentOperation.operations).filter(
+            DocumentOperation.document_id == doc.id,
+            DocumentOperation.version > base_version
+        ).all()
+        changed: Set[str] = set()
+        for (operations,) in batches:
+            if any(op.get("type") == RESTORE_OPERATION for op in operations or []):
+                return None
+            changed |= VersionStore.touched_para_ids(operations)
+        return changed
+
+    @staticmethod
+    def restore_operation(version: int) -> Dict:
+        return {"type": RESTORE_OPERATION, "version": version}
+
+    @staticmethod
+    def _has_snapshot(document_id, version: int, db: Session) -> bool:
+        return db.query(DocumentSnapshot.id).filter(
+            DocumentSnapshot.document_id == document_id,
+            DocumentSnapshot.version == version
+        ).first() is not None
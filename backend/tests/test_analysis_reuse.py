@@ -0,0 +1,106 @@
+import sys
+import os
+import copy
+from types import SimpleNamespace
+
+# Add backend to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.analysis_reuse import AnalysisReuse
+from services.similarity_index import SimilarityIndex, NEAR_DUPLICATE_THRESHOLD
+
+
+def _section(node_id, num, text, children=()):
+    return {"id": node_id, "an_type": "section", "an_num": num, "text_content": text, "children": list(children)}
+
+
+OLD_TREE = {"id": "root", "children": [
+    _section("a1", "1.1", '1.1 "Good Reason" means a material reduction in salary.'),
+    _section("a4", "4.1", "4.1 If a Founder resigns, all Unvested Shares are forfeited."),
+    _section("a7", "7.1", "7.1 This Agreement is governed by the laws of England."),
+]}
+
+
+def _text(tree):
+    return "\n\n".join(n["text_content"] for n in tree["children"])
+
+
+def test_signatures_find_near_duplicates_only():
+    base = " ".join(f"Clause {i} the parties agree to obligation number {i} in full." for i in range(200))
+    edited = base.replace("obligation number 17 in full", "a completely rewritten obligation")
+    unrelated = " ".join(f"Lease term {i} rent is payable monthly to landlord {i}." for i in range(200))
+
+    sig = SimilarityIndex.signature(base)
+    assert SimilarityIndex.similarity(sig, SimilarityIndex.signature(edited)) >= NEAR_DUPLICATE_THRESHOLD
+    assert SimilarityIndex.similarity(sig, SimilarityIndex.signature(unrelated)) < 0.2
+    assert set(SimilarityIndex.band_keys(sig)) & set(SimilarityIndex.band_keys(SimilarityIndex.signature(edited)))
+
+
+def test_plan_reuses_results_for_unchanged_clauses():
+    new_tree = copy.deepcopy(OLD_TREE)
+    new_tree["children"][2]["id"] = "b7"
+    new_tree["children"][2]["text_content"] = "7.1 This Agreement is governed by the laws of Delaware."
+
+    diff = AnalysisReuse.diff_trees(OLD_TREE, "", new_tree, "")
+    assert diff["unchanged"] == 2
+    assert diff["changed_sections"] == ["7.1"]
+
+    prior_doc = SimpleNamespace(id="old", tree=OLD_TREE, original_text=_text(OLD_TREE))
+    prior_analysis = SimpleNamespace(
+        id="an-1",
+        definitions=[{"term": "Good Reason", "definition": "a material reduction in salary"}],
+        conflict_analysis={"has_conflict": True, "affected_sections": ["4.1"]},
+        scenarios=[{"id": "s1"}]
+    )
+    tests = [
+        SimpleNamespace(id="t1", affected_clauses=["Section 4.1"]),
+        SimpleNamespace(id="t2", affected_clauses=["Section 7.1"]),
+        SimpleNamespace(id="t3", affected_clauses=[]),
+    ]
+    doc = SimpleNamespace(tree=new_tree, original_text=_text(new_tree))
+
+    plan = AnalysisReuse.plan(prior_doc, prior_analysis, tests, doc, 0.9)
+    assert plan["definitions"] == prior_analysis.definitions
+    assert plan["conflict_analysis"] == prior_analysis.conflict_analysis
+    assert [t.id for t in plan["reusable_scenario_tests"]] == ["t1"]
+    assert [t.id for t in plan["stale_scenario_tests"]] == ["t2", "t3"]
+
+
+def test_changed_definition_forces_rerun():
+    new_tree = copy.deepcopy(OLD_TREE)
+    new_tree["children"][0]["text_content"] = '1.1 "Good Reason" means any reduction in salary.'
+    prior_doc = SimpleNamespace(id="old", tree=OLD_TREE, original_text="")
+    prior_analysis = SimpleNamespace(id="an-1", definitions=[], conflict_analysis={"affected_sections": ["4.1"]}, scenarios=[])
+
+    plan = AnalysisReuse.plan(prior_doc, prior_analysis, [], SimpleNamespace(tree=new_tree, original_text=""), 0.9)
+    assert plan["definitions"] is None
+    assert plan["conflict_analysis"] is None
+
+
+def test_edit_reruns_only_results_depending_on_edited_nodes():
+    tests = [
+        SimpleNamespace(id="t1", affected_clauses=["Section 4.1"]),
+        SimpleNamespace(id="t2", affected_clauses=["Section 7.1"]),
+    ]
+    conflict = {"has_conflict": True, "affected_sections": ["4.1"]}
+    dependencies = AnalysisReuse.dependencies(OLD_TREE, conflict, tests)
+    assert dependencies == {"definitions": ["a1"], "conflict": ["a4"], "scenarios": {"t1": ["a4"], "t2": ["a7"]}}
+
+    prior_analysis = SimpleNamespace(
+        id="an-1", definitions=[{"term": "Good Reason"}], conflict_analysis=conflict, scenarios=[{"id": "s1"}],
+        node_hashes=AnalysisReuse.node_hashes(OLD_TREE), dependencies=dependencies
+    )
+    edited = copy.deepcopy(OLD_TREE)
+    edited["children"][2]["text_content"] = "7.1 This Agreement is governed by the laws of Delaware."
+    doc = SimpleNamespace(id="doc", tree=edited, original_text=_text(edited))
+
+    plan = AnalysisReuse.plan_after_edit(prior_analysis, tests, doc)
+    assert plan["kind"] == "edit"
+    assert plan["diff"]["changed_nodes"] == ["a7"]
+    assert plan["definitions"] == prior_analysis.definitions
+    assert plan["conflict_analysis"] == conflict
+    assert [t.id for t in plan["reusable_scenario_tests"]] == ["t1"]
+    assert [t.id for t in plan["stale_scenario_tests"]] == ["t2"]
+
+    # Unedited document: nothing to plan, a normal analysis runs
+    assert AnalysisReuse.plan_after_edit(prior_analysis, tests, SimpleNamespace(id="doc", tree=OLD_TREE)) is None
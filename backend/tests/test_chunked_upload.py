@@ -0,0 +1,142 @@
+import sys
+import os
+import asyncio
+import hashlib
+import tempfile
+import time
+
+# Add backend to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services import chunked_upload
+from services.chunked_upload import ChunkedUploadStore, CommitInProgress, MIN_CHUNK_SIZE
+
+
+async def _stream(data, piece=100_000):
+    for start in range(0, len(data), piece):
+        yield data[start:start + piece]
+
+
+def _put(store, upload_id, index, data, checksum=None):
+    checksum = checksum or hashlib.sha256(data).hexdigest()
+    return asyncio.run(store.write_chunk(upload_id, index, _stream(data), checksum))
+
+
+def test_chunks_resume_across_restarts_and_assemble():
+    content = os.urandom(MIN_CHUNK_SIZE * 3 + 1000)
+    chunks = [content[i:i + MIN_CHUNK_SIZE] for i in range(0, len(content), MIN_CHUNK_SIZE)]
+    with tempfile.TemporaryDirectory() as session_dir:
+        store = ChunkedUploadStore(session_dir=session_dir)
+        session = store.create("data-room.pdf", len(content), MIN_CHUNK_SIZE, hashlib.sha256(content).hexdigest())
+        upload_id = session["upload_id"]
+        assert session["chunks"] == 4 and session["received"] == []
+
+        _put(store, upload_id, 3, chunks[3])
+        _put(store, upload_id, 0, chunks[0])
+        for bad in (lambda: _put(store, upload_id, 1, chunks[1], checksum="0" * 64),
+                    lambda: _put(store, upload_id, 1, chunks[1][:-1]),
+                    lambda: store.assemble(upload_id)):
+            try:
+                bad()
+                raise AssertionError("accepted a corrupt chunk or an incomplete upload")
+            except ValueError:
+                pass
+
+        # A new worker picks the session up from disk
+        store = ChunkedUploadStore(session_dir=session_dir)
+        assert store.status(upload_id)["received"] == [0, 3]
+        _put(store, upload_id, 1, chunks[1])
+        _put(store, upload_id, 2, chunks[2])
+        _put(store, upload_id, 2, chunks[2])  # resent after a dropped response
+
+        path, size, sha256 = store.assemble(upload_id)
+        with open(path, "rb") as f:
+            assert f.read() == content
+        assert (size, sha256) == (len(content), hashlib.sha256(content).hexdigest())
+        assert store.assemble(upload_id) == (path, size, sha256)
+
+        store.committed(upload_id, "doc-1")
+        assert store.status(upload_id)["document_id"] == "doc-1"
+        assert not os.path.exists(path)
+
+
+def test_invalid_sessions_are_rejected():
+    with tempfile.TemporaryDirectory() as session_dir:
+        store = ChunkedUploadStore(session_dir=session_dir, max_size=10 * MIN_CHUNK_SIZE)
+        for size in (0, 11 * MIN_CHUNK_SIZE):
+            try:
+                store.create("a.pdf", size, MIN_CHUNK_SIZE)
+                raise AssertionError("accepted an invalid size")
+            except ValueError:
+                pass
+        for upload_id in ("../etc", "f" * 32):
+            try:
+                store.status(upload_id)
+                raise AssertionError("found a session that does not exist")
+            except KeyError:
+                pass
+
+        upload_id = store.create("a.pdf", 1000, MIN_CHUNK_SIZE)["upload_id"]
+        os.utime(os.path.join(session_dir, upload_id), (0, 0))
+        assert store.sweep() == 1
+
+
+def test_chunk_writes_do_not_block_the_event_loop(monkeypatch):
+    write = chunked_upload._write
+
+    def slow_write(out, digest, data):
+        time.sleep(0.05)
+        write(out, digest, data)
+
+    monkeypatch.setattr(chunked_upload, "_write", slow_write)
+    data = os.urandom(MIN_CHUNK_SIZE * 8)
+
+    async def main(store, upload_id):
+        ticks = 0
+        writing = asyncio.ensure_future(
+            store.write_chunk(upload_id, 0, _stream(data, piece=MIN_CHUNK_SIZE), hashlib.sha256(data).hexdigest())
+        )
+        while not writing.done():
+            ticks += 1
+            await asyncio.sleep(0.01)
+        await writing
+        return ticks
+
+    with tempfile.TemporaryDirectory() as session_dir:
+        store = ChunkedUploadStore(session_dir=session_dir)
+        upload_id = store.create("a.pdf", len(data), len(data))["upload_id"]
+        assert asyncio.run(main(store, upload_id)) >= 5
+        assert store.status(upload_id)["complete"]
+
+
+def test_limit_defaults_to_the_upload_limit(monkeypatch):
+    monkeypatch.delenv("MAX_CHUNKED_UPLOAD_MB", raising=False)
+    monkeypatch.setenv("MAX_UPLOAD_MB", "5")
+    assert ChunkedUploadStore(session_dir="unused").max_size == 5 * 1024 * 1024
+    monkeypatch.setenv("MAX_CHUNKED_UPLOAD_MB", "2")
+    assert ChunkedUploadStore(session_dir="unused").max_size == 2 * 1024 * 1024
+
+
+def test_commits_of_one_session_are_serialized():
+    content = os.urandom(MIN_CHUNK_SIZE + 10)
+    with tempfile.TemporaryDirectory() as session_dir:
+        store = ChunkedUploadStore(session_dir=session_dir)
+        upload_id = store.create("a.pdf", len(content), MIN_CHUNK_SIZE)["upload_id"]
+        _put(store, upload_id, 0, content[:MIN_CHUNK_SIZE])
+        _put(store, upload_id, 1, content[MIN_CHUNK_SIZE:])
+
+        # A worker died while assembling: its partial file is cleared by the next commit
+        partial = os.path.join(session_dir, upload_id, "upload.bin.part")
+        with open(partial, "wb") as f:
+            f.write(b"junk")
+        with store.committing(upload_id):
+            try:
+                with store.committing(upload_id):
+                    raise AssertionError("second commit got the lock")
+            except CommitInProgress:
+                pass
+            path, size, _ = store.assemble(upload_id)
+            store.committed(upload_id, "doc-1")
+        assert size == len(content) and not os.path.exists(partial)
+        with store.committing(upload_id):
+            assert store.status(upload_id)["document_id"] == "doc-1"
@@ -0,0 +1,149 @@
+import sys
+import os
+import asyncio
+import json
+import re
+import threading
+import time
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+from sqlalchemy import create_engine
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import sessionmaker
+
+# Add backend to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models import Base, ClauseMemo
+from services.clause_memo import ClauseMemoService, CLAUSE_PROMPT_VERSION
+from services.mistral_service import MistralService
+
+
+NOTICES = "Notices. All notices under this Agreement shall be in writing and delivered by hand or courier."
+
+
+def _tree(*sections):
+    return {"id": "root", "children": [
+        {"id": f"s{num}", "an_type": "section", "an_num": num, "text_content": f"{num} {text}", "children": []}
+        for num, text in sections
+    ]}
+
+
+class FakeMistral:
+    model = "test-model"
+    client = object()
+
+    def __init__(self):
+        self.calls = []
+
+    async def summarize_clauses(self, clauses, batch_size=25, concurrency=4):
+        self.calls.append([c["id"] for c in clauses])
+        return {c["id"]: {
+            "classification": "notices" if "notices" in c["text"].lower() else "vesting",
+            "boilerplate": "notices" in c["text"].lower(),
+            "terms": [],
+            "findings": "Notices must be written and hand or courier delivered."
+        } for c in clauses}
+
+
+@compiles(UUID, "sqlite")
+def _uuid_on_sqlite(type_, compiler, **kw):
+    return "CHAR(32)"
+
+
+def _db(rows):
+    db = MagicMock()
+    db.query.return_value.filter.return_value.all.return_value = rows
+    return db
+
+
+def test_fingerprint_ignores_numbering_case_and_whitespace():
+    assert ClauseMemoService.fingerprint(f"12.3 {NOTICES}") == ClauseMemoService.fingerprint(
+        f"Section 4  {NOTICES.upper()}\n"
+    )
+    assert ClauseMemoService.fingerprint(NOTICES) != ClauseMemoService.fingerprint(NOTICES.replace("hand", "email"))
+
+
+def test_digest_only_summarizes_novel_clauses():
+    tree = _tree(("9.1", NOTICES), ("4.1", "All Unvested Shares vest monthly over 48 months."))
+    notices_hash = ClauseMemoService.fingerprint(NOTICES)
+    memo = SimpleNamespace(
+        clause_hash=notices_hash, model_used="test-model", prompt_version=CLAUSE_PROMPT_VERSION,
+        classification="notices", is_boilerplate=True, terms=[], findings="Written notice by hand or courier.",
+        hit_count=3, last_used_at=None
+    )
+    mistral = FakeMistral()
+    db = _db([memo])
+
+    digest = asyncio.run(ClauseMemoService(mistral).digest(tree, "", db))
+
+    assert digest["reused"] == 1 and digest["novel"] == 1
+    assert mistral.calls == [[ClauseMemoService.fingerprint("All Unvested Shares vest monthly over 48 months.")]]
+    assert memo.hit_count == 4
+    assert db.add.call_count == 1
+    # Memoized boilerplate collapses; the deal-specific clause is sent verbatim
+    assert "[Section 9.1 - standard notices: Written notice by hand or courier.]" in digest["context_text"]
+    assert "4.1 All Unvested Shares vest monthly" in digest["context_text"]
+    assert NOTICES not in digest["context_text"]
+
+
+def test_boilerplate_summarized_in_this_request_is_sent_verbatim():
+    tree = _tree(("9.1", NOTICES), ("4.1", "All Unvested Shares vest monthly over 48 months."))
+    digest = asyncio.run(ClauseMemoService(FakeMistral()).digest(tree, "", _db([])))
+    assert digest["novel"] == 2
+    assert digest["clauses"][0]["memo"]["boilerplate"]
+    assert NOTICES in digest["context_text"]
+
+
+def test_clause_ids_sent_to_the_model_are_positional(monkeypatch):
+    monkeypatch.delenv("MISTRAL_API_KEY", raising=False)
+    monkeypatch.delenv("MISTRAL_CASSETTE_MODE", raising=False)
+    service = MistralService()
+    in_flight, peak = [0], [0]
+    lock = threading.Lock()
+
+    def complete(model, messages, temperature):
+        with lock:
+            in_flight[0] += 1
+            peak[0] = max(peak[0], in_flight[0])
+        time.sleep(0.02)
+        ids = re.findall(r"^\[(c\d+)\]", messages[0]["content"], re.MULTILINE)
+        # The model mangles the last id of every batch
+        clauses = [{"id": f"[{i}]", "classification": "notices", "findings": i} for i in ids[:-1]]
+        clauses.append({"id": ids[-1] + "x", "classification": "notices", "findings": "lost"})
+        with lock:
+            in_flight[0] -= 1
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=json.dumps({"clauses": clauses})))])
+
+    service.client = SimpleNamespace(chat=SimpleNamespace(complete=complete))
+    clauses = [{"id": ClauseMemoService.fingerprint(f"Clause {n}"), "section": None, "text": f"Clause {n}"} for n in range(40)]
+    summaries = asyncio.run(service.summarize_clauses(clauses, batch_size=2, concurrency=3))
+
+    assert peak[0] <= 3
+    assert len(summaries) == 20
+    assert summaries[clauses[0]["id"]] == {"id": clauses[0]["id"], "classification": "notices", "findings": "c0"}
+    assert clauses[1]["id"] not in summaries
+
+
+def test_concurrent_digests_store_one_memo_per_clause(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'memos.db'}")
+    Base.metadata.create_all(engine, tables=[ClauseMemo.__table__])
+    Session = sessionmaker(bind=engine)
+    tree = _tree(("9.1", NOTICES))
+
+    class RacingMistral(FakeMistral):
+        async def summarize_clauses(self, clauses, batch_size=25, concurrency=4):
+            # Another worker stores the same clause while this one waits on the model
+            other = Session()
+            other.add(ClauseMemo(clause_hash=clauses[0]["id"], model_used=self.model,
+                                 prompt_version=CLAUSE_PROMPT_VERSION, classification="notices"))
+            other.commit()
+            other.close()
+            return await super().summarize_clauses(clauses, batch_size, concurrency)
+
+    db = Session()
+    digest = asyncio.run(ClauseMemoService(RacingMistral()).digest(tree, "", db))
+    assert digest["clauses"][0]["memo"]["classification"] == "notices"
+    assert Session().query(ClauseMemo).count() == 1
@@ -0,0 +1,67 @@
+import sys
+import os
+import asyncio
+
+# Add backend to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.definition_extractor import DefinitionExtractor
+from services.mistral_service import MistralService
+
+PREAMBLE = (
+    'This Agreement is entered into by and between TechCorp Inc., a Delaware corporation '
+    '(the "Company"), and John Doe (the "Founder").'
+)
+
+TREE = {
+    "id": "root",
+    "an_type": "document",
+    "text_content": "ROOT",
+    "children": [
+        {"id": "n0", "an_type": "paragraph", "text_content": PREAMBLE, "children": []},
+        {
+            "id": "n1", "an_type": "section", "an_num": "1.1",
+            "text_content": "1.1 In this Agreement:",
+            "children": [
+                {"id": "n2", "an_type": "paragraph", "children": [],
+                 "text_content": '"Cause" shall mean fraud, embezzlement or gross negligence.'},
+                {"id": "n3", "an_type": "point", "an_num": "(a)", "children": [],
+                 "text_content": '(a) "Good Reason" means a material reduction in salary; and'},
+                {"id": "n4", "an_type": "paragraph", "children": [],
+                 "text_content": '"Bad Leaver" has the meaning given in Section 4.2.'},
+            ]
+        }
+    ]
+}
+
+
+def test_extracts_all_definition_forms_from_tree():
+    definitions = {d["term"]: d for d in DefinitionExtractor.extract("", TREE)}
+
+    assert definitions["Company"]["definition"] == "TechCorp Inc., a Delaware corporation"
+    assert definitions["Company"]["section"] == "Preamble"
+    assert definitions["Company"]["category"] == "parties"
+    assert definitions["Founder"]["definition"] == "John Doe"
+
+    assert definitions["Cause"]["section"] == "1.1"
+    assert definitions["Cause"]["node_id"] == "n2"
+    assert definitions["Good Reason"]["definition"] == "a material reduction in salary"
+    assert definitions["Good Reason"]["section"] == "1.1(a)"
+    assert definitions["Bad Leaver"]["kind"] == "pointer"
+
+
+def test_plain_text_fallback_and_gaps():
+    text = PREAMBLE + '\n\n4. Termination\n\n4.2 A Founder who resigns without "Good Reason" is a "Bad Leaver".'
+    definitions = DefinitionExtractor.extract(text)
+    assert {d["term"] for d in definitions} == {"Company", "Founder"}
+
+    gaps = [term for term, _ in DefinitionExtractor.find_undefined_quoted_terms(text, definitions)]
+    assert gaps == ["Good Reason", "Bad Leaver"]
+
+
+def test_extract_definitions_skips_llm_without_client(monkeypatch):
+    monkeypatch.delenv("MISTRAL_API_KEY", raising=False)
+    monkeypatch.delenv("MISTRAL_CASSETTE_MODE", raising=False)
+    service = MistralService()
+    definitions = asyncio.run(service.extract_definitions("", TREE))
+    assert len(definitions) == 5
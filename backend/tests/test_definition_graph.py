@@ -0,0 +1,46 @@
+import sys
+import os
+
+# Add backend to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.definition_graph import DefinitionGraph
+
+DEFINITIONS = [
+    {"term": "Good Reason", "definition": "a resignation that is not a Bad Leaver event", "node_id": "d1"},
+    {"term": "Bad Leaver", "definition": "a Founder who leaves without Good Reason", "node_id": "d2"},
+    {"term": "Founder", "definition": "John Doe", "node_id": "d3"},
+    {"term": "Escrow Agent", "definition": "the bank named in Schedule 2", "node_id": "d4"},
+]
+
+TREE = {
+    "id": "root",
+    "children": [
+        {"id": "d1", "text_content": '"Good Reason" means a resignation that is not a Bad Leaver event.', "children": []},
+        {"id": "d2", "text_content": '"Bad Leaver" means a Founder who leaves without Good Reason.', "children": []},
+        {"id": "d3", "text_content": '"Founder" means John Doe.', "children": []},
+        {"id": "d4", "text_content": '"Escrow Agent" means the bank named in Schedule 2.', "children": []},
+        {"id": "b1", "text_content": "If a Founder is a Bad Leaver, all Unvested Shares are forfeited.", "children": []},
+        {"id": "b2", "text_content": "The Company may repurchase the Unvested Shares at cost.", "children": []},
+    ]
+}
+
+
+def test_detects_cycles_undefined_and_unused_terms():
+    graph = DefinitionGraph.analyze(DEFINITIONS, "", TREE)
+
+    assert graph["has_cycles"]
+    assert sorted(graph["cycles"][0]) == ["Bad Leaver", "Good Reason"]
+    assert graph["edges"]["Bad Leaver"] == ["Founder", "Good Reason"]
+    assert "Unvested Shares" in graph["undefined_terms"]
+    assert graph["unused_terms"] == ["Escrow Agent"]
+
+
+def test_long_chain_has_no_cycle_and_no_recursion_limit():
+    chain = [{"term": f"Term {i}", "definition": f"as modified by Term {i + 1}"} for i in range(5000)]
+    components = DefinitionGraph.strongly_connected_components(
+        {f"t{i}": [f"t{i + 1}"] for i in range(5000)}
+    )
+    assert len(components) == 5001
+    assert all(len(c) == 1 for c in components)
+    assert not DefinitionGraph.analyze(chain[:200], "\n\n".join(d["definition"] for d in chain[:200]))["has_cycles"]
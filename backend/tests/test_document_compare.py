@@ -0,0 +1,87 @@
+import sys
+import os
+import time
+
+# Add backend to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.document_compare import DocumentCompare
+
+
+def _paragraphs(texts):
+    return DocumentCompare.paragraphs(None, "\n\n".join(texts))
+
+
+def _changes(old_texts, new_texts):
+    records = list(DocumentCompare.compare(_paragraphs(old_texts), _paragraphs(new_texts)))
+    return records[:-1], records[-1]
+
+
+BASE = [
+    "ARTICLE I DEFINITIONS",
+    '1.1 "Good Reason" means a material reduction in salary.',
+    "ARTICLE II VESTING",
+    "4.1 Shares vest monthly over four years.",
+    "(a) Unvested Shares are forfeited on termination.",
+    "ARTICLE III GOVERNING LAW",
+    "9.1 This Agreement is governed by Delaware law.",
+]
+
+
+def test_inserted_deleted_modified_and_moved():
+    draft = [
+        "ARTICLE I DEFINITIONS",
+        '1.1 "Good Reason" means any reduction in salary.',
+        "ARTICLE III GOVERNING LAW",
+        "9.1 This Agreement is governed by Delaware law.",
+        "ARTICLE II VESTING",
+        "4.1 Shares vest monthly over four years.",
+        "4.2 Vesting accelerates on a change of control.",
+    ]
+    changes, summary = _changes(BASE, draft)
+    kinds = {(c["type"], (c.get("old") or c.get("new"))["text"][:8]) for c in changes}
+    assert ("modified", '1.1 "Goo') in kinds
+    assert ("inserted", "4.2 Vest") in kinds
+    assert ("deleted", "(a) Unve") in kinds
+    assert summary["modified"] == 1 and summary["inserted"] == 1 and summary["deleted"] == 1
+    # One block moved: either ARTICLE II..4.1 or ARTICLE III..9.1, never both
+    assert summary["moved"] == 2 and summary["unchanged"] == 3
+
+    modified = next(c for c in changes if c["type"] == "modified")
+    assert [d for d in modified["diff"] if d["op"] != "equal"] == [
+        {"op": "delete", "text": "a material"}, {"op": "insert", "text": "any"}
+    ]
+    # Records come in new-document order
+    positions = [c["new"]["index"] for c in changes if "new" in c]
+    assert positions == sorted(positions)
+
+
+def test_identical_documents_have_no_changes():
+    changes, summary = _changes(BASE, BASE)
+    assert changes == []
+    assert summary["unchanged"] == len(BASE)
+
+
+def test_para_ids_pair_rewritten_paragraphs():
+    old = [{"id": "a", "original_xml_id": "P1", "text_content": "Term is one year.", "children": []}]
+    new = [{"id": "b", "original_xml_id": "P1", "text_content": "Completely different wording here.", "children": []}]
+    records = list(DocumentCompare.compare(
+        DocumentCompare.paragraphs({"children": old}, ""), DocumentCompare.paragraphs({"children": new}, "")
+    ))
+    assert records[0]["type"] == "modified" and records[0]["old"]["para_id"] == "P1"
+
+
+def test_large_agreement_is_near_linear():
+    # ~500 pages: 12,000 paragraphs with scattered edits
+    base = [f"{i}.1 The Supplier shall perform obligation {i} in good faith." for i in range(12000)]
+    draft = list(base)
+    for k in range(0, 12000, 97):
+        draft[k] = draft[k].replace("good faith", "good faith and with due care")
+    del draft[5000:5010]
+    draft[100:100] = ["A new boilerplate paragraph."] * 5
+
+    start = time.perf_counter()
+    changes, summary = _changes(base, draft)
+    assert time.perf_counter() - start < 5
+    assert summary["deleted"] == 10 and summary["inserted"] == 5
+    assert summary["modified"] == sum(1 for k in range(0, 12000, 97) if not 5000 <= k < 5010)
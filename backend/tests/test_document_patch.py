@@ -0,0 +1,117 @@
+import sys
+import os
+import io
+
+from docx import Document
+from docx.oxml.ns import qn
+
+# Add backend to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.composer_service import ComposerService
+from services.document_service import DocumentService
+
+
+def _docx(paragraphs):
+    doc = Document()
+    for i, text in enumerate(paragraphs):
+        doc.add_paragraph(text)._element.set(qn('w:paraId'), f"P{i}")
+    buffer = io.BytesIO()
+    doc.save(buffer)
+    return buffer.getvalue()
+
+
+def _shape(node):
+    return (node.get("an_type"), node.get("an_num"), node.get("text_content"), node.get("clause_type"),
+            [_shape(child) for child in node.get("children", [])])
+
+
+def _ids(node):
+    ids = {node["original_xml_id"]: node["id"]} if node.get("original_xml_id") else {}
+    for child in node.get("children", []):
+        ids.update(_ids(child))
+    return ids
+
+
+CONTRACT = [
+    "ARTICLE I DEFINITIONS",
+    '1.1 "Good Reason" means a material reduction in salary.',
+    "ARTICLE II VESTING",
+    "4.1 Shares vest monthly.",
+    "(a) Unvested Shares are forfeited on termination.",
+]
+
+
+def test_patch_matches_full_reparse_and_keeps_ids():
+    content = _docx(CONTRACT)
+    _, tree = DocumentService.parse_docx_structure(content)
+
+    composer = ComposerService(content)
+    new_content = composer.apply_operations([
+        {"type": "update_text", "id": "P1", "text": '1.1 "Good Reason" means any reduction in salary.'},
+        {"type": "split", "id": "P4", "parts": ["(a) Unvested Shares are forfeited.", "(b) Vested Shares are kept."]},
+    ])
+    text, patched = DocumentService.patch_docx_structure(tree, composer.changes())
+    full_text, reparsed = DocumentService.parse_docx_structure(new_content)
+
+    assert text == full_text
+    assert _shape(patched) == _shape(reparsed)
+    before, after = _ids(tree), _ids(patched)
+    assert all(after[para_id] == node_id for para_id, node_id in before.items())
+    assert len(after) == len(before) + 1
+
+
+def test_structural_edit_falls_back_to_reparse():
+    content = _docx(CONTRACT)
+    _, tree = DocumentService.parse_docx_structure(content)
+
+    composer = ComposerService(content)
+    composer.apply_operations([{"type": "update_text", "id": "P4", "text": "4.2 Shares vest yearly."}])
+    assert DocumentService.patch_docx_structure(tree, composer.changes()) is None
+
+
+def test_batch_insert_delete_and_move():
+    content = _docx(CONTRACT)
+    _, tree = DocumentService.parse_docx_structure(content)
+
+    composer = ComposerService(content)
+    operations = [
+        {"type": "insert", "id": "P3", "text": "Shares vest on a change of control."},
+        {"type": "delete", "id": "P4"},
+    ]
+    new_content = composer.apply_operations(operations)
+    assert operations[0]["new_id"]
+    text, patched = DocumentService.patch_docx_structure(tree, composer.changes())
+    full_text, reparsed = DocumentService.parse_docx_structure(new_content)
+    assert text == full_text
+    assert _shape(patched) == _shape(reparsed)
+
+    # Moves change the structure: no patch, the caller re-parses
+    composer = ComposerService(new_content)
+    moved = composer.apply_operations([{"type": "move", "id": "P1", "after": "P3"}])
+    assert composer.changes() is None
+    assert DocumentService.parse_docx_structure(moved)[0].endswith("salary.\n\nShares vest on a change of control.")
+
+
+def test_invalid_batch_is_rejected_before_anything_changes():
+    composer = ComposerService(_docx(CONTRACT))
+    try:
+        composer.apply_operations([
+            {"type": "update_text", "id": "P0", "text": "ARTICLE I TERMS"},
+            {"type": "delete", "id": "P9"},
+        ], save=False)
+        raise AssertionError("invalid batch was applied")
+    except ValueError as e:
+        assert "P9" in str(e)
+    assert composer.changes() == []
+    assert DocumentService.parse_docx_structure(composer.save())[0].startswith("ARTICLE I DEFINITIONS")
+
+
+def test_thousand_operation_batch():
+    content = _docx([f"Clause {i} text." for i in range(1000)])
+    composer = ComposerService(content)
+    composer.apply_operations(
+        [{"type": "update_text", "id": f"P{i}", "text": f"Clause {i} revised."} for i in range(1000)], save=False
+    )
+    assert len(composer.changes()) == 1000
+    assert composer.changes()[999]["text"] == "Clause 999 revised."
@@ -0,0 +1,153 @@
+import sys
+import os
+import io
+import zipfile
+
+from docx import Document
+from docx.oxml.ns import qn
+
+# Add backend to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.composer_service import ComposerService
+from services.document_service import DocumentService
+from services.id_normalizer import IDNormalizer
+
+FOOTNOTES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<w:footnotes xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">'
+    '<w:footnote w:type="separator" w:id="-1"><w:p><w:r><w:separator/></w:r></w:p></w:footnote>'
+    '<w:footnote w:id="1"><w:p><w:r><w:t>Subject to the Escrow Agreement.</w:t></w:r></w:p></w:footnote>'
+    '</w:footnotes>'
+)
+
+
+def _contract():
+    doc = Document()
+    doc.add_paragraph("Vesting", style="Heading 1")
+    doc.add_paragraph("Shares vest monthly.", style="List Number")
+    doc.add_paragraph("Unvested Shares are forfeited.", style="List Number")
+    table = doc.add_table(rows=2, cols=2)
+    table.cell(0, 0).text = "Holder"
+    table.cell(0, 1).text = "100 Shares"
+    table.cell(1, 0).text = "2.3 The Holder may transfer Shares to an Affiliate."
+    doc.sections[0].header.paragraphs[0].text = "CONFIDENTIAL"
+    footnoted = doc.add_paragraph("The escrow amount is held back.")
+    footnoted.runs[0]._r.append(footnoted.runs[0]._r.makeelement(qn('w:footnoteReference'), {qn('w:id'): "1"}))
+    buffer = io.BytesIO()
+    doc.save(buffer)
+
+    # python-docx cannot create footnotes: add the part (and its relationship) to the package
+    out = io.BytesIO()
+    with zipfile.ZipFile(io.BytesIO(buffer.getvalue())) as source, zipfile.ZipFile(out, "w") as target:
+        for item in source.infolist():
+            data = source.read(item.filename)
+            if item.filename == "word/_rels/document.xml.rels":
+                data = data.replace(b"</Relationships>", (
+                    b'<Relationship Id="rIdFootnotes" Target="footnotes.xml" Type="http://schemas.'
+                    b'openxmlformats.org/officeDocument/2006/relationships/footnotes"/></Relationships>'
+                ))
+            elif item.filename == "[Content_Types].xml":
+                data = data.replace(b"</Types>", (
+                    b'<Override PartName="/word/footnotes.xml" ContentType="application/'
+                    b'vnd.openxmlformats-officedocument.wordprocessingml.footnotes+xml"/></Types>'
+                ))
+            target.writestr(item, data)
+        target.writestr("word/footnotes.xml", FOOTNOTES)
+    return IDNormalizer.normalize_docx(out.getvalue())
+
+
+def _nodes(node):
+    for child in node.get("children", []):
+        yield child
+        yield from _nodes(child)
+
+
+def test_tables_numbering_notes_and_headers_are_parsed():
+    text, tree = DocumentService.parse_docx_structure(_contract())
+    nodes = {node["text_content"]: node for node in _nodes(tree)}
+
+    # Auto-numbered list items get the numbers Word renders
+    assert (nodes["Shares vest monthly."]["an_type"], nodes["Shares vest monthly."]["an_num"]) == ("section", "1")
+    assert nodes["Unvested Shares are forfeited."]["an_num"] == "2"
+
+    # Table cells are in document order; a bare number in a cell is data, "2.3 ..." is a clause
+    assert nodes["100 Shares"]["an_type"] == "paragraph"
+    clause = nodes["2.3 The Holder may transfer Shares to an Affiliate."]
+    assert (clause["an_type"], clause["an_num"]) == ("section", "2.3")
+    assert clause["metadata"]["table"] == {"index": 0, "row": 1, "cell": 0}
+
+    # Footnotes follow the paragraph that references them, headers come last
+    [footnote] = nodes["The escrow amount is held back."]["children"]
+    assert footnote["text_content"] == "Subject to the Escrow Agreement."
+    assert footnote["metadata"] == {"part": "footnote", "note_id": "1"}
+    assert ":" not in footnote["original_xml_id"]  # the normalizer covers notes too
+    assert tree["children"][-1]["metadata"] == {"part": "header"}
+
+    assert text == DocumentService.tree_text(tree)
+    assert all(node["original_xml_id"] for node in _nodes(tree))
+
+
+def test_table_cell_paragraphs_are_editable():
+    content = _contract()
+    _, tree = DocumentService.parse_docx_structure(content)
+    cell = next(n for n in _nodes(tree) if n["text_content"] == "Holder")
+
+    composer = ComposerService(content)
+    new_content = composer.apply_operations([{"type": "update_text", "id": cell["original_xml_id"], "text": "Holder name"}])
+    text, patched = DocumentService.patch_docx_structure(tree, composer.changes())
+    assert text == DocumentService.parse_docx_structure(new_content)[0]
+    assert "Holder name" in text
+
+    try:
+        composer.apply_operations([{"type": "delete", "id": cell["original_xml_id"]}], save=False)
+        raise AssertionError("deleted the only paragraph of a table cell")
+    except ValueError as e:
+        assert "table cell" in str(e)
+
+    body = next(n for n in _nodes(tree) if n["text_content"] == "Shares vest monthly.")
+    try:
+        composer.apply_operations([{"type": "move", "id": cell["original_xml_id"], "after": body["original_xml_id"]}], save=False)
+        raise AssertionError("moved the only paragraph out of a table cell")
+    except ValueError as e:
+        assert "table cell" in str(e)
+
+    # Fine once the cell has another paragraph
+    moved = composer.apply_operations([
+        {"type": "insert", "id": cell["original_xml_id"], "text": "Holder address"},
+        {"type": "move", "id": cell["original_xml_id"], "after": body["original_xml_id"]},
+    ])
+    assert "Shares vest monthly.\n\nHolder name" in DocumentService.parse_docx_structure(moved)[0]
+
+
+TEXT_BOX = (
+    '<mc:AlternateContent xmlns:mc="http://schemas.openxmlformats.org/markup-compatibility/2006"'
+    ' xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main"'
+    ' xmlns:v="urn:schemas-microsoft-com:vml">'
+    '<mc:Choice Requires="wps"><w:drawing><w:txbxContent>'
+    '<w:p><w:r><w:t>Box clause text.</w:t></w:r></w:p>'
+    '</w:txbxContent></w:drawing></mc:Choice>'
+    '<mc:Fallback><w:pict><v:shape><v:textbox><w:txbxContent>'
+    '<w:p><w:r><w:t>Box clause text.</w:t></w:r></w:p>'
+    '</w:txbxContent></v:textbox></v:shape></w:pict></mc:Fallback>'
+    '</mc:AlternateContent>'
+)
+
+
+def test_text_box_is_read_and_edited_once():
+    from docx.oxml import parse_xml
+
+    doc = Document()
+    anchor = doc.add_paragraph("The parties agree as follows.")
+    anchor.runs[0]._r.append(parse_xml(TEXT_BOX))
+    buffer = io.BytesIO()
+    doc.save(buffer)
+    content = IDNormalizer.normalize_docx(buffer.getvalue())
+
+    text, tree = DocumentService.parse_docx_structure(content)
+    assert text.count("Box clause text.") == 1
+    box = next(n for n in _nodes(tree) if n["text_content"] == "Box clause text.")
+
+    composer = ComposerService(content)
+    new_content = composer.apply_operations([{"type": "update_text", "id": box["original_xml_id"], "text": "Boxed."}])
+    assert "Boxed." in DocumentService.parse_docx_structure(new_content)[0]
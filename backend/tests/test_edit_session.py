@@ -0,0 +1,89 @@
+import sys
+import os
+import io
+
+from docx import Document
+from docx.oxml.ns import qn
+
+# Add backend to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.document_service import DocumentService
+from services.edit_session import EditSessionManager, EditConflict
+from services.version_store import VersionStore
+from models import Document as DocumentRow, DocumentOperation
+from test_version_store import _sessions
+
+
+def _docx(paragraphs):
+    doc = Document()
+    for i, text in enumerate(paragraphs):
+        doc.add_paragraph(text)._element.set(qn('w:paraId'), f"P{i}")
+    buffer = io.BytesIO()
+    doc.save(buffer)
+    return buffer.getvalue()
+
+
+CONTENT = _docx(["1.1 Shares vest monthly.", "(a) Unvested Shares are forfeited."])
+SPLIT = [{"type": "split", "id": "P1", "parts": ["(a) Unvested Shares are forfeited.", "(b) Vested Shares are kept."]}]
+
+
+def test_crashed_session_is_recovered_from_journal(tmp_path):
+    manager = EditSessionManager(journal_dir=str(tmp_path), max_pending_ops=3)
+    session = manager.open("doc-1", CONTENT)
+    session.apply([{"type": "update_text", "id": "P0", "text": "1.1 Shares vest yearly."}])
+    session.apply(SPLIT)
+    assert session.pending_ops == 2 and not manager.flush_due(session)
+
+    # A new worker finds the journal and replays it onto the stored content
+    recovered = EditSessionManager(journal_dir=str(tmp_path))
+    assert recovered.orphaned_journals() == ["doc-1"]
+    replayed = recovered.open("doc-1", CONTENT)
+    assert replayed.pending_ops == 2
+    text, _ = DocumentService.parse_docx_structure(replayed.composer.save())
+    assert text == "1.1 Shares vest yearly.\n\n(a) Unvested Shares are forfeited.\n\n(b) Vested Shares are kept."
+
+
+def test_flushed_journal_is_not_replayed_twice(tmp_path):
+    manager = EditSessionManager(journal_dir=str(tmp_path))
+    session = manager.open("doc-1", CONTENT)
+    session.apply(SPLIT)
+    stored = session.composer.save()
+
+    # Worker died after the flush committed but before the journal was removed
+    recovered = EditSessionManager(journal_dir=str(tmp_path)).open("doc-1", stored)
+    assert recovered.pending_ops == 0
+    assert not os.path.exists(recovered.journal_path)
+
+    session.flushed(DocumentService.fingerprint(stored), 1)
+    assert session.pending_ops == 0 and session.composer.changes() == []
+
+
+def test_session_batches_are_versions_checked_for_conflicts(tmp_path):
+    manager = EditSessionManager(journal_dir=str(tmp_path))
+    session = manager.open("doc-1", CONTENT, version=4)
+    session.apply([{"type": "update_text", "id": "P0", "text": "1.1 Shares vest yearly."}])
+    session.apply(SPLIT)
+    assert session.version == 6 and session.state()["version"] == 6
+    # A second client still on version 4 overlaps on P0, one on version 5 does not
+    assert "P0" in session.changed_since(4)
+    assert "P0" not in session.changed_since(5)
+    assert session.changed_since(7) is None
+
+    # Lost write race: replayed onto the new head only without overlap
+    try:
+        session.rebase(CONTENT, 5, {"P1"})
+        raise AssertionError("rebased over a conflicting stored edit")
+    except EditConflict as e:
+        assert e.conflicting_ids == ["P1"]
+    session.rebase(CONTENT, 5, {"P9"})
+    assert (session.base_version, session.version) == (5, 7)
+
+    # A flush logs one version per batch
+    db = _sessions()()
+    doc = DocumentRow(filename="a.docx", original_text="", file_type="docx", file_content=CONTENT, version=5)
+    db.add(doc)
+    db.commit()
+    assert VersionStore.record_batches(doc, session.batches, session.composer.save(), db) == 7
+    db.commit()
+    assert [v for (v,) in db.query(DocumentOperation.version).order_by(DocumentOperation.version)] == [6, 7]
@@ -118,3 +118,100 @@ def test_benchmark_analysis_endpoint():
 
         assert response.status_code == 200
         assert "benchmarks" in response.json()
+
+def test_upload_returns_existing_document_for_identical_file():
+    existing_doc = MagicMock()
+    existing_doc.id = "doc_123"
+    existing_doc.filename = "draft.txt"
+    existing_doc.original_text = "Existing agreement text. " * 10
+    existing_doc.text_hash = "abc"
+    existing_doc.uploaded_at.isoformat.return_value = "2024-01-01T00:00:00"
+    latest_analysis = MagicMock()
+    latest_analysis.id = "analysis_9"
+    
+    mock_db_session.reset_mock()
+    mock_db_session.query.side_effect = None
+    mock_db_session.query.return_value.filter.return_value.order_by.return_value.first.side_effect = None
+    mock_db_session.query.return_value.filter.return_value.order_by.return_value.first.return_value = existing_doc
+    mock_db_session.query.return_value.join.return_value.filter.return_value.order_by.return_value.first.return_value = latest_analysis
+    
+    response = client.post("/api/upload", files={"file": ("renamed.txt", b"same bytes as before", "text/plain")})
+    
+    assert response.status_code == 200
+    data = response.json()
+    assert data["document_id"] == "doc_123"
+    assert data["deduplicated"] is True
+    assert data["existing_analysis_id"] == "analysis_9"
+    mock_db_session.add.assert_not_called()
+
+def test_streams_for_documents_with_the_same_text_run_separately():
+    import asyncio
+    import main
+    
+    same_text = "The Supplier shall deliver the Goods. " * 10
+    docs = {}
+    for doc_id in ("doc_a", "doc_b"):
+        docs[doc_id] = MagicMock()
+        docs[doc_id].id = doc_id
+        docs[doc_id].original_text = same_text
+        docs[doc_id].tree = {}
+    analyzed = []
+    
+    async def fake_stream(document_id):
+        analyzed.append(document_id)
+        await asyncio.sleep(0.01)
+        yield {"type": "result", "data": {"analysis_id": f"analysis_{document_id}"}}
+    
+    async def run(doc_id):
+        db = MagicMock()
+        db.query.return_value.filter.return_value.first.return_value = docs[doc_id]
+        upload = MagicMock(document_id=doc_id, filename="draft.txt")
+        with patch("main.upload_document", new=AsyncMock(return_value=upload)):
+            response = await main.analyze_quick_stream(file=MagicMock(), db=db)
+        return [line async for line in response.body_iterator]
+    
+    async def both():
+        return await asyncio.gather(run("doc_a"), run("doc_b"))
+    
+    with patch("main.stream_document_analysis", new=fake_stream):
+        first, second = asyncio.run(both())
+    
+    # Each document gets its own run (and its own Analysis row)
+    assert sorted(analyzed) == ["doc_a", "doc_b"]
+    assert "analysis_doc_a" in first[-1] and "analysis_doc_b" in second[-1]
+
+def test_shared_analysis_outlives_the_leaders_session():
+    import asyncio
+    import main
+    
+    doc = MagicMock()
+    doc.id = "doc_a"
+    doc.original_text = "The Supplier shall deliver the Goods. " * 10
+    own_session = MagicMock()
+    own_session.query.return_value.filter.return_value.first.return_value = doc
+    sessions = []
+    
+    async def fake_run(document, document_id, db):
+        sessions.append(db)
+        await asyncio.sleep(0.05)
+        return {"document_id": document_id, "analysis_id": "analysis_1"}
+    
+    async def requests():
+        leader_db, follower_db = MagicMock(), MagicMock()
+        for db in (leader_db, follower_db):
+            db.query.return_value.filter.return_value.first.return_value = doc
+        leader = asyncio.ensure_future(main.analyze_document("doc_a", leader_db))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(main.analyze_document("doc_a", follower_db))
+        await asyncio.sleep(0.01)
+        leader.cancel()  # the leader disconnects; get_db would close its session now
+        return await follower
+    
+    with patch("main.run_document_analysis", new=fake_run), \
+         patch("main.flush_open_session", new=AsyncMock()), \
+         patch("main.SessionLocal", return_value=own_session):
+        response = asyncio.run(requests())
+    
+    assert response["analysis_id"] == "analysis_1"
+    assert sessions == [own_session]
+    assert own_session.close.called
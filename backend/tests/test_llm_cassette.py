@@ -0,0 +1,59 @@
+import sys
+import os
+import asyncio
+from unittest.mock import MagicMock
+
+import pytest
+
+# Add backend to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.llm_cassette import Cassette, CassetteClient, CassetteMissError
+from services.mistral_service import MistralService
+
+
+def _fake_mistral(content):
+    client = MagicMock()
+    response = MagicMock()
+    response.choices[0].message.content = content
+    client.chat.complete.return_value = response
+    return client
+
+
+def test_record_then_replay(tmp_path):
+    path = str(tmp_path / "cassette.jsonl")
+    inner = _fake_mistral('[{"term": "Cause", "definition": "fraud", "section": "1"}]')
+
+    recorder = CassetteClient(inner, mode="record", cassette=Cassette(path))
+    messages = [{"role": "user", "content": "Extract definitions"}]
+    recorder.chat.complete(model="mistral-small-latest", messages=messages, temperature=0.1)
+    assert inner.chat.complete.call_count == 1
+
+    # Fresh cassette instance reads the file back; no inner client needed
+    replayer = CassetteClient(None, mode="replay", cassette=Cassette(path))
+    response = replayer.chat.complete(model="mistral-small-latest", messages=messages, temperature=0.1)
+    assert "Cause" in response.choices[0].message.content
+
+    with pytest.raises(CassetteMissError):
+        replayer.chat.complete(model="mistral-small-latest", messages=messages, temperature=0.9)
+
+
+def test_mistral_service_replays_without_api_key(tmp_path, monkeypatch):
+    path = str(tmp_path / "cassette.jsonl")
+    monkeypatch.delenv("MISTRAL_API_KEY", raising=False)
+    monkeypatch.setenv("MISTRAL_CASSETTE_MODE", "replay")
+    monkeypatch.setenv("MISTRAL_CASSETTE_PATH", path)
+
+    service = MistralService()
+    assert isinstance(service.client, CassetteClient)
+
+    # Record the exact prompt the service will send, then replay it through the service
+    prompt_spy = _fake_mistral('[{"term": "Founder", "definition": "John Doe", "section": "1.1"}]')
+    service.client.inner = prompt_spy
+    service.client.mode = "record"
+    asyncio.run(service.extract_definitions("The parties agree as follows."))
+
+    service.client.mode = "replay"
+    service.client.inner = None
+    definitions = asyncio.run(service.extract_definitions("The parties agree as follows."))
+    assert definitions[0]["term"] == "Founder"
@@ -0,0 +1,98 @@
+import sys
+import os
+
+# Add backend to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.logic_graph import LogicGraphBuilder, LogicGraphCache
+
+TREE = {
+    "id": "root",
+    "an_type": "document",
+    "text_content": "ROOT",
+    "children": [
+        {"id": "s-1-1", "an_type": "section", "an_num": "1.1", "children": [],
+         "text_content": '1.1 "Good Reason" means a material reduction in salary.'},
+        {"id": "s-4-1", "an_type": "section", "an_num": "4.1", "children": [],
+         "text_content": "4.1 FORFEITURE. If a Founder resigns, all Unvested Shares are forfeited."},
+        {"id": "s-4-2", "an_type": "section", "an_num": "4.2", "children": [],
+         "text_content": "4.2 PROTECTION. Notwithstanding Section 4.1, a Founder who resigns for Good Reason keeps all Shares."},
+        {"id": "s-9", "an_type": "section", "an_num": "9", "children": [],
+         "text_content": "9 NOTICES. Notices must be in writing."},
+    ]
+}
+
+CONFLICT = {"has_conflict": True, "affected_sections": ["4.1", "Section 4.2"], "details": "4.2 overrides 4.1"}
+
+
+def test_graph_is_built_from_indexes_and_stable():
+    graph = LogicGraphBuilder.build(TREE, "", CONFLICT)
+
+    ids = [n["id"] for n in graph["nodes"]]
+    assert ids[:2] == ["clause_4_1", "clause_4_2"]
+    assert "clause_1_1" in ids          # Good Reason definition used by 4.2
+    assert "clause_9" not in ids        # unrelated section stays out
+    assert next(n for n in graph["nodes"] if n["id"] == "clause_1_1")["type"] == "definition"
+    assert next(n for n in graph["nodes"] if n["id"] == "clause_4_2")["type"] == "protection"
+
+    edges = {(e["from"], e["to"]): e for e in graph["edges"]}
+    assert edges[("clause_4_2", "clause_4_1")]["is_conflict_edge"]
+    assert ("clause_1_1", "clause_4_2") in edges
+
+    assert LogicGraphBuilder.build(TREE, "", CONFLICT) == graph
+
+
+def test_annotations_relabel_conflict_edges_only_with_known_types():
+    graph = LogicGraphBuilder.build(TREE, "", CONFLICT)
+    subgraph = LogicGraphBuilder.conflict_subgraph(graph)
+    assert {n["id"] for n in subgraph["nodes"]} >= {"clause_4_1", "clause_4_2"}
+
+    LogicGraphBuilder.apply_annotations(graph, [
+        {"from": "clause_4_2", "to": "clause_4_1", "type": "excludes", "label": "overrides"},
+        {"from": "clause_1_1", "to": "clause_4_2", "type": "invented", "label": "?"},
+    ])
+    edges = {(e["from"], e["to"]): e for e in graph["edges"]}
+    assert edges[("clause_4_2", "clause_4_1")]["type"] == "excludes"
+    assert edges[("clause_1_1", "clause_4_2")]["type"] == "depends_on"
+
+
+def test_cache_is_keyed_by_document_version_and_conflict():
+    cache = LogicGraphCache(max_size=1)
+    v1 = LogicGraphCache.document_version("doc", "text v1")
+    key = LogicGraphCache.key(v1, CONFLICT, False)
+    cache.put(key, {"nodes": [], "edges": []})
+
+    assert cache.get(LogicGraphCache.key(v1, dict(reversed(list(CONFLICT.items()))), False)) is not None
+    assert cache.get(LogicGraphCache.key(LogicGraphCache.document_version("doc", "text v2"), CONFLICT, False)) is None
+    cache.put(LogicGraphCache.key(v1, CONFLICT, True), {"nodes": [], "edges": []})
+    assert cache.get(key) is None
+
+
+def test_neighborhood_returns_only_new_nodes_with_pagination():
+    clause_graph = LogicGraphBuilder.clause_graph(TREE, "")
+
+    first = LogicGraphBuilder.neighborhood(clause_graph, "clause_4_2", hops=1, known=["clause_4_2"], limit=1)
+    assert first["total"] == 2
+    assert first["next_offset"] == 1
+    assert len(first["nodes"]) == 1
+
+    second = LogicGraphBuilder.neighborhood(clause_graph, "clause_4_2", hops=1, known=["clause_4_2"], offset=1, limit=1)
+    assert second["next_offset"] is None
+    assert {n["id"] for n in first["nodes"] + second["nodes"]} == {"clause_1_1", "clause_4_1"}
+    assert all("clause_4_2" in (e["from"], e["to"]) for e in first["edges"] + second["edges"])
+
+    # Already-known neighbours are not sent again
+    again = LogicGraphBuilder.neighborhood(clause_graph, "clause_4_2", known=["clause_4_2", "clause_4_1", "clause_1_1"])
+    assert again["nodes"] == [] and again["total"] == 0
+
+
+def test_article_and_clause_references_seed_the_graph():
+    tree = {"id": "root", "an_type": "document", "text_content": "ROOT", "children": [
+        {"id": "a-3", "an_type": "article", "an_num": "ARTICLE III", "text_content": "ARTICLE III TERMINATION", "children": [
+            {"id": "s-5-1", "an_type": "section", "an_num": "5.1", "children": [],
+             "text_content": "5.1 Either party may terminate on 30 days notice."},
+        ]},
+    ]}
+    conflict = {"has_conflict": True, "affected_sections": ["Article III", "Clause 5.1"]}
+    graph = LogicGraphBuilder.build(tree, "", conflict)
+    assert sum(n["is_conflict_node"] for n in graph["nodes"]) == 2
@@ -0,0 +1,105 @@
+import sys
+import os
+
+# Add backend to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.pdf_extractor import PdfExtractor
+
+
+def _pdf(pages, forms=False):
+    """
+    Minimal PDF, one text line per entry (Helvetica, 14pt leading).
+    forms: each page only draws a Form XObject holding its text
+    """
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", None, "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for lines in pages:
+        escaped = [line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)") for line in lines]
+        stream = "BT /F1 11 Tf 14 TL 72 760 Td " + " ".join(f"({line}) Tj T*" for line in escaped) + " ET"
+        resources = "<< /Font << /F1 3 0 R >> >>"
+        if forms:
+            objects.append(f"<< /Type /XObject /Subtype /Form /BBox [0 0 612 792] /Resources {resources} "
+                           f"/Length {len(stream)} >>\nstream\n{stream}\nendstream")
+            resources = f"<< /XObject << /Fm0 {len(objects)} 0 R >> >>"
+            stream = "q /Fm0 Do Q"
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+                       f"/Resources {resources} /Contents {len(objects)} 0 R >>")
+        kids.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(kids)} >>"
+    out, offsets = "%PDF-1.4\n", []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n{body}\nendobj\n"
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n" + "".join(f"{o:010d} 00000 n \n" for o in offsets)
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n"
+    return out.encode("latin-1")
+
+
+PAGES = [[f"{i}.1 The Supplier shall deliver lot {i}.", f"{i}.2 The Buyer shall pay for lot {i}."] for i in range(1, 11)]
+
+
+def test_pages_are_extracted_in_parallel_and_in_order():
+    extractor = PdfExtractor(workers=2, pages_per_task=3, parallel_min_pages=1)
+    try:
+        pages = list(extractor.pages(_pdf(PAGES)))
+        assert [number for number, _ in pages] == list(range(1, 11))
+        assert all(f"lot {number}." in text for number, text in pages)
+
+        # A re-uploaded draft with one page changed only extracts that page
+        draft = [list(lines) for lines in PAGES]
+        draft[6][1] = "7.2 The Buyer shall pay within thirty days."
+        pages = list(extractor.pages(_pdf(draft)))
+        assert extractor.cache_hits == 9
+        assert "thirty days" in pages[6][1]
+    finally:
+        extractor.close()
+
+
+def test_pages_drawing_different_forms_are_not_confused():
+    extractor = PdfExtractor(workers=1)
+    first = list(extractor.pages(_pdf([["Lot A is sold."]], forms=True)))
+    second = list(extractor.pages(_pdf([["Lot B is sold."]], forms=True)))
+    assert "Lot A" in first[0][1] and "Lot B" in second[0][1]
+    assert extractor.cache_hits == 0
+    assert list(extractor.pages(_pdf([["Lot B is sold."]], forms=True))) == second
+    assert extractor.cache_hits == 1
+
+
+def test_timed_out_pool_is_retired_without_failing_other_requests():
+    extractor = PdfExtractor(workers=2, pages_per_task=2, parallel_min_pages=1)
+    try:
+        running = extractor.pages(_pdf(PAGES))
+        assert next(running)[0] == 1
+        pool = extractor._pool
+
+        # Another request times out on the same pool
+        timed_out = extractor._acquire_pool()
+        extractor._retire_pool(timed_out)
+        extractor._release_pool(timed_out)
+        assert pool._state == "RUN"
+
+        # The running request finishes on the old pool, which is then terminated
+        assert [number for number, _ in running] == list(range(2, 11))
+        assert pool._state == "TERMINATE"
+        draft = [list(lines) + ["Amended."] for lines in PAGES]
+        assert len(list(extractor.pages(_pdf(draft)))) == 10
+        assert extractor._pool is not pool
+    finally:
+        extractor.close()
+
+
+def test_limits_are_enforced():
+    try:
+        list(PdfExtractor(workers=1, max_pages=5).pages(_pdf(PAGES)))
+        raise AssertionError("page limit not enforced")
+    except ValueError as e:
+        assert "10 pages" in str(e)
+
+    try:
+        list(PdfExtractor(workers=1, max_text_chars=200).pages(_pdf(PAGES)))
+        raise AssertionError("text limit not enforced")
+    except ValueError as e:
+        assert "200 characters" in str(e)
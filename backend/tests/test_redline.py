@@ -0,0 +1,140 @@
+import sys
+import os
+import io
+import time
+
+from docx import Document
+from docx.oxml.ns import qn
+
+# Add backend to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.composer_service import ComposerService
+from services.docx_editor import SafeDocxEditor
+from services.redline import diff_tokens, tokenize
+
+
+def _docx(paragraphs):
+    doc = Document()
+    for i, text in enumerate(paragraphs):
+        doc.add_paragraph(text)._element.set(qn('w:paraId'), f"P{i}")
+    buffer = io.BytesIO()
+    doc.save(buffer)
+    return buffer.getvalue()
+
+
+def _redline(content):
+    """Paragraphs as (accepted text, rejected text, [(kind, text)...])"""
+    result = []
+    for p in Document(io.BytesIO(content)).element.body.iterchildren(qn('w:p')):
+        accepted, rejected, changes = [], [], []
+        for child in p:
+            if child.tag == qn('w:r'):
+                accepted.append(child.text)
+                rejected.append(child.text)
+            elif child.tag == qn('w:ins'):
+                text = "".join(r.text for r in child.iterchildren(qn('w:r')))
+                accepted.append(text)
+                changes.append(("ins", text))
+            elif child.tag == qn('w:del'):
+                text = "".join(t.text for t in child.iter(qn('w:delText')))
+                rejected.append(text)
+                changes.append(("del", text))
+        result.append(("".join(accepted), "".join(rejected), changes))
+    return result
+
+
+def test_word_diff_folds_whitespace_between_changes():
+    a = tokenize("Payment is due net sixty days after invoice.")
+    b = tokenize("Payment is due thirty business days after invoice.")
+    changes = [(tag, "".join(a[i1:i2]), "".join(b[j1:j2])) for tag, i1, i2, j1, j2 in diff_tokens(a, b) if tag != "equal"]
+    assert changes == [("delete", "net sixty", ""), ("insert", "", "thirty business")]
+
+
+def test_fix_is_exported_as_tracked_changes_keeping_run_format():
+    doc = Document()
+    p = doc.add_paragraph()
+    p.add_run("The Company ").bold = True
+    p.add_run("may terminate on thirty days notice.")
+    buffer = io.BytesIO()
+    doc.save(buffer)
+
+    editor = SafeDocxEditor(buffer.getvalue(), track_changes=True)
+    assert editor.replace_clause("may terminate on thirty days notice", "The Company may terminate on ninety days written notice.")["success"]
+    # A second fix to the same clause is still redlined against the original
+    assert editor.replace_clause("ninety days written notice", "The Company shall not terminate on ninety days written notice.")["success"]
+
+    [(accepted, rejected, changes)] = _redline(editor.save_to_bytes())
+    assert accepted == "The Company shall not terminate on ninety days written notice."
+    assert rejected == "The Company may terminate on thirty days notice."
+    assert changes == [("del", "may"), ("ins", "shall not"), ("del", "thirty"), ("ins", "ninety"), ("ins", " written")]
+
+    body = Document(io.BytesIO(editor.save_to_bytes())).element.body
+    runs = list(body.iter(qn('w:r')))
+    assert runs[0].text == "The Company " and runs[0].find(qn('w:rPr')) is not None
+    ids = [el.get(qn('w:id')) for el in body.iter(qn('w:ins'), qn('w:del'))]
+    assert len(ids) == len(set(ids))
+
+
+def test_composer_tracks_edits_inserts_and_deletes():
+    composer = ComposerService(_docx(["Shares vest monthly.", "Unvested Shares are forfeited."]), track_changes=True)
+    content = composer.apply_operations([
+        {"type": "update_text", "id": "P0", "text": "Shares vest yearly."},
+        {"type": "insert", "id": "P0", "text": "Vesting accelerates on a sale."},
+        {"type": "delete", "id": "P1"},
+    ])
+    paragraphs = _redline(content)
+    assert [(accepted, rejected) for accepted, rejected, _ in paragraphs] == [
+        ("Shares vest yearly.", "Shares vest monthly."),
+        ("Vesting accelerates on a sale.", ""),
+        ("", "Unvested Shares are forfeited."),
+    ]
+    marks = [p.find(qn('w:pPr')).find(qn('w:rPr'))[0].tag for p in list(Document(io.BytesIO(content)).element.body.iterchildren(qn('w:p')))[1:]]
+    assert marks == [qn('w:ins'), qn('w:del')]
+
+
+def test_fields_and_footnote_references_keep_their_place():
+    doc = Document()
+    p = doc.add_paragraph("See clause ")
+    p._p.set(qn('w:paraId'), "P0")
+
+    def run(*children):
+        r = p.add_run()._r
+        for tag, attrs, text in children:
+            el = r.makeelement(qn(tag), {qn(f"w:{k}"): v for k, v in attrs.items()})
+            el.text = text
+            r.append(el)
+
+    run(("w:fldChar", {"fldCharType": "begin"}, None))
+    run(("w:instrText", {}, " REF _Ref4 \\h "))
+    run(("w:fldChar", {"fldCharType": "separate"}, None))
+    p.add_run("4.2")
+    run(("w:fldChar", {"fldCharType": "end"}, None))
+    run(("w:t", {}, " for the cap."), ("w:footnoteReference", {"id": "1"}, None))
+    buffer = io.BytesIO()
+    doc.save(buffer)
+
+    composer = ComposerService(buffer.getvalue(), track_changes=True)
+    content = composer.apply_operations([{"type": "update_text", "id": "P0", "text": "See clause 7 for the liability cap."}])
+    [(accepted, rejected, changes)] = _redline(content)
+    assert (accepted, rejected) == ("See clause 7 for the liability cap.", "See clause 4.2 for the cap.")
+    assert changes == [("del", "4.2"), ("ins", "7"), ("ins", " liability")]
+
+    p = Document(io.BytesIO(content)).element.body.find(qn('w:p'))
+    order = [el.tag.split('}')[1] for el in p.iter(qn('w:fldChar'), qn('w:instrText'), qn('w:footnoteReference'), qn('w:del'), qn('w:ins'))]
+    assert order == ["fldChar", "instrText", "fldChar", "del", "ins", "fldChar", "ins", "footnoteReference"]
+    assert all(len(r) for r in p.iter(qn('w:r')))
+
+
+def test_hundreds_of_redlined_fixes():
+    content = _docx([f"Clause {i}: the Seller shall deliver the goods within {i} days of the order." for i in range(500)])
+    composer = ComposerService(content, track_changes=True)
+    start = time.perf_counter()
+    composer.apply_operations([
+        {"type": "update_text", "id": f"P{i}", "text": f"Clause {i}: the Seller shall promptly deliver the goods within {i + 1} business days."}
+        for i in range(500)
+    ], save=False)
+    assert time.perf_counter() - start < 5
+    accepted, rejected, _ = _redline(composer.save())[499]
+    assert accepted == "Clause 499: the Seller shall promptly deliver the goods within 500 business days."
+    assert rejected == "Clause 499: the Seller shall deliver the goods within 499 days of the order."
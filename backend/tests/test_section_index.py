@@ -0,0 +1,79 @@
+import sys
+import os
+import asyncio
+
+# Add backend to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.section_index import SectionIndex
+from services.structure_service import DocumentStructureService
+
+TREE = {
+    "id": "root",
+    "an_type": "document",
+    "text_content": "ROOT",
+    "children": [
+        {"id": "art-1", "an_type": "article", "an_num": "ARTICLE I", "text_content": "ARTICLE I DEFINITIONS", "children": [
+            {"id": "s-1-1", "an_type": "section", "an_num": "1.1", "children": [],
+             "text_content": '1.1 "Good Reason" has the meaning given in Section 4.2(a).'},
+        ]},
+        {"id": "s-4-2", "an_type": "section", "an_num": "4.2", "text_content": "4.2 Termination.", "children": [
+            {"id": "p-a", "an_type": "point", "an_num": "(a)", "children": [],
+             "text_content": "(a) a material reduction in salary, subject to clause 1.1 and Schedule 3."},
+        ]},
+    ]
+}
+
+
+def test_build_indexes_sections_and_resolves_references():
+    index = SectionIndex.build(TREE, "")
+
+    assert index["sections"]["4.2"]["node_id"] == "s-4-2"
+    assert index["sections"]["4.2(a)"]["node_id"] == "p-a"
+    assert index["sections"]["article i"]["node_id"] == "art-1"
+    # Section text includes its points
+    assert "material reduction" in index["sections"]["4.2"]["text"]
+
+    edges = {(r["from"], r["to"]) for r in index["references"]}
+    assert ("s-1-1", "p-a") in edges
+    assert ("p-a", "s-1-1") in edges
+    assert index["unresolved"] == [{"from": "p-a", "ref": "schedule 3", "phrase": "Schedule 3"}]
+    assert [r["from"] for r in SectionIndex.referencing(index, "p-a")] == ["s-1-1"]
+
+
+def test_reference_at_the_start_of_a_paragraph_is_kept():
+    tree = {"id": "root", "children": [
+        {"id": "s-4-2", "an_type": "section", "an_num": "4.2", "text_content": "4.2 Termination.", "children": []},
+        {"id": "s-9", "an_type": "section", "an_num": "Section 9", "text_content": "Section 9 Survival.", "children": [
+            {"id": "p-9", "an_type": "paragraph", "children": [],
+             "text_content": "Section 4.2 shall survive termination of this Agreement."},
+        ]},
+    ]}
+    index = SectionIndex.build(tree, "")
+    assert [(r["from"], r["to"], r["phrase"]) for r in index["references"]] == [("p-9", "s-4-2", "Section 4.2")]
+    assert index["unresolved"] == []
+
+    text = "4.2 Termination.\n\nSection 4.2 shall survive termination."
+    references = SectionIndex.build(None, text)["references"]
+    assert [(r["ref"], text[r["start"]:r["end"]]) for r in references] == [("4.2", "Section 4.2")]
+
+
+def test_plain_text_offsets_and_lookup():
+    text = "ARTICLE I\n\n1.1 Scope. As used in Section 2.1.\n\n2.1 Vesting. See clause 1.1(b)."
+    index = SectionIndex.build(None, text)
+
+    ref = next(r for r in index["references"] if r["ref"] == "2.1")
+    assert text[ref["start"]:ref["end"]] == "Section 2.1"
+    # 1.1(b) is not a numbered node; it resolves to the enclosing 1.1
+    assert any(r["ref"] == "1.1(b)" for r in index["references"])
+    assert SectionIndex.lookup(index, "Conflict in § 2.1 vesting")["text"].startswith("2.1 Vesting")
+
+
+def test_find_clause_by_conflict_uses_index_without_llm():
+    service = DocumentStructureService()
+    service.mistral.client = None
+    found = asyncio.run(service.find_clause_by_conflict(
+        "", "Section 4.2 conflicts with the definition", section_index=SectionIndex.build(TREE, "")
+    ))
+    assert found["id"] == "s-4-2"
+    assert found["number"] == "4.2"
@@ -0,0 +1,82 @@
+import sys
+import os
+import asyncio
+
+import pytest
+
+# Add backend to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.single_flight import SingleFlight
+
+
+def test_concurrent_runs_share_one_computation():
+    flight = SingleFlight()
+    calls = []
+
+    async def work():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return {"analysis_id": "a1"}
+
+    async def main():
+        results = await asyncio.gather(*[flight.run("doc", work) for _ in range(5)])
+        assert not flight.in_flight("doc")
+        # Released after completion: the next request runs again
+        await flight.run("doc", work)
+        return results
+
+    results = asyncio.run(main())
+    assert len(calls) == 2
+    assert all(r is results[0] for r in results)
+
+
+def test_errors_reach_every_waiter():
+    flight = SingleFlight()
+
+    async def failing():
+        await asyncio.sleep(0)
+        raise ValueError("LLM down")
+
+    async def main():
+        return await asyncio.gather(*[flight.run("doc", failing) for _ in range(3)], return_exceptions=True)
+
+    assert all(isinstance(r, ValueError) for r in asyncio.run(main()))
+
+
+def test_late_stream_joiner_replays_missed_events():
+    flight = SingleFlight()
+    produced = []
+
+    async def producer():
+        for i in range(3):
+            produced.append(i)
+            yield {"type": "progress", "percent": i}
+            await asyncio.sleep(0.01)
+        yield {"type": "result", "data": {}}
+
+    async def consume(delay):
+        await asyncio.sleep(delay)
+        return [e async for e in flight.stream("doc", producer)]
+
+    async def main():
+        return await asyncio.gather(consume(0), consume(0.015))
+
+    first, late = asyncio.run(main())
+    assert produced == [0, 1, 2]
+    assert first == late
+    assert late[-1]["type"] == "result"
+
+
+def test_stream_error_is_raised_to_subscribers():
+    flight = SingleFlight()
+
+    async def producer():
+        yield {"type": "progress"}
+        raise RuntimeError("interrupted")
+
+    async def main():
+        return [e async for e in flight.stream("doc", producer)]
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(main())
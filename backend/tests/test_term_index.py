@@ -0,0 +1,78 @@
+import sys
+import os
+
+# Add backend to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.term_index import TermIndex
+from services.verification_service import VerificationService
+
+TREE = {
+    "id": "root",
+    "an_type": "document",
+    "text_content": "ROOT",
+    "children": [
+        {"id": "def-1", "an_type": "section", "an_num": "1.1", "children": [],
+         "text_content": '1.1 "Good Reason" means a material reduction in salary.'},
+        {"id": "def-2", "an_type": "section", "an_num": "1.2", "children": [],
+         "text_content": '1.2 "Party" means each of the Company and the Founder.'},
+        {"id": "body", "an_type": "section", "an_num": "4.2", "children": [],
+         "text_content": "4.2 Both Parties agree that good reasons exist; a Party's consent is required."},
+    ]
+}
+
+
+def test_build_records_definitions_and_usage_offsets():
+    index = TermIndex.build(TREE, "")
+
+    assert index["terms"]["good reason"]["node_id"] == "def-1"
+    assert index["terms"]["party"]["section"] == "1.2"
+
+    body = TREE["children"][2]["text_content"]
+    party_hits = [(start, end) for node, start, end in index["usages"]["party"] if node == "body"]
+    assert [body[s:e] for s, e in party_hits] == ["Parties", "Party's"]
+    assert any(node == "body" for node, _, _ in index["usages"]["good reason"])
+
+
+def test_lookup_is_case_and_plural_insensitive():
+    index = TermIndex.build(TREE, "")
+    assert TermIndex.lookup(index, "GOOD REASONS")["section"] == "1.1"
+    assert TermIndex.lookup(index, "parties")["term"] == "Party"
+    assert TermIndex.lookup(index, "Bad Leaver") is None
+
+
+def test_plurals_of_terms_ending_in_se_and_sibilants():
+    tree = {"id": "root", "children": [
+        {"id": "def", "an_type": "section", "an_num": "1.3", "children": [],
+         "text_content": '1.3 "Expense" means any cost incurred by the Founder.'},
+        {"id": "body", "an_type": "section", "an_num": "5.1", "children": [],
+         "text_content": "5.1 The Company reimburses Expenses within 30 days."},
+    ]}
+    index = TermIndex.build(tree, "")
+    assert TermIndex.lookup(index, "Expenses")["section"] == "1.3"
+    assert any(node == "body" for node, _, _ in index["usages"]["expense"])
+    for plural, singular in [("Licenses", "License"), ("Addresses", "Address"), ("Taxes", "Tax"), ("Branches", "Branch")]:
+        assert TermIndex.normalize(plural) == TermIndex.normalize(singular)
+
+
+def test_singular_nouns_ending_in_s_are_kept():
+    for term in ["Analysis", "Status", "Bonus", "Business"]:
+        assert TermIndex.normalize(term) == term.lower()
+    tree = {"id": "root", "children": [
+        {"id": "def", "an_type": "section", "an_num": "1.4", "children": [],
+         "text_content": '1.4 "Bonus" means the annual cash bonus.'},
+        {"id": "body", "an_type": "section", "an_num": "6.2", "children": [],
+         "text_content": "6.2 The Bonus is paid in March; Bonuses are not pro-rated."},
+    ]}
+    index = TermIndex.build(tree, "")
+    assert TermIndex.lookup(index, "Bonus")["section"] == "1.4"
+    assert TermIndex.lookup(index, "bonu") is None
+
+
+def test_verification_entity_lookup_uses_index():
+    service = VerificationService()
+    index = TermIndex.build(TREE, "")
+    definitions = TermIndex.definitions_map([{"term": "Bad Leaver", "section": "1.3"}])
+
+    assert service._find_entity_in_document("leaver", "", definitions, index) == "Definition: 1.3"
+    assert service._find_entity_in_document("Good Reason", "", definitions, index) == "Definition: 1.1"
@@ -0,0 +1,95 @@
+import sys
+import os
+
+# Add backend to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.document_service import DocumentService
+
+
+def _pdf(pages):
+    """Minimal PDF, one text line per entry (Helvetica, 14pt leading)"""
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", None, "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for lines in pages:
+        escaped = [line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)") for line in lines]
+        stream = "BT /F1 11 Tf 14 TL 72 760 Td " + " ".join(f"({line}) Tj T*" for line in escaped) + " ET"
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+                       f"/Resources << /Font << /F1 3 0 R >> >> /Contents {len(objects)} 0 R >>")
+        kids.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(kids)} >>"
+    out, offsets = "%PDF-1.4\n", []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n{body}\nendobj\n"
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n" + "".join(f"{o:010d} 00000 n \n" for o in offsets)
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n"
+    return out.encode("latin-1")
+
+
+def _outline(tree):
+    return [(node["an_type"], node["an_num"], [(c["an_type"], c["an_num"]) for c in node["children"]])
+            for node in tree["children"]]
+
+
+AGREEMENT = """MASTER SERVICES AGREEMENT
+
+This Agreement is made between Acme Inc. (the "Supplier") and Beta LLC
+(the "Customer").
+
+ARTICLE I
+DEFINITIONS
+1.1 "Services" means the services described in Schedule A, including any termi-
+nation assistance.
+1.2 "Fees" means the amounts set out in Schedule B.
+Page 1 of 3
+ARTICLE II SERVICES
+2.1 The Supplier shall perform the Services with due care.
+(a) Access shall be during business hours;
+(b) subject to the Customer's security policies.
+"""
+
+
+def test_text_lines_become_clause_tree():
+    text, tree = DocumentService.extract_text("msa.txt", AGREEMENT.encode("utf-8"))
+    assert _outline(tree) == [
+        ("article", None, [("paragraph", None)]),
+        ("article", "ARTICLE I", [("section", "1.1"), ("section", "1.2")]),
+        ("article", "ARTICLE II", [("section", "2.1")]),
+    ]
+    assert [c["an_num"] for c in tree["children"][2]["children"][0]["children"]] == ["(a)", "(b)"]
+
+    paragraphs = text.split("\n\n")
+    # Wrapped lines and hyphenation are joined, page numbers dropped
+    assert paragraphs[1] == 'This Agreement is made between Acme Inc. (the "Supplier") and Beta LLC (the "Customer").'
+    assert paragraphs[2] == "ARTICLE I DEFINITIONS"
+    assert "termination assistance" in paragraphs[3]
+    assert "Page 1" not in text
+    assert tree["children"][1]["children"][0]["clause_type"] == "definition"
+    assert text == DocumentService.tree_text(tree)
+
+
+def test_pdf_pages_stream_into_the_same_tree():
+    content = _pdf([
+        ["ARTICLE I", "DEFINITIONS", '1.1 "Fees" means the amounts in Schedule B.', "1"],
+        ["2.1 The Supplier shall", "perform the Services."],
+    ])
+    text, tree = DocumentService.extract_text("msa.pdf", content)
+    assert text == 'ARTICLE I DEFINITIONS\n\n1.1 "Fees" means the amounts in Schedule B.\n\n2.1 The Supplier shall perform the Services.'
+    sections = tree["children"][0]["children"]
+    assert [(s["an_num"], s["metadata"]["page"]) for s in sections] == [("1.1", 1), ("2.1", 2)]
+
+
+def test_wrapped_line_starting_with_a_number_continues_the_clause():
+    text, tree = DocumentService.parse_text_structure(
+        "1.1 The Buyer shall pay the Purchase Price within a period of\n"
+        "30 days after the Closing Date.\n"
+        "2 Payments are made in euro."
+    )
+    assert text.split("\n\n") == [
+        "1.1 The Buyer shall pay the Purchase Price within a period of 30 days after the Closing Date.",
+        "2 Payments are made in euro."
+    ]
+    assert [node["an_num"] for node in tree["children"]] == ["1.1", "2"]
@@ -0,0 +1,68 @@
+import sys
+import os
+import io
+import asyncio
+import tempfile
+
+from docx import Document
+from fastapi import FastAPI, File, UploadFile
+from fastapi.testclient import TestClient
+
+# Add backend to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.document_service import DocumentService
+from services.upload_spool import UploadSpool, UploadLimitMiddleware
+from test_pdf_extractor import _pdf, PAGES
+
+
+def _upload(content, filename="contract.pdf"):
+    spooled = tempfile.SpooledTemporaryFile(max_size=1024)
+    spooled.write(content)
+    spooled.seek(0)
+    return UploadFile(file=spooled, filename=filename)
+
+
+def test_spool_hashes_and_parsers_read_the_handle():
+    content = _pdf(PAGES)
+    upload = asyncio.run(UploadSpool.receive(_upload(content)))
+    assert upload.size == len(content)
+    assert upload.sha256 == DocumentService.fingerprint(content)
+    assert DocumentService.extract_text("contract.pdf", upload.file)[0] == DocumentService.extract_text("contract.pdf", content)[0]
+    assert upload.read() == content
+
+    doc = Document()
+    doc.add_paragraph("1.1 The Supplier shall deliver the Goods.")
+    buffer = io.BytesIO()
+    doc.save(buffer)
+    upload = asyncio.run(UploadSpool.receive(_upload(buffer.getvalue(), "contract.docx")))
+    assert DocumentService.extract_text("contract.docx", upload.file)[0] == "1.1 The Supplier shall deliver the Goods."
+
+    try:
+        asyncio.run(UploadSpool.receive(_upload(content), max_bytes=len(content) - 1))
+        raise AssertionError("oversized upload accepted")
+    except Exception as e:
+        assert getattr(e, "status_code", None) == 413
+
+
+def test_oversized_bodies_are_rejected_before_parsing():
+    app = FastAPI()
+    app.add_middleware(UploadLimitMiddleware, max_body_bytes=4096)
+
+    @app.post("/upload")
+    async def upload(file: UploadFile = File(...)):
+        return {"size": (await UploadSpool.receive(file)).size}
+
+    client = TestClient(app)
+    assert client.post("/upload", files={"file": ("a.txt", b"x" * 1000)}).json() == {"size": 1000}
+    assert client.post("/upload", files={"file": ("a.txt", b"x" * 10000)}).status_code == 413
+
+    # No Content-Length (chunked transfer): cut off once the limit is passed
+    def chunks():
+        yield b"--b\r\nContent-Disposition: form-data; name=\"file\"; filename=\"a.txt\"\r\n\r\n"
+        for _ in range(10):
+            yield b"x" * 1000
+        yield b"\r\n--b--\r\n"
+
+    response = client.post("/upload", content=chunks(), headers={"content-type": "multipart/form-data; boundary=b"})
+    assert response.status_code == 413
@@ -0,0 +1,104 @@
+import sys
+import os
+import io
+
+from docx import Document as DocxDocument
+from docx.oxml.ns import qn
+from sqlalchemy import create_engine
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm.exc import StaleDataError
+
+# Add backend to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models import Base, Document, DocumentOperation, DocumentSnapshot
+from services.composer_service import ComposerService
+from services.document_service import DocumentService
+from services import version_store
+from services.version_store import VersionStore
+
+
+def _docx(paragraphs):
+    doc = DocxDocument()
+    for i, text in enumerate(paragraphs):
+        doc.add_paragraph(text)._element.set(qn('w:paraId'), f"P{i}")
+    buffer = io.BytesIO()
+    doc.save(buffer)
+    return buffer.getvalue()
+
+
+@compiles(UUID, "sqlite")
+def _uuid_on_sqlite(type_, compiler, **kw):
+    return "CHAR(32)"
+
+
+def _sessions():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine, tables=[t.__table__ for t in (Document, DocumentOperation, DocumentSnapshot)])
+    return sessionmaker(bind=engine)
+
+
+def _edit(doc, operations, db):
+    composer = ComposerService(doc.file_content)
+    new_content = composer.apply_operations(operations)
+    VersionStore.record(doc, operations, new_content, db)
+    doc.file_content = new_content
+    db.commit()
+
+
+def _text(content):
+    return DocumentService.parse_docx_structure(content)[0]
+
+
+def test_any_version_replays_from_nearest_snapshot(monkeypatch):
+    monkeypatch.setattr(version_store, "SNAPSHOT_INTERVAL", 2)
+    db = _sessions()()
+    doc = Document(filename="a.docx", original_text="", file_type="docx", file_content=_docx(["Shares vest monthly."]))
+    db.add(doc)
+    db.commit()
+
+    _edit(doc, [{"type": "split", "id": "P0", "parts": ["Shares vest monthly.", "Cliff of one year."]}], db)
+    new_id = db.query(DocumentOperation).filter_by(version=1).one().operations[0]["new_ids"][0]
+    _edit(doc, [{"type": "update_text", "id": new_id, "text": "Cliff of two years."}], db)
+    _edit(doc, [{"type": "update_text", "id": "P0", "text": "Shares vest yearly."}], db)
+
+    assert doc.version == 3
+    assert sorted(v for (v,) in db.query(DocumentSnapshot.version).all()) == [0, 2]
+    assert _text(VersionStore.materialize(doc, 0, db)) == "Shares vest monthly."
+    # Version 1 replays a split; the logged new paraId makes version 2's edit replay too
+    assert _text(VersionStore.materialize(doc, 1, db)) == "Shares vest monthly.\n\nCliff of one year."
+    assert _text(VersionStore.materialize(doc, 3, db)) == "Shares vest yearly.\n\nCliff of two years."
+    assert VersionStore.materialize(doc, 4, db) is None
+
+    history = VersionStore.history(doc, db)
+    assert [v["version"] for v in history] == [3, 2, 1, 0]
+    assert [v["snapshot"] for v in history] == [False, True, False, True]
+
+
+def test_concurrent_writers_are_detected_and_merged_by_paragraph():
+    Session = _sessions()
+    setup = Session()
+    doc = Document(filename="a.docx", original_text="", file_type="docx", file_content=_docx(["One.", "Two."]))
+    setup.add(doc)
+    setup.commit()
+
+    alice, bob = Session(), Session()
+    alice_doc, bob_doc = alice.get(Document, doc.id), bob.get(Document, doc.id)
+    _edit(alice_doc, [{"type": "update_text", "id": "P0", "text": "One!"}], alice)
+
+    bob_ops = [{"type": "update_text", "id": "P1", "text": "Two!"}]
+    try:
+        _edit(bob_doc, bob_ops, bob)
+        raise AssertionError("stale write was not rejected")
+    except StaleDataError:
+        bob.rollback()
+
+    # Bob's base was version 0: only P0 changed since, so his batch merges cleanly
+    assert bob_doc.version == 1
+    assert VersionStore.changed_since(bob_doc, 0, bob) == {"P0"}
+    assert not VersionStore.changed_since(bob_doc, 0, bob) & VersionStore.touched_para_ids(bob_ops)
+    _edit(bob_doc, bob_ops, bob)
+    assert bob_doc.version == 2
+    assert _text(bob_doc.file_content) == "One!\n\nTwo!"
@@ -0,0 +1,161 @@
+"""
+Scaling microbenchmarks for the document pipeline.
+
+Times the ingestion and editing hot paths across synthetic contracts of
+increasing size (see spine/generate_scaled_corpus.py) and reports a scaling
+curve per function plus the fitted exponent k in t ~ pages^k
+(k ~ 1 is linear, k ~ 2 quadratic).
+
+Usage:
+    python bench_pipeline.py
+    python bench_pipeline.py --sizes 1 10 100 500 1000 --repeat 3 --json bench_output.json
+"""
+import os
+import io
+import sys
+import json
+import math
+import time
+import argparse
+import statistics
+from typing import Callable, Dict, List
+
+# Add backend and spine to path so we can import services and the generator
+ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(ROOT, 'backend'))
+sys.path.append(os.path.join(ROOT, 'spine'))
+sys.path.append(ROOT)
+
+from docx import Document
+from docx.oxml.ns import qn
+
+from services.id_normalizer import IDNormalizer
+from services.document_service import DocumentService
+from services.composer_service import ComposerService
+from services.docx_editor import SafeDocxEditor
+from spine.src.document_service import DocumentParser
+from generate_scaled_corpus import CorpusSpec, build_docx_bytes, build_pdf_bytes, build_txt_bytes
+
+DEFAULT_SIZES = [1, 10, 50, 100, 250]
+
+
+def _time(fn: Callable, repeat: int) -> float:
+    """Median wall time in milliseconds"""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def _edit_ops(normalized: bytes, fraction: float = 0.1) -> List[Dict]:
+    """update_text on ~10% of paragraphs plus a handful of splits"""
+    doc = Document(io.BytesIO(normalized))
+    ids = [p._element.get(qn('w:paraId')) for p in doc.paragraphs if p.text.strip()]
+    ids = [i for i in ids if i]
+    step = max(1, int(1 / fraction))
+    ops = [{"type": "update_text", "id": pid, "text": "Amended clause text."} for pid in ids[::step]]
+    ops += [{"type": "split", "id": pid, "parts": ["Part A.", "Part B."]} for pid in ids[1::step * 10]]
+    return ops
+
+
+def bench_size(pages: int, repeat: int, base: CorpusSpec) -> Dict:
+    spec = CorpusSpec(
+        pages=pages, depth=base.depth, tables=base.tables, numbering=base.numbering,
+        definitions=base.definitions, xref_density=base.xref_density,
+        missing_ids=base.missing_ids, seed=base.seed
+    )
+    raw = build_docx_bytes(spec)
+    pdf = build_pdf_bytes(spec)
+    txt = build_txt_bytes(spec)
+
+    normalized = IDNormalizer.normalize_docx(raw)
+    loaded = Document(io.BytesIO(normalized))
+    paragraphs = len(loaded.paragraphs)
+    ops = _edit_ops(normalized)
+    last_text = next(p.text for p in reversed(loaded.paragraphs) if p.text.strip())
+    spine_parser = DocumentParser()
+
+    def compose():
+        ComposerService(normalized).apply_operations(ops)
+
+    def redline():
+        SafeDocxEditor(normalized).replace_clause(last_text, "Replacement clause text.")
+
+    timings = {
+        "IDNormalizer.normalize_docx": _time(lambda: IDNormalizer.normalize_docx(raw), repeat),
+        "DocumentService.parse_docx_structure": _time(lambda: DocumentService.parse_docx_structure(normalized), repeat),
+        "DocumentParser._parse_document": _time(lambda: spine_parser._parse_document(loaded), repeat),
+        "ComposerService.apply_operations": _time(compose, repeat),
+        "SafeDocxEditor.replace_clause": _time(redline, repeat),
+        "DocumentService.extract_text[pdf]": _time(lambda: DocumentService.extract_text("c.pdf", pdf), repeat),
+        "DocumentService.extract_text[txt]": _time(lambda: DocumentService.extract_text("c.txt", txt), repeat),
+    }
+    return {
+        "pages": pages,
+        "paragraphs": paragraphs,
+        "docx_bytes": len(raw),
+        "operations": len(ops),
+        "timings_ms": timings,
+    }
+
+
+def scaling_exponent(xs: List[float], ys: List[float]) -> float:
+    """Least-squares slope of log(y) against log(x)"""
+    points = [(math.log(x), math.log(y)) for x, y in zip(xs, ys) if x > 0 and y > 0]
+    if len(points) < 2:
+        return float("nan")
+    mx = statistics.mean(p[0] for p in points)
+    my = statistics.mean(p[1] for p in points)
+    num = sum((x - mx) * (y - my) for x, y in points)
+    den = sum((x - mx) ** 2 for x, _ in points)
+    return num / den if den else float("nan")
+
+
+def print_report(results: List[Dict]):
+    functions = list(results[0]["timings_ms"].keys())
+    header = f"{'function':<40}" + "".join(f"{r['pages']:>10}p" for r in results) + f"{'k':>8}"
+    print(header)
+    print("-" * len(header))
+    for fn in functions:
+        ys = [r["timings_ms"][fn] for r in results]
+        k = scaling_exponent([r["paragraphs"] for r in results], ys)
+        print(f"{fn:<40}" + "".join(f"{y:>9.1f}ms" for y in ys) + f"{k:>8.2f}")
+    print()
+    print("paragraphs: " + ", ".join(f"{r['pages']}p={r['paragraphs']}" for r in results))
+    print("k = fitted exponent of time vs paragraph count (1.0 = linear)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Document pipeline scaling benchmarks")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="page counts")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--depth", type=int, default=3)
+    parser.add_argument("--tables", type=int, default=1)
+    parser.add_argument("--numbering", default="decimal")
+    parser.add_argument("--definitions", type=int, default=25)
+    parser.add_argument("--xref-density", type=float, default=0.3)
+    parser.add_argument("--missing-ids", type=float, default=0.2)
+    parser.add_argument("--json", help="write raw results to this path")
+    args = parser.parse_args()
+
+    base = CorpusSpec(
+        depth=args.depth, tables=args.tables, numbering=args.numbering,
+        definitions=args.definitions, xref_density=args.xref_density, missing_ids=args.missing_ids
+    )
+
+    results = []
+    for pages in sorted(args.sizes):
+        print(f"Benchmarking {pages} pages...", file=sys.stderr)
+        results.append(bench_size(pages, args.repeat, base))
+
+    print_report(results)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -4,4 +4,5 @@
 CREATE EXTENSION IF NOT EXISTS "uuid-ossp";
 
 -- The tables (documents, analyses) will be created automatically
--- by SQLAlchemy when the application starts
+-- by SQLAlchemy when the application starts. Columns added to existing
+-- tables later are applied at startup from backend/migrations/*.sql
@@ -0,0 +1,383 @@
+"""
+Parameterized synthetic contract generator for parser/composer benchmarks.
+
+Unlike generate_corpus.py / generate_complex_corpus.py (small fixed documents),
+this produces DOCX, PDF and TXT contracts of any length (1 to 1000+ pages) with
+control over the structural features that stress the ingestion pipeline.
+
+Usage:
+    python spine/generate_scaled_corpus.py --pages 250 --formats docx pdf txt
+    python spine/generate_scaled_corpus.py --pages 10 --depth 4 --numbering auto --missing-ids 0.5
+"""
+import os
+import io
+import random
+import argparse
+from dataclasses import dataclass
+from typing import List, Dict, Optional
+
+from docx import Document
+from docx.oxml import OxmlElement
+from docx.oxml.ns import qn
+from docx.shared import Pt
+
+CORPUS_DIR = os.path.join(os.path.dirname(__file__), 'tests', 'corpus', 'scaled')
+
+PARA_ID_ATTR = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}paraId'
+
+# Roughly one printed page of contract text
+WORDS_PER_PAGE = 500
+LINES_PER_PDF_PAGE = 50
+
+NUMBERING_STYLES = ("decimal", "article", "auto")
+
+_TERM_WORDS = [
+    "Affiliate", "Business", "Change", "Closing", "Completion", "Consideration", "Control",
+    "Disclosure", "Effective", "Encumbrance", "Equity", "Founder", "Group", "Indebtedness",
+    "Intellectual", "Investor", "Leaver", "Loss", "Material", "Notice", "Ordinary", "Permitted",
+    "Purchase", "Relevant", "Reserved", "Securities", "Share", "Subsidiary", "Tax", "Transfer",
+    "Vesting", "Warranty"
+]
+_TERM_SUFFIXES = ["Date", "Period", "Event", "Price", "Shares", "Party", "Matter", "Amount", "Right", "Notice"]
+
+_SENTENCES = [
+    "The Company shall procure that each member of the Group complies with its obligations under this Agreement.",
+    "No party may assign any of its rights under this Agreement without the prior written consent of the other parties.",
+    "Any notice given under this Agreement shall be in writing and delivered by hand or by recorded delivery.",
+    "The Investors shall not be liable for any loss arising from a breach by the Founders of any warranty.",
+    "Each party shall bear its own costs in connection with the negotiation and execution of this Agreement.",
+    "If any provision of this Agreement is held to be invalid, the remaining provisions shall continue in full force.",
+    "The Founders undertake to devote the whole of their working time and attention to the business of the Company.",
+    "Subject to applicable law, the Board may resolve to waive any requirement of this clause by majority vote.",
+    "Nothing in this Agreement shall constitute a partnership or agency relationship between the parties.",
+    "The obligations in this clause shall survive termination of this Agreement for a period of two years.",
+    "Unless otherwise agreed in writing, payments shall be made in immediately available funds without set-off.",
+    "The Company may, at its discretion, require the transfer of any Unvested Shares at the lower of cost and market value.",
+]
+
+_ROMAN = [(1000, "M"), (900, "CM"), (500, "D"), (400, "CD"), (100, "C"), (90, "XC"),
+          (50, "L"), (40, "XL"), (10, "X"), (9, "IX"), (5, "V"), (4, "IV"), (1, "I")]
+
+
+def _roman(n: int) -> str:
+    out = ""
+    for value, numeral in _ROMAN:
+        while n >= value:
+            out += numeral
+            n -= value
+    return out
+
+
+@dataclass
+class CorpusSpec:
+    """Knobs for a synthetic contract"""
+    pages: int = 10
+    depth: int = 3  # 1 = articles only ... 4 = article > section > subsection > point
+    tables: int = 1  # tables per article
+    numbering: str = "decimal"  # "decimal" (1.1 typed), "article" (ARTICLE IV / Section 4.01), "auto" (w:numPr)
+    definitions: int = 25
+    xref_density: float = 0.3  # probability a body paragraph cites another clause
+    missing_ids: float = 0.0  # fraction of paragraphs left without w:paraId
+    seed: int = 42
+
+    def __post_init__(self):
+        if self.numbering not in NUMBERING_STYLES:
+            raise ValueError(f"numbering must be one of {NUMBERING_STYLES}")
+        self.depth = max(1, min(4, self.depth))
+
+
+class ContractBlueprint:
+    """
+    Format-neutral contract model: a flat list of blocks in document order.
+    Each block is {"kind": "heading"|"para"|"table", "level", "num", "text", "rows"}.
+    The same blueprint is rendered to DOCX, PDF and TXT so sizes are comparable.
+    """
+
+    def __init__(self, spec: CorpusSpec):
+        self.spec = spec
+        self.rng = random.Random(spec.seed)
+        self.blocks: List[Dict] = []
+        self.terms: List[str] = []
+        self.section_nums: List[str] = []
+        self.words = 0
+        self._build()
+
+    # -- helpers ---------------------------------------------------------
+    def _term(self, i: int) -> str:
+        word = _TERM_WORDS[i % len(_TERM_WORDS)]
+        suffix = _TERM_SUFFIXES[(i // len(_TERM_WORDS)) % len(_TERM_SUFFIXES)]
+        extra = f" {i // (len(_TERM_WORDS) * len(_TERM_SUFFIXES)) + 1}" if i >= len(_TERM_WORDS) * len(_TERM_SUFFIXES) else ""
+        return f"{word} {suffix}{extra}"
+
+    def _body_text(self) -> str:
+        sentences = self.rng.sample(_SENTENCES, 3)
+        if self.terms and self.rng.random() < 0.6:
+            term = self.rng.choice(self.terms)
+            sentences[0] = sentences[0].rstrip(".") + f", having regard to the {term}."
+        if self.section_nums and self.rng.random() < self.spec.xref_density:
+            target = self.rng.choice(self.section_nums)
+            form = self.rng.choice(["Subject to Section {n}, ", "Notwithstanding clause {n}, ", "As set out in Schedule {s}, "])
+            sentences[1] = form.format(n=target, s=self.rng.randint(1, 3)) + sentences[1][0].lower() + sentences[1][1:]
+        return " ".join(sentences)
+
+    def _number(self, path: List[int]) -> str:
+        if self.spec.numbering == "article" and len(path) == 2:
+            return f"{path[0]}.{path[1]:02d}"
+        if len(path) == 4:
+            return f"({chr(ord('a') + (path[3] - 1) % 26)})"
+        return ".".join(str(p) for p in path)
+
+    def _add(self, kind: str, level: int, num: Optional[str], text: str, rows=None):
+        self.blocks.append({"kind": kind, "level": level, "num": num, "text": text, "rows": rows})
+        self.words += len(text.split()) + sum(len(cell.split()) for row in rows or () for cell in row)
+
+    # -- build -----------------------------------------------------------
+    def _build(self):
+        spec = self.spec
+        # Budgeted in words, so definitions, tables and clause depth all count towards the pages
+        budget = max(1, spec.pages) * WORDS_PER_PAGE
+
+        self._add("heading", 0, None, "SHAREHOLDERS' AGREEMENT")
+        self._add("para", 0, None, "THIS AGREEMENT is made on the 1st day of March 2026 between the parties set out in Schedule 1.")
+
+        # Article 1: definitions
+        self._add("heading", 1, "1", self._heading_text(1, "DEFINITIONS AND INTERPRETATION"))
+        self._add("para", 2, self._number([1, 1]), "In this Agreement the following terms shall have the following meanings:")
+        for i in range(spec.definitions):
+            term = self._term(i)
+            self.terms.append(term)
+            style = i % 3
+            if style == 0:
+                text = f"\"{term}\" means {self.rng.choice(_SENTENCES).lower()}"
+            elif style == 1:
+                text = f"\"{term}\" shall mean the {self.rng.choice(_TERM_WORDS).lower()} described in Section {self._number([1, 1])}."
+            else:
+                text = f"\"{term}\" has the meaning given to it in clause {self._number([1, 1])}."
+            self._add("para", 3, None, text)
+        self.section_nums.append(self._number([1, 1]))
+
+        article = 1
+        while self.words < budget:
+            article += 1
+            self._add("heading", 1, str(article), self._heading_text(article, self.rng.choice(
+                ["TERMINATION", "WARRANTIES", "TRANSFER OF SHARES", "CONFIDENTIALITY", "GOVERNANCE", "LIABILITY"]
+            )))
+            for s in range(1, self.rng.randint(3, 7)):
+                self._emit_clause([article, s])
+                if self.words >= budget:
+                    break
+            for _ in range(spec.tables):
+                rows = [["Item", "Holder", "Number of Shares"]] + [
+                    [f"{r}", self.rng.choice(["Founder", "Investor", "Company"]), str(self.rng.randint(100, 99999))]
+                    for r in range(1, 5)
+                ]
+                self._add("table", 2, None, "", rows=rows)
+
+        self._add("heading", 1, None, "SCHEDULE 1 - THE PARTIES")
+        self._add("para", 0, None, "(1) TechCorp Limited, a company incorporated in England and Wales.")
+
+    def _heading_text(self, article: int, title: str) -> str:
+        if self.spec.numbering == "article":
+            return f"ARTICLE {_roman(article)} - {title}"
+        return f"{article}. {title}" if self.spec.numbering == "decimal" else title
+
+    def _emit_clause(self, path: List[int]):
+        level = len(path)
+        num = self._number(path)
+        self._add("para", level, num, self._body_text())
+        if level >= 2:
+            self.section_nums.append(num)
+        if level < self.spec.depth:
+            for child in range(1, self.rng.randint(2, 4)):
+                self._emit_clause(path + [child])
+
+
+# ---------------------------------------------------------------------------
+# Renderers
+# ---------------------------------------------------------------------------
+
+def _block_line(block: Dict, numbering: str) -> str:
+    """Plain-text rendering of a paragraph block (numbers typed into the text)"""
+    num = block["num"]
+    if block["kind"] == "heading" or not num or numbering == "auto":
+        return block["text"]
+    prefix = f"Section {num}" if numbering == "article" and block["level"] == 2 else num
+    return f"{prefix} {block['text']}"
+
+
+def _set_auto_numbering(paragraph, level: int, num_id: str):
+    p_pr = paragraph._element.get_or_add_pPr()
+    num_pr = OxmlElement('w:numPr')
+    ilvl = OxmlElement('w:ilvl')
+    ilvl.set(qn('w:val'), str(max(0, level - 2)))
+    num_el = OxmlElement('w:numId')
+    num_el.set(qn('w:val'), num_id)
+    num_pr.append(ilvl)
+    num_pr.append(num_el)
+    p_pr.append(num_pr)
+
+
+def build_docx_bytes(spec: CorpusSpec) -> bytes:
+    """Render the blueprint to DOCX bytes"""
+    blueprint = ContractBlueprint(spec)
+    rng = random.Random(spec.seed + 1)
+    doc = Document()
+
+    list_num_id = None
+    if spec.numbering == "auto":
+        style_pr = doc.styles['List Number'].element.pPr
+        num_id_el = style_pr.find(qn('w:numPr')).find(qn('w:numId')) if style_pr is not None else None
+        list_num_id = num_id_el.get(qn('w:val')) if num_id_el is not None else "1"
+
+    def tag(paragraph):
+        if rng.random() >= spec.missing_ids:
+            paragraph._element.set(PARA_ID_ATTR, '{:08X}'.format(rng.randint(0, 0x7FFFFFFF)))
+        return paragraph
+
+    for block in blueprint.blocks:
+        if block["kind"] == "heading":
+            tag(doc.add_heading(block["text"], min(block["level"], 2) if block["level"] else 0))
+        elif block["kind"] == "table":
+            rows = block["rows"]
+            table = doc.add_table(rows=len(rows), cols=len(rows[0]))
+            for r, row in enumerate(rows):
+                for c, value in enumerate(row):
+                    cell = table.cell(r, c)
+                    cell.text = value
+                    tag(cell.paragraphs[0])
+        else:
+            if spec.numbering == "auto" and block["num"]:
+                p = doc.add_paragraph(block["text"], style='List Number')
+                _set_auto_numbering(p, block["level"], list_num_id)
+            else:
+                p = doc.add_paragraph(_block_line(block, spec.numbering))
+                if block["level"] >= 3:
+                    p.paragraph_format.left_indent = Pt(36)
+            tag(p)
+
+    stream = io.BytesIO()
+    doc.save(stream)
+    return stream.getvalue()
+
+
+def _text_lines(spec: CorpusSpec) -> List[str]:
+    blueprint = ContractBlueprint(spec)
+    lines = []
+    for block in blueprint.blocks:
+        if block["kind"] == "table":
+            lines.extend("    ".join(row) for row in block["rows"])
+        else:
+            lines.append(_block_line(block, "decimal" if spec.numbering == "auto" else spec.numbering))
+        lines.append("")
+    return lines
+
+
+def build_txt_bytes(spec: CorpusSpec) -> bytes:
+    """Render the blueprint to UTF-8 plain text"""
+    return "\n".join(_text_lines(spec)).encode("utf-8")
+
+
+def _wrap(line: str, width: int = 95) -> List[str]:
+    if not line:
+        return [""]
+    out, current = [], ""
+    for word in line.split():
+        if current and len(current) + 1 + len(word) > width:
+            out.append(current)
+            current = word
+        else:
+            current = f"{current} {word}" if current else word
+    out.append(current)
+    return out
+
+
+def build_pdf_bytes(spec: CorpusSpec) -> bytes:
+    """
+    Render the blueprint to a text-only PDF (Helvetica, 50 lines per page).
+    Hand-rolled writer so benchmarks do not need a PDF authoring dependency.
+    """
+    wrapped = [w for line in _text_lines(spec) for w in _wrap(line)]
+    pages = [wrapped[i:i + LINES_PER_PDF_PAGE] for i in range(0, len(wrapped), LINES_PER_PDF_PAGE)] or [[""]]
+
+    objects: List[bytes] = []  # index 0 => object 1
+    objects.append(b"<< /Type /Catalog /Pages 2 0 R >>")
+    objects.append(b"")  # pages tree, filled in below
+    objects.append(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+
+    page_refs = []
+    for page_lines in pages:
+        ops = ["BT", "/F1 10 Tf", "14 TL", "50 800 Td"]
+        for line in page_lines:
+            escaped = line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+            ops.append(f"({escaped}) Tj T*")
+        ops.append("ET")
+        stream = "\n".join(ops).encode("latin-1", "replace")
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        content_ref = len(objects)
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content_ref
+        )
+        page_refs.append(len(objects))
+
+    kids = " ".join(f"{ref} 0 R" for ref in page_refs).encode()
+    objects[1] = b"<< /Type /Pages /Kids [" + kids + b"] /Count %d >>" % len(page_refs)
+
+    out = io.BytesIO()
+    out.write(b"%PDF-1.4\n")
+    offsets = []
+    for i, body in enumerate(objects, start=1):
+        offsets.append(out.tell())
+        out.write(b"%d 0 obj\n" % i + body + b"\nendobj\n")
+    xref_at = out.tell()
+    out.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+    for offset in offsets:
+        out.write(b"%010d 00000 n \n" % offset)
+    out.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref_at))
+    return out.getvalue()
+
+
+BUILDERS = {
+    "docx": build_docx_bytes,
+    "pdf": build_pdf_bytes,
+    "txt": build_txt_bytes,
+}
+
+
+def generate(spec: CorpusSpec, formats: List[str], out_dir: str = CORPUS_DIR) -> List[str]:
+    os.makedirs(out_dir, exist_ok=True)
+    paths = []
+    for fmt in formats:
+        name = f"contract_{spec.pages}p_d{spec.depth}_{spec.numbering}_s{spec.seed}.{fmt}"
+        path = os.path.join(out_dir, name)
+        with open(path, "wb") as f:
+            f.write(BUILDERS[fmt](spec))
+        paths.append(path)
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic contracts for benchmarks")
+    parser.add_argument("--pages", type=int, default=10)
+    parser.add_argument("--depth", type=int, default=3)
+    parser.add_argument("--tables", type=int, default=1, help="tables per article")
+    parser.add_argument("--numbering", choices=NUMBERING_STYLES, default="decimal")
+    parser.add_argument("--definitions", type=int, default=25)
+    parser.add_argument("--xref-density", type=float, default=0.3)
+    parser.add_argument("--missing-ids", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--formats", nargs="+", choices=sorted(BUILDERS), default=["docx"])
+    parser.add_argument("--out", default=CORPUS_DIR)
+    args = parser.parse_args()
+
+    spec = CorpusSpec(
+        pages=args.pages, depth=args.depth, tables=args.tables, numbering=args.numbering,
+        definitions=args.definitions, xref_density=args.xref_density,
+        missing_ids=args.missing_ids, seed=args.seed
+    )
+    for path in generate(spec, args.formats, args.out):
+        print(f"Generated {path} ({os.path.getsize(path)} bytes)")
+
+
+if __name__ == "__main__":
+    main()
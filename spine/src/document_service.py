@@ -1,4 +1,6 @@
 from docx import Document
+from docx.oxml.ns import qn
+from docx.text.paragraph import Paragraph
 from spine.src.models import ClauseNode
 import os
 
@@ -23,7 +25,7 @@ class DocumentParser:
         current_article = None
         current_section = None
         
-        for p in doc.paragraphs:
+        for p in self._iter_paragraphs(doc):
             text = p.text.strip()
             if not text:
                 continue
@@ -112,6 +114,14 @@ class DocumentParser:
                     
         return root
 
+    def _iter_paragraphs(self, doc: Document):
+        """All body paragraphs in document order, including those inside tables and text boxes"""
+        fallback = '{http://schemas.openxmlformats.org/markup-compatibility/2006}Fallback'
+        for element in doc.element.body.iter(qn('w:p')):
+            # Text boxes are stored twice; the mc:Fallback (VML) copy is not shown by Word
+            if next(element.iterancestors(fallback), None) is None:
+                yield Paragraph(element, doc._body)
+
     def print_tree(self, node: ClauseNode, level=0):
         indent = "  " * level
         print(f"{indent}[{node.an_type}] {node.text[:50]}...")
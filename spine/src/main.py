@@ -1,7 +1,7 @@
 from fastapi import FastAPI, UploadFile, File, Form, HTTPException
 from pydantic import BaseModel
 from typing import List, Optional
-import shutil
+import hashlib
 import os
 import uuid
 
@@ -16,6 +16,8 @@ UPLOAD_DIR = "spine/uploads"
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 RAG_DIR = "spine/chroma_db"
 os.makedirs(RAG_DIR, exist_ok=True)
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_MB", "100")) * 1024 * 1024
+CHUNK_SIZE = 1024 * 1024
 
 # Global instances (mock database)
 parser = DocumentParser()
@@ -36,13 +38,29 @@ class RefactorRequest(BaseModel):
     part_b_text: Optional[str] = None
     injection_text: Optional[str] = None
 
+def save_upload(file: UploadFile, contract_id: str):
+    """Copy an upload to UPLOAD_DIR in chunks, hashing it; 413 (and no file left) past MAX_UPLOAD_BYTES"""
+    file_location = os.path.join(UPLOAD_DIR, f"{contract_id}_{os.path.basename(file.filename)}")
+    digest = hashlib.sha256()
+    size = 0
+    with open(file_location, "wb") as file_object:
+        while True:
+            chunk = file.file.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            size += len(chunk)
+            if size > MAX_UPLOAD_BYTES:
+                file_object.close()
+                os.remove(file_location)
+                raise HTTPException(status_code=413, detail=f"Upload exceeds {MAX_UPLOAD_BYTES // (1024 * 1024)} MB")
+            digest.update(chunk)
+            file_object.write(chunk)
+    return file_location, digest.hexdigest()
+
 @app.post("/upload")
 async def upload_document(file: UploadFile = File(...)):
     contract_id = str(uuid.uuid4())
-    file_location = os.path.join(UPLOAD_DIR, f"{contract_id}_{file.filename}")
-    
-    with open(file_location, "wb+") as file_object:
-        shutil.copyfileobj(file.file, file_object)
+    file_location, content_hash = save_upload(file, contract_id)
         
     # Ingest
     try:
@@ -54,6 +72,7 @@ async def upload_document(file: UploadFile = File(...)):
         
         return {
             "contract_id": contract_id, 
+            "content_hash": content_hash,
             "message": "Ingested successfully",
             "root_node": tree.to_dict()
         }
@@ -141,10 +160,7 @@ class AnalysisResponse(BaseModel):
 async def analyze_logic(file: UploadFile = File(...), playbook: Optional[str] = Form(None)):
     # playbook is passed as a JSON string because it's a form-data request alongside the file
     contract_id = str(uuid.uuid4())
-    file_location = os.path.join(UPLOAD_DIR, f"{contract_id}_{file.filename}")
-    
-    with open(file_location, "wb+") as file_object:
-        shutil.copyfileobj(file.file, file_object)
+    file_location, _ = save_upload(file, contract_id)
         
     try:
         # 1. Ingest
@@ -0,0 +1,45 @@
+import io
+import os
+import sys
+
+from docx import Document
+from pypdf import PdfReader
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from generate_scaled_corpus import WORDS_PER_PAGE, CorpusSpec, build_docx_bytes, build_pdf_bytes, build_txt_bytes
+from spine.src.document_service import DocumentParser
+
+PARA_ID = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}paraId'
+
+
+def test_docx_scales_with_pages():
+    small = Document(io.BytesIO(build_docx_bytes(CorpusSpec(pages=2, definitions=5))))
+    large = Document(io.BytesIO(build_docx_bytes(CorpusSpec(pages=20, definitions=5))))
+    assert len(large.paragraphs) > 5 * len(small.paragraphs)
+
+
+
+def test_length_follows_pages_not_structure():
+    # Tables, definitions and deeper nesting must not change how much text a page target yields
+    for spec in (CorpusSpec(pages=10), CorpusSpec(pages=10, tables=3), CorpusSpec(pages=10, depth=4), CorpusSpec(pages=10, definitions=60)):
+        words = len(build_txt_bytes(spec).decode("utf-8").split())
+        assert 10 * WORDS_PER_PAGE <= words < 1.25 * 10 * WORDS_PER_PAGE
+
+def test_missing_ids_and_tables():
+    doc = Document(io.BytesIO(build_docx_bytes(CorpusSpec(pages=5, tables=2, missing_ids=1.0))))
+    assert all(p._element.get(PARA_ID) is None for p in doc.paragraphs)
+    assert len(doc.tables) >= 2
+
+    tagged = Document(io.BytesIO(build_docx_bytes(CorpusSpec(pages=5, missing_ids=0.0))))
+    assert all(p._element.get(PARA_ID) for p in tagged.paragraphs)
+
+
+def test_formats_are_parseable():
+    spec = CorpusSpec(pages=3, numbering="article")
+    tree = DocumentParser().parse_stream(io.BytesIO(build_docx_bytes(spec)))
+    assert tree.children
+
+    reader = PdfReader(io.BytesIO(build_pdf_bytes(spec)))
+    assert "ARTICLE I" in reader.pages[0].extract_text()
+    assert "ARTICLE II" in build_txt_bytes(spec).decode("utf-8")